@@ -1,17 +1,32 @@
 """
 Analytics Views - Reporting & Analytics API
 Generate various reports for HO management
+
+Daily sales, payment method, cashier, product sales and COGS reports read
+the pre-aggregated rollups (analytics.rollups) instead of raw bills, items,
+payments and inventory movements.
 """
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Sum, Count, Avg, F, Q, DecimalField
-from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.db.models import Sum, Count, Avg, F, Q, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce, NullIf, TruncMonth
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
-from transactions.models import Bill, BillItem, Payment, BillPromotion, InventoryMovement
+from analytics.models import (
+    CashierSalesDaily, CategorySalesDaily, InventoryCostDaily, PaymentMethodDaily, ProductSalesDaily, SalesHourly
+)
+from transactions.models import Bill, BillPromotion
+from transactions.services.partitions import date_range_filter
+
+
+def _average(total, count):
+    """Per-bill / per-payment average from rollup sums"""
+    if not count:
+        return None
+    return (total / count).quantize(Decimal('0.01'))
 
 
 @api_view(['GET'])
@@ -32,10 +47,9 @@ def daily_sales_report(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    queryset = Bill.objects.filter(
-        status='PAID',
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
+    queryset = SalesHourly.objects.filter(
+        business_date__gte=start_date,
+        business_date__lte=end_date
     )
     
     if store_id:
@@ -43,27 +57,23 @@ def daily_sales_report(request):
     if brand_id:
         queryset = queryset.filter(brand_id=brand_id)
     
-    # Aggregate by date
-    daily_data = queryset.annotate(
-        date=TruncDate('created_at')
-    ).values('date').annotate(
-        total_bills=Count('id'),
+    totals = dict(
+        total_bills=Sum('bill_count'),
         total_sales=Sum('total'),
         total_discount=Sum('discount_amount'),
         total_tax=Sum('tax_amount'),
         total_service=Sum('service_charge'),
-        avg_bill_value=Avg('total')
-    ).order_by('date')
+    )
+    
+    # Aggregate by date
+    daily_data = list(queryset.values(date=F('business_date')).annotate(**totals).order_by('date'))
+    for row in daily_data:
+        row['avg_bill_value'] = _average(row['total_sales'], row['total_bills'])
     
     # Summary
-    summary = queryset.aggregate(
-        total_bills=Count('id'),
-        total_sales=Sum('total'),
-        total_discount=Sum('discount_amount'),
-        total_tax=Sum('tax_amount'),
-        total_service=Sum('service_charge'),
-        avg_bill_value=Avg('total')
-    )
+    summary = queryset.aggregate(**totals)
+    summary['total_bills'] = summary['total_bills'] or 0
+    summary['avg_bill_value'] = _average(summary['total_sales'], summary['total_bills'])
     
     return Response({
         'period': {
@@ -71,7 +81,7 @@ def daily_sales_report(request):
             'end_date': end_date
         },
         'summary': summary,
-        'daily_breakdown': list(daily_data)
+        'daily_breakdown': daily_data
     })
 
 
@@ -93,11 +103,10 @@ def product_sales_report(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    queryset = BillItem.objects.filter(
+    queryset = ProductSalesDaily.objects.filter(
         brand_id=brand_id,
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date,
-        is_void=False
+        business_date__gte=start_date,
+        business_date__lte=end_date
     )
     
     if category_id:
@@ -108,23 +117,33 @@ def product_sales_report(request):
         'product_id', 'product_sku', 'product_name', 'category_id'
     ).annotate(
         quantity_sold=Sum('quantity'),
-        total_revenue=Sum('total'),
-        total_cost=Sum(F('quantity') * F('unit_cost'), output_field=DecimalField()),
+        total_revenue=Sum('revenue'),
+        total_cost=Sum('cost'),
         total_discount=Sum('discount_amount'),
-        gross_margin=Sum('total') - Sum(F('quantity') * F('unit_cost'), output_field=DecimalField()),
-        order_count=Count('bill_id', distinct=True)
+        gross_margin=Sum('revenue') - Sum('cost'),
+        # A bill belongs to one store-day, so per-day distinct counts add up
+        order_count=Sum('order_count')
     ).annotate(
-        margin_percent=F('gross_margin') * 100 / F('total_revenue')
+        margin_percent=ExpressionWrapper(
+            F('gross_margin') * 100 / NullIf(F('total_revenue'), 0), output_field=DecimalField()
+        )
     ).order_by('-quantity_sold')
     
     # Top 10 products
     top_products = list(product_data[:10])
     
-    # Category summary
-    category_data = queryset.values('category_id').annotate(
+    # Category summary from its own rollup: a bill counts once per category
+    categories = CategorySalesDaily.objects.filter(
+        brand_id=brand_id,
+        business_date__gte=start_date,
+        business_date__lte=end_date
+    )
+    if category_id:
+        categories = categories.filter(category_id=category_id)
+    category_data = categories.values('category_id').annotate(
         quantity_sold=Sum('quantity'),
-        total_revenue=Sum('total'),
-        order_count=Count('bill_id', distinct=True)
+        total_revenue=Sum('revenue'),
+        order_count=Sum('order_count')
     ).order_by('-total_revenue')
     
     return Response({
@@ -155,8 +174,7 @@ def promotion_performance_report(request):
         )
     
     queryset = BillPromotion.objects.filter(
-        applied_at__date__gte=start_date,
-        applied_at__date__lte=end_date
+        **date_range_filter('applied_at', start_date, end_date)
     )
     
     # Filter by brand if provided (via bill)
@@ -285,15 +303,16 @@ def inventory_cogs_report(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Sales with COGS
-    sales_data = BillItem.objects.filter(
+    products = ProductSalesDaily.objects.filter(
         brand_id=brand_id,
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date,
-        is_void=False
-    ).aggregate(
-        total_revenue=Sum('total'),
-        total_cogs=Sum(F('quantity') * F('unit_cost'), output_field=DecimalField()),
+        business_date__gte=start_date,
+        business_date__lte=end_date
+    )
+    
+    # Sales with COGS
+    sales_data = products.aggregate(
+        total_revenue=Sum('revenue'),
+        total_cogs=Sum('cost'),
         total_quantity=Sum('quantity')
     )
     
@@ -309,28 +328,25 @@ def inventory_cogs_report(request):
     sales_data['margin_percent'] = margin_percent
     
     # Inventory movements by type
-    inv_movements = InventoryMovement.objects.filter(
+    inv_movements = InventoryCostDaily.objects.filter(
         brand_id=brand_id,
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
+        business_date__gte=start_date,
+        business_date__lte=end_date
     ).values('movement_type').annotate(
-        movement_count=Count('id'),
+        movement_count=Sum('movement_count'),
         total_cost=Sum('total_cost')
     ).order_by('movement_type')
     
     # Product margin analysis
-    product_margin = BillItem.objects.filter(
-        brand_id=brand_id,
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date,
-        is_void=False
-    ).values('product_id', 'product_name').annotate(
+    product_margin = products.values('product_id', 'product_name').annotate(
         quantity_sold=Sum('quantity'),
-        revenue=Sum('total'),
-        cogs=Sum(F('quantity') * F('unit_cost'), output_field=DecimalField()),
+        revenue=Sum('revenue'),
+        cogs=Sum('cost'),
     ).annotate(
         margin=F('revenue') - F('cogs'),
-        margin_percent=(F('revenue') - F('cogs')) * 100 / F('revenue')
+        margin_percent=ExpressionWrapper(
+            (F('revenue') - F('cogs')) * 100 / NullIf(F('revenue'), 0), output_field=DecimalField()
+        )
     ).order_by('-margin')[:20]
     
     return Response({
@@ -351,7 +367,7 @@ def cashier_performance_report(request):
     Cashier Performance Report
     Query params: start_date, end_date, store_id (optional)
     """
-    from transactions.models import CashierShift
+    from transactions.models import CashierShift, StoreSession
     
     start_date = request.query_params.get('start_date')
     end_date = request.query_params.get('end_date')
@@ -364,21 +380,21 @@ def cashier_performance_report(request):
         )
     
     # Bills by cashier
-    bill_queryset = Bill.objects.filter(
-        status='PAID',
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
+    rollups = CashierSalesDaily.objects.filter(
+        business_date__gte=start_date,
+        business_date__lte=end_date
     )
     
     if store_id:
-        bill_queryset = bill_queryset.filter(store_id=store_id)
+        rollups = rollups.filter(store_id=store_id)
     
-    cashier_data = bill_queryset.values('created_by').annotate(
-        total_bills=Count('id'),
+    cashier_data = list(rollups.values(created_by=F('cashier_id')).annotate(
+        total_bills=Sum('bill_count'),
         total_sales=Sum('total'),
-        avg_bill_value=Avg('total'),
         total_discount=Sum('discount_amount')
-    ).order_by('-total_sales')
+    ).order_by('-total_sales'))
+    for row in cashier_data:
+        row['avg_bill_value'] = _average(row['total_sales'], row['total_bills'])
     
     # Cashier shift data
     shift_queryset = CashierShift.objects.filter(
@@ -388,7 +404,7 @@ def cashier_performance_report(request):
     
     if store_id:
         shift_queryset = shift_queryset.filter(
-            store_session_id__in=queryset.values('id')
+            store_session_id__in=StoreSession.objects.filter(store_id=store_id).values('id')
         )
     
     shift_data = shift_queryset.values('cashier_id').annotate(
@@ -402,7 +418,7 @@ def cashier_performance_report(request):
             'start_date': start_date,
             'end_date': end_date
         },
-        'cashier_sales': list(cashier_data),
+        'cashier_sales': cashier_data,
         'cashier_shifts': list(shift_data)
     })
 
@@ -425,37 +441,28 @@ def payment_method_report(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Get bills in period
-    bills = Bill.objects.filter(
-        status='PAID',
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
+    # Payments of PAID bills, by bill date
+    queryset = PaymentMethodDaily.objects.filter(
+        business_date__gte=start_date,
+        business_date__lte=end_date
     )
     
     if store_id:
-        bills = bills.filter(store_id=store_id)
+        queryset = queryset.filter(store_id=store_id)
     if brand_id:
-        bills = bills.filter(brand_id=brand_id)
-    
-    bill_ids = bills.values_list('id', flat=True)
+        queryset = queryset.filter(brand_id=brand_id)
     
     # Payment method breakdown
-    payment_data = Payment.objects.filter(
-        bill_id__in=bill_ids,
-        status='SUCCESS'
-    ).values('payment_method').annotate(
-        payment_count=Count('id'),
-        total_amount=Sum('amount'),
-        avg_amount=Avg('amount')
-    ).order_by('-total_amount')
+    payment_list = list(queryset.values('payment_method').annotate(
+        payment_count=Sum('payment_count'),
+        total_amount=Sum('amount')
+    ).order_by('-total_amount'))
     
     # Calculate percentages
-    total_amount = Payment.objects.filter(
-        bill_id__in=bill_ids, status='SUCCESS'
-    ).aggregate(total=Sum('amount'))['total'] or 0
+    total_amount = sum(item['total_amount'] for item in payment_list) or 0
     
-    payment_list = list(payment_data)
     for item in payment_list:
+        item['avg_amount'] = _average(item['total_amount'], item['payment_count'])
         if total_amount > 0:
             item['percentage'] = float((item['total_amount'] / total_amount) * 100)
         else:
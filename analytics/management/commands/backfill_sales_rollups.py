@@ -0,0 +1,69 @@
+"""
+Management Command: Backfill Sales Rollups
+Recomputes the sales rollup tables (analytics.rollups) day by day from the
+raw transaction tables. Run once after deploying the rollups, and after
+loading transactions outside the push API.
+
+Usage:
+    python manage.py backfill_sales_rollups                        # first bill .. today
+    python manage.py backfill_sales_rollups --start 2026-01-01 --end 2026-01-31
+    python manage.py backfill_sales_rollups --days 7 --store <store_uuid>
+"""
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from analytics.rollups import business_day, refresh_day
+from transactions.models import Bill
+
+
+class Command(BaseCommand):
+    help = 'Recompute sales rollups from raw bills, items, payments and inventory movements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, help='First date (YYYY-MM-DD), default: first bill')
+        parser.add_argument('--end', type=str, help='Last date (YYYY-MM-DD), default: today')
+        parser.add_argument('--days', type=int, help='Only the last N days (overrides --start)')
+        parser.add_argument('--store', action='append', default=[], help='Store UUID (repeatable), default: all stores')
+
+    def _date(self, value, option):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'{option} must be YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        try:
+            store_ids = [uuid.UUID(store) for store in options['store']] or None
+        except ValueError:
+            raise CommandError('--store must be a UUID')
+
+        end = self._date(options['end'], '--end') if options['end'] else timezone.localdate()
+        if options['days']:
+            start = end - timedelta(days=options['days'] - 1)
+        elif options['start']:
+            start = self._date(options['start'], '--start')
+        else:
+            first = Bill.objects.aggregate(first=Min('created_at'))['first']
+            if first is None:
+                self.stdout.write(self.style.WARNING('No bills - nothing to backfill'))
+                return
+            start = business_day(first)
+        if start > end:
+            raise CommandError('start date is after end date')
+
+        totals = {}
+        day = start
+        while day <= end:
+            written = refresh_day(day, store_ids)
+            for table, count in written.items():
+                totals[table] = totals.get(table, 0) + count
+            self.stdout.write(f"  {day}: " + ', '.join(f"{table}={count}" for table, count in written.items()))
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {start} .. {end}: " + ', '.join(f"{table}={count}" for table, count in totals.items())
+        ))
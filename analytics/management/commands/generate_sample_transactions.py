@@ -1,6 +1,7 @@
 """
 Management command to generate sample transaction data for testing reports
 """
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
@@ -219,6 +220,9 @@ class Command(BaseCommand):
             
             current_date += timedelta(days=1)
         
+        # Sample bills bypass the push API - rebuild their sales rollups
+        call_command('backfill_sales_rollups', days=days + 1, stdout=self.stdout)
+        
         # Summary
         self.stdout.write(self.style.SUCCESS(f'\n{"="*60}'))
         self.stdout.write(self.style.SUCCESS('Generation Complete!'))
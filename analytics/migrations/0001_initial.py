@@ -0,0 +1,124 @@
+# Generated manually for sales rollup tables
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashierSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.UUIDField()),
+                ('brand_id', models.UUIDField()),
+                ('store_id', models.UUIDField()),
+                ('business_date', models.DateField()),
+                ('cashier_id', models.UUIDField()),
+                ('bill_count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cashier Sales Daily Rollup',
+                'verbose_name_plural': 'Cashier Sales Daily Rollups',
+                'db_table': 'rollup_cashier_daily',
+                'indexes': [models.Index(fields=['business_date'], name='rollup_cashier_date_idx')],
+                'unique_together': {('store_id', 'business_date', 'cashier_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PaymentMethodDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.UUIDField()),
+                ('brand_id', models.UUIDField()),
+                ('store_id', models.UUIDField()),
+                ('business_date', models.DateField()),
+                ('payment_method', models.CharField(max_length=50)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Payment Method Daily Rollup',
+                'verbose_name_plural': 'Payment Method Daily Rollups',
+                'db_table': 'rollup_payment_daily',
+                'indexes': [models.Index(fields=['business_date', 'brand_id'], name='rollup_payment_date_idx')],
+                'unique_together': {('store_id', 'business_date', 'payment_method')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.UUIDField()),
+                ('brand_id', models.UUIDField()),
+                ('store_id', models.UUIDField()),
+                ('business_date', models.DateField()),
+                ('product_id', models.UUIDField()),
+                ('product_sku', models.CharField(max_length=100)),
+                ('product_name', models.CharField(max_length=300)),
+                ('category_id', models.UUIDField(blank=True, null=True)),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('order_count', models.PositiveIntegerField(default=0, help_text='Distinct bills')),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Product Sales Daily Rollup',
+                'verbose_name_plural': 'Product Sales Daily Rollups',
+                'db_table': 'rollup_product_daily',
+                'indexes': [models.Index(fields=['brand_id', 'business_date'], name='rollup_product_brand_idx')],
+                'unique_together': {('store_id', 'business_date', 'product_id', 'category_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store_id', models.UUIDField()),
+                ('business_date', models.DateField()),
+                ('marked_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Rollup Dirty Day',
+                'verbose_name_plural': 'Rollup Dirty Days',
+                'db_table': 'rollup_dirty_day',
+                'unique_together': {('store_id', 'business_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.UUIDField()),
+                ('brand_id', models.UUIDField()),
+                ('store_id', models.UUIDField()),
+                ('business_date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('bill_count', models.PositiveIntegerField(default=0)),
+                ('pax', models.PositiveIntegerField(default=0)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('service_charge', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sales Hourly Rollup',
+                'verbose_name_plural': 'Sales Hourly Rollups',
+                'db_table': 'rollup_sales_hourly',
+                'indexes': [models.Index(fields=['business_date', 'brand_id'], name='rollup_sales_date_idx'), models.Index(fields=['company_id', 'business_date'], name='rollup_sales_company_idx')],
+                'unique_together': {('store_id', 'business_date', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated manually for product cost and inventory cost rollups
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_product_days_dirty(apps, schema_editor):
+    """Existing product rollups have no cost yet - let the next refresh recompute them"""
+    ProductSalesDaily = apps.get_model('analytics', 'ProductSalesDaily')
+    RollupDirtyDay = apps.get_model('analytics', 'RollupDirtyDay')
+    now = timezone.now()
+    RollupDirtyDay.objects.bulk_create([
+        RollupDirtyDay(store_id=store_id, business_date=day, marked_at=now)
+        for store_id, day in ProductSalesDaily.objects.values_list('store_id', 'business_date').distinct()
+    ], ignore_conflicts=True, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productsalesdaily',
+            name='cost',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Sum of quantity x unit_cost', max_digits=15),
+        ),
+        migrations.CreateModel(
+            name='InventoryCostDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.UUIDField()),
+                ('brand_id', models.UUIDField()),
+                ('store_id', models.UUIDField()),
+                ('business_date', models.DateField()),
+                ('movement_type', models.CharField(max_length=50)),
+                ('movement_count', models.PositiveIntegerField(default=0)),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Inventory Cost Daily Rollup',
+                'verbose_name_plural': 'Inventory Cost Daily Rollups',
+                'db_table': 'rollup_inventory_cost_daily',
+                'indexes': [models.Index(fields=['brand_id', 'business_date'], name='rollup_invcost_brand_idx')],
+                'unique_together': {('store_id', 'business_date', 'movement_type')},
+            },
+        ),
+        migrations.RunPython(mark_product_days_dirty, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated manually for the category sales rollup
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_product_days_dirty(apps, schema_editor):
+    """Category rollups start empty - let the next refresh fill every day that has product rows"""
+    ProductSalesDaily = apps.get_model('analytics', 'ProductSalesDaily')
+    RollupDirtyDay = apps.get_model('analytics', 'RollupDirtyDay')
+    now = timezone.now()
+    RollupDirtyDay.objects.bulk_create([
+        RollupDirtyDay(store_id=store_id, business_date=day, marked_at=now)
+        for store_id, day in ProductSalesDaily.objects.values_list('store_id', 'business_date').distinct()
+    ], ignore_conflicts=True, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_inventory_cost_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.UUIDField()),
+                ('brand_id', models.UUIDField()),
+                ('store_id', models.UUIDField()),
+                ('business_date', models.DateField()),
+                ('category_id', models.UUIDField(blank=True, null=True)),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('order_count', models.PositiveIntegerField(default=0, help_text='Distinct bills')),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Category Sales Daily Rollup',
+                'verbose_name_plural': 'Category Sales Daily Rollups',
+                'db_table': 'rollup_category_daily',
+                'indexes': [models.Index(fields=['brand_id', 'business_date'], name='rollup_category_brand_idx')],
+                'unique_together': {('store_id', 'business_date', 'category_id')},
+            },
+        ),
+        migrations.RunPython(mark_product_days_dirty, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,196 @@
+"""
+Analytics Models - Pre-aggregated sales and inventory cost rollups
+Maintained from ingested transactions (see analytics/rollups.py)
+
+Every rollup row belongs to one (store_id, business_date) slice; slices
+touched by an Edge push are marked dirty and recomputed from the raw rows,
+so the rollups stay exact after upserts (VOID / REFUND) as well.
+"""
 from django.db import models
 
-# Create your models here.
+
+class SalesHourly(models.Model):
+    """PAID bills per store and local hour"""
+    company_id = models.UUIDField()
+    brand_id = models.UUIDField()
+    store_id = models.UUIDField()
+    business_date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+
+    bill_count = models.PositiveIntegerField(default=0)
+    pax = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    service_charge = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_sales_hourly'
+        verbose_name = 'Sales Hourly Rollup'
+        verbose_name_plural = 'Sales Hourly Rollups'
+        unique_together = [['store_id', 'business_date', 'hour']]
+        indexes = [
+            models.Index(fields=['business_date', 'brand_id'], name='rollup_sales_date_idx'),
+            models.Index(fields=['company_id', 'business_date'], name='rollup_sales_company_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.store_id} {self.business_date} {self.hour:02d}:00"
+
+
+class ProductSalesDaily(models.Model):
+    """Non-void bill items per store, day and product"""
+    company_id = models.UUIDField()
+    brand_id = models.UUIDField()
+    store_id = models.UUIDField()
+    business_date = models.DateField()
+    product_id = models.UUIDField()
+    product_sku = models.CharField(max_length=100)
+    product_name = models.CharField(max_length=300)
+    category_id = models.UUIDField(null=True, blank=True)
+
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=15, decimal_places=2, default=0, help_text='Sum of quantity x unit_cost')
+    discount_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0, help_text='Distinct bills')
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_product_daily'
+        verbose_name = 'Product Sales Daily Rollup'
+        verbose_name_plural = 'Product Sales Daily Rollups'
+        unique_together = [['store_id', 'business_date', 'product_id', 'category_id']]
+        indexes = [
+            models.Index(fields=['brand_id', 'business_date'], name='rollup_product_brand_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_name} {self.business_date}"
+
+
+class CategorySalesDaily(models.Model):
+    """Non-void bill items per store, day and category (bills counted once per category)"""
+    company_id = models.UUIDField()
+    brand_id = models.UUIDField()
+    store_id = models.UUIDField()
+    business_date = models.DateField()
+    category_id = models.UUIDField(null=True, blank=True)
+
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0, help_text='Distinct bills')
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_category_daily'
+        verbose_name = 'Category Sales Daily Rollup'
+        verbose_name_plural = 'Category Sales Daily Rollups'
+        unique_together = [['store_id', 'business_date', 'category_id']]
+        indexes = [
+            models.Index(fields=['brand_id', 'business_date'], name='rollup_category_brand_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} {self.business_date}"
+
+
+class PaymentMethodDaily(models.Model):
+    """Successful payments of PAID bills per store, day (bill date) and method"""
+    company_id = models.UUIDField()
+    brand_id = models.UUIDField()
+    store_id = models.UUIDField()
+    business_date = models.DateField()
+    payment_method = models.CharField(max_length=50)
+
+    payment_count = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_payment_daily'
+        verbose_name = 'Payment Method Daily Rollup'
+        verbose_name_plural = 'Payment Method Daily Rollups'
+        unique_together = [['store_id', 'business_date', 'payment_method']]
+        indexes = [
+            models.Index(fields=['business_date', 'brand_id'], name='rollup_payment_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.payment_method} {self.business_date}"
+
+
+class CashierSalesDaily(models.Model):
+    """PAID bills per store, day and cashier (Bill.created_by)"""
+    company_id = models.UUIDField()
+    brand_id = models.UUIDField()
+    store_id = models.UUIDField()
+    business_date = models.DateField()
+    cashier_id = models.UUIDField()
+
+    bill_count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_cashier_daily'
+        verbose_name = 'Cashier Sales Daily Rollup'
+        verbose_name_plural = 'Cashier Sales Daily Rollups'
+        unique_together = [['store_id', 'business_date', 'cashier_id']]
+        indexes = [
+            models.Index(fields=['business_date'], name='rollup_cashier_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.cashier_id} {self.business_date}"
+
+
+class InventoryCostDaily(models.Model):
+    """Inventory movements per store, day and movement type"""
+    company_id = models.UUIDField()
+    brand_id = models.UUIDField()
+    store_id = models.UUIDField()
+    business_date = models.DateField()
+    movement_type = models.CharField(max_length=50)
+
+    movement_count = models.PositiveIntegerField(default=0)
+    quantity = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_inventory_cost_daily'
+        verbose_name = 'Inventory Cost Daily Rollup'
+        verbose_name_plural = 'Inventory Cost Daily Rollups'
+        unique_together = [['store_id', 'business_date', 'movement_type']]
+        indexes = [
+            models.Index(fields=['brand_id', 'business_date'], name='rollup_invcost_brand_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.movement_type} {self.business_date}"
+
+
+class RollupDirtyDay(models.Model):
+    """(store, day) slice whose rollups must be recomputed"""
+    store_id = models.UUIDField()
+    business_date = models.DateField()
+    marked_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'rollup_dirty_day'
+        verbose_name = 'Rollup Dirty Day'
+        verbose_name_plural = 'Rollup Dirty Days'
+        unique_together = [['store_id', 'business_date']]
+
+    def __str__(self):
+        return f"{self.store_id} {self.business_date}"
@@ -1,10 +1,12 @@
 """
 Analytics Report Views - UI for Sales & Business Reports
 """
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.db.models import Sum, Count, Avg, F, Q, FloatField
-from django.db.models.functions import TruncDate, TruncMonth, TruncWeek, Cast
+from django.db.models.functions import TruncHour, TruncMonth, TruncWeek, Cast
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -12,6 +14,92 @@ import json
 from transactions.models import Bill, BillItem, Payment
 from core.models import Store, Brand, Company
 from products.models import Category
+from transactions.services.partitions import date_range_filter
+
+
+SALES_REPORT_CACHE_KEY = 'sales_report:{store}:{start}:{end}'
+
+
+def _sales_report_data(start_date, end_date, store_id=None):
+    """
+    Widgets of the sales dashboard, cached per (store, date range)
+
+    Summary, daily trend and hourly distribution come from one GROUP BY
+    over local hours of PAID bills; payments and top products take one
+    query each, scoped to those bills through bill_id.
+    """
+    key = SALES_REPORT_CACHE_KEY.format(store=store_id or 'all', start=start_date, end=end_date)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    bills = Bill.objects.filter(status='PAID', **date_range_filter('created_at', start_date, end_date))
+    if store_id:
+        bills = bills.filter(store_id=store_id)
+
+    hours = bills.annotate(bucket=TruncHour('created_at')).values('bucket').annotate(
+        total=Sum('total'),
+        count=Count('id'),
+        tax=Sum('tax_amount'),
+        discount=Sum('discount_amount'),
+        service=Sum('service_charge'),
+    ).order_by('bucket')
+
+    summary = {
+        'total_bills': 0,
+        'total_sales': Decimal('0'),
+        'total_tax': Decimal('0'),
+        'total_discount': Decimal('0'),
+        'total_service': Decimal('0'),
+    }
+    daily = {}
+    hourly = {}
+    for row in hours:
+        summary['total_bills'] += row['count']
+        summary['total_sales'] += row['total'] or 0
+        summary['total_tax'] += row['tax'] or 0
+        summary['total_discount'] += row['discount'] or 0
+        summary['total_service'] += row['service'] or 0
+        # TruncHour buckets are aware datetimes in the current time zone
+        for buckets, bucket_key, label in (
+            (daily, row['bucket'].date(), 'date'), (hourly, row['bucket'].hour, 'hour')
+        ):
+            bucket = buckets.setdefault(bucket_key, {label: bucket_key, 'total': Decimal('0'), 'count': 0})
+            bucket['total'] += row['total'] or 0
+            bucket['count'] += row['count']
+    summary['avg_bill_value'] = (
+        summary['total_sales'] / summary['total_bills'] if summary['total_bills'] else Decimal('0')
+    )
+
+    # Payments / items are written with or after their bill - the lower
+    # bound only prunes older rows (and partitions)
+    since = date_range_filter('created_at', start_date, end_date)['created_at__gte']
+    payment_breakdown = list(Payment.objects.filter(
+        bill_id__in=bills.values('id'),
+        status='SUCCESS',
+        created_at__gte=since
+    ).values('payment_method').annotate(
+        total=Sum('amount'),
+        count=Count('id')
+    ).order_by('-total'))
+
+    items = BillItem.objects.filter(bill_id__in=bills.values('id'), is_void=False, created_at__gte=since)
+    if store_id:
+        items = items.filter(store_id=store_id)
+    top_products = list(items.values('product_name').annotate(
+        quantity=Sum('quantity'),
+        revenue=Sum('total')
+    ).order_by('-quantity')[:10])
+
+    data = {
+        'summary': summary,
+        'daily_sales': [daily[day] for day in sorted(daily)],
+        'hourly_sales': [hourly[hour] for hour in sorted(hourly)],
+        'payment_breakdown': payment_breakdown,
+        'top_products': top_products,
+    }
+    cache.set(key, data, getattr(settings, 'ANALYTICS_REPORT_CACHE_TIMEOUT', 300))
+    return data
 
 
 @login_required
@@ -25,95 +113,32 @@ def sales_report_dashboard(request):
     
     # Default to last 30 days if no dates provided
     if not start_date or not end_date:
-        end_date = timezone.now().date()
+        end_date = timezone.localdate()
         start_date = end_date - timedelta(days=30)
     else:
         start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
     
-    # Build queryset
-    bills = Bill.objects.filter(
-        status='PAID',
-        bill_date__gte=start_date,
-        bill_date__lte=end_date
-    )
-    
-    if store_id:
-        bills = bills.filter(store_id=store_id)
-    
-    # Summary statistics
-    summary = bills.aggregate(
-        total_bills=Count('id'),
-        total_sales=Sum('total_amount'),
-        total_tax=Sum('tax_amount'),
-        total_discount=Sum('discount_amount'),
-        total_service=Sum('service_charge'),
-        avg_bill=Avg('total_amount')
-    )
-    
-    # Daily sales trend
-    daily_sales = bills.annotate(
-        date=TruncDate('bill_date')
-    ).values('date').annotate(
-        total=Sum('total_amount'),
-        count=Count('id')
-    ).order_by('date')
-    
-    # Payment method breakdown
-    payment_breakdown = Payment.objects.filter(
-        bill__in=bills,
-        status='SUCCESS'
-    ).values('payment_method').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('-total')
-    
-    # Top selling products
-    top_products = BillItem.objects.filter(
-        bill__in=bills,
-        is_void=False
-    ).values('product_name').annotate(
-        quantity=Sum('quantity'),
-        revenue=Sum('subtotal')
-    ).order_by('-quantity')[:10]
-    
-    # Hourly sales distribution
-    hourly_sales = bills.extra(
-        select={'hour': 'EXTRACT(hour FROM bill_date)'}
-    ).values('hour').annotate(
-        total=Sum('total_amount'),
-        count=Count('id')
-    ).order_by('hour')
+    data = _sales_report_data(start_date, end_date, store_id)
     
     # Get active stores for filter
     stores = Store.objects.filter(is_active=True).select_related('brand')
     
     # Prepare chart data for templates
-    daily_labels = [d['date'].strftime('%Y-%m-%d') for d in daily_sales]
-    daily_revenue = [float(d['total'] or 0) for d in daily_sales]
+    daily_labels = [d['date'].strftime('%Y-%m-%d') for d in data['daily_sales']]
+    daily_revenue = [float(d['total']) for d in data['daily_sales']]
     
-    payment_labels = [p['payment_method'] for p in payment_breakdown]
-    payment_amounts = [float(p['total'] or 0) for p in payment_breakdown]
+    payment_labels = [p['payment_method'] for p in data['payment_breakdown']]
+    payment_amounts = [float(p['total'] or 0) for p in data['payment_breakdown']]
     
-    hourly_labels = [f"{int(h['hour'])}:00" for h in hourly_sales]
-    hourly_revenue = [float(h['total'] or 0) for h in hourly_sales]
+    hourly_labels = [f"{h['hour']}:00" for h in data['hourly_sales']]
+    hourly_revenue = [float(h['total']) for h in data['hourly_sales']]
     
     context = {
         'start_date': start_date,
         'end_date': end_date,
         'store_id': store_id,
-        'summary': {
-            'total_bills': summary['total_bills'] or 0,
-            'total_sales': summary['total_sales'] or 0,
-            'total_tax': summary['total_tax'] or 0,
-            'total_discount': summary['total_discount'] or 0,
-            'total_service': summary['total_service'] or 0,
-            'avg_bill_value': summary['avg_bill'] or 0,
-        },
-        'daily_sales': list(daily_sales),
-        'payment_breakdown': list(payment_breakdown),
-        'top_products': list(top_products),
-        'hourly_sales': list(hourly_sales),
+        **data,
         'stores': stores,
         # Chart data as JSON
         'daily_labels': json.dumps(daily_labels),
@@ -0,0 +1,248 @@
+"""
+Sales Rollups
+Pre-aggregated sales and inventory cost tables maintained from ingested transactions
+
+Reports over a year of bills for hundreds of stores can't afford to
+aggregate raw Bill / BillItem / Payment rows per request. The rollups
+(analytics.models) hold one row per:
+
+- SalesHourly         (store, local date, hour)      PAID bills
+- ProductSalesDaily   (store, local date, product)   non-void bill items
+- CategorySalesDaily  (store, local date, category)  non-void bill items
+- PaymentMethodDaily  (store, bill date, method)     SUCCESS payments of PAID bills
+- CashierSalesDaily   (store, local date, cashier)   PAID bills
+- InventoryCostDaily  (store, local date, type)      inventory movements
+
+Maintenance is slice based: the bill and inventory movement ingest mark
+every (store, date) they wrote as dirty in the same transaction
+(mark_dirty / mark_rows_dirty), and
+refresh_dirty() recomputes those slices from the raw rows with one
+GROUP BY per table and day. Recomputing instead of applying deltas keeps
+the rollups exact when a bill is upserted (VOID / REFUND / changed items).
+
+Dates are local business dates (TIME_ZONE), the same day boundaries as
+the raw created_at__date filters the reports used before.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+
+from analytics.models import (
+    CashierSalesDaily, CategorySalesDaily, InventoryCostDaily, PaymentMethodDaily, ProductSalesDaily,
+    RollupDirtyDay, SalesHourly
+)
+from transactions.models import Bill, BillItem, InventoryMovement, Payment
+from transactions.services.partitions import date_range_filter
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MODELS = (
+    SalesHourly, ProductSalesDaily, CategorySalesDaily, PaymentMethodDaily, CashierSalesDaily, InventoryCostDaily
+)
+
+REFRESH_PENDING_KEY = 'sales_rollup_refresh_pending'
+
+
+def business_day(value):
+    """Local business date of an aware datetime"""
+    return timezone.localtime(value).date()
+
+
+def mark_dirty(slices):
+    """
+    Mark (store_id, business_date) slices for recomputation
+
+    Call inside the transaction that wrote the raw rows; a refresh is
+    scheduled once it commits.
+    """
+    slices = {(store_id, day) for store_id, day in slices if store_id and day}
+    if not slices:
+        return
+    now = timezone.now()
+    RollupDirtyDay.objects.bulk_create(
+        [RollupDirtyDay(store_id=store_id, business_date=day, marked_at=now) for store_id, day in slices],
+        update_conflicts=True,
+        unique_fields=['store_id', 'business_date'],
+        update_fields=['marked_at'],
+    )
+    transaction.on_commit(schedule_refresh)
+
+
+def mark_rows_dirty(rows):
+    """mark_dirty for the slices of raw rows with store_id / created_at"""
+    mark_dirty((row.store_id, business_day(row.created_at)) for row in rows if row.created_at)
+
+
+def schedule_refresh():
+    """Dispatch one refresh for all pushes within ANALYTICS_ROLLUP_REFRESH_DELAY"""
+    delay = getattr(settings, 'ANALYTICS_ROLLUP_REFRESH_DELAY', 10)
+    if not cache.add(REFRESH_PENDING_KEY, 1, delay):
+        return
+    from config.tasks import refresh_sales_rollups_task
+    try:
+        refresh_sales_rollups_task.apply_async(countdown=delay)
+    except Exception as e:
+        # Broker down - the beat schedule refreshes the slices later
+        logger.warning(f"Could not dispatch sales rollup refresh: {e}")
+
+
+def _slice(queryset, day, store_ids, field='created_at'):
+    queryset = queryset.filter(**date_range_filter(field, day, day))
+    if store_ids is not None:
+        queryset = queryset.filter(store_id__in=store_ids)
+    return queryset
+
+
+def refresh_day(day, store_ids=None):
+    """
+    Recompute every rollup of one business date
+
+    Args:
+        day: date
+        store_ids: Stores to recompute (None = all stores)
+
+    Returns:
+        Dict of rows written per rollup table
+    """
+    bills = _slice(Bill.objects.filter(status='PAID'), day, store_ids)
+
+    hourly = [
+        SalesHourly(business_date=day, **row)
+        for row in bills.annotate(hour=ExtractHour('created_at')).values(
+            'company_id', 'brand_id', 'store_id', 'hour'
+        ).annotate(
+            bill_count=Count('id'),
+            pax=Sum('pax'),
+            subtotal=Sum('subtotal'),
+            discount_amount=Sum('discount_amount'),
+            tax_amount=Sum('tax_amount'),
+            service_charge=Sum('service_charge'),
+            total=Sum('total'),
+        ).order_by()
+    ]
+
+    cashiers = [
+        CashierSalesDaily(business_date=day, **row)
+        for row in bills.values('company_id', 'brand_id', 'store_id', cashier_id=F('created_by')).annotate(
+            bill_count=Count('id'),
+            total=Sum('total'),
+            discount_amount=Sum('discount_amount'),
+        ).order_by()
+    ]
+
+    items = _slice(BillItem.objects.filter(is_void=False), day, store_ids)
+    products = [
+        ProductSalesDaily(business_date=day, **row)
+        for row in items.values(
+            'company_id', 'brand_id', 'store_id', 'product_id', 'category_id'
+        ).annotate(
+            product_sku=Max('product_sku'),
+            product_name=Max('product_name'),
+            # before quantity=, which would shadow the column in F('quantity')
+            cost=Sum(F('quantity') * F('unit_cost'), output_field=DecimalField()),
+            quantity=Sum('quantity'),
+            revenue=Sum('total'),
+            discount_amount=Sum('discount_amount'),
+            order_count=Count('bill_id', distinct=True),
+        ).order_by()
+    ]
+
+    # Product rows can't be summed into bills per category: a bill with
+    # two products of a category would count twice
+    categories = [
+        CategorySalesDaily(business_date=day, **row)
+        for row in items.values('company_id', 'brand_id', 'store_id', 'category_id').annotate(
+            quantity=Sum('quantity'),
+            revenue=Sum('total'),
+            order_count=Count('bill_id', distinct=True),
+        ).order_by()
+    ]
+
+    inventory = [
+        InventoryCostDaily(business_date=day, **row)
+        for row in _slice(InventoryMovement.objects.all(), day, store_ids).values(
+            'company_id', 'brand_id', 'store_id', 'movement_type'
+        ).annotate(
+            movement_count=Count('id'),
+            quantity=Sum('quantity'),
+            total_cost=Sum('total_cost'),
+        ).order_by()
+    ]
+
+    # Payments carry no store - take it from the bill. They land shortly
+    # after their bill; the range only prunes payment partitions.
+    owners = {row.store_id: (row.company_id, row.brand_id) for row in hourly}
+    payments = []
+    for row in Payment.objects.filter(
+        bill_id__in=bills.values('id'),
+        status='SUCCESS',
+        **date_range_filter('created_at', day, day + timedelta(days=1))
+    ).annotate(
+        store_id=Subquery(Bill.objects.filter(id=OuterRef('bill_id')).values('store_id')[:1])
+    ).values('store_id', 'payment_method').annotate(
+        payment_count=Count('id'),
+        amount=Sum('amount'),
+    ).order_by():
+        company_id, brand_id = owners[row['store_id']]
+        payments.append(PaymentMethodDaily(
+            company_id=company_id, brand_id=brand_id, business_date=day, **row
+        ))
+
+    with transaction.atomic():
+        for model in ROLLUP_MODELS:
+            stale = model.objects.filter(business_date=day)
+            if store_ids is not None:
+                stale = stale.filter(store_id__in=store_ids)
+            stale.delete()
+        written = {}
+        for model, rows in (
+            (SalesHourly, hourly), (ProductSalesDaily, products), (CategorySalesDaily, categories),
+            (PaymentMethodDaily, payments), (CashierSalesDaily, cashiers),
+            (InventoryCostDaily, inventory),
+        ):
+            written[model._meta.db_table] = len(model.objects.bulk_create(rows, batch_size=1000))
+    return written
+
+
+def refresh_dirty(limit=1000):
+    """
+    Recompute the dirty slices (oldest dates first)
+
+    A slice re-marked while it was being recomputed stays dirty for the
+    next run.
+
+    Returns:
+        Number of slices refreshed
+    """
+    pending = defaultdict(set)
+    for store_id, day in RollupDirtyDay.objects.order_by('business_date').values_list(
+        'store_id', 'business_date'
+    )[:limit]:
+        pending[day].add(store_id)
+
+    refreshed = 0
+    for day, store_ids in sorted(pending.items()):
+        with transaction.atomic():
+            claimed = list(RollupDirtyDay.objects.select_for_update(skip_locked=True).filter(
+                business_date=day, store_id__in=store_ids
+            ))
+            if not claimed:
+                continue
+            refresh_day(day, [dirty.store_id for dirty in claimed])
+            RollupDirtyDay.objects.filter(reduce(or_, (
+                Q(pk=dirty.pk, marked_at=dirty.marked_at) for dirty in claimed
+            ))).delete()
+        refreshed += len(claimed)
+    if refreshed:
+        logger.info(f"Refreshed sales rollups for {refreshed} store-days")
+    return refreshed
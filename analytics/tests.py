@@ -1,3 +1,316 @@
+"""
+Analytics Tests - sales / inventory cost rollups, the reports reading them
+and the sales report dashboard
+"""
+import uuid
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analytics.models import (
+    CashierSalesDaily, InventoryCostDaily, PaymentMethodDaily, ProductSalesDaily, RollupDirtyDay, SalesHourly
+)
+from analytics.rollups import refresh_dirty
+from core.models import User
+from transactions.models import Bill
+from transactions.services.bill_ingest import ingest_bills
+
+
+class RollupTestMixin:
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reportuser', password='testpass123')
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.company_id = str(uuid.uuid4())
+        self.brand_id = str(uuid.uuid4())
+        self.store_id = str(uuid.uuid4())
+        self.cashier_id = str(uuid.uuid4())
+        self.product_id = str(uuid.uuid4())
+
+    def _bill(self, number, total='50000.00', created_at='2026-01-27T03:15:00Z', status='PAID', method='CASH'):
+        return {
+            'company_id': self.company_id,
+            'brand_id': self.brand_id,
+            'store_id': self.store_id,
+            'terminal_id': str(uuid.uuid4()),
+            'bill_number': number,
+            'bill_type': 'DINE_IN',
+            'status': status,
+            'pax': 2,
+            'subtotal': total,
+            'tax_amount': '5000.00',
+            'total': total,
+            'created_by': self.cashier_id,
+            'created_at': created_at,
+            'items': [
+                {
+                    'product_id': self.product_id,
+                    'product_sku': 'SKU-1',
+                    'product_name': 'Nasi Goreng',
+                    'quantity': '2.00',
+                    'unit_price': '25000.00',
+                    'unit_cost': '10000.00',
+                    'total': total,
+                }
+            ],
+            'payments': [
+                {'payment_method': method, 'amount': total, 'status': 'SUCCESS'}
+            ],
+        }
+
+    def _movement(self, movement_type='SALE', total_cost='5000.00', created_at='2026-01-27T03:15:00Z'):
+        return {
+            'company_id': self.company_id,
+            'brand_id': self.brand_id,
+            'store_id': self.store_id,
+            'inventory_item_id': str(uuid.uuid4()),
+            'movement_type': movement_type,
+            'quantity': '-0.50',
+            'unit': 'kg',
+            'unit_cost': '10000.00',
+            'total_cost': total_cost,
+            'created_at': created_at,
+            'created_by': self.cashier_id,
+        }
+
+    def _push_movements(self, *movements):
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.api.post(
+                '/api/v1/transactions/inventory/push_bulk/', {'movements': list(movements)}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        refresh_dirty()
+
+    def _ingest(self, *bills):
+        with self.captureOnCommitCallbacks(execute=False):
+            result = ingest_bills(list(bills))
+        self.assertEqual(result['failed'], 0, result['errors'])
+        refresh_dirty()
+        return result
+
+
+class SalesRollupTests(RollupTestMixin, TestCase):
+
+    def test_ingest_marks_and_refresh_builds_rollups(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            ingest_bills([self._bill('R-1'), self._bill('R-2', total='30000.00', method='QRIS')])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(RollupDirtyDay.objects.count(), 1)
+
+        self.assertEqual(refresh_dirty(), 1)
+
+        self.assertFalse(RollupDirtyDay.objects.exists())
+        # 03:15 UTC is 10:15 in Asia/Jakarta
+        hourly = SalesHourly.objects.get()
+        self.assertEqual((str(hourly.business_date), hourly.hour), ('2026-01-27', 10))
+        self.assertEqual(hourly.bill_count, 2)
+        self.assertEqual(hourly.pax, 4)
+        self.assertEqual(hourly.total, Decimal('80000.00'))
+        self.assertEqual(hourly.tax_amount, Decimal('10000.00'))
+
+        product = ProductSalesDaily.objects.get()
+        self.assertEqual(product.quantity, Decimal('4.00'))
+        self.assertEqual(product.cost, Decimal('40000.00'))
+        self.assertEqual(product.order_count, 2)
+        self.assertEqual(
+            dict(PaymentMethodDaily.objects.values_list('payment_method', 'amount')),
+            {'CASH': Decimal('50000.00'), 'QRIS': Decimal('30000.00')}
+        )
+        cashier = CashierSalesDaily.objects.get()
+        self.assertEqual((str(cashier.cashier_id), cashier.bill_count), (self.cashier_id, 2))
+
+    def test_local_business_date(self):
+        # 18:00 UTC on the 27th is already the 28th in Jakarta
+        self._ingest(self._bill('R-1', created_at='2026-01-27T18:00:00Z'))
+
+        hourly = SalesHourly.objects.get()
+        self.assertEqual((str(hourly.business_date), hourly.hour), ('2026-01-28', 1))
+
+    def test_voided_bill_leaves_rollups(self):
+        self._ingest(self._bill('R-1'), self._bill('R-2'))
+        self._ingest(self._bill('R-2', status='VOID'))
+
+        self.assertEqual(SalesHourly.objects.get().bill_count, 1)
+        self.assertEqual(PaymentMethodDaily.objects.get().payment_count, 1)
+
+    def test_movement_push_refreshes_only_touched_days(self):
+        self._ingest(self._bill('R-1'), self._bill('R-2', created_at='2026-01-29T03:00:00Z'))
+        untouched = SalesHourly.objects.get(business_date='2026-01-29').refreshed_at
+
+        with self.captureOnCommitCallbacks(execute=False):
+            self.api.post('/api/v1/transactions/inventory/push_bulk/', {'movements': [
+                self._movement(), self._movement('WASTE', total_cost='1500.00'),
+            ]}, format='json')
+
+        self.assertEqual(
+            list(RollupDirtyDay.objects.values_list('business_date', flat=True)), [date(2026, 1, 27)]
+        )
+        refresh_dirty()
+        self.assertEqual(
+            dict(InventoryCostDaily.objects.values_list('movement_type', 'total_cost')),
+            {'SALE': Decimal('5000.00'), 'WASTE': Decimal('1500.00')}
+        )
+        self.assertEqual(SalesHourly.objects.get(business_date='2026-01-29').refreshed_at, untouched)
+
+    def test_backfill_command(self):
+        self._ingest(self._bill('R-1'), self._bill('R-2', created_at='2026-01-29T03:00:00Z'))
+        SalesHourly.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_sales_rollups', stdout=out)
+
+        self.assertEqual(SalesHourly.objects.count(), 2)
+        self.assertIn('Backfilled 2026-01-27 .. ', out.getvalue())
+
+
+class RollupReportTests(RollupTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._ingest(
+            self._bill('R-1'),
+            self._bill('R-2', total='30000.00', created_at='2026-01-27T07:00:00Z', method='QRIS'),
+            self._bill('R-3', total='20000.00', created_at='2026-01-28T03:00:00Z'),
+        )
+
+    def test_daily_sales_report(self):
+        response = self.api.get('/api/v1/analytics/daily-sales/', {
+            'start_date': '2026-01-27', 'end_date': '2026-01-28', 'store_id': self.store_id
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary']['total_bills'], 3)
+        self.assertEqual(response.data['summary']['total_sales'], Decimal('100000.00'))
+        day = response.data['daily_breakdown'][0]
+        self.assertEqual((str(day['date']), day['total_bills']), ('2026-01-27', 2))
+        self.assertEqual(day['avg_bill_value'], Decimal('40000.00'))
+
+    def test_payment_method_report(self):
+        response = self.api.get('/api/v1/analytics/payment-methods/', {
+            'start_date': '2026-01-27', 'end_date': '2026-01-27'
+        })
+
+        self.assertEqual(response.data['total_amount'], Decimal('80000.00'))
+        breakdown = {row['payment_method']: row for row in response.data['payment_breakdown']}
+        self.assertEqual(breakdown['CASH']['payment_count'], 1)
+        self.assertAlmostEqual(breakdown['QRIS']['percentage'], 37.5)
+
+    def test_cashier_performance_report(self):
+        response = self.api.get('/api/v1/analytics/cashier-performance/', {
+            'start_date': '2026-01-27', 'end_date': '2026-01-28', 'store_id': self.store_id
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        cashier = response.data['cashier_sales'][0]
+        self.assertEqual((str(cashier['created_by']), cashier['total_bills']), (self.cashier_id, 3))
+
+    def test_reports_match_raw_bills(self):
+        raw_total = sum(Bill.objects.filter(status='PAID').values_list('total', flat=True))
+        response = self.api.get('/api/v1/analytics/daily-sales/', {
+            'start_date': '2026-01-01', 'end_date': '2026-01-31'
+        })
+        self.assertEqual(response.data['summary']['total_sales'], raw_total)
+
+    def test_product_sales_report(self):
+        response = self.api.get('/api/v1/analytics/product-sales/', {
+            'start_date': '2026-01-27', 'end_date': '2026-01-28', 'brand_id': self.brand_id
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        product = response.data['top_products'][0]
+        self.assertEqual(product['quantity_sold'], Decimal('6.00'))
+        self.assertEqual(product['total_revenue'], Decimal('100000.00'))
+        self.assertEqual(product['total_cost'], Decimal('60000.00'))
+        self.assertEqual(product['gross_margin'], Decimal('40000.00'))
+        self.assertEqual(product['order_count'], 3)
+
+    def test_category_summary_counts_a_bill_once(self):
+        category_id = str(uuid.uuid4())
+        bill = self._bill('R-4', created_at='2026-01-30T03:00:00Z')
+        bill['items'].append(dict(bill['items'][0], product_id=str(uuid.uuid4()), product_sku='SKU-2'))
+        for item in bill['items']:
+            item['category_id'] = category_id
+        self._ingest(bill)
+
+        response = self.api.get('/api/v1/analytics/product-sales/', {
+            'start_date': '2026-01-30', 'end_date': '2026-01-30', 'brand_id': self.brand_id
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['top_products']), 2)
+        [category] = response.data['category_summary']
+        self.assertEqual((str(category['category_id']), category['order_count']), (category_id, 1))
+        self.assertEqual(category['quantity_sold'], Decimal('4.00'))
+
+    def test_inventory_cogs_report(self):
+        self._push_movements(self._movement(), self._movement(), self._movement('WASTE', total_cost='1500.00'))
+
+        response = self.api.get('/api/v1/analytics/inventory-cogs/', {
+            'start_date': '2026-01-27', 'end_date': '2026-01-28', 'brand_id': self.brand_id
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['sales_summary']['total_cogs'], Decimal('60000.00'))
+        self.assertEqual(response.data['sales_summary']['gross_margin'], Decimal('40000.00'))
+        movements = {row['movement_type']: row for row in response.data['inventory_movements']}
+        self.assertEqual(movements['SALE']['movement_count'], 2)
+        self.assertEqual(movements['SALE']['total_cost'], Decimal('10000.00'))
+        self.assertEqual(response.data['top_margin_products'][0]['margin'], Decimal('40000.00'))
+
+
+class SalesReportDashboardTests(RollupTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(self.user)
+        self._ingest(
+            self._bill('R-1'),
+            self._bill('R-2', total='30000.00', created_at='2026-01-27T07:00:00Z', method='QRIS'),
+            self._bill('R-3', total='20000.00', created_at='2026-01-28T03:40:00Z'),
+            self._bill('R-4', total='99000.00', status='VOID'),
+        )
+        self.params = {'start_date': '2026-01-27', 'end_date': '2026-01-28', 'store_id': self.store_id}
+
+    def test_widgets(self):
+        response = self.client.get('/reports/sales-report/', self.params)
+
+        self.assertEqual(response.status_code, 200)
+        summary = response.context['summary']
+        self.assertEqual(summary['total_bills'], 3)
+        self.assertEqual(summary['total_sales'], Decimal('100000.00'))
+        self.assertEqual(summary['total_tax'], Decimal('15000.00'))
+        self.assertEqual(summary['avg_bill_value'], Decimal('100000.00') / 3)
+        self.assertEqual(
+            [(str(day['date']), day['count'], day['total']) for day in response.context['daily_sales']],
+            [('2026-01-27', 2, Decimal('80000.00')), ('2026-01-28', 1, Decimal('20000.00'))]
+        )
+        # Local hours: 10:15 and 10:40 share a bucket, 07:00 UTC is 14:00
+        self.assertEqual(
+            [(hour['hour'], hour['count']) for hour in response.context['hourly_sales']], [(10, 2), (14, 1)]
+        )
+        payments = {row['payment_method']: row['total'] for row in response.context['payment_breakdown']}
+        self.assertEqual(payments, {'CASH': Decimal('70000.00'), 'QRIS': Decimal('30000.00')})
+        product = response.context['top_products'][0]
+        self.assertEqual((product['product_name'], product['quantity']), ('Nasi Goreng', Decimal('6.00')))
+
+    def test_query_count_and_cache(self):
+        # Three widget queries; the other 9 are the user, the store filter
+        # and the page chrome (context processors, base template)
+        with self.assertNumQueries(12):
+            self.client.get('/reports/sales-report/', self.params)
+        with self.assertNumQueries(9):
+            response = self.client.get('/reports/sales-report/', self.params)
+        self.assertEqual(response.context['summary']['total_bills'], 3)
 
-# Create your tests here.
+        # Another store is another cache entry
+        with self.assertNumQueries(12):
+            response = self.client.get('/reports/sales-report/', {**self.params, 'store_id': str(uuid.uuid4())})
+        self.assertEqual(response.context['summary']['total_bills'], 0)
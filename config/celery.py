@@ -35,9 +35,9 @@ app.conf.beat_schedule = {
             'expires': 3600,
         }
     },
-    'sync-health-check-hourly': {
+    'sync-health-check': {
         'task': 'config.tasks.sync_health_check_task',
-        'schedule': crontab(minute=0),  # Every hour at :00
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
         'options': {
             'expires': 300,  # Task expires after 5 minutes
         }
@@ -49,6 +49,41 @@ app.conf.beat_schedule = {
             'expires': 7200,  # Task expires after 2 hours
         }
     },
+    'maintain-transaction-partitions-daily': {
+        'task': 'config.tasks.maintain_transaction_partitions_task',
+        'schedule': crontab(hour=1, minute=30),  # Daily at 01:30 AM
+        'options': {
+            'expires': 3600,
+        }
+    },
+    'compact-sync-tombstones-weekly': {
+        'task': 'config.tasks.compact_sync_tombstones_task',
+        'schedule': crontab(hour=2, minute=30, day_of_week=0),  # Sunday 02:30 AM
+        'options': {
+            'expires': 7200,
+        }
+    },
+    'drain-ingest-batches': {
+        'task': 'config.tasks.drain_ingest_batches_task',
+        'schedule': crontab(),  # Every minute
+        'options': {
+            'expires': 50,
+        }
+    },
+    'rebuild-sync-snapshots-daily': {
+        'task': 'config.tasks.rebuild_sync_snapshots_task',
+        'schedule': crontab(hour=7, minute=5),  # Daily at 07:05 (00:05 UTC, after the promotion date rolls)
+        'options': {
+            'expires': 3600,
+        }
+    },
+    'refresh-sales-rollups': {
+        'task': 'config.tasks.refresh_sales_rollups_task',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes (pushes also trigger it)
+        'options': {
+            'expires': 240,
+        }
+    },
 }
 
 # Celery Beat timezone
@@ -59,11 +59,13 @@ INSTALLED_APPS = [
     'analytics',      # Reporting & Analytics
     'dashboard',      # Dashboard & UI
     'settings',       # Settings & Bulk Import
+    'sync_api',       # Edge Server sync API
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files
+    'sync_api.compression.SyncCompressionMiddleware',  # Sync API gzip/br/zstd
     'corsheaders.middleware.CorsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',  # HTMX       # CORS
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -332,10 +334,46 @@ TENANT_FIELD = 'company'
 # Member & Loyalty Defaults
 DEFAULT_POINT_EXPIRY_MONTHS = 12
 DEFAULT_POINTS_PER_CURRENCY = 1.00
+MEMBER_CODE_BLOCK_MAX = env.int('MEMBER_CODE_BLOCK_MAX', default=1000)  # codes per Edge reservation (offline registration)
+MEMBER_PHONE_COUNTRY_CODE = env('MEMBER_PHONE_COUNTRY_CODE', default='62')  # for phones without a country code (E.164 normalization)
+MEMBER_LOOKUP_CACHE_TIMEOUT = env.int('MEMBER_LOOKUP_CACHE_TIMEOUT', default=3600)  # seconds, POS phone / card lookup -> member id
+MEMBER_SYNC_SETTLE_SECONDS = env.int('MEMBER_SYNC_SETTLE_SECONDS', default=5)  # members updated more recently wait for the next sync page
 
 # Promotion Engine Settings
 MAX_PROMOTION_STACK = 5  # Maximum number of promotions that can be stacked
 PROMOTION_EXECUTION_TIMEOUT = 10  # seconds
+COMPILED_PROMOTION_CACHE_TIMEOUT = env.int('COMPILED_PROMOTION_CACHE_TIMEOUT', default=86400)  # seconds
+
+# Edge Sync Settings
+SYNC_TOMBSTONE_RETENTION_DAYS = env.int('SYNC_TOMBSTONE_RETENTION_DAYS', default=90)
+SYNC_SNAPSHOTS_ENABLED = env.bool('SYNC_SNAPSHOTS_ENABLED', default=True)
+SYNC_SNAPSHOT_DEBOUNCE_SECONDS = env.int('SYNC_SNAPSHOT_DEBOUNCE_SECONDS', default=30)
+SYNC_SCOPE_CACHE_TIMEOUT = env.int('SYNC_SCOPE_CACHE_TIMEOUT', default=3600)
+SYNC_SCOPE_LOCAL_TTL = env.int('SYNC_SCOPE_LOCAL_TTL', default=30)
+SYNC_COMPRESSION_MIN_BYTES = env.int('SYNC_COMPRESSION_MIN_BYTES', default=512)
+
+# Async Transaction Ingest (bulk-push/async)
+TRANSACTION_INGEST_MAX_QUEUE_DEPTH = env.int('TRANSACTION_INGEST_MAX_QUEUE_DEPTH', default=500)  # 429 above this
+TRANSACTION_INGEST_RETRY_AFTER = env.int('TRANSACTION_INGEST_RETRY_AFTER', default=30)  # seconds
+TRANSACTION_INGEST_STORE_CONCURRENCY = env.int('TRANSACTION_INGEST_STORE_CONCURRENCY', default=1)  # workers per store
+TRANSACTION_INGEST_LEASE_SECONDS = env.int('TRANSACTION_INGEST_LEASE_SECONDS', default=600)
+TRANSACTION_COPY_ENABLED = env.bool('TRANSACTION_COPY_ENABLED', default=True)  # PostgreSQL COPY fast path
+TRANSACTION_COPY_MIN_ROWS = env.int('TRANSACTION_COPY_MIN_ROWS', default=200)  # smaller batches use bulk_create
+TRANSACTION_STREAM_BATCH_SIZE = env.int('TRANSACTION_STREAM_BATCH_SIZE', default=500)  # records per write for NDJSON pushes
+TRANSACTION_STREAM_SPOOL_BYTES = env.int('TRANSACTION_STREAM_SPOOL_BYTES', default=8 * 1024 * 1024)  # NDJSON push body kept in memory before spilling to a temp file
+TRANSACTION_PARTITION_MONTHS_AHEAD = env.int('TRANSACTION_PARTITION_MONTHS_AHEAD', default=3)
+TRANSACTION_PARTITION_ARCHIVE_MONTHS = env.int('TRANSACTION_PARTITION_ARCHIVE_MONTHS', default=0)  # 0 = never archive
+
+# Sales Rollups (analytics.rollups)
+ANALYTICS_ROLLUP_REFRESH_DELAY = env.int('ANALYTICS_ROLLUP_REFRESH_DELAY', default=10)  # seconds, batches pushes per refresh
+ANALYTICS_REPORT_CACHE_TIMEOUT = env.int('ANALYTICS_REPORT_CACHE_TIMEOUT', default=300)  # seconds, per store and date range
+
+# Ingest Metrics (/metrics, SyncHealth)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')  # Bearer token for Prometheus; empty = staff session only
+SYNC_METRICS_WINDOW_MINUTES = env.int('SYNC_METRICS_WINDOW_MINUTES', default=5)
+SYNC_HEALTH_RETENTION_DAYS = env.int('SYNC_HEALTH_RETENTION_DAYS', default=14)
+SYNC_LAG_ALERT_MINUTES = env.int('SYNC_LAG_ALERT_MINUTES', default=30)  # no push for this long = lagging
+SYNC_SLOW_PUSH_MS = env.int('SYNC_SLOW_PUSH_MS', default=5000)  # avg request time above this = slow
 
 # Security Settings (Production)
 if not DEBUG:
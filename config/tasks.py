@@ -34,21 +34,22 @@ def generate_daily_reports_task():
     """
     logger.info(f"Starting daily reports generation at {timezone.now()}")
     
-    from transactions.models import Bill
-    from django.db.models import Sum, Count, Avg
-    from datetime import date
+    from analytics.models import SalesHourly
+    from analytics.rollups import refresh_dirty
+    from django.db.models import Sum
     
     try:
-        today = date.today()
+        today = timezone.localdate()
         
-        # Generate daily summary
-        summary = Bill.objects.filter(
-            status='PAID',
-            created_at__date=today
-        ).aggregate(
-            total_bills=Count('id'),
-            total_sales=Sum('total'),
-            avg_bill_value=Avg('total')
+        # Bring today's rollups up to date, then summarize them
+        refresh_dirty()
+        summary = SalesHourly.objects.filter(business_date=today).aggregate(
+            total_bills=Sum('bill_count'),
+            total_sales=Sum('total')
+        )
+        summary['total_bills'] = summary['total_bills'] or 0
+        summary['avg_bill_value'] = (
+            summary['total_sales'] / summary['total_bills'] if summary['total_bills'] else None
         )
         
         logger.info(f"Daily report for {today}: {summary}")
@@ -69,35 +70,54 @@ def generate_daily_reports_task():
 @shared_task
 def sync_health_check_task():
     """
-    Check sync health from Edge servers
-    Run every hour
+    Check Edge push health from SyncHealth
+    Run every 5 minutes - logs stores that stopped pushing or push slowly
     """
     logger.info(f"Starting sync health check at {timezone.now()}")
     
-    from transactions.models import Bill
+    from django.conf import settings
+    from django.db.models import Max, Sum
     from datetime import timedelta
-    from django.db.models import Max
+    from core.models import Store
+    from sync_api.models import SyncHealth
     
     try:
-        # Check for bills synced in last 24 hours per store
-        yesterday = timezone.now() - timedelta(days=1)
+        now = timezone.now()
+        lag_cutoff = now - timedelta(minutes=getattr(settings, 'SYNC_LAG_ALERT_MINUTES', 30))
         
-        recent_syncs = Bill.objects.filter(
-            synced_at__gte=yesterday
-        ).values('store_id').annotate(
-            bill_count=Count('id'),
-            last_sync=Max('synced_at')
+        last_push = dict(
+            SyncHealth.objects.order_by().values('store_id').annotate(
+                last=Max('last_push_at')
+            ).values_list('store_id', 'last')
+        )
+        active_stores = dict(Store.objects.filter(is_active=True).values_list('id', 'store_code'))
+        lagging = sorted(
+            code for store_id, code in active_stores.items()
+            if store_id in last_push and last_push[store_id] < lag_cutoff
         )
         
-        logger.info(f"Sync health check: {recent_syncs.count()} stores active")
+        # Average request time over the last hour
+        slow_ms = getattr(settings, 'SYNC_SLOW_PUSH_MS', 5000)
+        slow = []
+        recent = SyncHealth.objects.filter(bucket__gte=now - timedelta(hours=1)).order_by().values(
+            'store_id'
+        ).annotate(requests=Sum('requests'), db_ms=Sum('db_ms'), serialize_ms=Sum('serialize_ms'))
+        for row in recent:
+            if row['requests'] and (row['db_ms'] + row['serialize_ms']) / row['requests'] > slow_ms:
+                slow.append(active_stores.get(row['store_id'], str(row['store_id'])))
         
-        # TODO: Alert if no sync from a store for > 24h
-        # TODO: Store health metrics
+        if lagging:
+            logger.warning(f"Sync health: no push for {len(lagging)} stores: {', '.join(lagging)}")
+        if slow:
+            logger.warning(f"Sync health: slow pushes from {', '.join(sorted(slow))}")
+        logger.info(f"Sync health check: {len(last_push)} stores reporting")
         
         return {
             'status': 'success',
-            'active_stores': recent_syncs.count(),
-            'timestamp': timezone.now().isoformat()
+            'active_stores': len(last_push),
+            'lagging_stores': lagging,
+            'slow_stores': sorted(slow),
+            'timestamp': now.isoformat()
         }
     except Exception as e:
         logger.error(f"Sync health check failed: {str(e)}")
@@ -125,11 +145,127 @@ def cleanup_old_logs_task():
         
         logger.info(f"Deleted {deleted_count} old promotion logs")
         
+        # Ingest metrics past their retention
+        from django.conf import settings
+        from sync_api.models import SyncHealth
+        health_cutoff = timezone.now() - timedelta(days=getattr(settings, 'SYNC_HEALTH_RETENTION_DAYS', 14))
+        health_deleted = SyncHealth.objects.filter(bucket__lt=health_cutoff).delete()[0]
+        logger.info(f"Deleted {health_deleted} old sync health rows")
+        
         return {
             'status': 'success',
             'deleted_count': deleted_count,
+            'sync_health_deleted': health_deleted,
             'timestamp': timezone.now().isoformat()
         }
     except Exception as e:
         logger.error(f"Log cleanup failed: {str(e)}")
         return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def maintain_transaction_partitions_task():
+    """
+    Create upcoming monthly partitions of the transaction tables and
+    archive months past TRANSACTION_PARTITION_ARCHIVE_MONTHS (0 = keep all)
+    Run daily (01:30 AM)
+    """
+    from django.conf import settings
+    
+    logger.info(f"Starting transaction partition maintenance at {timezone.now()}")
+    
+    try:
+        call_command('create_partitions')
+        archive_months = getattr(settings, 'TRANSACTION_PARTITION_ARCHIVE_MONTHS', 0)
+        if archive_months:
+            call_command('archive_partitions', older_than=archive_months)
+        logger.info("Transaction partition maintenance completed successfully")
+        return {'status': 'success', 'timestamp': timezone.now().isoformat()}
+    except Exception as e:
+        logger.error(f"Transaction partition maintenance failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def compact_sync_tombstones_task():
+    """
+    Delete sync deletion tombstones past the retention window
+    Run weekly (Sunday 02:30 AM)
+    """
+    logger.info(f"Starting sync tombstone compaction at {timezone.now()}")
+    
+    try:
+        call_command('compact_sync_tombstones')
+        logger.info("Sync tombstone compaction completed successfully")
+        return {'status': 'success', 'timestamp': timezone.now().isoformat()}
+    except Exception as e:
+        logger.error(f"Sync tombstone compaction failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def rebuild_sync_snapshots_task(company_id=None):
+    """
+    Rebuild precomputed per-store sync snapshots
+    Queued (debounced) after master data changes for one company;
+    run daily (07:05 AM, 00:05 UTC) for all companies to roll promotion date windows
+    """
+    logger.info(f"Starting sync snapshot rebuild (company={company_id or 'ALL'}) at {timezone.now()}")
+    
+    try:
+        if company_id:
+            call_command('build_sync_snapshots', company=company_id)
+        else:
+            call_command('build_sync_snapshots')
+        logger.info("Sync snapshot rebuild completed successfully")
+        return {'status': 'success', 'timestamp': timezone.now().isoformat()}
+    except Exception as e:
+        logger.error(f"Sync snapshot rebuild failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task(bind=True)
+def process_ingest_batch_task(self, batch_id):
+    """
+    Apply one queued Edge push (transactions.IngestBatch)
+    Queued by bulk-push/async; retried a few times while the store has no
+    free slot, then left QUEUED for drain_ingest_batches_task
+    """
+    from transactions.services.ingest_queue import BUSY_MAX_RETRIES, BUSY_RETRY_SECONDS, process_batch
+    
+    batch_status = process_batch(batch_id)
+    if batch_status == 'BUSY' and self.request.retries < BUSY_MAX_RETRIES:
+        raise self.retry(countdown=BUSY_RETRY_SECONDS, max_retries=BUSY_MAX_RETRIES)
+    return {'status': 'success', 'batch_id': batch_id, 'batch_status': batch_status}
+
+
+@shared_task
+def drain_ingest_batches_task():
+    """
+    Requeue stuck ingest batches and re-dispatch ones whose task was lost
+    Run every minute
+    """
+    from transactions.services.ingest_queue import requeue_stale_batches
+    
+    try:
+        dispatched = requeue_stale_batches()
+        return {'status': 'success', 'dispatched': dispatched, 'timestamp': timezone.now().isoformat()}
+    except Exception as e:
+        logger.error(f"Ingest batch drain failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def refresh_sales_rollups_task():
+    """
+    Recompute sales rollups for the store-days touched by recent pushes
+    Dispatched after each bill ingest (debounced); beat runs it every 5 minutes as a safety net
+    """
+    from analytics.rollups import refresh_dirty
+    
+    try:
+        refreshed = refresh_dirty()
+        return {'status': 'success', 'refreshed': refreshed, 'timestamp': timezone.now().isoformat()}
+    except Exception as e:
+        logger.error(f"Sales rollup refresh failed: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
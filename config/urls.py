@@ -10,6 +10,7 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from sync_api.sync_views import ingest_metrics
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
@@ -85,8 +86,14 @@ urlpatterns = [
     # API Endpoints - Edge → HO (Transaction Push)
     path('api/v1/transactions/', include('transactions.api.urls')),
     
+    # API Endpoints - Members (HO ↔ Edge)
+    path('api/v1/members/', include('members.api.urls')),
+    
     # API Endpoints - Analytics & Reporting
     path('api/v1/analytics/', include('analytics.api_urls')),
+    
+    # Prometheus scrape endpoint (Edge push ingest)
+    path('metrics', ingest_metrics, name='metrics'),
 ]
 
 # Serve media files in development
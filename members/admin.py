@@ -80,13 +80,14 @@ class MemberAdmin(admin.ModelAdmin):
     
     def activate_members(self, request, queryset):
         """Activate selected members"""
-        count = queryset.update(is_active=True)
+        # updated_at moves so keyset member sync picks the change up
+        count = queryset.update(is_active=True, updated_at=timezone.now())
         self.message_user(request, f"{count} members activated")
     activate_members.short_description = "Activate selected members"
     
     def deactivate_members(self, request, queryset):
         """Deactivate selected members"""
-        count = queryset.update(is_active=False)
+        count = queryset.update(is_active=False, updated_at=timezone.now())
         self.message_user(request, f"{count} members deactivated")
     deactivate_members.short_description = "Deactivate selected members"
 
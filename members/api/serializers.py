@@ -1,8 +1,11 @@
 """
 Members API Serializers - For HO ↔ Edge Bidirectional Sync
 """
+from django.conf import settings
 from rest_framework import serializers
 from members.models import Member, MemberTransaction
+from members.services.member_codes import is_reserved_code, next_member_code
+from members.services.member_search import normalize_phone
 
 
 class MemberSerializer(serializers.ModelSerializer):
@@ -22,48 +25,89 @@ class MemberTransactionSerializer(serializers.ModelSerializer):
 
 
 class MemberRegistrationSerializer(serializers.ModelSerializer):
-    """Serializer for registering new member (from Edge)"""
+    """
+    Serializer for registering new member (from Edge)
+    member_code is optional: an Edge registering offline sends a code from
+    a block it reserved earlier (reserve_codes); otherwise HO allocates one.
+    A registration sent again (Edge retry after a timeout: same code,
+    created_by and phone) returns the existing member, replayed is True.
+    """
+    company_id = serializers.UUIDField()
+    member_code = serializers.CharField(max_length=50, required=False)
+    
     class Meta:
         model = Member
         fields = [
-            'company_id', 'full_name', 'email', 'phone', 'birth_date',
+            'company_id', 'member_code', 'full_name', 'email', 'phone', 'birth_date',
             'gender', 'address', 'city', 'postal_code',
             'tier', 'created_by'
         ]
     
-    def create(self, validated_data):
-        # Auto-generate member_code at HO
+    def validate(self, attrs):
         from core.models import Company
-        from django.utils import timezone
-        
-        company_id = validated_data['company_id']
-        company = Company.objects.get(id=company_id)
         
-        # Generate member code: MB-COMPANYCODE-YYYYMM-XXXX
-        now = timezone.now()
-        year_month = now.strftime('%Y%m')
-        
-        # Get last sequence for this month
-        prefix = f'MB-{company.code}-{year_month}-'
-        last_member = Member.objects.filter(
-            company_id=company_id,
-            member_code__startswith=prefix
-        ).order_by('-member_code').first()
-        
-        if last_member:
-            last_seq = int(last_member.member_code.split('-')[-1])
-            new_seq = last_seq + 1
-        else:
-            new_seq = 1
+        company = Company.objects.filter(id=attrs['company_id']).first()
+        if not company:
+            raise serializers.ValidationError({'company_id': 'Company not found'})
+        if attrs.get('member_code'):
+            if not is_reserved_code(company, attrs['member_code']):
+                raise serializers.ValidationError({'member_code': 'Not a reserved member code of this company'})
+            existing = Member.objects.filter(member_code=attrs['member_code']).first()
+            if existing and not self._is_replay(existing, company, attrs):
+                raise serializers.ValidationError({'member_code': 'Member code already registered'})
+            attrs['existing'] = existing
+        attrs['company'] = company
+        return attrs
+    
+    @staticmethod
+    def _is_replay(member, company, attrs):
+        return (
+            member.company_id == company.id
+            and member.created_by_id == getattr(attrs.get('created_by'), 'pk', None)
+            and member.phone_normalized == normalize_phone(attrs.get('phone'))
+        )
+    
+    def create(self, validated_data):
+        from django.db import IntegrityError, transaction
+        from django.utils import timezone
         
-        validated_data['member_code'] = f'{prefix}{new_seq:04d}'
-        validated_data['joined_date'] = now.date()
+        self.replayed = False
+        existing = validated_data.pop('existing', None)
+        if existing:
+            self.replayed = True
+            return existing
+        validated_data.pop('company_id')
+        if not validated_data.get('member_code'):
+            # Auto-generate member_code at HO
+            validated_data['member_code'] = next_member_code(validated_data['company'])
+        validated_data['joined_date'] = timezone.localdate()
         validated_data['points'] = 0
         validated_data['point_balance'] = 0
         validated_data['total_visits'] = 0
         validated_data['total_spent'] = 0
         
-        return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            # The same registration committed concurrently
+            existing = Member.objects.filter(member_code=validated_data['member_code']).first()
+            if existing and self._is_replay(existing, validated_data['company'], validated_data):
+                self.replayed = True
+                return existing
+            raise serializers.ValidationError({'member_code': 'Member code already registered'})
+
+
+class MemberCodeReservationSerializer(serializers.Serializer):
+    """Block of member codes for offline registration at an Edge"""
+    company_id = serializers.UUIDField()
+    count = serializers.IntegerField(min_value=1)
+    
+    def validate_count(self, value):
+        limit = getattr(settings, 'MEMBER_CODE_BLOCK_MAX', 1000)
+        if value > limit:
+            raise serializers.ValidationError(f'At most {limit} codes per reservation')
+        return value
 
 
 class MemberUpdateSerializer(serializers.ModelSerializer):
@@ -75,3 +119,23 @@ class MemberUpdateSerializer(serializers.ModelSerializer):
             'total_visits', 'total_spent', 'last_visit', 'updated_at'
         ]
         read_only_fields = ['member_code', 'updated_at']
+
+
+class MemberLedgerEntrySerializer(serializers.Serializer):
+    """
+    One ledger entry posted by an Edge (members.services.ledger)
+    id is optional: an Edge that generates it makes a replayed entry a duplicate
+    """
+    id = serializers.UUIDField(required=False)
+    member_id = serializers.UUIDField()
+    transaction_type = serializers.ChoiceField(choices=MemberTransaction.TRANSACTION_TYPE_CHOICES)
+    points_change = serializers.IntegerField(default=0)
+    balance_change = serializers.DecimalField(max_digits=12, decimal_places=2, default=0)
+    bill_id = serializers.UUIDField(required=False, allow_null=True)
+    reference = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate(self, attrs):
+        if not attrs['points_change'] and not attrs['balance_change']:
+            raise serializers.ValidationError('points_change or balance_change is required')
+        return attrs
@@ -6,14 +6,24 @@ Edge → HO: Register new member, update points/visits
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+import logging
+
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db import transaction
+from core.models import Company
 from members.models import Member, MemberTransaction
+from members.services.ledger import post_ledger_entries
+from members.services.member_codes import reserve_member_codes
+from members.services.member_search import lookup_member, normalize_phone, search_members
+from members.services.member_sync import SYNC_FIELDS, member_sync_page, stream_member_sync, sync_params
 from .serializers import (
     MemberSerializer, MemberTransactionSerializer,
-    MemberRegistrationSerializer, MemberUpdateSerializer
+    MemberRegistrationSerializer, MemberUpdateSerializer,
+    MemberCodeReservationSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 
 class MemberViewSet(viewsets.ModelViewSet):
     """
@@ -32,15 +42,24 @@ class MemberViewSet(viewsets.ModelViewSet):
             return MemberUpdateSerializer
         return MemberSerializer
     
+    def create(self, request, *args, **kwargs):
+        return self.register(request)
+    
     @action(detail=False, methods=['get'])
     def sync(self, request):
         """
-        Sync members for specific company
-        Query params: company_id, last_sync, phone (optional for lookup)
+        Sync members for specific company (keyset pages, see members/services/member_sync.py)
+        Query params: company_id, cursor (next_cursor of the previous page),
+        last_sync (ISO timestamp, instead of a cursor), limit,
+        phone (optional for lookup), output (json | ndjson)
+        
+        json: { count, data, next_cursor, has_more, last_sync } - one page
+        ndjson: every member after the cursor, streamed (meta / members / end lines)
+        (output, not format: DRF reserves ?format= for renderer selection)
         """
         company_id = request.query_params.get('company_id')
-        last_sync = request.query_params.get('last_sync')
         phone = request.query_params.get('phone')
+        output_format = request.query_params.get('output') or 'json'
         
         if not company_id:
             return Response(
@@ -48,37 +67,92 @@ class MemberViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        queryset = self.get_queryset().filter(company_id=company_id)
+        if output_format not in ('json', 'ndjson'):
+            return Response(
+                {'error': 'output must be json or ndjson'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Phone lookup for POS
-        if phone:
-            queryset = queryset.filter(phone=phone)
+        try:
+            after, fresh_since, limit = sync_params(request.query_params)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if last_sync:
-            queryset = queryset.filter(updated_at__gt=last_sync)
+        now = timezone.now()
+        if output_format == 'ndjson' and not phone:
+            meta = {'company_id': str(company_id), 'fields': list(SYNC_FIELDS), 'sync_timestamp': now.isoformat()}
+            
+            def on_error(exc):
+                logger.error(f"Error in member sync stream: {str(exc)}", exc_info=True)
+            
+            response = StreamingHttpResponse(
+                stream_member_sync(company_id, after, fresh_since, limit, meta, on_error),
+                content_type='application/x-ndjson'
+            )
+            response['Cache-Control'] = 'no-store'
+            return response
         
-        serializer = self.get_serializer(queryset, many=True)
+        # Phone lookup for POS
+        phone_normalized = normalize_phone(phone) if phone else None
+        rows, next_cursor, has_more, last_sync = member_sync_page(
+            company_id, after, fresh_since, limit, phone_normalized
+        )
         return Response({
-            'count': queryset.count(),
-            'last_sync': timezone.now().isoformat(),
-            'data': serializer.data
+            'count': len(rows),
+            'last_sync': last_sync.isoformat(),
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'data': rows
         })
     
     @action(detail=False, methods=['post'])
     def register(self, request):
         """
         Register new member from Edge
-        Edge sends member data, HO generates member_code
+        Edge sends member data, HO generates member_code (or validates the
+        reserved one it sent); a retried registration answers 200 with the
+        member registered the first time
         """
         serializer = MemberRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             member = serializer.save()
             return Response(
                 MemberSerializer(member).data,
-                status=status.HTTP_201_CREATED
+                status=status.HTTP_200_OK if serializer.replayed else status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'])
+    def reserve_codes(self, request):
+        """
+        Reserve a block of member codes for offline registration at an Edge
+        Body: { company_id, count }
+        The Edge hands the codes out itself and sends each one with its
+        registration (register, member_code).
+        """
+        serializer = MemberCodeReservationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        company = Company.objects.filter(id=serializer.validated_data['company_id']).first()
+        if not company:
+            return Response(
+                {'error': 'Company not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        codes = reserve_member_codes(company, serializer.validated_data['count'])
+        return Response({
+            'company_id': str(company.id),
+            'count': len(codes),
+            'first_code': codes[0],
+            'last_code': codes[-1],
+            'codes': codes
+        }, status=status.HTTP_201_CREATED)
+    
     @action(detail=True, methods=['patch'])
     def update_stats(self, request, pk=None):
         """
@@ -96,11 +170,12 @@ class MemberViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def lookup(self, request):
         """
-        Lookup member by phone or member_code (for POS)
-        Body: { company_id, phone } or { company_id, member_code }
+        Lookup member by phone, card_number or member_code (for POS)
+        Body: { company_id, phone } or { company_id, card_number } or { company_id, member_code }
         """
         company_id = request.data.get('company_id')
         phone = request.data.get('phone')
+        card_number = request.data.get('card_number')
         member_code = request.data.get('member_code')
         
         if not company_id:
@@ -109,19 +184,13 @@ class MemberViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        queryset = self.get_queryset().filter(company_id=company_id)
-        
-        if phone:
-            queryset = queryset.filter(phone=phone)
-        elif member_code:
-            queryset = queryset.filter(member_code=member_code)
-        else:
+        if not (phone or card_number or member_code):
             return Response(
-                {'error': 'phone or member_code required'},
+                {'error': 'phone, card_number or member_code required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        member = queryset.first()
+        member = lookup_member(company_id, phone=phone, card_number=card_number, member_code=member_code)
         if not member:
             return Response(
                 {'error': 'Member not found'},
@@ -130,6 +199,38 @@ class MemberViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(member)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked prefix search (POS / back office)
+        Query params: company_id, q (code, phone, card number, name or email prefix), limit (default 20)
+        """
+        company_id = request.query_params.get('company_id')
+        query = request.query_params.get('q', '')
+        
+        if not company_id:
+            return Response(
+                {'error': 'company_id parameter required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response(
+                {'error': 'limit must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        members = search_members(company_id, query, limit)
+        return Response({
+            'query': query,
+            'results': [
+                {**self.get_serializer(member).data, 'rank': member.rank}
+                for member in members
+            ]
+        })
 
 
 class MemberTransactionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -171,23 +272,28 @@ class MemberTransactionViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'])
     def create_transaction(self, request):
         """
-        Create member transaction from Edge
-        Body: { member_id, transaction_type, points, description, bill_id, created_by }
+        Create one member transaction from Edge
+        Body: { id, member_id, transaction_type, points_change, balance_change, bill_id, reference, notes }
         """
-        serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
-            # Calculate balance_after
-            member = Member.objects.get(id=request.data['member_id'])
-            balance_after = member.point_balance + request.data['points']
-            
-            with transaction.atomic():
-                txn = serializer.save(balance_after=balance_after)
-                
-                # Update member balance
-                member.point_balance = balance_after
-                if request.data['transaction_type'] == 'EARN':
-                    member.points += request.data['points']
-                member.save(update_fields=['point_balance', 'points'])
-            
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        result = post_ledger_entries([request.data], created_by=request.user)
+        if result['errors']:
+            return Response(result['errors'][0]['errors'], status=status.HTTP_400_BAD_REQUEST)
+        txn = self.get_queryset().get(pk=result['transaction_ids'][0])
+        return Response(self.get_serializer(txn).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def post_batch(self, request):
+        """
+        Post many member transactions in one request (offline replay)
+        Body: { entries: [ { id, member_id, transaction_type, points_change, balance_change, ... } ] }
+        Each member is locked once; entries that fail validation or would
+        overdraw points / balance are reported per index (207).
+        """
+        entries = request.data.get('entries', [])
+        if not isinstance(entries, list):
+            return Response({'entries': ['Expected a list of entries.']}, status=status.HTTP_400_BAD_REQUEST)
+        result = post_ledger_entries(entries, created_by=request.user)
+        return Response({
+            'success': result['failed'] == 0,
+            **result
+        }, status=status.HTTP_201_CREATED if result['failed'] == 0 else status.HTTP_207_MULTI_STATUS)
@@ -1,13 +1,24 @@
 """
 Management Command: Expire Member Points
 Run daily via Celery Beat or cron
+
+Expiry is set based and chunked (see members/services/point_expiry.py);
+an interrupted run picks up after its last committed chunk when started
+again on the same day.
+
+Usage:
+    python manage.py expire_member_points
+    python manage.py expire_member_points --dry-run
+    python manage.py expire_member_points --company YGY --chunk-size 10000
+    python manage.py expire_member_points --as-of 2026-01-31 --restart
 """
-from django.core.management.base import BaseCommand
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import F
-from datetime import timedelta
-from members.models import Member, MemberTransaction
+
+from core.models import Company, User
+from members.services.point_expiry import DEFAULT_CHUNK_SIZE, expire_company_points
 
 
 class Command(BaseCommand):
@@ -19,92 +30,74 @@ class Command(BaseCommand):
             action='store_true',
             help='Preview what would be expired without making changes',
         )
+        parser.add_argument('--company', action='append', default=[], help='Company code (repeatable), default: all')
+        parser.add_argument('--as-of', type=str, help='Run date (YYYY-MM-DD), default: today')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Members per chunk')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an earlier run')
+        parser.add_argument('--user', type=str, help='Username recorded on expiry transactions, default: first superuser')
+
+    def _created_by(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if not user:
+                raise CommandError(f'User {username} not found')
+            return user
+        user = User.objects.filter(is_superuser=True, is_active=True).order_by('date_joined').first()
+        if not user:
+            raise CommandError('No active superuser to record expiry transactions - pass --user')
+        return user
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        today = timezone.now().date()
-        
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        try:
+            today = date.fromisoformat(options['as_of']) if options['as_of'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--as-of must be YYYY-MM-DD')
+        created_by = self._created_by(options['user'])
+
         self.stdout.write(self.style.WARNING(
-            f"Running member points expiry job for {today}"
+            f"Running member points expiry job for {today}{' [DRY RUN]' if dry_run else ''}"
         ))
-        
+
         # Get all active companies with expiry policy
-        from core.models import Company
         companies = Company.objects.filter(
             is_active=True,
             point_expiry_months__gt=0
-        )
-        
+        ).order_by('code')
+        if options['company']:
+            companies = companies.filter(code__in=options['company'])
+
         total_expired = 0
         total_members = 0
-        
+
         for company in companies:
             self.stdout.write(f"\nProcessing company: {company.name} ({company.code})")
-            
-            # Calculate expiry date
-            expiry_months = company.point_expiry_months
-            expiry_date = today - timedelta(days=expiry_months * 30)
-            
-            # Find members with points to expire
-            members = Member.objects.filter(
-                company_id=company.id,
-                is_active=True,
-                point_balance__gt=0
-            )
-            
-            for member in members:
-                # Get transactions older than expiry period that haven't been expired
-                expired_transactions = MemberTransaction.objects.filter(
-                    member=member,
-                    transaction_type='EARN',
-                    created_at__date__lte=expiry_date,
-                    points__gt=0,
-                    is_expired=False
+
+            def progress(stats):
+                self.stdout.write(
+                    f"  chunk {stats['chunks']}: scanned {stats['members_scanned']} members, "
+                    f"{stats['points_expired']} points from {stats['members_expired']} members"
                 )
-                
-                member_expired_points = 0
-                
-                for txn in expired_transactions:
-                    if dry_run:
-                        self.stdout.write(
-                            f"  [DRY RUN] Would expire {txn.points} points from {member.member_code} "
-                            f"(transaction date: {txn.created_at.date()})"
-                        )
-                    else:
-                        # Mark transaction as expired
-                        txn.is_expired = True
-                        txn.expired_at = timezone.now()
-                        txn.save()
-                        
-                        # Create expiry transaction
-                        MemberTransaction.objects.create(
-                            member=member,
-                            transaction_type='EXPIRED',
-                            points=-txn.points,
-                            balance_after=member.point_balance - txn.points,
-                            description=f'Points expired (earned on {txn.created_at.date()})',
-                            created_by=None  # System automated
-                        )
-                        
-                        member_expired_points += txn.points
-                
-                if member_expired_points > 0:
-                    if not dry_run:
-                        # Update member balance
-                        member.point_balance = F('point_balance') - member_expired_points
-                        member.save(update_fields=['point_balance'])
-                        member.refresh_from_db()
-                    
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"  Expired {member_expired_points} points for {member.member_code} "
-                            f"(new balance: {member.point_balance})"
-                        )
-                    )
-                    
-                    total_expired += member_expired_points
-                    total_members += 1
-        
+
+            stats = expire_company_points(
+                company, created_by,
+                as_of=today,
+                chunk_size=options['chunk_size'],
+                dry_run=dry_run,
+                resume=not options['restart'],
+                progress=progress,
+            )
+            if stats['resumed_after']:
+                self.stdout.write(f"  resumed after member {stats['resumed_after']}")
+            self.stdout.write(self.style.SUCCESS(
+                f"  {company.code}: {stats['points_expired']} points from {stats['members_expired']} members"
+            ))
+
+            total_expired += stats['points_expired']
+            total_members += stats['members_expired']
+
         if dry_run:
             self.stdout.write(
                 self.style.WARNING(
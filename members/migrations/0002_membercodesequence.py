@@ -0,0 +1,31 @@
+# Generated manually for member code sequences
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_add_store_to_tablearea'),
+        ('members', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberCodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(help_text='YYYYMM', max_length=6)),
+                ('last_value', models.PositiveIntegerField(default=0, help_text='Highest sequence handed out')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='member_code_sequences', to='core.company')),
+            ],
+            options={
+                'verbose_name': 'Member Code Sequence',
+                'verbose_name_plural': 'Member Code Sequences',
+                'db_table': 'member_code_sequence',
+                'unique_together': {('company', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated manually for member phone normalization and search indexes
+
+from django.db import migrations, models
+
+from members.services.member_search import normalize_phone
+
+# PostgreSQL only: prefix (pattern_ops) and trigram indexes for
+# members.services.member_search - LIKE 'x%' can't use a plain B-tree
+# under a non-C collation
+SEARCH_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS member_phone_prefix_idx '
+    'ON member (company_id, phone_normalized varchar_pattern_ops)',
+    'CREATE INDEX IF NOT EXISTS member_card_prefix_idx '
+    'ON member (company_id, card_number varchar_pattern_ops)',
+    'CREATE INDEX IF NOT EXISTS member_code_prefix_idx '
+    'ON member (member_code varchar_pattern_ops)',
+]
+TRIGRAM_INDEX = (
+    'CREATE INDEX IF NOT EXISTS member_name_trgm_idx '
+    'ON member USING gin (UPPER(full_name) gin_trgm_ops)'
+)
+SEARCH_INDEX_NAMES = ['member_phone_prefix_idx', 'member_card_prefix_idx', 'member_code_prefix_idx', 'member_name_trgm_idx']
+
+
+def normalize_phones(apps, schema_editor):
+    Member = apps.get_model('members', 'Member')
+    batch = []
+    for member in Member.objects.only('id', 'phone').iterator(chunk_size=2000):
+        member.phone_normalized = normalize_phone(member.phone)
+        batch.append(member)
+        if len(batch) == 2000:
+            Member.objects.bulk_update(batch, ['phone_normalized'])
+            batch = []
+    if batch:
+        Member.objects.bulk_update(batch, ['phone_normalized'])
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in SEARCH_INDEXES:
+            cursor.execute(statement)
+        # pg_trgm needs CREATE privilege on the database; without it name
+        # search still works, as a scan
+        cursor.execute('SAVEPOINT member_trgm')
+        try:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(TRIGRAM_INDEX)
+            cursor.execute('RELEASE SAVEPOINT member_trgm')
+        except Exception:
+            cursor.execute('ROLLBACK TO SAVEPOINT member_trgm')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in SEARCH_INDEX_NAMES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0002_membercodesequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='phone_normalized',
+            field=models.CharField(blank=True, editable=False, help_text='E.164 form of phone (lookup / search key)', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['company', 'phone_normalized'], name='member_company_phone_e164_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['company', 'card_number'], name='member_company_card_idx'),
+        ),
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated manually for keyset member sync
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0003_member_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['company', 'updated_at', 'id'], name='member_sync_keyset_idx'),
+        ),
+    ]
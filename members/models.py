@@ -1,6 +1,7 @@
 """
 Member & Loyalty Program Models
 - Member (company-wide with auto-generated code)
+- MemberCodeSequence (member code counter per company and month)
 - MemberTransaction (earn/redeem/topup/payment/refund/adjustment/expired)
 - Points & Balance tracking with full audit trail
 """
@@ -44,6 +45,12 @@ class Member(models.Model):
     full_name = models.CharField(max_length=200)
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=20, db_index=True)
+    phone_normalized = models.CharField(
+        max_length=20,
+        blank=True,
+        editable=False,
+        help_text="E.164 form of phone (lookup / search key)"
+    )
     birth_date = models.DateField(null=True, blank=True)
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES, blank=True)
     
@@ -96,6 +103,9 @@ class Member(models.Model):
             models.Index(fields=['company', 'phone']),
             models.Index(fields=['tier', 'is_active']),
             models.Index(fields=['company', 'is_active']),
+            models.Index(fields=['company', 'phone_normalized'], name='member_company_phone_e164_idx'),
+            models.Index(fields=['company', 'card_number'], name='member_company_card_idx'),
+            models.Index(fields=['company', 'updated_at', 'id'], name='member_sync_keyset_idx'),
         ]
     
     def __str__(self):
@@ -104,25 +114,14 @@ class Member(models.Model):
     def save(self, *args, **kwargs):
         """Auto-generate member_code if not exists"""
         if not self.member_code:
-            # Generate: MB-{COMPANY_CODE}-{YYYYMM}-{XXXX}
-            now = timezone.now()
-            year_month = now.strftime('%Y%m')
-            company_code = self.company.code
-            
-            # Get last member code for this company and month
-            last_member = Member.objects.filter(
-                company=self.company,
-                member_code__startswith=f'MB-{company_code}-{year_month}-'
-            ).order_by('-member_code').first()
-            
-            if last_member:
-                # Extract sequence number and increment
-                last_seq = int(last_member.member_code.split('-')[-1])
-                new_seq = last_seq + 1
-            else:
-                new_seq = 1
-            
-            self.member_code = f'MB-{company_code}-{year_month}-{new_seq:04d}'
+            from members.services.member_codes import next_member_code
+            self.member_code = next_member_code(self.company)
+        
+        from members.services.member_search import normalize_phone
+        self.phone_normalized = normalize_phone(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_normalized'}
         
         super().save(*args, **kwargs)
     
@@ -135,6 +134,26 @@ class Member(models.Model):
         return self.joined_date + relativedelta(months=expiry_months)
 
 
+class MemberCodeSequence(models.Model):
+    """
+    Member code counter per company and month (MB-{CODE}-{YYYYMM}-{seq})
+    Advanced by members.services.member_codes, never read-modify-write
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='member_code_sequences')
+    period = models.CharField(max_length=6, help_text="YYYYMM")
+    last_value = models.PositiveIntegerField(default=0, help_text="Highest sequence handed out")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'member_code_sequence'
+        verbose_name = 'Member Code Sequence'
+        verbose_name_plural = 'Member Code Sequences'
+        unique_together = [['company', 'period']]
+
+    def __str__(self):
+        return f"{self.company_id} {self.period}: {self.last_value}"
+
+
 class MemberTransaction(models.Model):
     """
     Member Transaction - Points & Balance tracking with full audit trail
@@ -198,8 +217,9 @@ class MemberTransaction(models.Model):
         """
         Validate and update member balance atomically
         IMPORTANT: Always use this to create transactions, not direct Member.save()
+        Batches go through members.services.ledger.post_ledger_entries()
         """
-        if not self.pk:  # New transaction
+        if self._state.adding:  # New transaction (pk is set by its default)
             # Lock member row for update (prevent race condition)
             from django.db import transaction as db_transaction
             with db_transaction.atomic():
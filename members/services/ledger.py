@@ -0,0 +1,160 @@
+"""
+Member Ledger
+Batched posting of member transactions (earn / redeem / topup / ...)
+
+MemberTransaction.save() locks the member row for every single entry, so
+an Edge replaying a day of offline transactions serialised on its hot
+members with one lock round-trip per entry. post_ledger_entries() posts
+a whole batch in one transaction:
+
+- every entry is validated once; invalid entries are reported per index
+- the touched members are locked once, with select_for_update in member
+  id order (the same order in every batch, so two batches sharing members
+  can't deadlock)
+- points_before / points_after and balance_before / balance_after are
+  computed in memory, entry after entry in batch order per member
+- entries are written with bulk_create, the new member balances with one
+  bulk_update
+
+The balance invariants of MemberTransaction.save() still hold: an entry
+that would take points or balance below zero is rejected (reported like
+an invalid entry) and the member's running balance is left as it was.
+
+An Edge may send its own entry id: entries already posted (checked after
+the locks are taken, so a concurrent replay is seen) and repeats within
+the batch are acknowledged as duplicates, so a retried upload never posts
+twice.
+"""
+
+import logging
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from members.api.serializers import MemberLedgerEntrySerializer
+from members.models import Member, MemberTransaction
+
+logger = logging.getLogger(__name__)
+
+# Members per locking SELECT / transactions per INSERT
+LOCK_BATCH_SIZE = 1000
+ROW_BATCH_SIZE = 1000
+
+
+def _lock_members(member_ids):
+    """Lock members in id order; {id: Member}"""
+    member_ids = sorted(member_ids)
+    members = {}
+    for start in range(0, len(member_ids), LOCK_BATCH_SIZE):
+        chunk = member_ids[start:start + LOCK_BATCH_SIZE]
+        locked = Member.objects.select_for_update().filter(pk__in=chunk).order_by('pk').only(
+            'id', 'points', 'point_balance', 'updated_at'
+        )
+        members.update((member.pk, member) for member in locked)
+    return members
+
+
+def _posted_ids(entry_ids):
+    posted = set()
+    entry_ids = list(entry_ids)
+    for start in range(0, len(entry_ids), ROW_BATCH_SIZE):
+        posted.update(MemberTransaction.objects.filter(
+            pk__in=entry_ids[start:start + ROW_BATCH_SIZE]
+        ).values_list('pk', flat=True))
+    return posted
+
+
+def post_ledger_entries(entries_data, created_by):
+    """
+    Validate and post a batch of ledger entries
+
+    Args:
+        entries_data: List of entry dicts (MemberLedgerEntrySerializer), in
+            the order they happened - per member, entries are applied in
+            batch order
+        created_by: User recorded on every entry
+
+    Returns:
+        Dict with posted, duplicates, failed, transaction_ids (index-ordered
+        ids of every acknowledged entry, None for failed ones) and errors
+        (index, errors)
+    """
+    errors = []
+    pending = []
+    for index, entry_data in enumerate(entries_data):
+        serializer = MemberLedgerEntrySerializer(data=entry_data)
+        if not serializer.is_valid():
+            errors.append({'index': index, 'errors': serializer.errors})
+            continue
+        entry = dict(serializer.validated_data)
+        entry.setdefault('id', uuid.uuid4())
+        pending.append((index, entry))
+
+    transaction_ids = [None] * len(entries_data)
+    rows, duplicates = [], 0
+    with transaction.atomic():
+        members = _lock_members({entry['member_id'] for index, entry in pending})
+        seen = _posted_ids(entry['id'] for index, entry in pending)
+        touched = {}
+
+        for index, entry in pending:
+            if entry['id'] in seen:
+                duplicates += 1
+                transaction_ids[index] = str(entry['id'])
+                continue
+            member = members.get(entry['member_id'])
+            if member is None:
+                errors.append({'index': index, 'errors': {'member_id': ['Member not found']}})
+                continue
+
+            points_after = member.points + entry['points_change']
+            balance_after = member.point_balance + entry['balance_change']
+            if points_after < 0:
+                errors.append({'index': index, 'errors': {'points_change': [
+                    f'Insufficient points. Current: {member.points}, Required: {-entry["points_change"]}'
+                ]}})
+                continue
+            if balance_after < 0:
+                errors.append({'index': index, 'errors': {'balance_change': [
+                    f'Insufficient balance. Current: {member.point_balance}, Required: {-entry["balance_change"]}'
+                ]}})
+                continue
+
+            member_id = entry.pop('member_id')
+            rows.append(MemberTransaction(
+                member_id=member_id,
+                points_before=member.points,
+                points_after=points_after,
+                balance_before=member.point_balance,
+                balance_after=balance_after,
+                created_by=created_by,
+                **entry
+            ))
+            member.points = points_after
+            member.point_balance = balance_after
+            touched[member_id] = member
+            seen.add(entry['id'])
+            transaction_ids[index] = str(entry['id'])
+
+        if rows:
+            MemberTransaction.objects.bulk_create(rows, batch_size=ROW_BATCH_SIZE)
+            now = timezone.now()
+            for member in touched.values():
+                member.updated_at = now
+            Member.objects.bulk_update(
+                touched.values(), ['points', 'point_balance', 'updated_at'], batch_size=ROW_BATCH_SIZE
+            )
+
+    errors.sort(key=lambda error: error['index'])
+    logger.info(
+        f"Member ledger: total={len(entries_data)}, posted={len(rows)}, members={len(touched)}, "
+        f"duplicates={duplicates}, failed={len(errors)}"
+    )
+    return {
+        'posted': len(rows),
+        'duplicates': duplicates,
+        'failed': len(errors),
+        'transaction_ids': transaction_ids,
+        'errors': errors,
+    }
@@ -0,0 +1,114 @@
+"""
+Member Codes
+Allocation of MB-{COMPANY_CODE}-{YYYYMM}-{seq} member codes
+
+Codes used to be derived from the highest existing code of the month
+(startswith filter + order_by('-member_code')), so concurrent
+registrations raced for the same number and collided on the unique
+constraint. The sequence now lives in one MemberCodeSequence row per
+(company, month), advanced with a single atomic UPDATE (RETURNING on
+PostgreSQL): no prefix scan, no read-modify-write.
+
+- next_member_code(): one code for a registration at HO
+- reserve_member_codes(): a contiguous block, pre-fetched by an Edge so
+  it can register members offline; the Edge later sends the code with the
+  registration and is_reserved_code() vouches for it
+
+The counter row of a month is seeded from the highest existing code the
+first time it is needed, so codes handed out before the counter existed
+are never reused. Numbers of failed registrations / unused block codes are
+skipped, like a database sequence.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from members.models import Member, MemberCodeSequence
+
+CODE_PATTERN = re.compile(r'^MB-(?P<company>.+)-(?P<period>\d{6})-(?P<seq>\d{4,})$')
+
+
+def code_period(when=None):
+    """YYYYMM of a local datetime (default now)"""
+    return timezone.localtime(when).strftime('%Y%m')
+
+
+def format_member_code(company_code, period, seq):
+    return f'MB-{company_code}-{period}-{seq:04d}'
+
+
+def _existing_last_value(company, period):
+    """Highest sequence among the month's existing codes (seeds the counter)"""
+    prefix = format_member_code(company.code, period, 0)[:-4]
+    last = Member.objects.filter(
+        company=company, member_code__startswith=prefix
+    ).order_by(Length('member_code').desc(), '-member_code').values_list('member_code', flat=True).first()
+    match = CODE_PATTERN.match(last or '')
+    return int(match['seq']) if match else 0
+
+
+def _advance(company, period, count):
+    """Add count to the counter; new last_value, or None without a counter row"""
+    now = timezone.now()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {MemberCodeSequence._meta.db_table} '
+                f'SET last_value = last_value + %s, updated_at = %s '
+                f'WHERE company_id = %s AND period = %s RETURNING last_value',
+                [count, now, str(company.pk), period]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+    counter = MemberCodeSequence.objects.filter(company=company, period=period)
+    with transaction.atomic():
+        if not counter.update(last_value=F('last_value') + count, updated_at=now):
+            return None
+        return counter.values_list('last_value', flat=True).get()
+
+
+def reserve_member_codes(company, count=1, when=None):
+    """
+    Allocate count consecutive member codes
+
+    Args:
+        company: core.Company
+        count: Block size (1..MEMBER_CODE_BLOCK_MAX)
+        when: Registration time, picks the month (default now)
+
+    Returns:
+        List of member codes in sequence order
+    """
+    limit = getattr(settings, 'MEMBER_CODE_BLOCK_MAX', 1000)
+    if not 1 <= count <= limit:
+        raise ValueError(f'count must be between 1 and {limit}')
+    period = code_period(when)
+
+    last = _advance(company, period, count)
+    if last is None:
+        MemberCodeSequence.objects.bulk_create(
+            [MemberCodeSequence(company=company, period=period, last_value=_existing_last_value(company, period))],
+            ignore_conflicts=True
+        )
+        last = _advance(company, period, count)
+    return [format_member_code(company.code, period, seq) for seq in range(last - count + 1, last + 1)]
+
+
+def next_member_code(company, when=None):
+    """Allocate one member code"""
+    return reserve_member_codes(company, 1, when)[0]
+
+
+def is_reserved_code(company, code):
+    """True if code is a well-formed code of company that has been handed out"""
+    match = CODE_PATTERN.match(code or '')
+    if not match or match['company'] != company.code or int(match['seq']) < 1:
+        return False
+    return MemberCodeSequence.objects.filter(
+        company=company, period=match['period'], last_value__gte=int(match['seq'])
+    ).exists()
@@ -0,0 +1,134 @@
+"""
+Member Search
+POS lookups and ranked search over members
+
+- normalize_phone(): phones are matched in E.164 form (Member.phone_normalized),
+  so 0812-3456, +62 812 3456 and 628123456 find the same member
+- lookup_member(): exact POS lookup by phone / card_number / member_code.
+  Phone and card hits are remembered in the cache as key -> member id;
+  a cached id is re-checked against the row (still active, same phone /
+  card), so a stale entry costs one extra query and no invalidation
+  hooks are needed
+- search_members() / ranked_search(): prefix matching, ranked
+
+      0  exact member code, phone or card number
+      1  member code, phone or card number prefix
+      2  name or email prefix
+      3  prefix of a later word of the name ("sari" finds "Dewi Sari")
+
+Every condition is a prefix match: (company, phone_normalized),
+(company, card_number) and member_code use B-tree indexes, the name
+conditions the trigram index on UPPER(full_name) that migration 0003
+creates on PostgreSQL.
+"""
+
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from members.models import Member
+
+LOOKUP_CACHE_KEY = 'member_lookup:{company_id}:{kind}:{value}'
+
+PHONE_QUERY = re.compile(r'^\+?[\d\s().-]+$')
+
+# Shortest query search_members() runs (shorter ones match too much)
+MIN_QUERY_LENGTH = 2
+
+
+def normalize_phone(raw, country_code=None):
+    """
+    E.164 form of a phone number ('' if it has no digits)
+
+    Numbers without a country code (leading trunk 0 or none) get
+    MEMBER_PHONE_COUNTRY_CODE.
+    """
+    country_code = country_code or getattr(settings, 'MEMBER_PHONE_COUNTRY_CODE', '62')
+    raw = (raw or '').strip()
+    digits = re.sub(r'\D', '', raw)
+    if not digits:
+        return ''
+    if raw.startswith('+'):
+        return f'+{digits}'
+    if digits.startswith('00'):
+        return f'+{digits[2:]}'
+    if digits.startswith('0'):
+        return f'+{country_code}{digits[1:]}'
+    if digits.startswith(country_code):
+        return f'+{digits}'
+    return f'+{country_code}{digits}'
+
+
+def lookup_member(company_id, phone=None, card_number=None, member_code=None):
+    """
+    Active member of a company by phone, card number or member code
+
+    Returns:
+        Member or None
+    """
+    if phone:
+        kind, value = 'phone', normalize_phone(phone)
+        match = {'phone_normalized': value}
+    elif card_number:
+        kind, value = 'card', card_number.strip()
+        match = {'card_number': value}
+    elif member_code:
+        # Unique - the index lookup is as cheap as the cache
+        return Member.objects.filter(company_id=company_id, is_active=True, member_code=member_code).first()
+    else:
+        return None
+    if not value:
+        return None
+
+    members = Member.objects.filter(company_id=company_id, is_active=True, **match)
+    key = LOOKUP_CACHE_KEY.format(company_id=company_id, kind=kind, value=value)
+    member_id = cache.get(key)
+    if member_id:
+        member = members.filter(pk=member_id).first()
+        if member:
+            return member
+        cache.delete(key)
+
+    member = members.first()
+    if member:
+        cache.set(key, member.pk, getattr(settings, 'MEMBER_LOOKUP_CACHE_TIMEOUT', 3600))
+    return member
+
+
+def ranked_search(queryset, query):
+    """
+    Filter a member queryset to prefix matches of query, annotated with rank
+
+    Returns:
+        Queryset ordered by rank, then name
+    """
+    query = query.strip()
+    code = query.upper()
+    exact = Q(member_code=code)
+    prefix = Q(member_code__startswith=code)
+    if PHONE_QUERY.match(query) and re.sub(r'\D', '', query):
+        phone = normalize_phone(query)
+        digits = re.sub(r'\D', '', query)
+        exact |= Q(phone_normalized=phone) | Q(card_number=digits)
+        prefix |= Q(phone_normalized__startswith=phone) | Q(card_number__startswith=digits)
+    name = Q(full_name__istartswith=query) | Q(email__istartswith=query)
+    word = Q(full_name__icontains=f' {query}')
+
+    return queryset.filter(prefix | name | word).annotate(
+        rank=Case(
+            When(exact, then=Value(0)),
+            When(prefix, then=Value(1)),
+            When(name, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField()
+        )
+    ).order_by('rank', 'full_name')
+
+
+def search_members(company_id, query, limit=20):
+    """Ranked prefix search over the active members of a company"""
+    if len(query.strip()) < MIN_QUERY_LENGTH:
+        return []
+    return list(ranked_search(Member.objects.filter(company_id=company_id, is_active=True), query)[:limit])
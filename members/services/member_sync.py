@@ -0,0 +1,206 @@
+"""
+Member Sync
+Keyset-paginated member download for Edge servers
+
+A fresh Edge of a company with millions of members used to get every
+member serialized in one response (plus a count()). Members are now read
+in (updated_at, id) order, page by page, behind an opaque cursor:
+
+    GET .../members/sync/?company_id=...                  first page
+    GET .../members/sync/?company_id=...&cursor=<next>    following pages
+
+The last page's next_cursor is kept by the Edge and sent on its next
+(incremental) sync: a member updated since then has a newer updated_at and
+sorts after the cursor. Rows are projected to the few fields a POS needs
+(SYNC_FIELDS) with values(), no serializer.
+
+A fresh sync returns active members only (plus members deactivated after
+it started, so the Edge drops what it already received); the cursor of its
+last page and every later page include deactivated members with is_active
+false.
+Members updated within MEMBER_SYNC_SETTLE_SECONDS are held back for the
+next request: a registration still committing with an older updated_at
+would otherwise land behind a cursor already handed out.
+
+Edges that predate the cursor never send one and only keep last_sync:
+the last row's updated_at while has_more, the settle cutoff on the last
+page. A page requested without a cursor therefore ends on a whole
+updated_at instant (it grows past limit when more rows share it), so
+"updated_at > last_sync" never skips part of an instant. Cursor pages
+keep to limit; their last_sync is informational.
+"""
+
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from members.models import Member
+
+SYNC_FIELDS = (
+    'id', 'member_code', 'full_name', 'phone', 'card_number', 'tier',
+    'points', 'point_balance', 'is_active', 'updated_at',
+)
+
+DEFAULT_SYNC_PAGE_SIZE = 1000
+MAX_SYNC_PAGE_SIZE = 5000
+
+
+def encode_cursor(updated_at, member_id, fresh_since=None):
+    """fresh_since: start of a fresh sync still in progress, else None"""
+    raw = json.dumps(
+        [updated_at.isoformat(), str(member_id or ''), fresh_since.isoformat() if fresh_since else None],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Returns:
+        (updated_at, member_id or None, fresh_since or None)
+
+    Raises ValueError for a cursor this module did not produce.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        updated_at, member_id, fresh_since = json.loads(raw)
+        updated_at = parse_datetime(updated_at)
+        fresh_since = parse_datetime(fresh_since) if fresh_since else None
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('invalid cursor')
+    if updated_at is None:
+        raise ValueError('invalid cursor')
+    return updated_at, member_id or None, fresh_since
+
+
+def sync_params(params):
+    """
+    Parse cursor / last_sync / limit from query params
+
+    last_sync (ISO timestamp) is the pre-cursor way to ask for changes
+    and starts an incremental sync at that instant.
+
+    Returns:
+        (after, fresh_since, limit) where after is (updated_at, id) or None
+        and fresh_since the start of a fresh sync (None for incremental)
+    Raises ValueError for malformed values.
+    """
+    cursor = params.get('cursor')
+    last_sync = params.get('last_sync')
+    limit = params.get('limit')
+    limit = DEFAULT_SYNC_PAGE_SIZE if limit in (None, '') else int(limit)
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    limit = min(limit, MAX_SYNC_PAGE_SIZE)
+
+    if cursor:
+        updated_at, member_id, fresh_since = decode_cursor(cursor)
+        return (updated_at, member_id), fresh_since, limit
+    if last_sync:
+        updated_at = parse_datetime(last_sync.replace(' ', '+'))
+        if updated_at is None:
+            raise ValueError('last_sync must be an ISO 8601 timestamp')
+        if timezone.is_naive(updated_at):
+            updated_at = timezone.make_aware(updated_at)
+        return (updated_at, None), None, limit
+    return None, timezone.now(), limit
+
+
+def settle_cutoff():
+    """Members updated after this are held back for a later request"""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'MEMBER_SYNC_SETTLE_SECONDS', 5))
+
+
+def _base_queryset(company_id, fresh_since, phone_normalized=None, until=None):
+    members = Member.objects.filter(company_id=company_id)
+    if fresh_since:
+        members = members.filter(Q(is_active=True) | Q(updated_at__gt=fresh_since))
+    if phone_normalized:
+        members = members.filter(phone_normalized=phone_normalized)
+    return members.filter(updated_at__lte=until or settle_cutoff())
+
+
+def _page(members, after, limit):
+    if after is not None:
+        updated_at, member_id = after
+        if member_id is None:
+            members = members.filter(updated_at__gt=updated_at)
+        else:
+            members = members.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=member_id))
+    return list(members.order_by('updated_at', 'id').values(*SYNC_FIELDS)[:limit])
+
+
+def _next_cursor(after, fresh_since):
+    return encode_cursor(after[0], after[1], fresh_since) if after is not None else None
+
+
+def _rest_of_instant(members, row):
+    """Rows sharing row's updated_at that sort after it"""
+    return list(members.filter(updated_at=row['updated_at'], id__gt=row['id']).order_by('id').values(*SYNC_FIELDS))
+
+
+def member_sync_page(company_id, after, fresh_since, limit, phone_normalized=None):
+    """
+    One page of members after the keyset position
+
+    Returns:
+        (rows, next_cursor, has_more, last_sync); next_cursor is None only
+        when nothing has been synced yet, last_sync is for pre-cursor Edges
+    """
+    until = settle_cutoff()
+    members = _base_queryset(company_id, fresh_since, phone_normalized, until)
+    rows = _page(members, after, limit + 1)
+    has_more = len(rows) > limit
+    following = rows[limit] if has_more else None
+    rows = rows[:limit]
+    no_cursor = after is None or after[1] is None
+    if no_cursor and following and following['updated_at'] == rows[-1]['updated_at']:
+        # The Edge may continue from last_sync (updated_at >), so the page
+        # ends on a whole instant - one bulk update can stamp more members
+        # than a page
+        rows += _rest_of_instant(members, rows[-1])
+        has_more = members.filter(updated_at__gt=rows[-1]['updated_at']).exists()
+    if rows:
+        after = (rows[-1]['updated_at'], rows[-1]['id'])
+    last_sync = after[0] if has_more else until
+    # The fresh sync ends with its last page
+    return rows, _next_cursor(after, fresh_since if has_more else None), has_more, last_sync
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def stream_member_sync(company_id, after, fresh_since, batch_size, meta, on_error):
+    """
+    Every member after the keyset position as NDJSON, read batch_size at a time
+
+    {"section": "meta", "data": {...}}
+    {"section": "members", "data": {...row...}}   (one line per member)
+    {"section": "end", "data": {"count": n, "next_cursor": "..."}}
+    """
+    yield _dumps({'section': 'meta', 'data': meta}) + '\n'
+    count = 0
+    try:
+        members = _base_queryset(company_id, fresh_since)
+        while True:
+            rows = _page(members, after, batch_size)
+            for row in rows:
+                yield _dumps({'section': 'members', 'data': row}) + '\n'
+            count += len(rows)
+            if rows:
+                after = (rows[-1]['updated_at'], rows[-1]['id'])
+            if len(rows) < batch_size:
+                break
+    except Exception as e:
+        on_error(e)
+        yield _dumps({'section': 'error', 'data': {'code': 'INTERNAL_ERROR', 'count': count}}) + '\n'
+        return
+    next_cursor = _next_cursor(after, None)
+    yield _dumps({'section': 'end', 'data': {'count': count, 'next_cursor': next_cursor}}) + '\n'
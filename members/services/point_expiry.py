@@ -0,0 +1,189 @@
+"""
+Point Expiry
+Set-based expiry of member points, one member chunk at a time
+
+Points expire first-in first-out: every point credited on or before the
+expiry date (as_of - company.point_expiry_months) that has not been
+consumed by a later debit (redeem, expired, negative adjustment) expires.
+Per member that is
+
+    expirable = min(points, max(0, credited_before_cutoff - all_debits))
+
+which one grouped query over member_transaction computes for a whole
+chunk. Expired points are debits themselves, so a rerun finds nothing
+left to expire - the job is idempotent.
+
+Per chunk (one database transaction):
+
+1. lock the next chunk_size members with points (ordered by id)
+2. one GROUP BY member_id over their transactions
+3. bulk_create the 'expired' MemberTransaction rows
+4. one UPDATE of member.points (UPDATE ... FROM (VALUES ...) on
+   PostgreSQL, CASE WHEN elsewhere)
+
+The last member id of every committed chunk is kept in the cache, so a
+run that is killed (task expiry, deploy) resumes after the last chunk.
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from members.models import Member, MemberTransaction
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = 'member_points_expiry:{company_id}:{as_of}'
+CHECKPOINT_TIMEOUT = 2 * 86400
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def expiry_cutoff(company, as_of):
+    """
+    First instant whose credits have not expired yet (None = never expire)
+
+    Points credited on or before as_of - point_expiry_months expire.
+    """
+    months = company.get_point_expiry_months()
+    if not months:
+        return None
+    expiry_date = as_of - relativedelta(months=months)
+    return timezone.make_aware(datetime.combine(expiry_date + timedelta(days=1), time.min))
+
+
+def _expirable(member_points, cutoff):
+    """{member_id: points to expire} for one chunk, from one grouped query"""
+    totals = MemberTransaction.objects.filter(member_id__in=member_points).values('member_id').annotate(
+        credited=Sum('points_change', filter=Q(points_change__gt=0, created_at__lt=cutoff)),
+        debited=Sum('points_change', filter=Q(points_change__lt=0)),
+    ).order_by()
+    expirable = {}
+    for row in totals:
+        points = min(member_points[row['member_id']], (row['credited'] or 0) + (row['debited'] or 0))
+        if points > 0:
+            expirable[row['member_id']] = points
+    return expirable
+
+
+def _apply_expiry(expirable, now):
+    """Subtract the expired points from member.points in one UPDATE"""
+    if connection.vendor == 'postgresql':
+        values = ', '.join(['(%s::uuid, %s)'] * len(expirable))
+        params = [now]
+        for member_id, points in expirable.items():
+            params.extend([str(member_id), points])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Member._meta.db_table} AS m '
+                f'SET points = m.points - v.expired, updated_at = %s '
+                f'FROM (VALUES {values}) AS v(id, expired) '
+                f'WHERE m.id = v.id',
+                params
+            )
+        return
+    Member.objects.filter(id__in=expirable).update(
+        points=Case(
+            *[When(id=member_id, then=F('points') - Value(points)) for member_id, points in expirable.items()],
+            output_field=IntegerField()
+        ),
+        updated_at=now
+    )
+
+
+def _expire_chunk(company, cutoff, created_by, after, chunk_size, dry_run):
+    members = Member.objects.filter(
+        company=company, is_active=True, points__gt=0
+    ).order_by('id')
+    if after is not None:
+        members = members.filter(id__gt=after)
+    if not dry_run:
+        members = members.select_for_update()
+    rows = list(members.values_list('id', 'points', 'point_balance')[:chunk_size])
+    member_points = {member_id: points for member_id, points, balance in rows}
+    # Expiry leaves the balance as it is; the rows still record it
+    balances = {member_id: balance for member_id, points, balance in rows}
+    if not member_points:
+        return None, 0, 0, 0
+
+    expirable = _expirable(member_points, cutoff)
+    if expirable and not dry_run:
+        now = timezone.now()
+        notes = f'Points credited before {timezone.localdate(cutoff)} expired'
+        MemberTransaction.objects.bulk_create([
+            MemberTransaction(
+                member_id=member_id,
+                transaction_type='expired',
+                points_change=-points,
+                points_before=member_points[member_id],
+                points_after=member_points[member_id] - points,
+                balance_before=balances[member_id],
+                balance_after=balances[member_id],
+                reference='Auto point expiry',
+                notes=notes,
+                created_by=created_by,
+            )
+            for member_id, points in expirable.items()
+        ], batch_size=1000)
+        _apply_expiry(expirable, now)
+    return max(member_points), len(member_points), len(expirable), sum(expirable.values())
+
+
+def expire_company_points(company, created_by, as_of=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                          dry_run=False, resume=True, progress=None):
+    """
+    Expire the points of one company
+
+    Args:
+        company: core.Company
+        created_by: User recorded on the expiry transactions
+        as_of: Local date of the run (default today)
+        chunk_size: Members per chunk / database transaction
+        dry_run: Compute only - no writes, no checkpoint
+        resume: Continue after the last committed chunk of this run date
+        progress: Optional callable(stats) after every chunk
+
+    Returns:
+        Dict with chunks, members_scanned, members_expired, points_expired and
+        resumed_after (member id the run continued after, or None)
+    """
+    as_of = as_of or timezone.localdate()
+    stats = {'chunks': 0, 'members_scanned': 0, 'members_expired': 0, 'points_expired': 0, 'resumed_after': None}
+    cutoff = expiry_cutoff(company, as_of)
+    if cutoff is None:
+        return stats
+
+    checkpoint = CHECKPOINT_KEY.format(company_id=company.id, as_of=as_of)
+    after = cache.get(checkpoint) if resume and not dry_run else None
+    stats['resumed_after'] = after
+
+    while True:
+        with transaction.atomic():
+            last_id, scanned, members, points = _expire_chunk(
+                company, cutoff, created_by, after, chunk_size, dry_run
+            )
+        if last_id is None:
+            break
+        after = last_id
+        if not dry_run:
+            cache.set(checkpoint, after, CHECKPOINT_TIMEOUT)
+        stats['chunks'] += 1
+        stats['members_scanned'] += scanned
+        stats['members_expired'] += members
+        stats['points_expired'] += points
+        if progress:
+            progress(stats)
+        if scanned < chunk_size:
+            break
+
+    logger.info(
+        f"Point expiry {company.code} as of {as_of}: {stats['points_expired']} points "
+        f"from {stats['members_expired']} members in {stats['chunks']} chunks"
+        f"{' (dry run)' if dry_run else ''}"
+    )
+    return stats
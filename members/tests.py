@@ -1,3 +1,461 @@
-from django.test import TestCase
+"""
+Members Tests - point expiry, member code allocation, lookup, search and sync
+"""
+import json
+import uuid
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Company, User
+from members.models import Member, MemberCodeSequence, MemberTransaction
+from members.services.ledger import post_ledger_entries
+from members.services.member_codes import code_period, is_reserved_code, next_member_code, reserve_member_codes
+from members.services.member_search import lookup_member, normalize_phone, search_members
+from members.services.member_sync import encode_cursor
+from members.services.point_expiry import expire_company_points
+
+
+class MemberTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(username='hoadmin', password='testpass123')
+        self.company = Company.objects.create(code='YGY', name='Yogya Group', point_expiry_months=12)
+
+    def _member(self, name='Member', phone='0812', **kwargs):
+        return Member.objects.create(
+            company=self.company, full_name=name, phone=phone, created_by=self.user, **kwargs
+        )
+
+    def _txn(self, member, points, days_ago, transaction_type='earn'):
+        txn = MemberTransaction.objects.create(
+            member=member, transaction_type=transaction_type, points_change=points, created_by=self.user
+        )
+        MemberTransaction.objects.filter(pk=txn.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return txn
+
+
+class PointExpiryTests(MemberTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.as_of = timezone.localdate()
+        # 500 old points, 200 of them already redeemed; 100 recent points
+        self.member = self._member('Old Earner')
+        self._txn(self.member, 500, days_ago=400)
+        self._txn(self.member, -200, days_ago=100, transaction_type='redeem')
+        self._txn(self.member, 100, days_ago=30)
+        self.fresh = self._member('Fresh Earner')
+        self._txn(self.fresh, 80, days_ago=10)
+
+    def test_expires_unconsumed_old_points(self):
+        Member.objects.filter(pk=self.member.pk).update(point_balance=500)
+        stats = expire_company_points(self.company, self.user, as_of=self.as_of)
+
+        self.assertEqual((stats['members_expired'], stats['points_expired']), (1, 300))
+        self.member.refresh_from_db()
+        self.fresh.refresh_from_db()
+        self.assertEqual((self.member.points, self.fresh.points), (100, 80))
+        expired = MemberTransaction.objects.get(transaction_type='expired')
+        self.assertEqual((expired.points_before, expired.points_change, expired.points_after), (400, -300, 100))
+        self.assertEqual((expired.balance_before, expired.balance_change, expired.balance_after), (500, 0, 500))
+
+    def test_rerun_is_idempotent(self):
+        expire_company_points(self.company, self.user, as_of=self.as_of)
+        stats = expire_company_points(self.company, self.user, as_of=self.as_of, resume=False)
+
+        self.assertEqual(stats['points_expired'], 0)
+        self.assertEqual(MemberTransaction.objects.filter(transaction_type='expired').count(), 1)
+
+    def test_dry_run_writes_nothing(self):
+        stats = expire_company_points(self.company, self.user, as_of=self.as_of, dry_run=True)
+
+        self.assertEqual(stats['points_expired'], 300)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.points, 400)
+        self.assertFalse(MemberTransaction.objects.filter(transaction_type='expired').exists())
+
+    def test_chunks_and_resume(self):
+        members = [self.member, self.fresh]
+        for index in range(3):
+            member = self._member(f'Member {index}')
+            self._txn(member, 50, days_ago=400)
+            members.append(member)
+
+        chunks = []
+        stats = expire_company_points(
+            self.company, self.user, as_of=self.as_of, chunk_size=2, progress=lambda s: chunks.append(dict(s))
+        )
+        self.assertEqual(stats['chunks'], 3)
+        self.assertEqual(chunks[-1]['members_scanned'], 5)
+        self.assertEqual(stats['points_expired'], 450)
+
+        # A second run the same day resumes after the last committed chunk
+        stats = expire_company_points(self.company, self.user, as_of=self.as_of, chunk_size=2)
+        self.assertEqual(stats['chunks'], 0)
+        self.assertEqual(stats['resumed_after'], max(member.id for member in members))
+
+    def test_no_policy(self):
+        self.company.point_expiry_months = 0
+        self.company.save()
+
+        with self.assertNumQueries(0):
+            stats = expire_company_points(self.company, self.user, as_of=self.as_of)
+        self.assertEqual(stats['points_expired'], 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('expire_member_points', '--dry-run', stdout=out)
+        self.assertIn('[DRY RUN] Would have expired 300 points for 1 members', out.getvalue())
+
+        out = StringIO()
+        call_command('expire_member_points', '--as-of', str(self.as_of), stdout=out)
+        self.assertIn('Successfully expired 300 points for 1 members', out.getvalue())
+
+
+class MemberCodeTests(MemberTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.prefix = f'MB-YGY-{code_period()}-'
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+
+    def test_sequential_codes(self):
+        first = self._member('First')
+        second = self._member('Second')
+
+        self.assertEqual((first.member_code, second.member_code), (self.prefix + '0001', self.prefix + '0002'))
+        self.assertEqual(MemberCodeSequence.objects.get().last_value, 2)
+
+    def test_counter_seeded_from_existing_codes(self):
+        self._member('Legacy', member_code=self.prefix + '9999')
+        self._member('Legacy', member_code=self.prefix + '10000')
+
+        self.assertEqual(next_member_code(self.company), self.prefix + '10001')
+
+    def test_allocation_is_one_update(self):
+        next_member_code(self.company)
+        # savepoint, UPDATE, SELECT, release
+        with self.assertNumQueries(4):
+            self.assertEqual(next_member_code(self.company), self.prefix + '0002')
+
+    def test_block_reservation(self):
+        block = reserve_member_codes(self.company, 3)
+
+        self.assertEqual(block, [self.prefix + '0001', self.prefix + '0002', self.prefix + '0003'])
+        self.assertEqual(self._member().member_code, self.prefix + '0004')
+        self.assertTrue(is_reserved_code(self.company, block[1]))
+        self.assertFalse(is_reserved_code(self.company, self.prefix + '0005'))
+        with self.assertRaises(ValueError):
+            reserve_member_codes(self.company, 0)
+
+    def test_offline_registration_with_reserved_code(self):
+        response = self.api.post('/api/v1/members/members/reserve_codes/', {
+            'company_id': str(self.company.id), 'count': 2
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['last_code'], self.prefix + '0002')
+
+        payload = {'company_id': str(self.company.id), 'full_name': 'Offline', 'phone': '0813', 'created_by': self.user.id}
+        response = self.api.post('/api/v1/members/members/register/', {
+            **payload, 'member_code': response.data['first_code']
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['member_code'], self.prefix + '0001')
+
+        response = self.api.post('/api/v1/members/members/register/', {
+            **payload, 'member_code': self.prefix + '0003'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.api.post('/api/v1/members/members/register/', payload, format='json')
+        self.assertEqual(response.data['member_code'], self.prefix + '0003')
+
+    def test_registration_replay_returns_existing_member(self):
+        code = reserve_member_codes(self.company, 1)[0]
+        payload = {
+            'company_id': str(self.company.id), 'full_name': 'Offline', 'phone': '0813',
+            'created_by': self.user.id, 'member_code': code
+        }
+        first = self.api.post('/api/v1/members/members/register/', payload, format='json')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED, first.data)
+
+        replay = self.api.post('/api/v1/members/members/register/', payload, format='json')
+        self.assertEqual(replay.status_code, status.HTTP_200_OK, replay.data)
+        self.assertEqual(replay.data['id'], first.data['id'])
+
+        response = self.api.post('/api/v1/members/members/register/', {**payload, 'phone': '0899'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('member_code', response.data)
+        self.assertEqual(Member.objects.filter(member_code=code).count(), 1)
+
+
+class MemberSearchTests(MemberTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.dewi = self._member('Dewi Sari', phone='0812-3456-789', card_number='7001')
+        self.sari = self._member('Sari Wulandari', phone='+62 813 1111', email='sari@example.com')
+        self.other = Company.objects.create(code='BDG', name='Bandung Group')
+        Member.objects.create(company=self.other, full_name='Sari Other', phone='08123456789', created_by=self.user)
+
+    def test_normalize_phone(self):
+        for raw in ['0812-3456-789', '+62 812 3456 789', '628123456789', '812 3456 789', '0062 812 3456789']:
+            self.assertEqual(normalize_phone(raw), '+628123456789', raw)
+        self.assertEqual(normalize_phone(''), '')
+        self.assertEqual(self.dewi.phone_normalized, '+628123456789')
+
+    def test_lookup_by_phone_and_card(self):
+        self.assertEqual(lookup_member(self.company.id, phone='+62 812-3456-789'), self.dewi)
+        self.assertEqual(lookup_member(self.company.id, card_number='7001'), self.dewi)
+        self.assertEqual(lookup_member(self.company.id, member_code=self.sari.member_code), self.sari)
+        self.assertIsNone(lookup_member(self.company.id, phone='0899'))
+
+    def test_cached_lookup_is_rechecked(self):
+        lookup_member(self.company.id, phone='08123456789')
+        with self.assertNumQueries(1):
+            self.assertEqual(lookup_member(self.company.id, phone='08123456789'), self.dewi)
+
+        # The cached id no longer matches once the phone changes
+        self.dewi.phone = '0877'
+        self.dewi.save()
+        self.assertIsNone(lookup_member(self.company.id, phone='08123456789'))
+        self.assertEqual(lookup_member(self.company.id, phone='0877'), self.dewi)
+
+    def test_ranked_search(self):
+        names = [member.full_name for member in search_members(self.company.id, 'sari')]
+        # Name / email prefix before a later word of the name; other company excluded
+        self.assertEqual(names, ['Sari Wulandari', 'Dewi Sari'])
+
+        results = search_members(self.company.id, '0812')
+        self.assertEqual([(member, member.rank) for member in results], [(self.dewi, 1)])
+        self.assertEqual(search_members(self.company.id, self.dewi.member_code)[0].rank, 0)
+        self.assertEqual(search_members(self.company.id, 's'), [])
+
+    def test_search_and_lookup_endpoints(self):
+        response = self.api.get('/api/v1/members/members/search/', {'company_id': str(self.company.id), 'q': '7001'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['full_name'], row['rank']) for row in response.data['results']], [('Dewi Sari', 0)])
+
+        response = self.api.post('/api/v1/members/members/lookup/', {
+            'company_id': str(self.company.id), 'phone': '+6281234 56789'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['member_code'], self.dewi.member_code)
+
+
+@override_settings(MEMBER_SYNC_SETTLE_SECONDS=0)
+class MemberSyncTests(MemberTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.inactive = self._member('Inactive', is_active=False)
+        self.members = [self._member(f'Member {index}') for index in range(4)]
+        self.url = '/api/v1/members/members/sync/'
+
+    def _sync(self, **params):
+        response = self.api.get(self.url, {'company_id': str(self.company.id), **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, getattr(response, 'data', None))
+        return response
+
+    def test_fresh_sync_pages(self):
+        synced = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(1):
+                data = self._sync(limit=3, **({'cursor': cursor} if cursor else {})).data
+            synced += [row['member_code'] for row in data['data']]
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                break
+
+        self.assertEqual(synced, [member.member_code for member in self.members])
+        self.assertEqual(set(data['data'][0]), {
+            'id', 'member_code', 'full_name', 'phone', 'card_number', 'tier',
+            'points', 'point_balance', 'is_active', 'updated_at'
+        })
+
+        # Nothing new: an empty page keeps the position
+        data = self._sync(cursor=cursor).data
+        self.assertEqual((data['data'], data['next_cursor']), ([], cursor))
+
+        # Incremental: updated and deactivated members, in update order
+        self.members[0].tier = 'gold'
+        self.members[0].save()
+        self.members[1].is_active = False
+        self.members[1].save()
+        rows = self._sync(cursor=cursor).data['data']
+        self.assertEqual(
+            [(row['member_code'], row['tier'], row['is_active']) for row in rows],
+            [(self.members[0].member_code, 'gold', True), (self.members[1].member_code, 'bronze', False)]
+        )
+
+    def test_last_sync_and_invalid_params(self):
+        since = timezone.now()
+        self.members[2].save()
+
+        rows = self._sync(last_sync=since.isoformat()).data['data']
+        self.assertEqual([row['id'] for row in rows], [self.members[2].id])
+
+        for params in ({'cursor': 'garbage'}, {'last_sync': 'yesterday'}, {'limit': 0}, {'output': 'xml'}):
+            response = self.api.get(self.url, {'company_id': str(self.company.id), **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_legacy_last_sync_walks_every_page(self):
+        # Members 0 and 1 share an updated_at across the end of the first page
+        tied = timezone.now() - timedelta(minutes=1)
+        Member.objects.filter(pk=self.inactive.pk).update(updated_at=tied - timedelta(minutes=1))
+        Member.objects.filter(pk__in=[self.members[0].pk, self.members[1].pk]).update(updated_at=tied)
+        synced, last_sync = set(), (timezone.now() - timedelta(days=1)).isoformat()
+        for _ in range(6):
+            data = self._sync(last_sync=last_sync, limit=2).data
+            synced.update(row['id'] for row in data['data'])
+            last_sync = data['last_sync']
+            if not data['has_more']:
+                break
+
+        self.assertEqual(synced, {member.id for member in self.members} | {self.inactive.id})
+        self.assertFalse(data['has_more'])
+
+    def test_legacy_page_ends_on_a_whole_instant(self):
+        # One bulk update stamped more members than a page
+        stamped = timezone.now() - timedelta(minutes=1)
+        Member.objects.filter(pk__in=[member.pk for member in self.members[:3]]).update(updated_at=stamped)
+        last_sync = (stamped - timedelta(minutes=1)).isoformat()
+
+        data = self._sync(last_sync=last_sync, limit=2).data
+        self.assertEqual({row['id'] for row in data['data']}, {member.id for member in self.members[:3]})
+        self.assertTrue(data['has_more'])
+
+        data = self._sync(last_sync=data['last_sync'], limit=2).data
+        self.assertEqual({row['id'] for row in data['data']}, {self.inactive.id, self.members[3].id})
+        self.assertFalse(data['has_more'])
+
+        # A cursor page keeps to limit
+        cursor = encode_cursor(stamped - timedelta(minutes=1), uuid.UUID(int=0))
+        self.assertEqual(len(self._sync(cursor=cursor, limit=2).data['data']), 2)
+
+    def test_admin_bulk_deactivate_moves_updated_at(self):
+        from django.contrib.admin.sites import site
+        admin = site._registry[Member]
+        cursor = self._sync().data['next_cursor']
+        admin.message_user = lambda *args, **kwargs: None
+
+        admin.deactivate_members(None, Member.objects.filter(pk=self.members[3].pk))
+
+        rows = self._sync(cursor=cursor).data['data']
+        self.assertEqual([(row['id'], row['is_active']) for row in rows], [(self.members[3].id, False)])
+
+    def test_ndjson_stream(self):
+        response = self._sync(output='ndjson', limit=2)
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['section'] for line in lines], ['meta'] + ['members'] * 4 + ['end'])
+        self.assertEqual(lines[-1]['data']['count'], 4)
+
+        self.members[3].save()
+        rows = self._sync(cursor=lines[-1]['data']['next_cursor']).data['data']
+        self.assertEqual([row['id'] for row in rows], [self.members[3].id])
+
+
+class MemberLedgerTests(MemberTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.alice = self._member('Alice')
+        self.bob = self._member('Bob')
+        self._txn(self.alice, 100, days_ago=1)
+
+    def _entry(self, member, points=0, balance=0, transaction_type='earn', **kwargs):
+        return {
+            'member_id': str(member.pk), 'transaction_type': transaction_type,
+            'points_change': points, 'balance_change': str(balance), **kwargs
+        }
+
+    def test_single_save_updates_member(self):
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.points, 100)
+        with self.assertRaises(ValueError):
+            self._txn(self.alice, -150, days_ago=0, transaction_type='redeem')
+
+    def test_batch_running_balances(self):
+        result = post_ledger_entries([
+            self._entry(self.alice, 50),
+            self._entry(self.bob, balance=200, transaction_type='topup'),
+            self._entry(self.alice, -120, transaction_type='redeem'),
+            self._entry(self.bob, balance=-50, transaction_type='payment'),
+        ], created_by=self.user)
+
+        self.assertEqual((result['posted'], result['failed']), (4, 0))
+        redeem = MemberTransaction.objects.get(pk=result['transaction_ids'][2])
+        self.assertEqual((redeem.points_before, redeem.points_after), (150, 30))
+        payment = MemberTransaction.objects.get(pk=result['transaction_ids'][3])
+        self.assertEqual((payment.balance_before, payment.balance_after), (200, 150))
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.alice.points, 30)
+        self.assertEqual(self.bob.point_balance, 150)
+
+    def test_overdraw_rejected_without_touching_balance(self):
+        result = post_ledger_entries([
+            self._entry(self.alice, -150, transaction_type='redeem'),
+            self._entry(self.alice, -60, transaction_type='redeem'),
+            self._entry(self.alice, -60, transaction_type='redeem'),
+            {'member_id': str(self.bob.pk), 'transaction_type': 'bogus'},
+        ], created_by=self.user)
+
+        self.assertEqual(result['posted'], 1)
+        self.assertEqual([error['index'] for error in result['errors']], [0, 2, 3])
+        self.assertIn('points_change', result['errors'][0]['errors'])
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.points, 40)
+
+    def test_query_count_is_independent_of_batch_size(self):
+        entries = [self._entry(member, 1) for member in (self.alice, self.bob) for _ in range(30)]
+        with self.assertNumQueries(6):
+            # savepoint, lock, posted ids, insert, update, release
+            post_ledger_entries(entries, created_by=self.user)
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.points, 30)
+
+    def test_replayed_entries_are_duplicates(self):
+        entry_id = str(uuid.uuid4())
+        entries = [self._entry(self.bob, 10, id=entry_id), self._entry(self.bob, 10, id=entry_id)]
+        first = post_ledger_entries(entries, created_by=self.user)
+        second = post_ledger_entries(entries, created_by=self.user)
+
+        self.assertEqual((first['posted'], first['duplicates']), (1, 1))
+        self.assertEqual((second['posted'], second['duplicates']), (0, 2))
+        self.assertEqual(second['transaction_ids'], [entry_id, entry_id])
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.points, 10)
+
+    def test_post_batch_endpoint(self):
+        api = APIClient()
+        api.force_authenticate(user=self.user)
+        url = '/api/v1/members/transactions/post_batch/'
+        response = api.post(url, {'entries': [self._entry(self.bob, 5)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        response = api.post(url, {'entries': [self._entry(self.bob, -10, transaction_type='redeem')]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertFalse(response.data['success'])
+
+        response = api.post(
+            '/api/v1/members/transactions/create_transaction/', self._entry(self.bob, 3), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['points_after'], 8)
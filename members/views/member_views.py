@@ -6,11 +6,10 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
 from django.contrib import messages
-from django.db.models import Q
 from django.core.paginator import Paginator
 from members.models import Member
+from members.services.member_search import ranked_search
 from core.models import Company
-from datetime import datetime
 
 
 @login_required
@@ -24,15 +23,6 @@ def member_list(request):
     # Base queryset
     members = Member.objects.select_related('company')
     
-    # Apply search
-    if search:
-        members = members.filter(
-            Q(full_name__icontains=search) |
-            Q(member_code__icontains=search) |
-            Q(phone__icontains=search) |
-            Q(email__icontains=search)
-        )
-    
     # Apply company filter
     if company_id:
         members = members.filter(company_id=company_id)
@@ -41,8 +31,11 @@ def member_list(request):
     if tier:
         members = members.filter(tier=tier)
     
-    # Apply ordering
-    members = members.order_by('-joined_date', 'full_name')
+    # Apply search (ranked prefix match) / ordering
+    if search:
+        members = ranked_search(members, search)
+    else:
+        members = members.order_by('-joined_date', 'full_name')
     
     # Pagination
     paginator = Paginator(members, 10)
@@ -92,26 +85,9 @@ def member_create(request):
             # Get company
             company = Company.objects.get(pk=company_id)
             
-            # Generate member code
-            year_month = datetime.now().strftime('%Y%m')
-            last_member = Member.objects.filter(
-                company=company,
-                member_code__startswith=f'MB-{company.code}-{year_month}'
-            ).order_by('-member_code').first()
-            
-            if last_member:
-                last_seq = int(last_member.member_code.split('-')[-1])
-                new_seq = last_seq + 1
-            else:
-                new_seq = 1
-            
-            member_code = f'MB-{company.code}-{year_month}-{new_seq:04d}'
-            
-            # Create member
-            member_data['created_by'] = request.user
+            # Create member (Member.save allocates the member code)
             member = Member.objects.create(
                 company=company,
-                member_code=member_code,
                 full_name=full_name,
                 phone=phone,
                 email=email,
@@ -7,6 +7,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db.models import Q, Prefetch
+from sync_api.cursor import paginate_changes, seq_params
+from sync_api.store_scope import get_store_scope
 from products.models import (
     Category, Product, ProductPhoto, Modifier, ModifierOption,
     ProductModifier, TableArea, Tables, KitchenStation, PrinterConfig
@@ -18,6 +20,22 @@ from .serializers import (
 )
 
 
+def _resolve_store(company_id, store_id):
+    """
+    Cached store scope lookup shared by the sync actions
+
+    Returns:
+        (scope, error_response) - exactly one of them is None
+    """
+    scope = get_store_scope(company_id, store_id)
+    if scope is None or not scope.store.is_active:
+        return None, Response(
+            {'error': 'Store not found or does not belong to the specified company'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return scope, None
+
+
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """Category master data - Edge pulls categories"""
     queryset = Category.objects.filter(is_active=True)
@@ -31,11 +49,12 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         
         Query params:
         - company_id (required): Company ID for the edge location
-        - store_id (optional): Store ID (for reference)
+        - store_id (optional): Limit to brands operating in this store
         - brand_id (optional): Filter by specific brand
         - last_sync (optional): ISO datetime for incremental sync
         
-        Categories are brand-scoped, so Edge gets all categories from all brands in the company
+        Categories are brand-scoped, so without store_id / brand_id Edge gets all categories
+        from all brands in the company
         """
         company_id = request.query_params.get('company_id')
         store_id = request.query_params.get('store_id')
@@ -51,9 +70,14 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         # Filter by company through brand relationship
         queryset = self.get_queryset().filter(brand__company_id=company_id)
         
-        # Optional: Filter by specific brand
+        # Optional: Filter by specific brand, else by the brands in the store
         if brand_id:
             queryset = queryset.filter(brand_id=brand_id)
+        elif store_id:
+            scope, error = _resolve_store(company_id, store_id)
+            if error:
+                return error
+            queryset = queryset.filter(brand_id__in=scope.brand_ids)
         
         # Incremental sync
         if last_sync:
@@ -111,10 +135,12 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         # Optional: Filter by specific brand (for single-brand stores)
         if brand_id:
             queryset = queryset.filter(brand_id=brand_id)
-        else:
-            # For food court: get all brands in the company
-            # Edge will receive products from all brands
-            pass
+        elif store_id:
+            # For food court: get all brands operating in the store
+            scope, error = _resolve_store(company_id, store_id)
+            if error:
+                return error
+            queryset = queryset.filter(brand_id__in=scope.brand_ids)
         
         # Optional: Filter by category
         if category_id:
@@ -149,7 +175,7 @@ class ModifierViewSet(viewsets.ReadOnlyModelViewSet):
         
         Query params (GET) or Body (POST):
         - company_id (required): Company ID for the edge location
-        - store_id (optional): Store ID (for reference)
+        - store_id (optional): Limit to brands operating in this store
         - brand_id (optional): Filter by specific brand
         - last_sync (optional): ISO datetime for incremental sync
         
@@ -181,9 +207,14 @@ class ModifierViewSet(viewsets.ReadOnlyModelViewSet):
         # Filter by company through brand relationship
         queryset = self.get_queryset().filter(brand__company_id=company_id)
         
-        # Optional: Filter by specific brand
+        # Optional: Filter by specific brand, else by the brands in the store
         if brand_id:
             queryset = queryset.filter(brand_id=brand_id)
+        elif store_id:
+            scope, error = _resolve_store(company_id, store_id)
+            if error:
+                return error
+            queryset = queryset.filter(brand_id__in=scope.brand_ids)
         
         # Incremental sync
         if last_sync:
@@ -257,6 +288,10 @@ class TableAreaViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        _, error = _resolve_store(company_id, store_id)
+        if error:
+            return error
+        
         # Filter by company and store
         queryset = self.get_queryset().filter(
             company_id=company_id,
@@ -312,6 +347,10 @@ class TableViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        _, error = _resolve_store(company_id, store_id)
+        if error:
+            return error
+        
         # Filter by company and store through area relationship
         queryset = self.get_queryset().filter(
             area__company_id=company_id,
@@ -347,6 +386,8 @@ class KitchenStationViewSet(viewsets.ReadOnlyModelViewSet):
         Query params:
         - company_id (required): Company ID for the edge location
         - store_id (required): Store ID - Kitchen stations are store-specific
+        - since_seq (optional): next_seq from the previous sync
+        - limit (optional): Page size for since_seq syncs
         
         Kitchen stations are ALWAYS store-specific (not company-wide or brand-wide)
         Each store has its own kitchen configuration
@@ -366,20 +407,34 @@ class KitchenStationViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        _, error = _resolve_store(company_id, store_id)
+        if error:
+            return error
+        
+        try:
+            since_seq, limit = seq_params(request.query_params)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'since_seq must be a non-negative integer and limit a positive integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         # Filter by company and store (kitchen stations are store-specific)
         queryset = self.get_queryset().filter(
             company_id=company_id,
             store_id=store_id
         )
+        stations, cursor = paginate_changes(queryset, company_id, since_seq, limit)
         
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(stations, many=True)
         
         return Response({
-            'count': queryset.count(),
+            'count': len(serializer.data),
             'last_sync': timezone.now().isoformat(),
             'company_id': company_id,
             'store_id': store_id,
-            'data': serializer.data
+            'data': serializer.data,
+            **cursor,
         })
 
 
@@ -0,0 +1,67 @@
+# Generated manually for change sequence sync cursor
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_rename_table_to_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Per-company change sequence for incremental edge sync'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Per-company change sequence for incremental edge sync'),
+        ),
+        migrations.AddField(
+            model_name='modifier',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Per-company change sequence for incremental edge sync'),
+        ),
+        migrations.AddField(
+            model_name='tablearea',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Per-company change sequence for incremental edge sync'),
+        ),
+        migrations.AddField(
+            model_name='tables',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Per-company change sequence for incremental edge sync'),
+        ),
+        migrations.AddField(
+            model_name='kitchenstation',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Per-company change sequence for incremental edge sync'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['brand', 'change_seq'], name='category_brand_i_366c64_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['brand', 'change_seq'], name='product_brand_i_4e3b8e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='modifier',
+            index=models.Index(fields=['brand', 'change_seq'], name='modifier_brand_i_0f9cd3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tablearea',
+            index=models.Index(fields=['company', 'change_seq'], name='table_area_company_01b851_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tables',
+            index=models.Index(fields=['area', 'change_seq'], name='tables_area_id_2a68be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kitchenstation',
+            index=models.Index(fields=['store', 'change_seq'], name='kitchen_sta_store_i_f1d793_idx'),
+        ),
+    ]
@@ -11,9 +11,10 @@ import uuid
 from django.db import models
 from django.core.validators import MinValueValidator
 from core.models import Brand, User
+from sync_api.models import ChangeSequenceMixin
 
 
-class Category(models.Model):
+class Category(ChangeSequenceMixin, models.Model):
     """
     Product Category - Hierarchical, Brand-scoped
     Example: Makanan → Ayam → Ayam Geprek
@@ -35,6 +36,8 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    sync_company_field = 'brand__company_id'
+    
     class Meta:
         db_table = 'category'
         verbose_name = 'Category'
@@ -43,6 +46,7 @@ class Category(models.Model):
         indexes = [
             models.Index(fields=['brand', 'is_active']),
             models.Index(fields=['parent']),
+            models.Index(fields=['brand', 'change_seq']),
         ]
     
     def __str__(self):
@@ -51,7 +55,7 @@ class Category(models.Model):
         return self.name
 
 
-class Product(models.Model):
+class Product(ChangeSequenceMixin, models.Model):
     """
     Product/Menu Item - Multi-tenant, SKU unique per brand
     """
@@ -94,6 +98,8 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    sync_company_field = 'brand__company_id'
+    
     class Meta:
         db_table = 'product'
         verbose_name = 'Product'
@@ -104,6 +110,7 @@ class Product(models.Model):
             models.Index(fields=['brand', 'is_active']),
             models.Index(fields=['category', 'is_active']),
             models.Index(fields=['sku']),
+            models.Index(fields=['brand', 'change_seq']),
         ]
     
     def __str__(self):
@@ -146,7 +153,7 @@ class ProductPhoto(models.Model):
         return f"{self.product.name} - Photo {self.sort_order}"
 
 
-class Modifier(models.Model):
+class Modifier(ChangeSequenceMixin, models.Model):
     """
     Modifier Group - Customization options (Size, Spice Level, Extras)
     Example: "Tingkat Kepedasan", "Ukuran", "Topping"
@@ -167,6 +174,8 @@ class Modifier(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    sync_company_field = 'brand__company_id'
+    
     class Meta:
         db_table = 'modifier'
         verbose_name = 'Modifier'
@@ -174,6 +183,7 @@ class Modifier(models.Model):
         ordering = ['name']
         indexes = [
             models.Index(fields=['brand', 'is_active']),
+            models.Index(fields=['brand', 'change_seq']),
         ]
     
     def __str__(self):
@@ -240,7 +250,7 @@ class ProductModifier(models.Model):
 # TABLE MANAGEMENT (Dine-In)
 # =============================================================================
 
-class TableArea(models.Model):
+class TableArea(ChangeSequenceMixin, models.Model):
     """
     Dining Area - Sections in restaurant
     Example: Indoor, Outdoor, VIP Room
@@ -262,6 +272,8 @@ class TableArea(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    sync_company_field = 'brand__company_id'
+    
     class Meta:
         db_table = 'table_area'
         verbose_name = 'Table Area'
@@ -271,6 +283,7 @@ class TableArea(models.Model):
             models.Index(fields=['company', 'is_active']),
             models.Index(fields=['brand', 'is_active']),
             models.Index(fields=['store', 'is_active']),
+            models.Index(fields=['company', 'change_seq']),
         ]
     
     def __str__(self):
@@ -288,7 +301,7 @@ class TableArea(models.Model):
         super().save(*args, **kwargs)
 
 
-class Tables(models.Model):
+class Tables(ChangeSequenceMixin, models.Model):
     """
     Tables - Individual tables in restaurant
     Status managed by Edge, HO stores template only
@@ -323,6 +336,8 @@ class Tables(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    sync_company_field = 'area__brand__company_id'
+    
     class Meta:
         db_table = 'tables'  # Changed from 'table' to 'tables' to avoid SQL keyword
         verbose_name = 'Table'
@@ -331,6 +346,7 @@ class Tables(models.Model):
         indexes = [
             models.Index(fields=['area', 'is_active']),
             models.Index(fields=['number']),
+            models.Index(fields=['area', 'change_seq']),
         ]
     
     def __str__(self):
@@ -391,7 +407,7 @@ class TableGroupMember(models.Model):
 # KITCHEN CONFIGURATION
 # =============================================================================
 
-class KitchenStation(models.Model):
+class KitchenStation(ChangeSequenceMixin, models.Model):
     """
     Kitchen Station - Production areas per Store (Store-specific only)
     Example: Main Kitchen, Bar, Dessert Station
@@ -421,6 +437,7 @@ class KitchenStation(models.Model):
             models.Index(fields=['store', 'is_active']),
             models.Index(fields=['company', 'brand', 'store']),
             models.Index(fields=['code']),
+            models.Index(fields=['store', 'change_seq']),
         ]
     
     def __str__(self):
@@ -0,0 +1,25 @@
+"""
+Product Signals
+Keep parent timestamps and change sequences current for rows that have
+no updated_at / change_seq of their own
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from products.models import Modifier, ModifierOption, Product, ProductModifier
+
+
+@receiver(post_save, sender=ModifierOption)
+@receiver(post_delete, sender=ModifierOption)
+def modifier_option_changed(sender, instance, **kwargs):
+    """Option edits show up as a modifier change for incremental sync"""
+    Modifier.touch_change_seq([instance.modifier_id], updated_at=timezone.now())
+
+
+@receiver(post_save, sender=ProductModifier)
+@receiver(post_delete, sender=ProductModifier)
+def product_modifier_changed(sender, instance, **kwargs):
+    """Product-modifier links show up as a product change for incremental sync"""
+    Product.touch_change_seq([instance.product_id], updated_at=timezone.now())
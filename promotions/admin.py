@@ -3,6 +3,7 @@ Admin configuration for Promotions app
 """
 
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from .models import (
     Promotion, PackagePromotion, PackageItem, PromotionTier,
@@ -121,13 +122,26 @@ class PromotionAdmin(admin.ModelAdmin):
         self.message_user(request, f"{queryset.count()} promotions selected for duplication")
     duplicate_promotion.short_description = "Duplicate selected promotions"
     
+    def _set_active(self, queryset, is_active):
+        """
+        Save each flipped row (not queryset.update) so the sync signals run:
+        deactivation tombstones, change_seq, updated_at, compiled cache
+        """
+        count = 0
+        with transaction.atomic():
+            for promo in queryset.exclude(is_active=is_active):
+                promo.is_active = is_active
+                promo.save(update_fields=['is_active', 'updated_at'])
+                count += 1
+        return count
+    
     def activate_promotions(self, request, queryset):
-        count = queryset.update(is_active=True)
+        count = self._set_active(queryset, True)
         self.message_user(request, f"{count} promotions activated")
     activate_promotions.short_description = "Activate selected promotions"
     
     def deactivate_promotions(self, request, queryset):
-        count = queryset.update(is_active=False)
+        count = self._set_active(queryset, False)
         self.message_user(request, f"{count} promotions deactivated")
     deactivate_promotions.short_description = "Deactivate selected promotions"
 
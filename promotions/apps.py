@@ -5,3 +5,6 @@ class PromotionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "promotions"
     verbose_name = "Promotion Engine"
+
+    def ready(self):
+        import promotions.signals  # noqa: F401
@@ -0,0 +1,34 @@
+# Generated manually for CompiledPromotion model
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promotions', '0004_promotionsyncsettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompiledPromotion',
+            fields=[
+                ('promotion', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True,
+                    related_name='compiled',
+                    serialize=False,
+                    to='promotions.promotion'
+                )),
+                ('content_hash', models.CharField(max_length=64)),
+                ('compiled_data', models.JSONField()),
+                ('compiled_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Compiled Promotion',
+                'verbose_name_plural': 'Compiled Promotions',
+                'db_table': 'compiled_promotion',
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated manually for change sequence sync cursor
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promotions', '0005_compiledpromotion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotion',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Per-company change sequence for incremental edge sync'),
+        ),
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(fields=['company', 'change_seq'], name='promotion_company_64eff3_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated manually for idempotent promotion usage ingest
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promotions', '0006_promotion_change_seq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='promotionusage',
+            name='used_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='When the edge applied it'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='promotionusage',
+            unique_together={('promotion', 'bill_id')},
+        ),
+    ]
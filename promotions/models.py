@@ -11,9 +11,10 @@ from django.utils import timezone
 from core.models import Company, Brand, Store, User
 from products.models import Category, Product
 from members.models import Member
+from sync_api.models import ChangeSequenceMixin
 
 
-class Promotion(models.Model):
+class Promotion(ChangeSequenceMixin, models.Model):
     """
     Promotion - Comprehensive promotion engine
     Supports 12+ promotion types with complex rules
@@ -325,6 +326,7 @@ class Promotion(models.Model):
             models.Index(fields=['promo_type']),
             models.Index(fields=['code']),
             models.Index(fields=['execution_priority']),
+            models.Index(fields=['company', 'change_seq']),
         ]
     
     def __str__(self):
@@ -534,13 +536,15 @@ class PromotionUsage(models.Model):
     bill_id = models.UUIDField(help_text="Reference to Bill")
     brand = models.ForeignKey(Brand, on_delete=models.PROTECT, related_name='promotion_usages')
     discount_amount = models.DecimalField(max_digits=10, decimal_places=2)
-    used_at = models.DateTimeField(auto_now_add=True)
+    used_at = models.DateTimeField(default=timezone.now, help_text="When the edge applied it")
     
     class Meta:
         db_table = 'promotion_usage'
         verbose_name = 'Promotion Usage'
         verbose_name_plural = 'Promotion Usages'
         ordering = ['-used_at']
+        # Edge uploads are retried - one usage per promotion per bill
+        unique_together = [['promotion', 'bill_id']]
         indexes = [
             models.Index(fields=['promotion', 'member', 'used_at']),
             models.Index(fields=['promotion', 'customer_phone', 'used_at']),
@@ -715,3 +719,27 @@ class PromotionApproval(models.Model):
             return True  # Company scope can approve all
         # TODO: Check brand match for brand/store scope
         return True
+
+
+class CompiledPromotion(models.Model):
+    """
+    Compiled Promotion JSON (DB fallback for the compiled-promotion cache)
+    Keyed by promotion plus a content hash; invalidated by signals
+    """
+    promotion = models.OneToOneField(
+        Promotion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='compiled'
+    )
+    content_hash = models.CharField(max_length=64)
+    compiled_data = models.JSONField()
+    compiled_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'compiled_promotion'
+        verbose_name = 'Compiled Promotion'
+        verbose_name_plural = 'Compiled Promotions'
+    
+    def __str__(self):
+        return f"{self.promotion_id} ({self.content_hash[:8]})"
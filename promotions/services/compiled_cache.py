@@ -0,0 +1,183 @@
+"""
+Compiled Promotion Cache
+Persistent cache of compiled promotion JSON for Edge sync
+
+Entries are keyed by promotion id and carry a content hash; an entry is
+only served when its hash matches the current promotion row. The primary
+store is the default Django cache (Redis in production), with the
+CompiledPromotion table as a fallback that survives cache flushes.
+Entries are invalidated by the signals in promotions/signals.py.
+"""
+
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from promotions.models import CompiledPromotion, Promotion
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledPromotionCache:
+    """
+    Two-level cache (Django cache + DB table) for compiled promotions
+
+    Usage:
+        cached, missing = compiled_promotion_cache.get_many(promotions)
+        compiled_promotion_cache.set_many(missing, compiled_list)
+    """
+
+    KEY_PREFIX = 'compiled_promotion'
+    STATS_KEYS = ('hits', 'misses')
+
+    def __init__(self, compiler_version: str = "1.0"):
+        self.compiler_version = compiler_version
+
+    @property
+    def timeout(self) -> int:
+        return getattr(settings, 'COMPILED_PROMOTION_CACHE_TIMEOUT', 86400)
+
+    def make_key(self, promotion_id) -> str:
+        return f"{self.KEY_PREFIX}:{promotion_id}"
+
+    def content_hash(self, promotion: Promotion) -> str:
+        """
+        Hash of the promotion row state the compiled JSON was built from
+
+        Relation changes (M2M, tiers, package items) are handled by signal
+        invalidation, so the row's updated_at plus compiler version is enough.
+        """
+        updated_at = promotion.updated_at.isoformat() if promotion.updated_at else ''
+        raw = f"{promotion.pk}:{updated_at}:{self.compiler_version}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    # ============================================================================
+    # READ / WRITE
+    # ============================================================================
+
+    def get_many(self, promotions: Iterable[Promotion]) -> Tuple[Dict[str, Dict], List[Promotion]]:
+        """
+        Look up compiled JSON for promotions
+
+        Args:
+            promotions: Promotion instances
+
+        Returns:
+            (cached, missing) - dict of promotion id -> compiled JSON, and the
+            promotions that have no valid entry and must be compiled
+        """
+        promotions = list(promotions)
+        hashes = {str(p.pk): self.content_hash(p) for p in promotions}
+        cached = {}
+
+        # Level 1: Django cache (Redis)
+        entries = cache.get_many([self.make_key(pk) for pk in hashes])
+        for pk, content_hash in hashes.items():
+            entry = entries.get(self.make_key(pk))
+            if entry and entry.get('hash') == content_hash:
+                cached[pk] = entry['data']
+
+        # Level 2: DB fallback, re-populating the Django cache on hit
+        remaining = [pk for pk in hashes if pk not in cached]
+        if remaining:
+            refill = {}
+            rows = CompiledPromotion.objects.filter(promotion_id__in=remaining).values_list(
+                'promotion_id', 'content_hash', 'compiled_data'
+            )
+            for promotion_id, content_hash, data in rows:
+                pk = str(promotion_id)
+                if hashes[pk] == content_hash:
+                    cached[pk] = data
+                    refill[self.make_key(pk)] = {'hash': content_hash, 'data': data}
+            if refill:
+                cache.set_many(refill, self.timeout)
+
+        missing = [p for p in promotions if str(p.pk) not in cached]
+        self._bump('hits', len(cached))
+        self._bump('misses', len(missing))
+        return cached, missing
+
+    def set_many(self, promotions: List[Promotion], compiled: List[Dict]) -> None:
+        """
+        Store compiled JSON for promotions in both cache levels
+
+        Args:
+            promotions: Promotion instances that were compiled
+            compiled: Compiled dicts (matched to promotions by id)
+        """
+        by_id = {item['id']: item for item in compiled}
+        entries = {}
+        rows = []
+        for promotion in promotions:
+            data = by_id.get(str(promotion.pk))
+            if data is None:
+                continue
+            content_hash = self.content_hash(promotion)
+            entries[self.make_key(promotion.pk)] = {'hash': content_hash, 'data': data}
+            rows.append(CompiledPromotion(
+                promotion_id=promotion.pk,
+                content_hash=content_hash,
+                compiled_data=data,
+            ))
+
+        if not rows:
+            return
+
+        cache.set_many(entries, self.timeout)
+        try:
+            CompiledPromotion.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['promotion'],
+                update_fields=['content_hash', 'compiled_data', 'compiled_at'],
+            )
+        except Exception as e:
+            # The Django cache already holds the entries; the DB copy is best effort
+            logger.warning(f"Could not persist compiled promotions: {str(e)}")
+
+    def invalidate(self, promotion_ids: Iterable) -> None:
+        """Drop cached entries for the given promotion ids"""
+        promotion_ids = [pk for pk in promotion_ids if pk]
+        if not promotion_ids:
+            return
+        cache.delete_many([self.make_key(pk) for pk in promotion_ids])
+        CompiledPromotion.objects.filter(promotion_id__in=promotion_ids).delete()
+
+    # ============================================================================
+    # STATS
+    # ============================================================================
+
+    def _stats_key(self, name: str) -> str:
+        return f"{self.KEY_PREFIX}:stats:{name}"
+
+    def _bump(self, name: str, amount: int) -> None:
+        if not amount:
+            return
+        key = self._stats_key(name)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Counter does not exist yet (or expired)
+            if not cache.add(key, amount, None):
+                cache.incr(key, amount)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and hit rate"""
+        values = cache.get_many([self._stats_key(name) for name in self.STATS_KEYS])
+        hits = values.get(self._stats_key('hits'), 0)
+        misses = values.get(self._stats_key('misses'), 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        cache.delete_many([self._stats_key(name) for name in self.STATS_KEYS])
+
+
+compiled_promotion_cache = CompiledPromotionCache()
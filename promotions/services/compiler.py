@@ -12,9 +12,10 @@ Version: 1.0
 
 from typing import Dict, List, Optional
 from decimal import Decimal
-from django.db.models import Q
+from django.db.models import Q, Prefetch, prefetch_related_objects
 from django.utils import timezone
-from promotions.models import Promotion, PromotionTier, PackagePromotion
+from promotions.models import Promotion, PromotionTier, PackagePromotion, PackageItem
+from promotions.services.compiled_cache import CompiledPromotionCache
 from products.models import Product, Category
 from core.models import Store
 import logging
@@ -30,11 +31,15 @@ class PromotionCompiler:
     Usage:
         compiler = PromotionCompiler()
         json_data = compiler.compile_promotion(promotion)
+    
+    Batch compilation (compile_multiple) reads from and writes to the
+    compiled-promotion cache unless created with use_cache=False.
     """
     
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.version = "1.0"
         self.compiler_name = "PromotionCompiler"
+        self.cache = CompiledPromotionCache(self.version) if use_cache else None
     
     def compile_promotion(self, promotion: Promotion) -> Dict:
         """
@@ -136,18 +141,18 @@ class PromotionCompiler:
         
         # Categories
         if promotion.apply_to == 'category':
-            scope["categories"] = [str(cat_id) for cat_id in promotion.categories.values_list('id', flat=True)]
-            scope["exclude_categories"] = [str(cat_id) for cat_id in promotion.exclude_categories.values_list('id', flat=True)]
+            scope["categories"] = self._related_ids(promotion, 'categories')
+            scope["exclude_categories"] = self._related_ids(promotion, 'exclude_categories')
         
         # Products
         if promotion.apply_to == 'product':
-            scope["products"] = [str(prod_id) for prod_id in promotion.products.values_list('id', flat=True)]
-            scope["exclude_products"] = [str(prod_id) for prod_id in promotion.exclude_products.values_list('id', flat=True)]
+            scope["products"] = self._related_ids(promotion, 'products')
+            scope["exclude_products"] = self._related_ids(promotion, 'exclude_products')
         
         # For 'all' - still need exclusions
         if promotion.apply_to == 'all':
-            scope["exclude_categories"] = [str(cat_id) for cat_id in promotion.exclude_categories.values_list('id', flat=True)]
-            scope["exclude_products"] = [str(prod_id) for prod_id in promotion.exclude_products.values_list('id', flat=True)]
+            scope["exclude_categories"] = self._related_ids(promotion, 'exclude_categories')
+            scope["exclude_products"] = self._related_ids(promotion, 'exclude_products')
         
         return scope
     
@@ -167,19 +172,20 @@ class PromotionCompiler:
         if promotion.all_stores:
             targeting["stores"] = "all"
         else:
-            targeting["stores"] = [str(store_id) for store_id in promotion.stores.values_list('id', flat=True)]
+            targeting["stores"] = self._related_ids(promotion, 'stores')
         
         # Brand targeting
         if promotion.scope == 'company':
             targeting["brands"] = "all"
         elif promotion.scope == 'brands':
-            targeting["brands"] = [str(brand_id) for brand_id in promotion.brands.values_list('id', flat=True)]
-        elif promotion.scope == 'single' and promotion.brand:
-            targeting["brands"] = [str(promotion.brand.id)]
+            targeting["brands"] = self._related_ids(promotion, 'brands')
+        elif promotion.scope == 'single' and promotion.brand_id:
+            targeting["brands"] = [str(promotion.brand_id)]
         
         # Exclude brands
-        if promotion.exclude_brands.exists():
-            targeting["exclude_brands"] = [str(brand_id) for brand_id in promotion.exclude_brands.values_list('id', flat=True)]
+        exclude_brands = self._related_ids(promotion, 'exclude_brands')
+        if exclude_brands:
+            targeting["exclude_brands"] = exclude_brands
         
         # Customer targeting
         targeting["member_only"] = promotion.member_only
@@ -267,8 +273,8 @@ class PromotionCompiler:
         }
         
         # If specific get_product is defined
-        if promotion.get_product:
-            rules["get_product_id"] = str(promotion.get_product.id)
+        if promotion.get_product_id:
+            rules["get_product_id"] = str(promotion.get_product_id)
             rules["same_product_only"] = False
         else:
             rules["same_product_only"] = True
@@ -280,19 +286,15 @@ class PromotionCompiler:
         Type 4: Combo Deal
         Example: Burger + Fries + Drink = Rp 45,000
         """
-        combo_products = list(
-            promotion.combo_products.values('id', 'name', 'price')
-        )
-        
         return {
             "type": "combo",
             "combo_price": float(promotion.combo_price),
             "products": [
                 {
-                    "product_id": str(p['id']),
+                    "product_id": product_id,
                     "quantity": 1,  # Default, can be enhanced
                 }
-                for p in combo_products
+                for product_id in self._related_ids(promotion, 'combo_products')
             ],
             "all_required": True,
         }
@@ -307,12 +309,12 @@ class PromotionCompiler:
             "min_purchase": float(promotion.min_purchase),
         }
         
-        if promotion.required_product:
-            rules["trigger_product_id"] = str(promotion.required_product.id)
+        if promotion.required_product_id:
+            rules["trigger_product_id"] = str(promotion.required_product_id)
             rules["trigger_min_qty"] = promotion.buy_quantity or 1
         
-        if promotion.get_product:
-            rules["free_product_id"] = str(promotion.get_product.id)
+        if promotion.get_product_id:
+            rules["free_product_id"] = str(promotion.get_product_id)
             rules["free_quantity"] = promotion.get_quantity or 1
         
         return rules
@@ -377,10 +379,10 @@ class PromotionCompiler:
                     "is_required": item.is_required,
                 }
                 
-                if item.product:
-                    item_data["product_id"] = str(item.product.id)
-                elif item.category:
-                    item_data["category_id"] = str(item.category.id)
+                if item.product_id:
+                    item_data["product_id"] = str(item.product_id)
+                elif item.category_id:
+                    item_data["category_id"] = str(item.category_id)
                     item_data["min_selection"] = item.min_selection
                     item_data["max_selection"] = item.max_selection
                 
@@ -422,12 +424,12 @@ class PromotionCompiler:
             "upsell_message": promotion.upsell_message,
         }
         
-        if promotion.required_product:
-            rules["required_product_id"] = str(promotion.required_product.id)
+        if promotion.required_product_id:
+            rules["required_product_id"] = str(promotion.required_product_id)
             rules["required_min_qty"] = promotion.buy_quantity or 1
         
-        if promotion.upsell_product:
-            rules["upsell_product_id"] = str(promotion.upsell_product.id)
+        if promotion.upsell_product_id:
+            rules["upsell_product_id"] = str(promotion.upsell_product_id)
             rules["special_price"] = float(promotion.upsell_special_price)
         
         return rules
@@ -439,7 +441,13 @@ class PromotionCompiler:
         """
         tiers = []
         
-        for tier in promotion.tiers.filter(is_active=True).order_by('tier_order'):
+        if 'tiers' in getattr(promotion, '_prefetched_objects_cache', {}):
+            # Batch mode: tiers were prefetched already filtered and ordered
+            active_tiers = promotion.tiers.all()
+        else:
+            active_tiers = promotion.tiers.filter(is_active=True).order_by('tier_order')
+        
+        for tier in active_tiers:
             tier_data = {
                 "tier_name": tier.tier_name,
                 "min_amount": float(tier.min_amount),
@@ -448,8 +456,8 @@ class PromotionCompiler:
                 "discount_value": float(tier.discount_value),
             }
             
-            if tier.free_product:
-                tier_data["free_product_id"] = str(tier.free_product.id)
+            if tier.free_product_id:
+                tier_data["free_product_id"] = str(tier.free_product_id)
             
             if tier.discount_type == 'points_multiplier':
                 tier_data["points_multiplier"] = float(tier.points_multiplier)
@@ -491,39 +499,132 @@ class PromotionCompiler:
         }
         
         if promotion.cross_brand_type == 'trigger_benefit':
-            cross_brand["trigger_brands"] = [str(brand_id) for brand_id in promotion.trigger_brands.values_list('id', flat=True)]
+            cross_brand["trigger_brands"] = self._related_ids(promotion, 'trigger_brands')
             cross_brand["trigger_min_amount"] = float(promotion.trigger_min_amount or 0)
-            cross_brand["benefit_brands"] = [str(brand_id) for brand_id in promotion.benefit_brands.values_list('id', flat=True)]
+            cross_brand["benefit_brands"] = self._related_ids(promotion, 'benefit_brands')
         
         # Add custom rules from JSON field
         if promotion.cross_brand_rules:
             cross_brand["rules"] = promotion.cross_brand_rules
         
         return cross_brand
-    
+
+    def _related_ids(self, promotion: Promotion, relation: str) -> List[str]:
+        """
+        Return related object ids for an M2M relation as strings
+
+        Uses the prefetch cache when the promotion went through
+        prefetch_for_compile(), otherwise runs a single values_list query.
+        """
+        manager = getattr(promotion, relation)
+        if relation in getattr(promotion, '_prefetched_objects_cache', {}):
+            return [str(obj.pk) for obj in manager.all()]
+        return [str(pk) for pk in manager.values_list('id', flat=True)]
+
     # ============================================================================
     # BATCH OPERATIONS
     # ============================================================================
-    
+
+    # (lookup, predicate) pairs - each lookup is loaded with one query for
+    # all promotions matching the predicate, so the number of queries does
+    # not depend on how many promotions are compiled.
+    BATCH_PREFETCHES = (
+        ('categories', lambda p: p.apply_to == 'category'),
+        ('exclude_categories', lambda p: p.apply_to in ('category', 'all')),
+        ('products', lambda p: p.apply_to == 'product'),
+        ('exclude_products', lambda p: p.apply_to in ('product', 'all')),
+        ('stores', lambda p: not p.all_stores),
+        ('brands', lambda p: p.scope == 'brands'),
+        ('exclude_brands', lambda p: True),
+        ('combo_products', lambda p: p.promo_type == 'combo'),
+        ('tiers', lambda p: p.promo_type == 'threshold_tier'),
+        ('package', lambda p: p.promo_type == 'package'),
+        ('trigger_brands', lambda p: p.is_cross_brand and p.cross_brand_type == 'trigger_benefit'),
+        ('benefit_brands', lambda p: p.is_cross_brand and p.cross_brand_type == 'trigger_benefit'),
+    )
+
+    def _build_prefetch(self, lookup: str):
+        """Build the Prefetch object used for a batch lookup"""
+        if lookup == 'tiers':
+            return Prefetch(
+                'tiers',
+                queryset=PromotionTier.objects.filter(is_active=True).order_by('tier_order')
+            )
+        if lookup == 'package':
+            return Prefetch('package', queryset=PackagePromotion.objects.prefetch_related(
+                Prefetch('items', queryset=PackageItem.objects.all())
+            ))
+        related_model = Promotion._meta.get_field(lookup).related_model
+        # Only ids are needed for the compiled JSON
+        return Prefetch(lookup, queryset=related_model.objects.only('id'))
+
+    def prefetch_for_compile(self, promotions) -> List[Promotion]:
+        """
+        Load every relation the compiler needs for a set of promotions
+
+        Runs at most one query per relation in BATCH_PREFETCHES (plus one for
+        package items), regardless of the number of promotions. The compile_*
+        methods then read from the prefetch cache instead of querying per row.
+
+        Args:
+            promotions: QuerySet or list of Promotion instances
+
+        Returns:
+            List of Promotion instances with relations prefetched
+        """
+        promotions = list(promotions)
+
+        for lookup, predicate in self.BATCH_PREFETCHES:
+            matching = [p for p in promotions if predicate(p)]
+            if matching:
+                prefetch_related_objects(matching, self._build_prefetch(lookup))
+
+        return promotions
+
     def compile_multiple(self, promotions: List[Promotion]) -> List[Dict]:
         """
         Compile multiple promotions (batch operation)
-        
+
+        Promotions with a valid compiled-promotion cache entry are served
+        from the cache. The rest have their relations prefetched for the
+        whole batch, so the query count stays constant no matter how many
+        promotions are compiled.
+
         Args:
-            promotions: List of Promotion instances
-            
+            promotions: QuerySet or list of Promotion instances
+
         Returns:
-            List of compiled promotion dicts
+            List of compiled promotion dicts (in input order)
         """
-        compiled = []
-        for promotion in promotions:
+        promotions = list(promotions)
+        cached = {}
+        to_compile = promotions
+        if self.cache is not None:
+            cached, to_compile = self.cache.get_many(promotions)
+
+        fresh = {}
+        for promotion in self.prefetch_for_compile(to_compile):
             try:
-                compiled.append(self.compile_promotion(promotion))
+                fresh[str(promotion.id)] = self.compile_promotion(promotion)
             except Exception as e:
                 logger.error(f"Error compiling promotion {promotion.id}: {str(e)}")
                 continue
+
+        if self.cache is not None and fresh:
+            self.cache.set_many(to_compile, list(fresh.values()))
+
+        compiled = []
+        for promotion in promotions:
+            key = str(promotion.id)
+            if key in cached:
+                compiled.append(cached[key])
+            elif key in fresh:
+                compiled.append(fresh[key])
         
-        logger.info(f"Batch compiled {len(compiled)} promotions")
+        logger.info(
+            f"Batch compiled {len(fresh)} promotions "
+            f"({len(cached)} served from cache)"
+        )
         return compiled
     
     def compile_for_store(self, store_id: str) -> List[Dict]:
@@ -0,0 +1,179 @@
+"""
+Promotion Usage Ingest
+Bulk, idempotent ingest of promotion usages uploaded by Edge Servers
+
+Edges upload thousands of usages at end of day and retry on timeouts.
+The whole batch is validated in memory, promotions / members are
+resolved with one query each, and rows are written with
+bulk_create(ignore_conflicts=True) against the unique
+(promotion, bill_id) key - a retried upload inserts nothing twice.
+Promotion.current_uses gets one aggregated F() update per promotion,
+counting only rows that were actually inserted; those promotions are then
+touched (updated_at, change_seq) so sync ETags and snapshots move too.
+"""
+
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from members.models import Member
+from promotions.models import Promotion, PromotionUsage
+from promotions.signals import touch_promotions
+
+logger = logging.getLogger(__name__)
+
+
+# Upper bound of usages accepted in one request
+MAX_USAGES_PER_REQUEST = 10000
+
+# Rows per INSERT / lookup round-trip
+USAGE_BATCH_SIZE = 1000
+
+DISCOUNT_LIMIT = Decimal('99999999.99')  # max_digits=10, decimal_places=2
+
+
+class UsageValidationError(ValueError):
+    pass
+
+
+def _uuid(value, field):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        raise UsageValidationError(f'{field} must be a UUID')
+
+
+def _parse_row(row):
+    """Validate one usage dict; returns the cleaned values"""
+    if not isinstance(row, dict):
+        raise UsageValidationError('usage must be an object')
+
+    promotion_id = _uuid(row.get('promotion_id'), 'promotion_id')
+    bill_id = _uuid(row.get('bill_id'), 'bill_id')
+
+    try:
+        discount_amount = Decimal(str(row.get('discount_amount'))).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise UsageValidationError('discount_amount must be a number')
+    if not discount_amount.is_finite() or discount_amount < 0 or discount_amount > DISCOUNT_LIMIT:
+        raise UsageValidationError('discount_amount out of range')
+
+    used_at = row.get('used_at')
+    if used_at:
+        try:
+            used_at = datetime.fromisoformat(str(used_at).replace('Z', '+00:00'))
+        except ValueError:
+            raise UsageValidationError('used_at must be an ISO 8601 datetime')
+        if timezone.is_naive(used_at):
+            used_at = timezone.make_aware(used_at)
+    else:
+        used_at = timezone.now()
+
+    customer_id = row.get('customer_id') or row.get('member_id')
+    member_id = _uuid(customer_id, 'customer_id') if customer_id else None
+
+    return {
+        'promotion_id': promotion_id,
+        'bill_id': bill_id,
+        'discount_amount': discount_amount,
+        'used_at': used_at,
+        'member_id': member_id,
+        'customer_phone': str(row.get('customer_phone') or '')[:20],
+    }
+
+
+def _chunks(items, size=USAGE_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def ingest_usages(usages):
+    """
+    Validate and persist a batch of usages
+
+    Args:
+        usages: List of usage dicts from the edge
+
+    Returns:
+        Dict with created, duplicates, errors (index, data, error), total
+    """
+    errors = []
+    parsed = []
+    seen = set()
+    duplicates = 0
+
+    for index, row in enumerate(usages):
+        try:
+            values = _parse_row(row)
+        except UsageValidationError as e:
+            errors.append({'index': index, 'data': row, 'error': str(e)})
+            continue
+        key = (values['promotion_id'], values['bill_id'])
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        parsed.append((index, row, values))
+
+    # One query each for promotions (with brand) and members
+    promotion_brands = dict(Promotion.objects.filter(
+        id__in={values['promotion_id'] for _, _, values in parsed}
+    ).values_list('id', 'brand_id'))
+    member_ids = {values['member_id'] for _, _, values in parsed if values['member_id']}
+    known_members = set(Member.objects.filter(id__in=member_ids).values_list('id', flat=True)) if member_ids else set()
+
+    rows = []
+    for index, row, values in parsed:
+        brand_id = promotion_brands.get(values['promotion_id'])
+        if brand_id is None:
+            errors.append({'index': index, 'data': row, 'error': 'Promotion not found'})
+            continue
+        member_id = values['member_id'] if values['member_id'] in known_members else None
+        rows.append(PromotionUsage(
+            id=uuid.uuid4(),
+            promotion_id=values['promotion_id'],
+            bill_id=values['bill_id'],
+            brand_id=brand_id,
+            member_id=member_id,
+            customer_phone=values['customer_phone'],
+            discount_amount=values['discount_amount'],
+            used_at=values['used_at'],
+        ))
+
+    inserted = Counter()
+    with transaction.atomic():
+        PromotionUsage.objects.bulk_create(rows, batch_size=USAGE_BATCH_SIZE, ignore_conflicts=True)
+
+        # ignore_conflicts doesn't report which rows went in; our generated
+        # ids only exist for rows that were actually inserted
+        for chunk in _chunks([row.id for row in rows]):
+            for promotion_id, count in PromotionUsage.objects.filter(id__in=chunk).order_by().values(
+                'promotion_id'
+            ).annotate(count=Count('id')).values_list('promotion_id', 'count'):
+                inserted[promotion_id] += count
+
+        # Sorted so concurrent uploads lock promotion rows in the same order
+        for promotion_id, count in sorted(inserted.items()):
+            Promotion.objects.filter(id=promotion_id).update(current_uses=F('current_uses') + count)
+
+    # current_uses is synced to Edges (compiled JSON, ETag, snapshots)
+    touch_promotions(list(inserted))
+
+    errors.sort(key=lambda error: error['index'])
+    created = sum(inserted.values())
+    duplicates += len(rows) - created
+    logger.info(
+        f"Usage ingest: total={len(usages)}, created={created}, duplicates={duplicates}, errors={len(errors)}"
+    )
+    return {
+        'created': created,
+        'duplicates': duplicates,
+        'errors': errors,
+        'total': len(usages),
+    }
@@ -0,0 +1,111 @@
+"""
+Promotion Signals
+Invalidate compiled-promotion cache entries when promotion data changes
+
+Changes to related rows (tiers, package, M2M) also bump the parent
+Promotion.updated_at so incremental sync and sync ETags pick them up.
+"""
+
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from promotions.models import PackageItem, PackagePromotion, Promotion, PromotionTier
+from promotions.services.compiled_cache import compiled_promotion_cache
+
+logger = logging.getLogger(__name__)
+
+
+# M2M relations that are part of the compiled JSON
+COMPILED_M2M_FIELDS = (
+    'brands',
+    'exclude_brands',
+    'stores',
+    'combo_products',
+    'categories',
+    'products',
+    'exclude_categories',
+    'exclude_products',
+    'trigger_brands',
+    'benefit_brands',
+)
+
+
+def invalidate_compiled(promotion_ids):
+    """Invalidate compiled cache entries for the given promotion ids"""
+    compiled_promotion_cache.invalidate(promotion_ids)
+    logger.debug(f"Invalidated compiled promotions: {list(promotion_ids)}")
+
+
+def touch_promotions(promotion_ids):
+    """
+    Bump updated_at and change_seq on promotions whose related data changed
+
+    Uses a queryset update, so post_save is not re-triggered.
+    """
+    promotion_ids = [pk for pk in promotion_ids if pk]
+    if promotion_ids:
+        Promotion.touch_change_seq(promotion_ids, updated_at=timezone.now())
+    invalidate_compiled(promotion_ids)
+
+
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+def promotion_changed(sender, instance, **kwargs):
+    invalidate_compiled([instance.pk])
+
+
+@receiver(post_save, sender=PromotionTier)
+@receiver(post_delete, sender=PromotionTier)
+@receiver(post_save, sender=PackagePromotion)
+@receiver(post_delete, sender=PackagePromotion)
+def promotion_child_changed(sender, instance, **kwargs):
+    touch_promotions([instance.promotion_id])
+
+
+@receiver(post_save, sender=PackageItem)
+@receiver(post_delete, sender=PackageItem)
+def package_item_changed(sender, instance, **kwargs):
+    promotion_id = PackagePromotion.objects.filter(
+        pk=instance.package_id
+    ).values_list('promotion_id', flat=True).first()
+    touch_promotions([promotion_id])
+
+
+def _promotion_m2m_handler(field_name):
+    """
+    Build the m2m_changed handler for one compiled M2M relation
+
+    Forward changes (promotion.categories.add(...)) invalidate the
+    promotion itself; reverse changes (category.promotions.add(...))
+    invalidate the promotions in pk_set.
+    """
+    field = Promotion._meta.get_field(field_name)
+    promotion_column = field.m2m_column_name()
+    target_field = field.m2m_reverse_field_name()
+
+    def handler(sender, instance, action, reverse, pk_set, **kwargs):
+        if not reverse:
+            if action in ('post_add', 'post_remove', 'post_clear'):
+                touch_promotions([instance.pk])
+        elif action in ('post_add', 'post_remove'):
+            touch_promotions(pk_set or [])
+        elif action == 'pre_clear':
+            # pk_set is not provided for clear(); collect affected promotions first
+            promotion_ids = sender.objects.filter(
+                **{target_field: instance.pk}
+            ).values_list(promotion_column, flat=True)
+            touch_promotions(list(promotion_ids))
+
+    return handler
+
+
+for _field_name in COMPILED_M2M_FIELDS:
+    m2m_changed.connect(
+        _promotion_m2m_handler(_field_name),
+        sender=getattr(Promotion, _field_name).through,
+        weak=False,
+        dispatch_uid=f'promotion_compiled_{_field_name}',
+    )
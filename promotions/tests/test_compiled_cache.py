@@ -0,0 +1,122 @@
+"""
+Tests for the compiled-promotion cache
+
+Covers cache hits/misses, the DB fallback, and signal invalidation.
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.models import Company, Brand, Store, User
+from products.models import Category
+from promotions.models import CompiledPromotion, Promotion, PromotionTier
+from promotions.services.compiled_cache import compiled_promotion_cache
+from promotions.services.compiler import PromotionCompiler
+
+
+@pytest.mark.django_db
+class TestCompiledPromotionCache:
+    """Test compiled promotion caching in compile_multiple"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.company = Company.objects.create(code='CACHE', name='Cache Company')
+        self.brand = Brand.objects.create(company=self.company, code='CACHE-BR1', name='Cache Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='CACHE-ST1',
+            store_name='Cache Store',
+            address='Cache Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='cacheuser', password='testpass123')
+        self.category = Category.objects.create(brand=self.brand, name='Food')
+        today = timezone.now().date()
+        self.promotion = Promotion.objects.create(
+            company=self.company,
+            brand=self.brand,
+            name='Cached Promotion',
+            code='CACHED-1',
+            promo_type='percent_discount',
+            discount_percent=Decimal('10.00'),
+            apply_to='category',
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=7),
+            created_by=self.user,
+        )
+        yield
+        cache.clear()
+
+    def _compile(self):
+        return PromotionCompiler().compile_multiple(Promotion.objects.filter(pk=self.promotion.pk))
+
+    def test_second_compile_is_a_hit(self):
+        """Compiled JSON is served from cache on the second call"""
+        first = self._compile()
+        second = self._compile()
+
+        assert second == first
+        stats = compiled_promotion_cache.stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_db_fallback_when_cache_is_flushed(self):
+        """The DB table serves entries after the Django cache is cleared"""
+        first = self._compile()
+        assert CompiledPromotion.objects.filter(promotion=self.promotion).exists()
+
+        cache.clear()
+        second = self._compile()
+
+        assert second == first
+        assert compiled_promotion_cache.stats()['hits'] == 1
+
+    def test_save_invalidates(self):
+        """Saving the promotion drops the cached entry"""
+        self._compile()
+
+        self.promotion.discount_percent = Decimal('25.00')
+        self.promotion.save()
+        result = self._compile()
+
+        assert result[0]['rules']['discount_percent'] == 25.0
+        assert not CompiledPromotion.objects.filter(
+            promotion=self.promotion, compiled_data__rules__discount_percent=10.0
+        ).exists()
+
+    def test_m2m_change_invalidates(self):
+        """Adding a category (forward and reverse) drops the cached entry"""
+        self._compile()
+        self.promotion.categories.add(self.category)
+        assert self._compile()[0]['scope']['categories'] == [str(self.category.id)]
+
+        self.category.promotions.clear()
+        assert self._compile()[0]['scope']['categories'] == []
+
+    def test_tier_change_invalidates(self):
+        """Saving a PromotionTier drops the parent promotion's entry"""
+        self.promotion.promo_type = 'threshold_tier'
+        self.promotion.save()
+        self._compile()
+
+        PromotionTier.objects.create(
+            promotion=self.promotion,
+            tier_name='Gold',
+            tier_order=1,
+            min_amount=Decimal('100000.00'),
+            discount_type='percent',
+            discount_value=Decimal('10.00'),
+        )
+
+        assert len(self._compile()[0]['rules']['tiers']) == 1
+
+    def test_use_cache_false_bypasses_cache(self):
+        """use_cache=False never reads or writes the cache"""
+        PromotionCompiler(use_cache=False).compile_multiple([self.promotion])
+
+        assert not CompiledPromotion.objects.exists()
+        assert compiled_promotion_cache.stats()['misses'] == 0
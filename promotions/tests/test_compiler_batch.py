@@ -0,0 +1,193 @@
+"""
+Tests for batch (prefetch-aware) promotion compilation
+
+Ensures PromotionCompiler.compile_multiple runs a constant number of
+queries regardless of batch size and produces the same JSON as
+compiling promotions one by one.
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Company, Brand, Store, User
+from products.models import Category, Product
+from promotions.models import Promotion, PromotionTier, PackagePromotion, PackageItem
+from promotions.services.compiler import PromotionCompiler
+
+
+def _strip_compiled_at(items):
+    """compiled_at is a timestamp and differs between runs"""
+    return [{k: v for k, v in item.items() if k != 'compiled_at'} for item in items]
+
+
+@pytest.mark.django_db
+class TestCompileMultipleBatch:
+    """Test batched compile_multiple"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.company = Company.objects.create(code='BATCH', name='Batch Company')
+        self.brand = Brand.objects.create(company=self.company, code='BATCH-BR1', name='Batch Brand')
+        self.other_brand = Brand.objects.create(company=self.company, code='BATCH-BR2', name='Other Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='BATCH-ST1',
+            store_name='Batch Store',
+            address='Batch Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='batchuser', password='testpass123')
+        self.category = Category.objects.create(brand=self.brand, name='Drinks')
+        self.product = Product.objects.create(
+            brand=self.brand,
+            category=self.category,
+            sku='SKU-1',
+            name='Coffee',
+            price=Decimal('25000.00'),
+            cost=Decimal('10000.00')
+        )
+        self.counter = 0
+
+    def _create_set(self):
+        """Create one promotion of each relation-heavy type"""
+        today = timezone.now().date()
+        self.counter += 1
+        base = {
+            'company': self.company,
+            'brand': self.brand,
+            'start_date': today - timedelta(days=1),
+            'end_date': today + timedelta(days=7),
+            'created_by': self.user,
+        }
+
+        category_promo = Promotion.objects.create(
+            **base,
+            name=f'Category {self.counter}',
+            code=f'CAT-{self.counter}',
+            promo_type='percent_discount',
+            discount_percent=Decimal('10.00'),
+            apply_to='category',
+            all_stores=False,
+            scope='brands',
+        )
+        category_promo.categories.add(self.category)
+        category_promo.stores.add(self.store)
+        category_promo.brands.add(self.brand)
+        category_promo.exclude_brands.add(self.other_brand)
+
+        combo_promo = Promotion.objects.create(
+            **base,
+            name=f'Combo {self.counter}',
+            code=f'COMBO-{self.counter}',
+            promo_type='combo',
+            combo_price=Decimal('45000.00'),
+            apply_to='product',
+        )
+        combo_promo.combo_products.add(self.product)
+        combo_promo.products.add(self.product)
+
+        tier_promo = Promotion.objects.create(
+            **base,
+            name=f'Tier {self.counter}',
+            code=f'TIER-{self.counter}',
+            promo_type='threshold_tier',
+            is_cross_brand=True,
+            cross_brand_type='trigger_benefit',
+        )
+        tier_promo.trigger_brands.add(self.brand)
+        tier_promo.benefit_brands.add(self.other_brand)
+        for order in (2, 1):
+            PromotionTier.objects.create(
+                promotion=tier_promo,
+                tier_name=f'Tier {order}',
+                tier_order=order,
+                min_amount=Decimal('100000.00') * order,
+                discount_type='percent',
+                discount_value=Decimal('5.00') * order,
+                free_product=self.product if order == 1 else None,
+            )
+
+        package_promo = Promotion.objects.create(
+            **base,
+            name=f'Package {self.counter}',
+            code=f'PKG-{self.counter}',
+            promo_type='package',
+        )
+        package = PackagePromotion.objects.create(
+            promotion=package_promo,
+            package_name='Family Pack',
+            package_sku=f'PKG-SKU-{self.counter}',
+            package_price=Decimal('200000.00'),
+        )
+        PackageItem.objects.create(package=package, item_type='product', product=self.product, quantity=2, sort_order=1)
+        PackageItem.objects.create(package=package, item_type='category', category=self.category, quantity=1, sort_order=2)
+
+    def _count_queries(self):
+        promotions = Promotion.objects.filter(company=self.company).order_by('code')
+        with CaptureQueriesContext(connection) as ctx:
+            compiled = PromotionCompiler(use_cache=False).compile_multiple(promotions)
+        return len(ctx.captured_queries), compiled
+
+    def test_query_count_is_constant(self):
+        """Doubling the number of promotions must not add queries"""
+        self._create_set()
+        small_count, small_result = self._count_queries()
+
+        for _ in range(3):
+            self._create_set()
+        large_count, large_result = self._count_queries()
+
+        assert len(large_result) == 4 * len(small_result)
+        assert large_count == small_count
+
+    def test_batch_matches_single_compilation(self):
+        """Batch output must be identical to per-promotion output"""
+        self._create_set()
+        self._create_set()
+
+        compiler = PromotionCompiler(use_cache=False)
+        promotions = list(Promotion.objects.filter(company=self.company).order_by('code'))
+        single = [compiler.compile_promotion(p) for p in promotions]
+
+        fresh = Promotion.objects.filter(company=self.company).order_by('code')
+        batch = compiler.compile_multiple(fresh)
+
+        assert _strip_compiled_at(batch) == _strip_compiled_at(single)
+
+    def test_batch_tiers_are_filtered_and_ordered(self):
+        """Inactive tiers are skipped and tiers keep tier_order"""
+        self._create_set()
+        tier_promo = Promotion.objects.get(code='TIER-1')
+        PromotionTier.objects.create(
+            promotion=tier_promo,
+            tier_name='Disabled',
+            tier_order=0,
+            min_amount=Decimal('1.00'),
+            discount_type='percent',
+            discount_value=Decimal('1.00'),
+            is_active=False,
+        )
+
+        compiled = PromotionCompiler().compile_multiple(Promotion.objects.filter(code='TIER-1'))
+
+        tier_names = [tier['tier_name'] for tier in compiled[0]['rules']['tiers']]
+        assert tier_names == ['Tier 1', 'Tier 2']
+
+    def test_package_without_details(self):
+        """Package promotions without a PackagePromotion still compile"""
+        Promotion.objects.create(
+            company=self.company,
+            name='Broken Package',
+            code='PKG-BROKEN',
+            promo_type='package',
+            start_date=timezone.now().date(),
+            end_date=timezone.now().date(),
+            created_by=self.user,
+        )
+
+        compiled = PromotionCompiler().compile_multiple(Promotion.objects.filter(code='PKG-BROKEN'))
+
+        assert compiled[0]['rules']['error'] == 'Package details not configured'
@@ -0,0 +1,162 @@
+"""
+Tests for the streamed Edge Server bootstrap endpoint
+"""
+import json
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Company, Brand, Store, User
+from products.models import (
+    Category, Modifier, ModifierOption, Product, ProductModifier, TableArea, Tables
+)
+from promotions.models import Promotion
+from sync_api.bootstrap import BOOTSTRAP_SECTIONS
+from sync_api.models import SyncSequence
+
+
+BOOTSTRAP_URL = '/api/v1/sync/bootstrap/'
+
+
+@pytest.mark.django_db
+class TestSyncBootstrap:
+    """Test /api/v1/sync/bootstrap/"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.company = Company.objects.create(code='BOOT', name='Bootstrap Company')
+        self.brand = Brand.objects.create(company=self.company, code='BOOT-BR1', name='Bootstrap Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='BOOT-ST1',
+            store_name='Bootstrap Store',
+            address='Bootstrap Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='bootuser', password='testpass123')
+        self.category = Category.objects.create(brand=self.brand, name='Drinks')
+        self.modifier = Modifier.objects.create(brand=self.brand, name='Sugar')
+        ModifierOption.objects.create(modifier=self.modifier, name='Less')
+        self.area = TableArea.objects.create(brand=self.brand, store=self.store, name='Indoor')
+        Tables.objects.create(area=self.area, number='A1', capacity=4)
+        today = timezone.now().date()
+        Promotion.objects.create(
+            company=self.company,
+            brand=self.brand,
+            name='Boot Promo',
+            code='BOOT-PROMO',
+            promo_type='percent_discount',
+            discount_percent=Decimal('10.00'),
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=1),
+            created_by=self.user,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.body = {'company_id': str(self.company.id), 'store_id': str(self.store.id)}
+        yield
+        cache.clear()
+
+    def _add_products(self, count, offset=0):
+        for i in range(offset, offset + count):
+            product = Product.objects.create(
+                brand=self.brand,
+                category=self.category,
+                sku=f'BOOT-{i}',
+                name=f'Product {i}',
+                price=Decimal('15000.00'),
+                cost=Decimal('5000.00')
+            )
+            ProductModifier.objects.create(product=product, modifier=self.modifier)
+
+    def _stream(self, **params):
+        response = self.client.post(BOOTSTRAP_URL, dict(self.body, **params), format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return response, b''.join(response.streaming_content).decode()
+
+    def _lines(self, **params):
+        response, content = self._stream(**params)
+        assert response['Content-Type'] == 'application/x-ndjson'
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_ndjson_stream_has_every_section(self):
+        """meta first, one line per row, end with counts last"""
+        self._add_products(3)
+
+        lines = self._lines()
+
+        assert lines[0]['section'] == 'meta'
+        assert lines[0]['data']['next_seq'] == SyncSequence.current(self.company.id)
+        assert lines[-1]['section'] == 'end'
+        counts = lines[-1]['data']['counts']
+        assert list(counts) == list(BOOTSTRAP_SECTIONS)
+        assert counts['products'] == 3
+        assert counts['product_modifiers'] == 3
+        assert counts['tables'] == 1
+        assert counts['promotions'] == 1
+        for name, count in counts.items():
+            assert len([line for line in lines if line['section'] == name]) == count
+
+    def test_rows_match_sync_endpoint(self):
+        """Product rows have the same shape as /sync/products/"""
+        self._add_products(1)
+
+        rows = [line['data'] for line in self._lines() if line['section'] == 'products']
+        expected = self.client.post('/api/v1/sync/products/', self.body, format='json').data['products']
+
+        assert rows == expected
+
+    def test_json_format(self):
+        """format=json streams a single parseable document"""
+        self._add_products(2)
+
+        response, content = self._stream(format='json')
+        document = json.loads(content)
+
+        assert response['Content-Type'] == 'application/json'
+        assert len(document['products']) == 2
+        assert document['counts']['modifiers'] == 1
+        assert document['modifiers'][0]['options'][0]['name'] == 'Less'
+
+    def test_sections_subset(self):
+        """Only the requested sections are streamed, in canonical order"""
+        lines = self._lines(sections=['tables', 'categories'])
+
+        assert [line['section'] for line in lines] == ['meta', 'categories', 'tables', 'end']
+
+    def test_query_count_independent_of_catalog_size(self):
+        """Scope is resolved once; sections don't query per row"""
+        self._add_products(2)
+        self._stream()  # warm the compiled-promotion cache and sync settings
+        with CaptureQueriesContext(connection) as small:
+            self._stream()
+
+        self._add_products(20, offset=2)
+        with CaptureQueriesContext(connection) as large:
+            self._stream()
+
+        assert len(large) == len(small)
+
+    def test_store_not_found(self):
+        """An unknown store is rejected before streaming"""
+        other = Company.objects.create(code='BOOT2', name='Other Company')
+        response = self.client.post(
+            BOOTSTRAP_URL, {'company_id': str(other.id), 'store_id': str(self.store.id)}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.data['code'] == 'STORE_NOT_FOUND'
+
+    def test_invalid_sections(self):
+        """Unknown section names are rejected"""
+        response = self.client.post(BOOTSTRAP_URL, dict(self.body, sections=['nope']), format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['code'] == 'INVALID_SECTIONS'
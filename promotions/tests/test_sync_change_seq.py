@@ -0,0 +1,191 @@
+"""
+Tests for the per-company change sequence sync cursor (since_seq)
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Company, Brand, Store, User
+from products.models import Category, Modifier, ModifierOption, Product, TableArea, Tables
+from promotions.models import Promotion, PromotionTier
+from sync_api.models import SyncSequence, SyncTombstone
+
+
+@pytest.mark.django_db
+class TestSyncChangeSequence:
+    """Test change_seq stamping and since_seq paging on /api/v1/sync/*"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.company = Company.objects.create(code='SEQ', name='Sequence Company')
+        self.brand = Brand.objects.create(company=self.company, code='SEQ-BR1', name='Sequence Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='SEQ-ST1',
+            store_name='Sequence Store',
+            address='Sequence Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='sequser', password='testpass123')
+        self.category = Category.objects.create(brand=self.brand, name='Drinks')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        yield
+        cache.clear()
+
+    def _product(self, sku):
+        return Product.objects.create(
+            brand=self.brand,
+            category=self.category,
+            sku=sku,
+            name=f'Product {sku}',
+            price=Decimal('15000.00'),
+            cost=Decimal('5000.00')
+        )
+
+    def _post(self, url, **params):
+        body = {'company_id': str(self.company.id), 'store_id': str(self.store.id), **params}
+        return self.client.post(url, body, format='json')
+
+    def test_saves_stamp_increasing_sequence(self):
+        """Every save takes the next per-company value"""
+        first = self._product('SEQ-1')
+        second = self._product('SEQ-2')
+        assert self.category.change_seq < first.change_seq < second.change_seq
+
+        first.price = Decimal('16000.00')
+        first.save(update_fields=['price'])
+        first.refresh_from_db()
+        assert first.change_seq > second.change_seq
+        assert SyncSequence.current(self.company.id) == first.change_seq
+
+    def test_sequences_are_per_company(self):
+        """Another company's writes don't advance this company's counter"""
+        other_company = Company.objects.create(code='SEQ2', name='Other Company')
+        other_brand = Brand.objects.create(company=other_company, code='SEQ2-BR1', name='Other Brand')
+        before = SyncSequence.current(self.company.id)
+
+        Category.objects.create(brand=other_brand, name='Food')
+
+        assert SyncSequence.current(self.company.id) == before
+        assert SyncSequence.current(other_company.id) == 1
+
+    def test_since_seq_pages_without_overlap(self):
+        """Paging with limit visits every change exactly once"""
+        products = [self._product(f'SEQ-{i}') for i in range(5)]
+        since_seq = self.category.change_seq
+        seen = []
+
+        while True:
+            response = self._post('/api/v1/sync/products/', since_seq=since_seq, limit=2)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(row['id'] for row in response.data['products'])
+            since_seq = response.data['next_seq']
+            if not response.data['has_more']:
+                break
+
+        assert seen == [str(product.id) for product in products]
+        assert since_seq == SyncSequence.current(self.company.id)
+
+        response = self._post('/api/v1/sync/products/', since_seq=since_seq)
+        assert response.data['products'] == []
+        assert response.data['has_more'] is False
+
+    def test_full_sync_returns_next_seq(self):
+        """A full sync hands out the high-water mark to continue from"""
+        self._product('SEQ-1')
+
+        response = self._post('/api/v1/sync/categories/')
+
+        assert response.data['total'] == 1
+        assert response.data['next_seq'] == SyncSequence.current(self.company.id)
+        assert response.data['has_more'] is False
+
+    def test_since_seq_returns_deleted_ids(self):
+        """Tombstones carry a sequence and are returned for the window"""
+        product = self._product('SEQ-1')
+        product_id = str(product.id)
+        since_seq = SyncSequence.current(self.company.id)
+
+        product.delete()
+
+        response = self._post('/api/v1/sync/products/', since_seq=since_seq)
+        assert response.data['deleted_ids'] == [product_id]
+        assert response.data['full_resync_required'] is False
+        assert SyncTombstone.objects.get().change_seq == response.data['next_seq']
+
+    def test_child_changes_restamp_parent(self):
+        """Option and tier edits bump the parent's change_seq"""
+        modifier = Modifier.objects.create(brand=self.brand, name='Sugar')
+        since_seq = modifier.change_seq
+        ModifierOption.objects.create(modifier=modifier, name='Less')
+
+        response = self._post('/api/v1/sync/modifiers/', since_seq=since_seq)
+        assert [row['id'] for row in response.data['modifiers']] == [str(modifier.id)]
+
+        today = timezone.now().date()
+        promotion = Promotion.objects.create(
+            company=self.company,
+            brand=self.brand,
+            name='Tiered',
+            code='SEQ-TIER',
+            promo_type='threshold_tier',
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=1),
+            created_by=self.user,
+        )
+        since_seq = promotion.change_seq
+        PromotionTier.objects.create(
+            promotion=promotion,
+            tier_name='Silver',
+            tier_order=1,
+            min_amount=Decimal('50000.00'),
+            discount_type='percent',
+            discount_value=Decimal('5.00'),
+        )
+
+        response = self._post('/api/v1/sync/promotions/', since_seq=since_seq)
+        assert response.data['total'] == 1
+        promotion.refresh_from_db()
+        assert promotion.change_seq > since_seq
+
+    def test_tables_share_one_cursor(self):
+        """Areas and tables page on the same cursor without skipping rows"""
+        area = TableArea.objects.create(brand=self.brand, store=self.store, name='Indoor')
+        tables = [Tables.objects.create(area=area, number=str(i), capacity=4) for i in range(3)]
+        since_seq = self.category.change_seq
+        areas_seen, tables_seen = [], []
+
+        while True:
+            response = self._post('/api/v1/sync/tables/', since_seq=since_seq, limit=2)
+            areas_seen.extend(row['id'] for row in response.data['table_areas'])
+            tables_seen.extend(row['id'] for row in response.data['tables'])
+            since_seq = response.data['next_seq']
+            if not response.data['has_more']:
+                break
+
+        assert areas_seen == [str(area.id)]
+        assert tables_seen == [str(table.id) for table in tables]
+
+    def test_invalid_since_seq(self):
+        """Non-integer cursors are rejected"""
+        response = self._post('/api/v1/sync/products/', since_seq='abc')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['code'] == 'INVALID_SEQ'
+
+    def test_compacted_tombstones_require_full_resync(self):
+        """since_seq older than compacted tombstones forces a full resync"""
+        product = self._product('SEQ-1')
+        since_seq = SyncSequence.current(self.company.id)
+        product.delete()
+        SyncTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=365))
+
+        SyncTombstone.compact()
+
+        response = self._post('/api/v1/sync/products/', since_seq=since_seq)
+        assert response.data['full_resync_required'] is True
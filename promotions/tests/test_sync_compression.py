@@ -0,0 +1,173 @@
+"""
+Tests for sync response compression and the compact columnar format
+"""
+import gzip
+import json
+import pytest
+from decimal import Decimal
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Company, Brand, Store, User
+from products.models import Category, Modifier, ModifierOption, Product, ProductModifier
+from sync_api.compact import decode_compact, encode_compact
+from sync_api.compression import negotiate_encoding
+
+
+COMPACT_TYPE = 'application/vnd.fnb.sync-compact+json'
+
+
+class TestEncodingNegotiation:
+    """Test sync_api.compression.negotiate_encoding"""
+
+    def test_gzip_and_q_values(self):
+        assert negotiate_encoding('gzip, deflate') == 'gzip'
+        assert negotiate_encoding('deflate') is None
+        assert negotiate_encoding('gzip;q=0') is None
+        assert negotiate_encoding('') is None
+        assert negotiate_encoding('*') is not None
+
+
+class TestCompactEncoding:
+    """Test sync_api.compact round trips"""
+
+    def test_round_trip_with_nested_and_absent_fields(self):
+        data = {
+            'products': [
+                {'id': 'p1', 'brand_id': 'b1', 'name': 'Tea', 'options': [{'name': 'Less'}]},
+                {'id': 'p2', 'brand_id': 'b1', 'name': 'Coffee', 'note': None},
+            ],
+            'total': 2,
+            'tags': ['a', 'b'],
+        }
+
+        encoded = encode_compact(data)
+
+        assert encoded['strings'] == ['b1']
+        assert encoded['data']['products']['$dict'] == ['brand_id']
+        assert decode_compact(encoded) == data
+
+
+@pytest.mark.django_db
+class TestSyncCompression:
+    """Test negotiation on /api/v1/sync/*"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.company = Company.objects.create(code='CMP', name='Compression Company')
+        self.brand = Brand.objects.create(company=self.company, code='CMP-BR1', name='Compression Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='CMP-ST1',
+            store_name='Compression Store',
+            address='Compression Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='cmpuser', password='testpass123')
+        category = Category.objects.create(brand=self.brand, name='Drinks')
+        modifier = Modifier.objects.create(brand=self.brand, name='Sugar')
+        ModifierOption.objects.create(modifier=modifier, name='Less')
+        for i in range(10):
+            product = Product.objects.create(
+                brand=self.brand,
+                category=category,
+                sku=f'CMP-{i}',
+                name=f'Product {i}',
+                price=Decimal('15000.00'),
+                cost=Decimal('5000.00')
+            )
+            ProductModifier.objects.create(product=product, modifier=modifier)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.body = {'company_id': str(self.company.id), 'store_id': str(self.store.id)}
+        yield
+        cache.clear()
+
+    def _post(self, url, **headers):
+        return self.client.post(url, self.body, format='json', **headers)
+
+    def _without_timestamp(self, data):
+        return {key: value for key, value in data.items() if key != 'sync_timestamp'}
+
+    def test_gzip_response(self):
+        """Accept-Encoding: gzip compresses the body and weakens the ETag"""
+        plain = self._post('/api/v1/sync/product-modifiers/')
+        response = self._post('/api/v1/sync/product-modifiers/', HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert response['ETag'] == 'W/' + plain['ETag']
+        assert len(response.content) < len(plain.content)
+        assert self._without_timestamp(json.loads(gzip.decompress(response.content))) == \
+            self._without_timestamp(json.loads(plain.content))
+
+        revalidate = self._post(
+            '/api/v1/sync/product-modifiers/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert revalidate.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_no_accept_encoding_is_uncompressed(self):
+        response = self._post('/api/v1/sync/product-modifiers/')
+
+        assert 'Content-Encoding' not in response
+
+    def test_compact_format(self):
+        """Accept: compact media type returns the columnar encoding"""
+        plain = self._post('/api/v1/sync/product-modifiers/')
+        response = self._post('/api/v1/sync/product-modifiers/', HTTP_ACCEPT=COMPACT_TYPE)
+
+        assert response['Content-Type'] == COMPACT_TYPE
+        assert response['ETag'] != plain['ETag']
+        assert len(response.content) < len(plain.content)
+        assert self._without_timestamp(decode_compact(json.loads(response.content))) == \
+            self._without_timestamp(json.loads(plain.content))
+
+    def test_representations_vary_on_accept(self):
+        """Both the JSON and the compact variant (and their 304s) carry Vary: Accept"""
+        plain = self._post('/api/v1/sync/product-modifiers/')
+        compact = self._post('/api/v1/sync/product-modifiers/', HTTP_ACCEPT=COMPACT_TYPE)
+        revalidate = self._post(
+            '/api/v1/sync/product-modifiers/', HTTP_ACCEPT=COMPACT_TYPE, HTTP_IF_NONE_MATCH=compact['ETag']
+        )
+
+        assert revalidate.status_code == status.HTTP_304_NOT_MODIFIED
+        for response in (plain, compact, revalidate):
+            vary = [value.strip() for value in response['Vary'].split(',')]
+            assert 'Accept' in vary
+            assert 'Accept-Encoding' in vary
+
+    def test_bootstrap_stream_is_gzipped(self):
+        """The streamed bootstrap is gzip-compressed chunk by chunk"""
+        plain = self._post('/api/v1/sync/bootstrap/')
+        response = self._post('/api/v1/sync/bootstrap/', HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response.streaming
+        assert response['Content-Encoding'] == 'gzip'
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        plain_content = b''.join(plain.streaming_content).decode()
+        assert [json.loads(line)['section'] for line in content.splitlines()] == \
+            [json.loads(line)['section'] for line in plain_content.splitlines()]
+
+    def test_compact_format_query_param_skips_snapshot(self):
+        """?format=compact works and never serves the gzip JSON snapshot"""
+        call_command('build_sync_snapshots', company=str(self.company.id), stdout=StringIO())
+
+        response = self.client.post('/api/v1/sync/products/?format=compact', self.body, format='json')
+
+        assert 'X-Sync-Snapshot' not in response
+        assert len(decode_compact(json.loads(response.content))['products']) == 10
+
+    def test_benchmark_command(self):
+        """The benchmark reports every format / encoding combination"""
+        out = StringIO()
+        call_command('benchmark_sync_formats', store=str(self.store.id), iterations=1, stdout=out)
+
+        output = out.getvalue()
+        assert 'product_modifiers' in output
+        assert 'compact' in output
+        assert 'gzip' in output
@@ -0,0 +1,168 @@
+"""
+Tests for ETag / 304 Not Modified on the Edge Server sync API
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Company, Brand, Store, User
+from products.models import Category, Modifier, ModifierOption, Product
+from promotions.models import Promotion, PromotionTier
+from sync_api.models import SyncSequence, SyncTombstone
+
+
+@pytest.mark.django_db
+class TestSyncETag:
+    """Test ETag handling on /api/v1/sync/* endpoints"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.company = Company.objects.create(code='ETAG', name='ETag Company')
+        self.brand = Brand.objects.create(company=self.company, code='ETAG-BR1', name='ETag Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='ETAG-ST1',
+            store_name='ETag Store',
+            address='ETag Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='etaguser', password='testpass123')
+        self.category = Category.objects.create(brand=self.brand, name='Drinks')
+        self.product = Product.objects.create(
+            brand=self.brand,
+            category=self.category,
+            sku='ETAG-1',
+            name='Tea',
+            price=Decimal('15000.00'),
+            cost=Decimal('5000.00')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.body = {'company_id': str(self.company.id), 'store_id': str(self.store.id)}
+        yield
+        cache.clear()
+
+    def _post(self, url, etag=None, body=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.post(url, body or self.body, format='json', **headers)
+
+    def test_products_etag_and_304(self):
+        """Unchanged catalog answers If-None-Match with 304"""
+        first = self._post('/api/v1/sync/products/')
+        assert first.status_code == status.HTTP_200_OK
+        etag = first['ETag']
+        assert first.data['total'] == 1
+
+        second = self._post('/api/v1/sync/products/', etag=etag)
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second['ETag'] == etag
+
+    def test_products_etag_changes_on_update(self):
+        """Updating a product produces a new ETag"""
+        etag = self._post('/api/v1/sync/products/')['ETag']
+
+        self.product.price = Decimal('17000.00')
+        self.product.save()
+
+        response = self._post('/api/v1/sync/products/', etag=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_etag_depends_on_request_params(self):
+        """Different request parameters never share an ETag"""
+        etag = self._post('/api/v1/sync/categories/')['ETag']
+
+        body = dict(self.body, updated_since=timezone.now().isoformat())
+        response = self._post('/api/v1/sync/categories/', etag=etag, body=body)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_category_delete_changes_etag(self):
+        """Hard deletes are caught by the row count"""
+        other = Category.objects.create(brand=self.brand, name='Snacks')
+        etag = self._post('/api/v1/sync/categories/')['ETag']
+
+        other.delete()
+
+        assert self._post('/api/v1/sync/categories/', etag=etag).status_code == status.HTTP_200_OK
+
+    def test_modifier_option_change_changes_modifier_etag(self):
+        """Option edits touch the parent modifier"""
+        modifier = Modifier.objects.create(brand=self.brand, name='Sugar')
+        option = ModifierOption.objects.create(modifier=modifier, name='Less')
+        etag = self._post('/api/v1/sync/modifiers/')['ETag']
+
+        option.name = 'Half'
+        option.save()
+
+        assert self._post('/api/v1/sync/modifiers/', etag=etag).status_code == status.HTTP_200_OK
+
+    def test_promotions_304_and_tier_change(self):
+        """Promotion ETag changes when a tier changes"""
+        today = timezone.now().date()
+        promotion = Promotion.objects.create(
+            company=self.company,
+            brand=self.brand,
+            name='Tiered',
+            code='ETAG-TIER',
+            promo_type='threshold_tier',
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=1),
+            created_by=self.user,
+        )
+        first = self._post('/api/v1/sync/promotions/')
+        assert first.status_code == status.HTTP_200_OK
+        etag = first['ETag']
+        assert self._post('/api/v1/sync/promotions/', etag=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        PromotionTier.objects.create(
+            promotion=promotion,
+            tier_name='Silver',
+            tier_order=1,
+            min_amount=Decimal('50000.00'),
+            discount_type='percent',
+            discount_value=Decimal('5.00'),
+        )
+
+        response = self._post('/api/v1/sync/promotions/', etag=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['promotions'][0]['rules']['tiers']) == 1
+
+    def test_promotions_tombstone_changes_etag(self):
+        """A tombstone-only change (no promotion row touched) is not answered with 304"""
+        today = timezone.now().date()
+        promotion = Promotion.objects.create(
+            company=self.company,
+            brand=self.brand,
+            name='Gone',
+            code='ETAG-GONE',
+            promo_type='percent_discount',
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=1),
+            created_by=self.user,
+        )
+        body = dict(self.body, since_seq=0)
+        etag = self._post('/api/v1/sync/promotions/', body=body)['ETag']
+
+        SyncTombstone.objects.create(
+            company_id=self.company.id,
+            model_name='promotion',
+            object_id=promotion.id,
+            brand_id=self.brand.id,
+            change_seq=SyncSequence.allocate(self.company.id),
+        )
+
+        response = self._post('/api/v1/sync/promotions/', etag=etag, body=body)
+        assert response.status_code == status.HTTP_200_OK
+        assert str(promotion.id) in response.data['deleted_ids']
+
+    def test_weak_and_multiple_etags(self):
+        """W/ prefixes and comma-separated lists are accepted"""
+        etag = self._post('/api/v1/sync/companies/', body={})['ETag']
+
+        response = self._post('/api/v1/sync/companies/', etag=f'"other", W/{etag}', body={})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
@@ -0,0 +1,168 @@
+"""
+Tests for precomputed per-store sync snapshots
+"""
+import gzip
+import json
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from config.tasks import rebuild_sync_snapshots_task
+from core.models import Company, Brand, Store, User
+from products.models import Category, Product
+from promotions.models import Promotion
+from sync_api.models import SyncSnapshot
+from sync_api.snapshots import schedule_snapshot_rebuild
+
+
+@pytest.mark.django_db
+class TestSyncSnapshots:
+    """Test snapshot build and serving on /api/v1/sync/products/ and /sync/promotions/"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.company = Company.objects.create(code='SNAP', name='Snapshot Company')
+        self.brand = Brand.objects.create(company=self.company, code='SNAP-BR1', name='Snapshot Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='SNAP-ST1',
+            store_name='Snapshot Store',
+            address='Snapshot Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='snapuser', password='testpass123')
+        self.category = Category.objects.create(brand=self.brand, name='Drinks')
+        for i in range(3):
+            Product.objects.create(
+                brand=self.brand,
+                category=self.category,
+                sku=f'SNAP-{i}',
+                name=f'Product {i}',
+                price=Decimal('15000.00'),
+                cost=Decimal('5000.00')
+            )
+        today = timezone.now().date()
+        Promotion.objects.create(
+            company=self.company,
+            brand=self.brand,
+            name='Snap Promo',
+            code='SNAP-PROMO',
+            promo_type='percent_discount',
+            discount_percent=Decimal('10.00'),
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=1),
+            created_by=self.user,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.body = {'company_id': str(self.company.id), 'store_id': str(self.store.id)}
+        yield
+        cache.clear()
+
+    def _build(self):
+        call_command('build_sync_snapshots', company=str(self.company.id))
+
+    def _post(self, url, **headers):
+        return self.client.post(url, self.body, format='json', **headers)
+
+    def _without_timestamp(self, data):
+        return {key: value for key, value in data.items() if key != 'sync_timestamp'}
+
+    @pytest.mark.parametrize('url', ['/api/v1/sync/products/', '/api/v1/sync/promotions/'])
+    def test_snapshot_matches_live_response(self, url):
+        """The stored gzip bytes decode to the live full-sync payload"""
+        live = json.loads(json.dumps(self._post(url).data, default=str))
+        self._build()
+
+        response = self._post(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert {'Accept', 'Accept-Encoding'} <= {value.strip() for value in response['Vary'].split(',')}
+        assert 'Accept-Encoding' in response['Vary']
+        served = json.loads(gzip.decompress(response.content))
+        assert self._without_timestamp(served) == self._without_timestamp(live)
+
+    def test_plain_clients_get_decompressed_body(self):
+        """Clients without gzip support get plain JSON from the snapshot"""
+        self._build()
+
+        response = self._post('/api/v1/sync/products/')
+
+        assert 'Content-Encoding' not in response
+        assert 'X-Sync-Snapshot' in response
+        assert json.loads(response.content)['total'] == 3
+
+    def test_snapshot_etag_not_modified(self):
+        """If-None-Match against the snapshot ETag returns 304"""
+        self._build()
+        etag = self._post('/api/v1/sync/products/')['ETag']
+
+        response = self._post('/api/v1/sync/products/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_stale_snapshot_falls_back_to_live(self):
+        """A change after the build makes the snapshot stale until rebuilt"""
+        self._build()
+        Product.objects.create(
+            brand=self.brand,
+            category=self.category,
+            sku='SNAP-NEW',
+            name='New Product',
+            price=Decimal('15000.00'),
+            cost=Decimal('5000.00')
+        )
+
+        response = self._post('/api/v1/sync/products/')
+        assert 'X-Sync-Snapshot' not in response
+        assert response.data['total'] == 4
+
+        self._build()
+        response = self._post('/api/v1/sync/products/')
+        assert 'X-Sync-Snapshot' in response
+        assert json.loads(response.content)['total'] == 4
+
+    def test_incremental_sync_is_not_served_from_snapshot(self):
+        """since_seq requests always take the live path"""
+        self._build()
+
+        response = self.client.post(
+            '/api/v1/sync/products/', dict(self.body, since_seq=0), format='json'
+        )
+
+        assert 'X-Sync-Snapshot' not in response
+        assert response.data['total'] == 3
+
+    def test_store_change_invalidates_snapshots(self):
+        """Store edits drop snapshots (store info is embedded in them)"""
+        self._build()
+        assert SyncSnapshot.objects.filter(store_id=self.store.id).count() == 2
+
+        self.store.store_name = 'Renamed Store'
+        self.store.save()
+
+        assert not SyncSnapshot.objects.filter(store_id=self.store.id).exists()
+
+    def test_rebuilds_are_debounced(self, monkeypatch, settings):
+        """Only the first change inside the debounce window queues a task"""
+        settings.SYNC_SNAPSHOT_DEBOUNCE_SECONDS = 30
+        queued = []
+        monkeypatch.setattr(
+            rebuild_sync_snapshots_task, 'apply_async', lambda **kwargs: queued.append(kwargs)
+        )
+
+        schedule_snapshot_rebuild(self.company.id)
+        schedule_snapshot_rebuild(self.company.id)
+
+        assert queued == [{'args': [str(self.company.id)], 'countdown': 30}]
+
+        # The rebuild clears the pending flag, so the next change queues again
+        rebuild_sync_snapshots_task(str(self.company.id))
+        schedule_snapshot_rebuild(self.company.id)
+        assert len(queued) == 2
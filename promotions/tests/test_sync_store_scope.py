@@ -0,0 +1,86 @@
+"""
+Tests for the cached store scope resolver used by the sync endpoints
+"""
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Company, Brand, Store, User
+from sync_api.store_scope import clear_local_store_scopes, get_store_scope
+
+
+@pytest.mark.django_db
+class TestStoreScope:
+    """Test sync_api.store_scope.get_store_scope"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        clear_local_store_scopes()
+        self.company = Company.objects.create(code='SCOPE', name='Scope Company')
+        self.brand = Brand.objects.create(company=self.company, code='SCOPE-BR1', name='Scope Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='SCOPE-ST1',
+            store_name='Scope Store',
+            address='Scope Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='scopeuser', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        yield
+        cache.clear()
+        clear_local_store_scopes()
+
+    def test_resolves_store_company_and_brands(self):
+        """One lookup returns the store, its company and food-court brands"""
+        scope = get_store_scope(str(self.company.id), str(self.store.id))
+
+        assert scope.store == self.store
+        assert scope.company == self.company
+        assert scope.brand_ids == (self.brand.id,)
+
+    def test_cached_lookup_has_no_queries(self, django_assert_num_queries):
+        """Repeat lookups hit the in-process LRU, then the shared cache"""
+        get_store_scope(self.company.id, self.store.id)
+
+        with django_assert_num_queries(0):
+            get_store_scope(self.company.id, self.store.id)
+
+        clear_local_store_scopes()
+        with django_assert_num_queries(0):
+            assert get_store_scope(self.company.id, self.store.id).store == self.store
+
+    def test_wrong_company_or_malformed_ids(self):
+        """Stores of another company and malformed ids resolve to None"""
+        other = Company.objects.create(code='SCOPE2', name='Other Company')
+
+        assert get_store_scope(other.id, self.store.id) is None
+        assert get_store_scope(self.company.id, 'not-a-uuid') is None
+        assert get_store_scope(None, self.store.id) is None
+
+    def test_store_and_brand_changes_invalidate(self):
+        """Store and brand saves drop the cached scope"""
+        get_store_scope(self.company.id, self.store.id)
+
+        self.store.store_name = 'Renamed Store'
+        self.store.save()
+        assert get_store_scope(self.company.id, self.store.id).store.store_name == 'Renamed Store'
+
+        self.brand.is_active = False
+        self.brand.save()
+        assert get_store_scope(self.company.id, self.store.id).brand_ids == ()
+
+    def test_deactivated_store_is_rejected_by_sync(self):
+        """Sync views see a deactivation immediately"""
+        body = {'company_id': str(self.company.id), 'store_id': str(self.store.id)}
+        assert self.client.post('/api/v1/sync/categories/', body, format='json').status_code == status.HTTP_200_OK
+
+        self.store.is_active = False
+        self.store.save()
+
+        response = self.client.post('/api/v1/sync/categories/', body, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.data['code'] == 'STORE_NOT_FOUND'
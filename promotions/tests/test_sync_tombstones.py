@@ -0,0 +1,147 @@
+"""
+Tests for sync deletion tombstones and deleted_ids in the sync API
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Company, Brand, Store, User
+from products.models import Category, Modifier, ModifierOption, Product
+from promotions.models import Promotion
+from sync_api.models import SyncTombstone
+
+
+@pytest.mark.django_db
+class TestSyncTombstones:
+    """Test tombstone recording and deleted_ids on /api/v1/sync/*"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.company = Company.objects.create(code='TOMB', name='Tombstone Company')
+        self.brand = Brand.objects.create(company=self.company, code='TOMB-BR1', name='Tombstone Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='TOMB-ST1',
+            store_name='Tombstone Store',
+            address='Tombstone Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='tombuser', password='testpass123')
+        self.category = Category.objects.create(brand=self.brand, name='Drinks')
+        self.product = Product.objects.create(
+            brand=self.brand,
+            category=self.category,
+            sku='TOMB-1',
+            name='Tea',
+            price=Decimal('15000.00'),
+            cost=Decimal('5000.00')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.since = (timezone.now() - timedelta(minutes=5)).isoformat()
+        yield
+        cache.clear()
+
+    def _post(self, url, **params):
+        body = {'company_id': str(self.company.id), 'store_id': str(self.store.id), **params}
+        return self.client.post(url, body, format='json')
+
+    def test_product_delete_is_returned(self):
+        """Deleted product ids appear in deleted_ids for incremental sync"""
+        product_id = str(self.product.id)
+        self.product.delete()
+
+        response = self._post('/api/v1/sync/products/', updated_since=self.since)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['deleted_ids'] == [product_id]
+        assert response.data['full_resync_required'] is False
+
+    def test_full_sync_has_no_deleted_ids(self):
+        """Without updated_since the snapshot itself is authoritative"""
+        self.product.delete()
+
+        response = self._post('/api/v1/sync/products/')
+        assert response.data['deleted_ids'] == []
+
+    def test_deactivate_and_reactivate(self):
+        """Deactivation writes a tombstone, reactivation removes it"""
+        self.category.is_active = False
+        self.category.save()
+        tombstone = SyncTombstone.objects.get(object_id=self.category.id)
+        assert tombstone.reason == 'deactivated'
+        assert tombstone.company_id == self.company.id
+
+        response = self._post('/api/v1/sync/categories/', updated_since=self.since)
+        assert response.data['deleted_ids'] == [str(self.category.id)]
+
+        self.category.is_active = True
+        self.category.save()
+        assert not SyncTombstone.objects.filter(object_id=self.category.id).exists()
+
+    def test_other_saves_do_not_write_tombstones(self):
+        """Plain updates leave no tombstone"""
+        self.product.price = Decimal('17000.00')
+        self.product.save()
+        self.product.save(update_fields=['price'])
+
+        assert not SyncTombstone.objects.exists()
+
+    def test_admin_bulk_deactivate_writes_tombstones(self):
+        """The admin bulk actions save rows, so flips are tombstoned and re-sequenced"""
+        from django.contrib.admin.sites import site
+        today = timezone.now().date()
+        promotion = Promotion.objects.create(
+            company=self.company, brand=self.brand, name='Bulk Promo', code='TOMB-PROMO',
+            promo_type='percent_discount', discount_percent=Decimal('10.00'),
+            start_date=today, end_date=today + timedelta(days=1), created_by=self.user,
+        )
+        change_seq = promotion.change_seq
+        admin = site._registry[Promotion]
+        admin.message_user = lambda *args, **kwargs: None
+
+        admin.deactivate_promotions(None, Promotion.objects.filter(pk=promotion.pk))
+
+        tombstone = SyncTombstone.objects.get(object_id=promotion.id)
+        assert tombstone.reason == 'deactivated'
+        promotion.refresh_from_db()
+        assert promotion.change_seq > change_seq
+
+        admin.activate_promotions(None, Promotion.objects.filter(pk=promotion.pk))
+        assert not SyncTombstone.objects.filter(object_id=promotion.id).exists()
+
+    def test_modifier_delete_cascades_to_options(self):
+        """Cascade-deleted modifier options get their own tombstones"""
+        modifier = Modifier.objects.create(brand=self.brand, name='Sugar')
+        option = ModifierOption.objects.create(modifier=modifier, name='Less')
+        option_id = str(option.id)
+
+        modifier.delete()
+
+        response = self._post('/api/v1/sync/modifier-options/', updated_since=self.since)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['deleted_ids'] == [option_id]
+
+    def test_stale_client_requires_full_resync(self):
+        """Clients older than the retention window must resync from scratch"""
+        since = (timezone.now() - timedelta(days=365)).isoformat()
+
+        response = self._post('/api/v1/sync/products/', updated_since=since)
+        assert response.data['full_resync_required'] is True
+
+    def test_compact_command(self):
+        """compact_sync_tombstones drops tombstones past retention"""
+        self.product.delete()
+        self.category.delete()
+        SyncTombstone.objects.filter(model_name='product').update(
+            deleted_at=timezone.now() - timedelta(days=120)
+        )
+
+        call_command('compact_sync_tombstones', days=90)
+
+        assert list(SyncTombstone.objects.values_list('model_name', flat=True)) == ['category']
@@ -0,0 +1,153 @@
+"""
+Tests for bulk, idempotent promotion usage upload (/api/v1/sync/usage/)
+"""
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Company, Brand, Store, User
+from members.models import Member
+from promotions.models import Promotion, PromotionUsage
+from promotions.services.usage_ingest import MAX_USAGES_PER_REQUEST
+
+
+USAGE_URL = '/api/v1/sync/usage/'
+
+
+@pytest.mark.django_db
+class TestUsageIngest:
+    """Test upload_usage persistence"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.company = Company.objects.create(code='USG', name='Usage Company')
+        self.brand = Brand.objects.create(company=self.company, code='USG-BR1', name='Usage Brand')
+        self.store = Store.objects.create(
+            brand=self.brand,
+            store_code='USG-ST1',
+            store_name='Usage Store',
+            address='Usage Address',
+            phone='123456789'
+        )
+        self.user = User.objects.create_user(username='usguser', password='testpass123')
+        today = timezone.now().date()
+        self.promotion = Promotion.objects.create(
+            company=self.company,
+            brand=self.brand,
+            name='Usage Promo',
+            code='USG-PROMO',
+            promo_type='percent_discount',
+            discount_percent=Decimal('10.00'),
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=1),
+            created_by=self.user,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _usage(self, bill_id=None, **overrides):
+        return {
+            'promotion_id': str(self.promotion.id),
+            'bill_id': str(bill_id or uuid.uuid4()),
+            'discount_amount': 15000.0,
+            'used_at': '2026-01-27T10:00:00Z',
+            'store_id': str(self.store.id),
+            **overrides,
+        }
+
+    def _upload(self, usages):
+        return self.client.post(USAGE_URL, {'usages': usages}, format='json')
+
+    def test_usages_are_persisted(self):
+        """Rows are stored with the edge timestamp and counted on the promotion"""
+        member = Member.objects.create(
+            company=self.company, full_name='Usage Member', phone='0811111111', created_by=self.user
+        )
+        usages = [self._usage(), self._usage(customer_id=str(member.id))]
+
+        response = self._upload(usages)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['created'] == 2
+        assert response.data['errors'] == []
+        usage = PromotionUsage.objects.get(bill_id=usages[0]['bill_id'])
+        assert usage.brand_id == self.brand.id
+        assert usage.used_at == datetime.fromisoformat('2026-01-27T10:00:00+00:00')
+        assert usage.discount_amount == Decimal('15000.00')
+        assert PromotionUsage.objects.get(bill_id=usages[1]['bill_id']).member_id == member.id
+        self.promotion.refresh_from_db()
+        assert self.promotion.current_uses == 2
+
+    def test_retry_is_idempotent(self):
+        """Re-uploading the same batch inserts and counts nothing"""
+        usages = [self._usage(), self._usage()]
+        self._upload(usages)
+
+        response = self._upload(usages)
+
+        assert response.data['created'] == 0
+        assert response.data['duplicates'] == 2
+        assert PromotionUsage.objects.count() == 2
+        self.promotion.refresh_from_db()
+        assert self.promotion.current_uses == 2
+
+    def test_counted_promotions_are_touched_for_sync(self):
+        """current_uses reaches Edges: change_seq and updated_at move, a retry leaves them"""
+        before = Promotion.objects.values_list('change_seq', 'updated_at').get(pk=self.promotion.pk)
+        usages = [self._usage()]
+        self._upload(usages)
+
+        after = Promotion.objects.values_list('change_seq', 'updated_at').get(pk=self.promotion.pk)
+        assert after[0] > before[0]
+        assert after[1] > before[1]
+
+        self._upload(usages)
+        assert Promotion.objects.values_list('change_seq', 'updated_at').get(pk=self.promotion.pk) == after
+
+    def test_duplicates_within_batch(self):
+        bill_id = uuid.uuid4()
+
+        response = self._upload([self._usage(bill_id), self._usage(bill_id)])
+
+        assert response.data['created'] == 1
+        assert response.data['duplicates'] == 1
+
+    def test_invalid_rows_are_reported(self):
+        """Bad rows are rejected individually; valid rows still go in"""
+        usages = [
+            self._usage(),
+            self._usage(bill_id='B001'),
+            self._usage(promotion_id=str(uuid.uuid4())),
+            self._usage(discount_amount='abc'),
+            self._usage(used_at='yesterday'),
+        ]
+
+        response = self._upload(usages)
+
+        assert response.data['created'] == 1
+        assert [error['index'] for error in response.data['errors']] == [1, 2, 3, 4]
+        assert response.data['total'] == 5
+
+    def test_large_batch_uses_constant_queries(self):
+        """10k usages are written in batches, not row by row"""
+        usages = [self._usage() for _ in range(10000)]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._upload(usages)
+
+        assert response.data['created'] == 10000
+        assert len(queries) < 200  # SQLite splits INSERTs further than PostgreSQL
+        self.promotion.refresh_from_db()
+        assert self.promotion.current_uses == 10000
+
+    def test_batch_too_large(self):
+        response = self._upload([self._usage()] * (MAX_USAGES_PER_REQUEST + 1))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['code'] == 'BATCH_TOO_LARGE'
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class SyncApiConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "sync_api"
+    verbose_name = "Edge Sync API"
+
+    def ready(self):
+        import sync_api.signals  # noqa: F401
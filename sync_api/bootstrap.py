@@ -0,0 +1,466 @@
+"""
+Edge Server bootstrap stream
+Every master-data section an edge needs to come online, in one request
+
+The store scope (company, store, brands operating in the store) is
+resolved once through the cached resolver (sync_api/store_scope.py) and
+shared by all sections. Each section is a generator reading its queryset
+with iterator(), so memory stays flat no matter how large the catalog
+is. Row shapes match the per-entity sync endpoints.
+"""
+
+import json
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, Q
+
+from core.models import Brand, Company, Store
+from products.models import (
+    Category, Modifier, ModifierOption, Product, ProductModifier,
+    TableArea, TableGroup, Tables
+)
+from promotions.models import Promotion
+from promotions.models_settings import PromotionSyncSettings
+from promotions.services.compiler import PromotionCompiler
+from sync_api.store_scope import get_store_scope
+
+
+# Rows fetched per database round-trip while streaming
+BOOTSTRAP_CHUNK_SIZE = 500
+
+
+class StoreScope:
+    """Store scope shared by every bootstrap section"""
+
+    def __init__(self, company, store, brand_ids, sync_settings, now):
+        self.company = company
+        self.store = store
+        self.brand_ids = brand_ids
+        self.sync_settings = sync_settings
+        self.now = now
+
+    @property
+    def company_id(self):
+        return self.company.id
+
+    @property
+    def store_id(self):
+        return self.store.id
+
+
+def promotion_sync_query(sync_settings, company_id, now):
+    """
+    Base promotion filter for a company's sync strategy
+
+    Shared by sync_promotions and the bootstrap stream.
+    """
+    if sync_settings.sync_strategy == 'current_only':
+        # Only promotions valid today
+        query = Q(
+            company_id=company_id,
+            start_date__lte=now.date(),
+            end_date__gte=now.date()
+        )
+    elif sync_settings.sync_strategy == 'include_future':
+        # Promotions valid from past_days ago to future_days ahead
+        query = Q(
+            company_id=company_id,
+            start_date__lte=now.date() + timedelta(days=sync_settings.future_days),
+            end_date__gte=now.date() - timedelta(days=sync_settings.past_days)
+        )
+    else:  # 'all_active'
+        # All active promotions regardless of dates
+        query = Q(company_id=company_id)
+
+    # Apply active filter based on settings
+    if not sync_settings.include_inactive:
+        query &= Q(is_active=True)
+
+    return query
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def companies_section(scope, request):
+    company = scope.company
+    yield {
+        'id': str(company.id),
+        'code': company.code,
+        'name': company.name,
+        'timezone': company.timezone,
+        'is_active': company.is_active,
+        'point_expiry_months': company.point_expiry_months,
+        'points_per_currency': str(company.points_per_currency),
+        'created_at': _iso(company.created_at),
+        'updated_at': _iso(company.updated_at),
+    }
+
+
+def brands_section(scope, request):
+    company = scope.company
+    brands = Brand.objects.filter(id__in=scope.brand_ids).order_by('name')
+    for brand in brands.iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        brand.company = company
+        yield {
+            'id': str(brand.id),
+            'company_id': str(company.id),
+            'company_code': company.code,
+            'company_name': company.name,
+            'code': brand.code,
+            'name': brand.name,
+            'address': brand.address,
+            'phone': brand.phone,
+            'tax_id': brand.tax_id,
+            'tax_rate': str(brand.tax_rate),
+            'service_charge': str(brand.service_charge),
+            'point_expiry_months_override': brand.point_expiry_months_override,
+            'point_expiry_months': brand.get_point_expiry_months(),
+            'is_active': brand.is_active,
+            'created_at': _iso(brand.created_at),
+            'updated_at': _iso(brand.updated_at),
+        }
+
+
+def stores_section(scope, request):
+    store = scope.store
+    yield {
+        'id': str(store.id),
+        'brand_id': str(store.brand.id),
+        'brand_code': store.brand.code,
+        'brand_name': store.brand.name,
+        'company_id': str(scope.company.id),
+        'company_code': scope.company.code,
+        'company_name': scope.company.name,
+        'store_code': store.store_code,
+        'store_name': store.store_name,
+        'address': store.address,
+        'phone': store.phone,
+        'timezone': store.timezone,
+        'latitude': str(store.latitude) if store.latitude else None,
+        'longitude': str(store.longitude) if store.longitude else None,
+        'is_active': store.is_active,
+        'created_at': _iso(store.created_at),
+        'updated_at': _iso(store.updated_at),
+    }
+
+
+def categories_section(scope, request):
+    categories = Category.objects.filter(
+        brand_id__in=scope.brand_ids, is_active=True
+    ).values(
+        'id', 'brand_id', 'name', 'parent_id', 'is_active', 'sort_order',
+        'created_at', 'updated_at', 'change_seq'
+    )
+    for cat in categories.iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        yield {
+            'id': str(cat['id']),
+            'company_id': str(scope.company_id),
+            'brand_id': str(cat['brand_id']),
+            'name': cat['name'],
+            'parent_id': str(cat['parent_id']) if cat['parent_id'] else None,
+            'is_active': cat['is_active'],
+            'sort_order': cat['sort_order'],
+            'created_at': _iso(cat['created_at']),
+            'updated_at': _iso(cat['updated_at']),
+            'change_seq': cat['change_seq'],
+        }
+
+
+def products_section(scope, request):
+    products = Product.objects.filter(
+        company_id=scope.company_id, brand_id__in=scope.brand_ids, is_active=True
+    ).values(
+        'id', 'company_id', 'brand_id', 'category_id',
+        'name', 'sku', 'price', 'cost', 'is_active',
+        'description', 'created_at', 'updated_at', 'change_seq'
+    )
+    store_id = str(scope.store_id)
+    for prod in products.iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        yield {
+            'id': str(prod['id']),
+            'company_id': str(prod['company_id']),
+            'brand_id': str(prod['brand_id']),
+            'category_id': str(prod['category_id']),
+            'store_id': store_id,
+            'name': prod['name'],
+            'sku': prod['sku'],
+            'price': str(prod['price']),
+            'cost': str(prod['cost']),
+            'is_active': prod['is_active'],
+            'description': prod['description'] or '',
+            'created_at': _iso(prod['created_at']),
+            'updated_at': _iso(prod['updated_at']),
+            'change_seq': prod['change_seq'],
+        }
+
+
+def modifiers_section(scope, request):
+    modifiers = Modifier.objects.filter(
+        brand_id__in=scope.brand_ids, is_active=True
+    ).prefetch_related(
+        Prefetch('options', queryset=ModifierOption.objects.filter(is_active=True), to_attr='active_options')
+    )
+    for modifier in modifiers.iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        yield {
+            'id': str(modifier.id),
+            'brand_id': str(modifier.brand_id),
+            'company_id': str(scope.company_id),
+            'name': modifier.name,
+            'is_required': modifier.is_required,
+            'max_selections': modifier.max_selections,
+            'is_active': modifier.is_active,
+            'options': [
+                {
+                    'id': str(option.id),
+                    'modifier_id': str(option.modifier_id),
+                    'name': option.name,
+                    'price_adjustment': str(option.price_adjustment),
+                    'is_default': option.is_default,
+                    'sort_order': option.sort_order,
+                    'is_active': option.is_active,
+                    'created_at': _iso(option.created_at),
+                }
+                for option in modifier.active_options
+            ],
+            'created_at': _iso(modifier.created_at),
+            'updated_at': _iso(modifier.updated_at),
+            'change_seq': modifier.change_seq,
+        }
+
+
+def modifier_options_section(scope, request):
+    options = ModifierOption.objects.filter(
+        modifier__brand_id__in=scope.brand_ids,
+        modifier__is_active=True,
+        is_active=True
+    ).select_related('modifier').order_by('modifier', 'sort_order')
+    for option in options.iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        yield {
+            'id': str(option.id),
+            'modifier_id': str(option.modifier_id),
+            'modifier_name': option.modifier.name,
+            'brand_id': str(option.modifier.brand_id),
+            'company_id': str(scope.company_id),
+            'name': option.name,
+            'price_adjustment': str(option.price_adjustment),
+            'is_default': option.is_default,
+            'sort_order': option.sort_order,
+            'is_active': option.is_active,
+            'created_at': _iso(option.created_at),
+        }
+
+
+def product_modifiers_section(scope, request):
+    product_modifiers = ProductModifier.objects.filter(
+        product__company_id=scope.company_id,
+        product__brand_id__in=scope.brand_ids,
+        product__is_active=True,
+        modifier__is_active=True
+    ).values(
+        'id', 'product_id', 'product__name', 'product__sku',
+        'modifier_id', 'modifier__name', 'sort_order'
+    ).order_by('product', 'sort_order')
+    for pm in product_modifiers.iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        yield {
+            'id': str(pm['id']),
+            'product_id': str(pm['product_id']),
+            'product_name': pm['product__name'],
+            'product_sku': pm['product__sku'],
+            'modifier_id': str(pm['modifier_id']),
+            'modifier_name': pm['modifier__name'],
+            'sort_order': pm['sort_order'],
+        }
+
+
+def _store_areas(scope):
+    return TableArea.objects.filter(
+        company_id=scope.company_id,
+        brand_id__in=scope.brand_ids,
+        store_id=scope.store_id,
+        is_active=True
+    )
+
+
+def table_areas_section(scope, request):
+    for area in _store_areas(scope).order_by('sort_order', 'name').iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        yield {
+            'id': str(area.id),
+            'company_id': str(area.company_id),
+            'brand_id': str(area.brand_id),
+            'store_id': str(area.store_id),
+            'name': area.name,
+            'description': area.description,
+            'sort_order': area.sort_order,
+            'floor_width': area.floor_width,
+            'floor_height': area.floor_height,
+            'floor_image': request.build_absolute_uri(area.floor_image.url) if area.floor_image else None,
+            'is_active': area.is_active,
+            'created_at': _iso(area.created_at),
+            'updated_at': _iso(area.updated_at),
+            'change_seq': area.change_seq,
+        }
+
+
+def tables_section(scope, request):
+    tables = Tables.objects.filter(
+        area__in=_store_areas(scope), is_active=True
+    ).select_related('area').order_by('area', 'number')
+    for table in tables.iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        yield {
+            'id': str(table.id),
+            'area_id': str(table.area_id),
+            'area_name': table.area.name,
+            'number': table.number,
+            'capacity': table.capacity,
+            'qr_code': table.qr_code,
+            'pos_x': table.pos_x,
+            'pos_y': table.pos_y,
+            'status': table.status,  # Note: Status managed by Edge
+            'is_active': table.is_active,
+            'created_at': _iso(table.created_at),
+            'updated_at': _iso(table.updated_at),
+            'change_seq': table.change_seq,
+        }
+
+
+def table_groups_section(scope, request):
+    table_groups = TableGroup.objects.filter(
+        brand_id__in=scope.brand_ids
+    ).select_related(
+        'main_table', 'created_by'
+    ).prefetch_related('members__table__area').order_by('-created_at')
+    for group in table_groups.iterator(chunk_size=BOOTSTRAP_CHUNK_SIZE):
+        members = [
+            {
+                'id': str(member.id),
+                'table_id': str(member.table_id),
+                'table_number': member.table.number,
+                'table_area': member.table.area.name,
+            }
+            for member in group.members.all()
+        ]
+        yield {
+            'id': str(group.id),
+            'brand_id': str(group.brand_id),
+            'main_table_id': str(group.main_table_id),
+            'main_table_number': group.main_table.number,
+            'created_by_id': str(group.created_by_id),
+            'created_by_name': group.created_by.get_full_name() if hasattr(group.created_by, 'get_full_name') else str(group.created_by),
+            'created_at': _iso(group.created_at),
+            'members': members,
+            'total_members': len(members),
+        }
+
+
+def promotions_section(scope, request):
+    """Compiled promotions for every brand in the store, compiled per chunk"""
+    sync_settings = scope.sync_settings
+    query = promotion_sync_query(sync_settings, scope.company_id, scope.now)
+    query &= Q(brand_id__in=scope.brand_ids)
+    query &= (Q(all_stores=True) | Q(stores=scope.store))
+
+    promotion_ids = list(
+        Promotion.objects.filter(query).distinct()
+        .order_by('-execution_priority', 'name')
+        .values_list('id', flat=True)[:sync_settings.max_promotions_per_sync]
+    )
+
+    compiler = PromotionCompiler()
+    for start in range(0, len(promotion_ids), BOOTSTRAP_CHUNK_SIZE):
+        chunk = promotion_ids[start:start + BOOTSTRAP_CHUNK_SIZE]
+        promotions = {promotion.id: promotion for promotion in Promotion.objects.filter(id__in=chunk)}
+        yield from compiler.compile_multiple([promotions[pk] for pk in chunk if pk in promotions])
+
+
+# Section name -> row generator, in stream order
+BOOTSTRAP_SECTIONS = {
+    'companies': companies_section,
+    'brands': brands_section,
+    'stores': stores_section,
+    'categories': categories_section,
+    'products': products_section,
+    'modifiers': modifiers_section,
+    'modifier_options': modifier_options_section,
+    'product_modifiers': product_modifiers_section,
+    'table_areas': table_areas_section,
+    'tables': tables_section,
+    'table_groups': table_groups_section,
+    'promotions': promotions_section,
+}
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def stream_ndjson(scope, request, sections, meta, on_error):
+    """
+    One JSON object per line
+
+    {"section": "meta", "data": {...}}
+    {"section": "<name>", "data": {...row...}}   (one line per row)
+    {"section": "end", "data": {"counts": {...}}}
+    """
+    yield _dumps({'section': 'meta', 'data': meta}) + '\n'
+    counts = {}
+    try:
+        for name in sections:
+            counts[name] = 0
+            for row in BOOTSTRAP_SECTIONS[name](scope, request):
+                counts[name] += 1
+                yield _dumps({'section': name, 'data': row}) + '\n'
+    except Exception as e:
+        on_error(e)
+        yield _dumps({'section': 'error', 'data': {'code': 'INTERNAL_ERROR', 'section': name}}) + '\n'
+        return
+    yield _dumps({'section': 'end', 'data': {'counts': counts}}) + '\n'
+
+
+def stream_json(scope, request, sections, meta, on_error):
+    """
+    A single JSON document written piece by piece
+
+    {"meta": {...}, "<name>": [rows...], ..., "counts": {...}}
+    A failure mid-stream ends the document with an "error" member.
+    """
+    yield '{"meta":' + _dumps(meta)
+    counts = {}
+    in_array = False
+    try:
+        for name in sections:
+            counts[name] = 0
+            yield ',' + _dumps(name) + ':['
+            in_array = True
+            for row in BOOTSTRAP_SECTIONS[name](scope, request):
+                yield (',' if counts[name] else '') + _dumps(row)
+                counts[name] += 1
+            yield ']'
+            in_array = False
+    except Exception as e:
+        on_error(e)
+        yield (']' if in_array else '') + ',"error":' + _dumps({'code': 'INTERNAL_ERROR', 'section': name}) + '}'
+        return
+    yield ',"counts":' + _dumps(counts) + '}'
+
+
+def resolve_scope(company_id, store_id, now, cached=True):
+    """
+    Resolve the store scope once for the whole bootstrap
+
+    Args:
+        cached: False bypasses the store scope cache (background jobs)
+
+    Raises Store.DoesNotExist / Company.DoesNotExist for an unknown scope.
+    """
+    resolved = get_store_scope(company_id, store_id, cached=cached)
+    if resolved is None or not resolved.store.is_active:
+        raise Store.DoesNotExist
+    company = resolved.company
+    if not company.is_active:
+        raise Company.DoesNotExist
+
+    sync_settings = PromotionSyncSettings.get_for_company(company)
+    return StoreScope(company, resolved.store, list(resolved.brand_ids), sync_settings, now)
@@ -0,0 +1,128 @@
+"""
+Compact columnar encoding for sync payloads
+
+Sync responses are lists of flat rows that repeat the same keys, UUIDs
+and names on every row. The compact encoding turns every list of objects
+into a table of per-field arrays and dictionary-encodes repeated strings
+into one shared string table, so each id or name is sent once.
+
+    {
+        "format": "compact-v1",
+        "strings": ["<uuid>", "Nasi Goreng", ...],
+        "data": {
+            "products": {
+                "$rows": 2,
+                "$cols": {"id": ["a1", "a2"], "brand_id": [0, 0], "price": ["1.00", "2.00"]},
+                "$dict": ["brand_id"],
+                "$absent": {"note": [1]}
+            },
+            "total": 2
+        }
+    }
+
+- "$cols": one array per field, values in row order
+- "$dict": fields whose values are indices into "strings"
+- "$absent": row indices where the field was missing (kept only when needed)
+
+Nested lists of objects (modifier options, promotion rules) are encoded
+the same way. decode_compact() is the reference decoder for edges.
+"""
+
+COMPACT_FORMAT = 'compact-v1'
+
+
+class _StringTable:
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def add(self, value):
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+def _is_table(value):
+    return isinstance(value, list) and value and all(isinstance(item, dict) for item in value)
+
+
+def _encode_value(value, strings):
+    if isinstance(value, dict):
+        return {key: _encode_value(item, strings) for key, item in value.items()}
+    if _is_table(value):
+        return _encode_rows(value, strings)
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(item, strings) for item in value]
+    return value
+
+
+def _encode_rows(rows, strings):
+    fields = {}
+    for row in rows:
+        for key in row:
+            fields.setdefault(key, None)
+
+    columns, dict_fields, absent = {}, [], {}
+    for field in fields:
+        values = [row.get(field) for row in rows]
+        missing = [i for i, row in enumerate(rows) if field not in row]
+        if missing:
+            absent[field] = missing
+
+        present = [v for v in values if v is not None]
+        # Dictionary-encode string columns that repeat (ids, names, codes)
+        if present and all(isinstance(v, str) for v in present) and len(set(present)) < len(present):
+            columns[field] = [None if v is None else strings.add(v) for v in values]
+            dict_fields.append(field)
+        else:
+            columns[field] = [_encode_value(v, strings) for v in values]
+
+    table = {'$rows': len(rows), '$cols': columns}
+    if dict_fields:
+        table['$dict'] = dict_fields
+    if absent:
+        table['$absent'] = absent
+    return table
+
+
+def encode_compact(data):
+    """Encode a sync payload (dict of JSON-compatible values) to the compact format"""
+    strings = _StringTable()
+    encoded = _encode_value(data, strings)
+    return {'format': COMPACT_FORMAT, 'strings': strings.values, 'data': encoded}
+
+
+def _decode_value(value, strings):
+    if isinstance(value, dict):
+        if '$rows' in value and '$cols' in value:
+            return _decode_rows(value, strings)
+        return {key: _decode_value(item, strings) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(item, strings) for item in value]
+    return value
+
+
+def _decode_rows(table, strings):
+    dict_fields = set(table.get('$dict', ()))
+    absent = {field: set(indices) for field, indices in table.get('$absent', {}).items()}
+    rows = [{} for _ in range(table['$rows'])]
+
+    for field, values in table['$cols'].items():
+        skip = absent.get(field, ())
+        for i, value in enumerate(values):
+            if i in skip:
+                continue
+            if field in dict_fields:
+                rows[i][field] = None if value is None else strings[value]
+            else:
+                rows[i][field] = _decode_value(value, strings)
+    return rows
+
+
+def decode_compact(payload):
+    """Decode a compact payload back to the plain JSON structure"""
+    if payload.get('format') != COMPACT_FORMAT:
+        raise ValueError(f"Unsupported compact format: {payload.get('format')}")
+    return _decode_value(payload['data'], payload['strings'])
@@ -0,0 +1,161 @@
+"""
+Transfer compression for sync responses
+
+Edges on weak store uplinks advertise what they can decode with
+Accept-Encoding; SyncCompressionMiddleware compresses /api/v1/sync/
+responses with the best codec both sides support.
+
+Server preference: zstd > br > gzip. zstd and brotli need the optional
+zstandard / Brotli packages (requirements-compression.txt) and are simply
+not offered without them.
+
+Streaming responses (bootstrap) are gzip-compressed chunk by chunk, so the
+Edge still receives the stream as it is produced.
+"""
+
+import gzip
+import logging
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SYNC_PATH_PREFIX = '/api/v1/sync/'
+
+
+def _gzip(data):
+    # mtime=0 keeps the output deterministic for identical payloads
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=5)
+
+
+def _zstd(data):
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def _build_codecs():
+    codecs = {}
+    if zstandard is not None:
+        codecs['zstd'] = _zstd
+    if brotli is not None:
+        codecs['br'] = _brotli
+    codecs['gzip'] = _gzip
+    return codecs
+
+
+# Content-Encoding -> compress function, in server preference order
+CODECS = _build_codecs()
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header
+
+    Returns:
+        Dict of coding -> q value (codings with q=0 are kept as 0.0)
+    """
+    accepted = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def accepts_encoding(header, coding):
+    """True if the Accept-Encoding header allows coding"""
+    accepted = parse_accept_encoding(header)
+    return accepted.get(coding, accepted.get('*', 0.0)) > 0
+
+
+def negotiate_encoding(header):
+    """
+    Pick the codec for a response
+
+    Returns:
+        Content-Encoding name, or None to send the body uncompressed
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in CODECS:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        # Ties keep the earlier (preferred) codec
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class SyncCompressionMiddleware:
+    """
+    Compress sync API responses per Accept-Encoding
+
+    Skips responses that already carry a Content-Encoding (precomputed
+    snapshots) and bodies below SYNC_COMPRESSION_MIN_BYTES. Streaming
+    responses are gzip-only. Strong ETags are weakened, as the bytes on
+    the wire now depend on the negotiated codec.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not request.path.startswith(SYNC_PATH_PREFIX):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.has_header('Content-Encoding'):
+            return response
+
+        if response.streaming:
+            if not response.is_async and accepts_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), 'gzip'):
+                response.streaming_content = compress_sequence(response.streaming_content)
+                response['Content-Encoding'] = 'gzip'
+                if response.has_header('Content-Length'):
+                    del response['Content-Length']
+            return response
+
+        content = response.content
+        if len(content) < getattr(settings, 'SYNC_COMPRESSION_MIN_BYTES', 512):
+            return response
+
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = CODECS[encoding](content)
+        if len(compressed) >= len(content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,86 @@
+"""
+ETag support for Edge Server sync endpoints
+
+Each sync view computes a cheap version fingerprint for the requested
+scope (one aggregate query over the rows it would return) and answers
+If-None-Match with 304 Not Modified before building the payload.
+"""
+
+import hashlib
+import json
+
+from django.db.models import Count, Max
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _request_params(request):
+    """Request parameters that shape the payload (part of the fingerprint)"""
+    data = request.data
+    if hasattr(data, 'dict'):
+        data = data.dict()
+    params = dict(data or {})
+    # Non-default representations (compact format) get their own ETag
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is not None and renderer.format not in ('json', 'api'):
+        params['_format'] = renderer.format
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from arbitrary parts"""
+    raw = '|'.join(str(part) for part in parts)
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def sync_etag(request, entity, queryset, *max_fields, extra=()) -> str:
+    """
+    Compute the ETag for a sync response
+
+    Runs a single aggregate query on queryset: the row count plus
+    Max() of each field in max_fields. Row count catches hard deletes,
+    the Max() values catch inserts, updates and deactivations.
+
+    Args:
+        request: DRF request (its body parameters are part of the ETag)
+        entity: Entity name, e.g. 'products'
+        queryset: Rows in scope (usually without the is_active filter)
+        max_fields: Timestamp fields to take the maximum of
+        extra: Additional values the payload depends on
+
+    Returns:
+        Quoted ETag string
+    """
+    aggregates = {'_count': Count('pk')}
+    for i, field in enumerate(max_fields):
+        aggregates[f'_max{i}'] = Max(field)
+    result = queryset.order_by().aggregate(**aggregates)
+
+    values = [result['_count']] + [result[f'_max{i}'] for i in range(len(max_fields))]
+    return make_etag(entity, _request_params(request), *values, *extra)
+
+
+def etag_matches(request, etag: str) -> bool:
+    """Check the request's If-None-Match header against etag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    # Weak comparison: W/"x" matches "x"
+    candidates = [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    """304 response carrying the current ETag"""
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    """Attach the ETag to a successful response"""
+    response['ETag'] = etag
+    return response
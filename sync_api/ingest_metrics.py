@@ -0,0 +1,251 @@
+"""
+Ingest Metrics
+Per-store instrumentation of Edge push endpoints
+
+@instrument_push wraps the transaction push views and records, per store
+and minute, into SyncHealth:
+
+- requests / failed requests (4xx, 5xx)
+- validation failures (rejected records)
+- rows written per table
+- payload bytes (Content-Length)
+- DB time (connection.execute_wrapper) vs the rest of the request
+  (parsing, validation, rendering)
+
+render_metrics() exposes the last SYNC_METRICS_WINDOW_MINUTES of that in
+the Prometheus text format (served at /metrics), plus the age of each
+store's last push so lagging stores show up within minutes.
+"""
+
+import functools
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from sync_api.models import SyncHealth
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """connection.execute_wrapper hook summing time spent in queries"""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def _find_request(args):
+    for arg in args:
+        if isinstance(arg, (Request, HttpRequest)):
+            return arg
+    return None
+
+
+def _rows_from_response(table, response):
+    """Rows written per table, from the push response body"""
+    data = response.data if isinstance(getattr(response, 'data', None), dict) else {}
+    if isinstance(data.get('rows'), dict):
+        return data['rows']
+    created = data.get('created')
+    if isinstance(created, dict):
+        return created
+    if table and isinstance(created, int):
+        return {table: created}
+    if table and response.status_code == 201:
+        return {table: 1}
+    return {}
+
+
+def _failures_from_response(response):
+    data = response.data if isinstance(getattr(response, 'data', None), dict) else {}
+    if response.status_code == 207:
+        return data.get('failed') or len(data.get('bill_errors', []))
+    if 400 <= response.status_code < 500:
+        return 1
+    return 0
+
+
+def record_push(store_id, rows=None, failed=False, validation_failures=0,
+                payload_bytes=0, db_seconds=0.0, serialize_seconds=0.0, company_id=None,
+                count_request=True):
+    """
+    Add one push to the store's SyncHealth row for the current minute
+
+    Args:
+        count_request: False for work done outside the HTTP request
+            (async batches), which was already counted when queued
+    """
+    now = timezone.now()
+    bucket = now.replace(second=0, microsecond=0)
+    try:
+        with transaction.atomic():
+            health, _ = SyncHealth.objects.select_for_update().get_or_create(
+                store_id=store_id, bucket=bucket,
+                defaults={'company_id': company_id, 'last_push_at': now}
+            )
+            health.requests += int(count_request)
+            health.failed_requests += int(failed)
+            health.validation_failures += validation_failures
+            health.payload_bytes += payload_bytes
+            health.db_ms += db_seconds * 1000
+            health.serialize_ms += serialize_seconds * 1000
+            health.last_push_at = now
+            for table, count in (rows or {}).items():
+                if count:
+                    health.rows[table] = health.rows.get(table, 0) + int(count)
+            health.save()
+    except IntegrityError:
+        # Metrics must never fail the push itself
+        logger.warning(f"Could not record ingest metrics for store {store_id}")
+
+
+def _record_request(request, table, timer, elapsed, response=None, error=None):
+    """Record one instrumented push: its response, or the exception it raised"""
+    try:
+        from transactions.services.ingest_queue import resolve_store_id
+        data = request.data if request is not None else {}
+        # Streamed (NDJSON) bodies expose what they saw in .meta
+        data = getattr(data, 'meta', data)
+        if not isinstance(data, dict):
+            data = {}
+        store_id = resolve_store_id(data)
+        if store_id is None:
+            return
+        if response is not None:
+            rows = _rows_from_response(table, response)
+            failed = response.status_code >= 400
+            validation_failures = _failures_from_response(response)
+        else:
+            # ParseError / ValidationError raised by the view count like a 400
+            rows, failed = {}, True
+            validation_failures = int(isinstance(error, APIException) and 400 <= error.status_code < 500)
+        record_push(
+            store_id,
+            rows=rows,
+            failed=failed,
+            validation_failures=validation_failures,
+            payload_bytes=int(request.META.get('CONTENT_LENGTH') or 0),
+            db_seconds=timer.seconds,
+            serialize_seconds=max(elapsed - timer.seconds, 0.0),
+            company_id=data.get('company_id'),
+        )
+    except Exception:
+        logger.exception('Ingest metrics recording failed')
+
+
+def instrument_push(table=None):
+    """
+    Record ingest metrics for a push view (function or ViewSet action)
+
+    Args:
+        table: Row key for responses that only report a created count
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            request = _find_request(args)
+            timer = QueryTimer()
+            started = time.perf_counter()
+            try:
+                with connection.execute_wrapper(timer):
+                    response = view(*args, **kwargs)
+            except Exception as e:
+                _record_request(request, table, timer, time.perf_counter() - started, error=e)
+                raise
+            _record_request(request, table, timer, time.perf_counter() - started, response=response)
+            return response
+        return wrapper
+    return decorator
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+
+
+def render_metrics():
+    """Prometheus text exposition of recent ingest activity"""
+    from core.models import Store
+    from transactions.services.ingest_queue import queue_depth
+
+    now = timezone.now()
+    window = getattr(settings, 'SYNC_METRICS_WINDOW_MINUTES', 5)
+    since = now - timedelta(minutes=window)
+
+    totals = defaultdict(lambda: defaultdict(float))
+    rows = defaultdict(lambda: defaultdict(int))
+    for health in SyncHealth.objects.filter(bucket__gte=since):
+        store_totals = totals[health.store_id]
+        store_totals['requests'] += health.requests
+        store_totals['failed_requests'] += health.failed_requests
+        store_totals['validation_failures'] += health.validation_failures
+        store_totals['payload_bytes'] += health.payload_bytes
+        store_totals['db_seconds'] += health.db_ms / 1000
+        store_totals['serialize_seconds'] += health.serialize_ms / 1000
+        for table, count in health.rows.items():
+            rows[health.store_id][table] += count
+
+    stores = {
+        store.id: store.store_code
+        for store in Store.objects.filter(is_active=True).only('id', 'store_code')
+    }
+    last_push = dict(
+        SyncHealth.objects.order_by().values('store_id').annotate(last=Max('last_push_at')).values_list('store_id', 'last')
+    )
+
+    def store_labels(store_id, **extra):
+        return _labels(store_id=store_id, store_code=stores.get(store_id, ''), **extra)
+
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            lines.append(f'{name}{{{labels}}} {value:g}' if labels else f'{name} {value:g}')
+
+    per_store = [
+        ('fnb_ingest_requests', 'requests', 'Push requests in the window'),
+        ('fnb_ingest_failed_requests', 'failed_requests', 'Push requests answered with 4xx/5xx in the window'),
+        ('fnb_ingest_validation_failures', 'validation_failures', 'Records rejected by validation in the window'),
+        ('fnb_ingest_payload_bytes', 'payload_bytes', 'Request payload bytes in the window'),
+        ('fnb_ingest_db_seconds', 'db_seconds', 'Seconds spent in DB queries in the window'),
+        ('fnb_ingest_serialize_seconds', 'serialize_seconds', 'Seconds spent outside DB queries in the window'),
+    ]
+    metric('fnb_ingest_window_seconds', 'gauge', 'Length of the aggregation window', [('', window * 60)])
+    for name, key, help_text in per_store:
+        metric(name, 'gauge', help_text, [
+            (store_labels(store_id), values[key]) for store_id, values in sorted(totals.items(), key=str)
+        ])
+    metric('fnb_ingest_rows', 'gauge', 'Rows written per table in the window', [
+        (store_labels(store_id, table=table), count)
+        for store_id, tables in sorted(rows.items(), key=str)
+        for table, count in sorted(tables.items())
+    ])
+    # Stores that never pushed are reported with the retention window as age
+    retention = getattr(settings, 'SYNC_HEALTH_RETENTION_DAYS', 14) * 86400
+    metric('fnb_ingest_last_push_age_seconds', 'gauge', 'Seconds since the store last pushed', [
+        (store_labels(store_id), (now - last_push[store_id]).total_seconds() if store_id in last_push else retention)
+        for store_id in sorted(set(stores) | set(last_push), key=str)
+    ])
+    metric('fnb_ingest_queue_depth', 'gauge', 'Async ingest batches queued or processing', [('', queue_depth())])
+    return '\n'.join(lines) + '\n'
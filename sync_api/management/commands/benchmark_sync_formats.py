@@ -0,0 +1,125 @@
+"""
+Management Command: Benchmark Sync Formats
+Reports bytes-on-wire and serialize time of each sync payload for every
+representation / Content-Encoding combination.
+
+Usage:
+    python manage.py generate_sample_data
+    python manage.py benchmark_sync_formats
+    python manage.py benchmark_sync_formats --store <uuid> --scale 200
+"""
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Store, User
+from sync_api import sync_views
+from sync_api.compression import CODECS
+from sync_api.renderers import CompactSyncRenderer
+
+
+# (label, list key in the response, view)
+BENCHMARK_ENDPOINTS = [
+    ('products', 'products', sync_views.sync_products),
+    ('categories', 'categories', sync_views.sync_categories),
+    ('modifiers', 'modifiers', sync_views.sync_modifiers),
+    ('modifier_options', 'modifier_options', sync_views.sync_modifier_options),
+    ('product_modifiers', 'product_modifiers', sync_views.sync_product_modifiers),
+    ('promotions', 'promotions', sync_views.sync_promotions),
+]
+
+RENDERERS = {
+    'json': JSONRenderer(),
+    'compact': CompactSyncRenderer(),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sync payload size and serialize time per format and encoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--store',
+            type=str,
+            default=None,
+            help='Store UUID (defaults to the first store of the generate_sample_data company)',
+        )
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1,
+            help='Replicate rows N times (fresh ids) to simulate a larger catalog',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Serialize iterations to average over',
+        )
+
+    def handle(self, *args, **options):
+        store = self.get_store(options['store'])
+        user = User.objects.filter(is_superuser=True).first() or User(username='benchmark')
+        factory = APIRequestFactory()
+        body = {'company_id': str(store.brand.company_id), 'store_id': str(store.id)}
+
+        self.stdout.write(self.style.SUCCESS(
+            f"=== Sync format benchmark: {store.store_name} (scale x{options['scale']}) ===\n"
+        ))
+        self.stdout.write(f"{'endpoint':<20}{'format':<10}{'encoding':<10}{'bytes':>12}{'ratio':>8}{'ms':>10}")
+
+        for label, key, view in BENCHMARK_ENDPOINTS:
+            request = factory.post(f'/api/v1/sync/{label}/', body, format='json')
+            force_authenticate(request, user=user)
+            # Measure the live serializer, not a precomputed snapshot
+            with override_settings(SYNC_SNAPSHOTS_ENABLED=False):
+                response = view(request)
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f"{label}: HTTP {response.status_code}, skipped"))
+                continue
+
+            data = self.scale(response.data, key, options['scale'])
+            baseline = None
+            for format_name, renderer in RENDERERS.items():
+                started = time.perf_counter()
+                for _ in range(options['iterations']):
+                    raw = renderer.render(data)
+                render_ms = (time.perf_counter() - started) * 1000 / options['iterations']
+                baseline = baseline or len(raw)
+                self.report(label, format_name, 'identity', len(raw), baseline, render_ms)
+
+                for encoding, compress in CODECS.items():
+                    started = time.perf_counter()
+                    compressed = compress(raw)
+                    compress_ms = (time.perf_counter() - started) * 1000
+                    self.report(label, format_name, encoding, len(compressed), baseline, render_ms + compress_ms)
+
+    def report(self, label, format_name, encoding, size, baseline, ms):
+        self.stdout.write(
+            f"{label:<20}{format_name:<10}{encoding:<10}{size:>12,}{size / baseline:>8.2f}{ms:>10.2f}"
+        )
+
+    def get_store(self, store_id):
+        stores = Store.objects.select_related('brand').filter(is_active=True)
+        if store_id:
+            store = stores.filter(id=store_id).first()
+        else:
+            store = stores.filter(brand__company__code='YGY').order_by('store_code').first() or stores.first()
+        if store is None:
+            raise CommandError('No store found - run generate_sample_data first or pass --store')
+        return store
+
+    def scale(self, data, key, factor):
+        """Replicate the rows under key with fresh ids"""
+        rows = data.get(key) or []
+        if factor <= 1 or not rows:
+            return data
+        scaled = list(rows)
+        for _ in range(factor - 1):
+            for row in rows:
+                scaled.append(dict(row, id=str(uuid.uuid4())) if 'id' in row else dict(row))
+        return dict(data, **{key: scaled})
@@ -0,0 +1,47 @@
+"""
+Management Command: Build Sync Snapshots
+Renders the precomputed gzip product / promotion sync snapshots per store.
+Queued (debounced) after master data changes and run daily via Celery Beat
+so promotion date windows roll over.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Company, Store
+from sync_api.snapshots import build_company_snapshots, build_store_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Build precomputed per-store sync snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=str,
+            default=None,
+            help='Only rebuild stores of this company (UUID)',
+        )
+        parser.add_argument(
+            '--store',
+            type=str,
+            default=None,
+            help='Only rebuild this store (UUID)',
+        )
+
+    def handle(self, *args, **options):
+        store_id = options['store']
+        company_id = options['company']
+
+        if store_id:
+            company_id = Store.objects.filter(pk=store_id).values_list('brand__company_id', flat=True).first()
+            if company_id is None:
+                raise CommandError(f"Store {store_id} not found")
+            built = build_store_snapshots(company_id, store_id)
+        elif company_id:
+            built = build_company_snapshots(company_id)
+        else:
+            built = sum(
+                build_company_snapshots(pk)
+                for pk in Company.objects.filter(is_active=True).values_list('id', flat=True)
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Built {built} sync snapshots"))
@@ -0,0 +1,31 @@
+"""
+Management Command: Compact Sync Tombstones
+Deletes deletion tombstones older than the retention window.
+Run weekly via Celery Beat or cron.
+"""
+from django.core.management.base import BaseCommand
+
+from sync_api.models import SyncTombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Retention in days (defaults to SYNC_TOMBSTONE_RETENTION_DAYS)',
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = SyncTombstone.retention_days()
+
+        deleted = SyncTombstone.compact(retention_days=days)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} sync tombstones older than {days} days"
+        ))
@@ -0,0 +1,39 @@
+# Generated manually for SyncTombstone model
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.UUIDField()),
+                ('model_name', models.CharField(help_text='Synced entity, e.g. product', max_length=50)),
+                ('object_id', models.UUIDField()),
+                ('brand_id', models.UUIDField(blank=True, null=True)),
+                ('store_id', models.UUIDField(blank=True, null=True)),
+                ('reason', models.CharField(choices=[('deleted', 'Deleted'), ('deactivated', 'Deactivated')], default='deleted', max_length=20)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Sync Tombstone',
+                'verbose_name_plural': 'Sync Tombstones',
+                'db_table': 'sync_tombstone',
+                'ordering': ['deleted_at'],
+                'indexes': [
+                    models.Index(fields=['company_id', 'model_name', 'deleted_at'], name='sync_tomb_company_model_idx'),
+                    models.Index(fields=['model_name', 'object_id'], name='sync_tomb_object_idx'),
+                    models.Index(fields=['deleted_at'], name='sync_tomb_deleted_at_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated manually for SyncSequence model
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncSequence',
+            fields=[
+                ('company_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('last_seq', models.BigIntegerField(default=0)),
+                ('compacted_seq', models.BigIntegerField(default=0, help_text='Highest tombstone sequence removed by compaction')),
+            ],
+            options={
+                'verbose_name': 'Sync Sequence',
+                'verbose_name_plural': 'Sync Sequences',
+                'db_table': 'sync_sequence',
+            },
+        ),
+        migrations.AddField(
+            model_name='synctombstone',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, help_text='Company change sequence at deletion'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['company_id', 'model_name', 'change_seq'], name='sync_tomb_company_seq_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated manually to backfill change sequences on existing master data
+
+from collections import defaultdict
+
+from django.db import migrations
+
+
+# (app_label, model_name, company lookup, ordering field)
+SEQUENCED_MODELS = [
+    ('products', 'Category', 'brand__company_id', 'updated_at'),
+    ('products', 'Product', 'brand__company_id', 'updated_at'),
+    ('products', 'Modifier', 'brand__company_id', 'updated_at'),
+    ('products', 'TableArea', 'brand__company_id', 'updated_at'),
+    ('products', 'Tables', 'area__brand__company_id', 'updated_at'),
+    # KitchenStation.company is not in the migration state yet; go through brand
+    ('products', 'KitchenStation', 'brand__company_id', 'updated_at'),
+    ('promotions', 'Promotion', 'company_id', 'updated_at'),
+    ('sync_api', 'SyncTombstone', 'company_id', 'deleted_at'),
+]
+
+BATCH_SIZE = 1000
+
+
+def backfill_change_seq(apps, schema_editor):
+    SyncSequence = apps.get_model('sync_api', 'SyncSequence')
+    last_seq = defaultdict(int)
+
+    for app_label, model_name, company_field, order_field in SEQUENCED_MODELS:
+        Model = apps.get_model(app_label, model_name)
+        rows = Model.objects.order_by(order_field, 'pk').values_list('pk', company_field)
+
+        batch = []
+        for pk, company_id in rows.iterator(chunk_size=BATCH_SIZE):
+            if not company_id:
+                continue
+            last_seq[company_id] += 1
+            batch.append(Model(pk=pk, change_seq=last_seq[company_id]))
+            if len(batch) >= BATCH_SIZE:
+                Model.objects.bulk_update(batch, ['change_seq'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['change_seq'])
+
+    SyncSequence.objects.bulk_create([
+        SyncSequence(company_id=company_id, last_seq=seq)
+        for company_id, seq in last_seq.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_api', '0002_syncsequence'),
+        ('products', '0012_change_seq'),
+        ('promotions', '0006_promotion_change_seq'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_change_seq, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated manually for SyncSnapshot model
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_api', '0003_backfill_change_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.UUIDField()),
+                ('store_id', models.UUIDField()),
+                ('entity', models.CharField(choices=[('products', 'Products'), ('promotions', 'Promotions')], max_length=30)),
+                ('version', models.CharField(help_text='Source data fingerprint at build time', max_length=100)),
+                ('etag', models.CharField(max_length=64)),
+                ('content_encoding', models.CharField(default='gzip', max_length=20)),
+                ('payload', models.BinaryField()),
+                ('raw_size', models.PositiveIntegerField(default=0, help_text='Uncompressed payload size in bytes')),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sync Snapshot',
+                'verbose_name_plural': 'Sync Snapshots',
+                'db_table': 'sync_snapshot',
+                'unique_together': {('store_id', 'entity')},
+                'indexes': [models.Index(fields=['company_id'], name='sync_snapshot_company_idx')],
+            },
+        ),
+    ]
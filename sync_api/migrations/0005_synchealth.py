@@ -0,0 +1,37 @@
+# Generated manually for SyncHealth model
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_api', '0004_syncsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncHealth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store_id', models.UUIDField()),
+                ('company_id', models.UUIDField(blank=True, null=True)),
+                ('bucket', models.DateTimeField(help_text='Start of the minute')),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('failed_requests', models.PositiveIntegerField(default=0, help_text='4xx / 5xx responses')),
+                ('validation_failures', models.PositiveIntegerField(default=0, help_text='Rejected records')),
+                ('rows', models.JSONField(default=dict, help_text='Rows written per table')),
+                ('payload_bytes', models.BigIntegerField(default=0)),
+                ('db_ms', models.FloatField(default=0, help_text='Time spent in DB queries')),
+                ('serialize_ms', models.FloatField(default=0, help_text='Request time outside DB queries (parse / validate / render)')),
+                ('last_push_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Sync Health',
+                'verbose_name_plural': 'Sync Health',
+                'db_table': 'sync_health',
+                'unique_together': {('store_id', 'bucket')},
+                'indexes': [models.Index(fields=['bucket'], name='sync_health_bucket_idx')],
+            },
+        ),
+    ]
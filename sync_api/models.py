@@ -0,0 +1,311 @@
+"""
+Sync API Models
+Bookkeeping tables for Edge Server incremental sync
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+
+class SyncSequence(models.Model):
+    """
+    Per-company change sequence counter
+    
+    Every master-data write takes the next value as its change_seq.
+    The counter row stays locked until the writing transaction commits,
+    so sequence values become visible in order and an edge reading up to
+    last_seq never misses a row committed later with a lower value.
+    """
+    company_id = models.UUIDField(primary_key=True)
+    last_seq = models.BigIntegerField(default=0)
+    compacted_seq = models.BigIntegerField(
+        default=0,
+        help_text="Highest tombstone sequence removed by compaction"
+    )
+    
+    class Meta:
+        db_table = 'sync_sequence'
+        verbose_name = 'Sync Sequence'
+        verbose_name_plural = 'Sync Sequences'
+    
+    def __str__(self):
+        return f"{self.company_id}: {self.last_seq}"
+    
+    @classmethod
+    def allocate(cls, company_id, count=1):
+        """
+        Reserve count sequence values for a company
+        
+        Must run inside the transaction that writes the stamped rows.
+        
+        Returns:
+            The highest reserved value (range is last - count + 1 .. last)
+        """
+        with transaction.atomic():
+            sequence, _ = cls.objects.select_for_update().get_or_create(company_id=company_id)
+            sequence.last_seq += count
+            sequence.save(update_fields=['last_seq'])
+        
+        # Rebuild the company's sync snapshots once the change is visible
+        from sync_api.snapshots import schedule_snapshot_rebuild
+        transaction.on_commit(lambda: schedule_snapshot_rebuild(company_id))
+        return sequence.last_seq
+    
+    @classmethod
+    def current(cls, company_id):
+        """Highest committed sequence value for a company"""
+        return cls.objects.filter(company_id=company_id).values_list('last_seq', flat=True).first() or 0
+    
+    @classmethod
+    def compacted(cls, company_id):
+        """Highest sequence whose tombstones were compacted away"""
+        return cls.objects.filter(company_id=company_id).values_list('compacted_seq', flat=True).first() or 0
+
+
+class ChangeSequenceMixin(models.Model):
+    """
+    Stamp a per-company change_seq on every save
+    
+    Edge Servers sync incrementally with since_seq instead of timestamps.
+    sync_company_field is the lookup from the model to its company id.
+    """
+    change_seq = models.BigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Per-company change sequence for incremental edge sync"
+    )
+    
+    sync_company_field = 'company_id'
+    
+    class Meta:
+        abstract = True
+    
+    def get_sync_company_id(self):
+        value = self
+        for part in self.sync_company_field.split('__'):
+            if value is None:
+                return None
+            value = getattr(value, part)
+        return value
+    
+    def save(self, *args, **kwargs):
+        company_id = self.get_sync_company_id()
+        if not company_id:
+            return super().save(*args, **kwargs)
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'change_seq'}
+        
+        with transaction.atomic():
+            self.change_seq = SyncSequence.allocate(company_id)
+            super().save(*args, **kwargs)
+    
+    @classmethod
+    def touch_change_seq(cls, pks, **updates):
+        """
+        Stamp fresh sequence values on rows changed via related data
+        
+        Queryset updates bypass save(); this is the equivalent for rows
+        whose children changed. Extra updates (e.g. updated_at) are
+        applied in the same transaction.
+        """
+        rows = cls.objects.filter(pk__in=pks).values_list('pk', cls.sync_company_field)
+        by_company = defaultdict(list)
+        for pk, company_id in rows:
+            if company_id:
+                by_company[company_id].append(pk)
+        
+        with transaction.atomic():
+            stamped = []
+            # Fixed lock order across companies
+            for company_id in sorted(by_company, key=str):
+                ids = sorted(by_company[company_id], key=str)
+                last_seq = SyncSequence.allocate(company_id, len(ids))
+                first_seq = last_seq - len(ids) + 1
+                stamped.extend(cls(pk=pk, change_seq=first_seq + i) for i, pk in enumerate(ids))
+            if stamped:
+                cls.objects.bulk_update(stamped, ['change_seq'])
+            if updates:
+                cls.objects.filter(pk__in=pks).update(**updates)
+
+
+class SyncTombstone(models.Model):
+    """
+    Deletion tombstone for incremental sync
+
+    Written by signals when a synced master-data row is deleted or
+    deactivated, so sync endpoints can return real deleted_ids.
+    Compacted after SYNC_TOMBSTONE_RETENTION_DAYS.
+    """
+    REASON_CHOICES = [
+        ('deleted', 'Deleted'),
+        ('deactivated', 'Deactivated'),
+    ]
+    
+    company_id = models.UUIDField()
+    model_name = models.CharField(max_length=50, help_text="Synced entity, e.g. product")
+    object_id = models.UUIDField()
+    brand_id = models.UUIDField(null=True, blank=True)
+    store_id = models.UUIDField(null=True, blank=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default='deleted')
+    deleted_at = models.DateTimeField(default=timezone.now)
+    change_seq = models.BigIntegerField(default=0, help_text="Company change sequence at deletion")
+    
+    class Meta:
+        db_table = 'sync_tombstone'
+        verbose_name = 'Sync Tombstone'
+        verbose_name_plural = 'Sync Tombstones'
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['company_id', 'model_name', 'deleted_at'], name='sync_tomb_company_model_idx'),
+            models.Index(fields=['model_name', 'object_id'], name='sync_tomb_object_idx'),
+            models.Index(fields=['deleted_at'], name='sync_tomb_deleted_at_idx'),
+            models.Index(fields=['company_id', 'model_name', 'change_seq'], name='sync_tomb_company_seq_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_name}:{self.object_id} ({self.reason})"
+    
+    @staticmethod
+    def retention_days():
+        return getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 90)
+    
+    @classmethod
+    def retention_horizon(cls):
+        """Tombstones older than this may already be compacted"""
+        return timezone.now() - timedelta(days=cls.retention_days())
+    
+    @classmethod
+    def deleted_ids(cls, company_id, model_name, since=None, brand_ids=None, store_id=None, reasons=None,
+                    since_seq=None, until_seq=None):
+        """
+        Ids of objects deleted/deactivated since a timestamp or sequence
+        
+        Args:
+            company_id: Company UUID
+            model_name: Synced entity name
+            since: Datetime of the edge's last sync
+            brand_ids: Optional brand ids (or subquery) to scope to a store
+            store_id: Optional store UUID for store-specific entities
+            reasons: Optional list of reasons to include
+            since_seq: Exclusive lower change sequence bound (instead of since)
+            until_seq: Inclusive upper change sequence bound
+            
+        Returns:
+            List of object ids as strings
+        """
+        queryset = cls.objects.filter(company_id=company_id, model_name=model_name)
+        if since is not None:
+            queryset = queryset.filter(deleted_at__gte=since)
+        if since_seq is not None:
+            queryset = queryset.filter(change_seq__gt=since_seq)
+        if until_seq is not None:
+            queryset = queryset.filter(change_seq__lte=until_seq)
+        if brand_ids is not None:
+            queryset = queryset.filter(brand_id__in=brand_ids)
+        if store_id is not None:
+            queryset = queryset.filter(store_id=store_id)
+        if reasons:
+            queryset = queryset.filter(reason__in=reasons)
+        
+        object_ids = queryset.order_by().values_list('object_id', flat=True).distinct()
+        return [str(object_id) for object_id in object_ids]
+    
+    @classmethod
+    def compact(cls, retention_days=None):
+        """
+        Delete tombstones older than the retention window
+        
+        Records the highest compacted change_seq per company, so edges
+        syncing from an older since_seq are told to resync fully.
+        
+        Returns:
+            Number of tombstones deleted
+        """
+        days = cls.retention_days() if retention_days is None else retention_days
+        cutoff = timezone.now() - timedelta(days=days)
+        expired = cls.objects.filter(deleted_at__lt=cutoff)
+        
+        with transaction.atomic():
+            compacted = expired.order_by().values('company_id').annotate(max_seq=Max('change_seq'))
+            for row in compacted:
+                SyncSequence.objects.filter(
+                    company_id=row['company_id'], compacted_seq__lt=row['max_seq']
+                ).update(compacted_seq=row['max_seq'])
+            return expired.delete()[0]
+
+
+class SyncSnapshot(models.Model):
+    """
+    Precomputed, compressed full-sync response for one store
+    
+    Built by the rebuild_sync_snapshots Celery task after master data
+    changes. version fingerprints the source data; sync endpoints serve
+    the stored bytes only while it still matches.
+    """
+    ENTITY_CHOICES = [
+        ('products', 'Products'),
+        ('promotions', 'Promotions'),
+    ]
+    
+    company_id = models.UUIDField()
+    store_id = models.UUIDField()
+    entity = models.CharField(max_length=30, choices=ENTITY_CHOICES)
+    version = models.CharField(max_length=100, help_text="Source data fingerprint at build time")
+    etag = models.CharField(max_length=64)
+    content_encoding = models.CharField(max_length=20, default='gzip')
+    payload = models.BinaryField()
+    raw_size = models.PositiveIntegerField(default=0, help_text="Uncompressed payload size in bytes")
+    built_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'sync_snapshot'
+        verbose_name = 'Sync Snapshot'
+        verbose_name_plural = 'Sync Snapshots'
+        unique_together = [['store_id', 'entity']]
+        indexes = [
+            models.Index(fields=['company_id'], name='sync_snapshot_company_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity} snapshot for store {self.store_id}"
+
+
+class SyncHealth(models.Model):
+    """
+    Per-store, per-minute aggregate of Edge push ingest
+    
+    Written by sync_api.ingest_metrics on every instrumented push request
+    and read by the /metrics endpoint and sync_health_check_task.
+    Pruned after SYNC_HEALTH_RETENTION_DAYS.
+    """
+    store_id = models.UUIDField()
+    company_id = models.UUIDField(null=True, blank=True)
+    bucket = models.DateTimeField(help_text="Start of the minute")
+    
+    requests = models.PositiveIntegerField(default=0)
+    failed_requests = models.PositiveIntegerField(default=0, help_text="4xx / 5xx responses")
+    validation_failures = models.PositiveIntegerField(default=0, help_text="Rejected records")
+    rows = models.JSONField(default=dict, help_text="Rows written per table")
+    payload_bytes = models.BigIntegerField(default=0)
+    db_ms = models.FloatField(default=0, help_text="Time spent in DB queries")
+    serialize_ms = models.FloatField(default=0, help_text="Request time outside DB queries (parse / validate / render)")
+    last_push_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'sync_health'
+        verbose_name = 'Sync Health'
+        verbose_name_plural = 'Sync Health'
+        unique_together = [['store_id', 'bucket']]
+        indexes = [
+            models.Index(fields=['bucket'], name='sync_health_bucket_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Store {self.store_id} @ {self.bucket:%Y-%m-%d %H:%M}"
@@ -0,0 +1,35 @@
+"""
+Renderers for sync endpoints
+
+Edges pick the representation with the Accept header (or ?format=):
+
+- application/json - plain JSON (default)
+- application/vnd.fnb.sync-compact+json / ?format=compact - columnar
+  compact encoding (see sync_api/compact.py)
+
+DRF sends Vary: Accept on every response of a view with more than one
+renderer class (304s and snapshot responses included), so shared caches
+keep the JSON and compact variants apart.
+
+Transfer compression is negotiated separately with Accept-Encoding
+(see sync_api/compression.py).
+"""
+
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from sync_api.compact import encode_compact
+
+
+class CompactSyncRenderer(JSONRenderer):
+    """Columnar, dictionary-encoded JSON for bandwidth-constrained edges"""
+    media_type = 'application/vnd.fnb.sync-compact+json'
+    format = 'compact'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return super().render(encode_compact(data), accepted_media_type, renderer_context)
+
+
+# Renderer classes for sync read endpoints
+SYNC_RENDERER_CLASSES = [JSONRenderer, BrowsableAPIRenderer, CompactSyncRenderer]
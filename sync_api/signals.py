@@ -0,0 +1,179 @@
+"""
+Sync API Signals
+Record deletion tombstones for synced master data, drop sync snapshots
+on changes their version doesn't cover, and invalidate cached store scopes
+
+A tombstone is written when a synced row is deleted (post_delete) or
+deactivated (is_active flips True -> False). Reactivating a row removes
+its tombstones so edges don't drop it again.
+
+Note: queryset.update(is_active=False) bypasses these signals - admin
+bulk actions save row by row instead (see PromotionAdmin._set_active).
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from core.models import Brand, Company, Store
+from products.models import (
+    Category, Modifier, ModifierOption, Product, ProductModifier, TableArea, Tables
+)
+from promotions.models import Promotion
+from promotions.models_settings import PromotionSyncSettings
+from sync_api.models import SyncSequence, SyncTombstone
+from sync_api.snapshots import invalidate_snapshots, schedule_snapshot_rebuild
+from sync_api.store_scope import invalidate_store_scopes
+
+logger = logging.getLogger(__name__)
+
+
+def _brand_scope(brand_id):
+    company_id = Brand.objects.filter(pk=brand_id).values_list('company_id', flat=True).first()
+    return company_id, brand_id, None
+
+
+def _promotion_scope(instance):
+    return instance.company_id, instance.brand_id, None
+
+
+def _product_scope(instance):
+    if instance.company_id:
+        return instance.company_id, instance.brand_id, None
+    return _brand_scope(instance.brand_id)
+
+
+def _category_scope(instance):
+    return _brand_scope(instance.brand_id)
+
+
+def _modifier_scope(instance):
+    return _brand_scope(instance.brand_id)
+
+
+def _modifier_option_scope(instance):
+    row = Modifier.objects.filter(pk=instance.modifier_id).values_list(
+        'brand__company_id', 'brand_id'
+    ).first()
+    return (row[0], row[1], None) if row else (None, None, None)
+
+
+def _product_modifier_scope(instance):
+    row = Product.objects.filter(pk=instance.product_id).values_list(
+        'brand__company_id', 'brand_id'
+    ).first()
+    return (row[0], row[1], None) if row else (None, None, None)
+
+
+def _table_area_scope(instance):
+    company_id = instance.company_id or _brand_scope(instance.brand_id)[0]
+    return company_id, instance.brand_id, instance.store_id
+
+
+def _tables_scope(instance):
+    row = TableArea.objects.filter(pk=instance.area_id).values_list(
+        'brand__company_id', 'brand_id', 'store_id'
+    ).first()
+    return row if row else (None, None, None)
+
+
+# model -> (tombstone model_name, scope resolver)
+TOMBSTONE_MODELS = {
+    Promotion: ('promotion', _promotion_scope),
+    Product: ('product', _product_scope),
+    Category: ('category', _category_scope),
+    Modifier: ('modifier', _modifier_scope),
+    ModifierOption: ('modifier_option', _modifier_option_scope),
+    ProductModifier: ('product_modifier', _product_modifier_scope),
+    TableArea: ('table_area', _table_area_scope),
+    Tables: ('table', _tables_scope),
+}
+
+
+def record_tombstone(instance, reason):
+    """Write a tombstone for a synced instance"""
+    model_name, resolve_scope = TOMBSTONE_MODELS[type(instance)]
+    company_id, brand_id, store_id = resolve_scope(instance)
+    if not company_id:
+        logger.warning(f"Skipping tombstone for {model_name}:{instance.pk} - company not resolvable")
+        return None
+
+    return SyncTombstone.objects.create(
+        company_id=company_id,
+        model_name=model_name,
+        object_id=instance.pk,
+        brand_id=brand_id,
+        store_id=store_id,
+        reason=reason,
+        change_seq=SyncSequence.allocate(company_id),
+    )
+
+
+def synced_row_deleted(sender, instance, **kwargs):
+    record_tombstone(instance, 'deleted')
+
+
+def synced_row_pre_save(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored is_active value to detect flips in post_save"""
+    instance._sync_was_active = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    instance._sync_was_active = sender.objects.filter(pk=instance.pk).values_list(
+        'is_active', flat=True
+    ).first()
+
+
+def synced_row_saved(sender, instance, created, **kwargs):
+    was_active = getattr(instance, '_sync_was_active', None)
+    if created or was_active is None:
+        return
+
+    if was_active and not instance.is_active:
+        record_tombstone(instance, 'deactivated')
+    elif not was_active and instance.is_active:
+        model_name = TOMBSTONE_MODELS[sender][0]
+        SyncTombstone.objects.filter(model_name=model_name, object_id=instance.pk).delete()
+
+
+for _model, (_model_name, _resolver) in TOMBSTONE_MODELS.items():
+    post_delete.connect(synced_row_deleted, sender=_model, dispatch_uid=f'sync_tombstone_delete_{_model_name}')
+    if any(field.name == 'is_active' for field in _model._meta.fields):
+        pre_save.connect(synced_row_pre_save, sender=_model, dispatch_uid=f'sync_tombstone_pre_save_{_model_name}')
+        post_save.connect(synced_row_saved, sender=_model, dispatch_uid=f'sync_tombstone_save_{_model_name}')
+
+
+def snapshot_scope_changed(sender, instance, **kwargs):
+    """
+    Store, brand or sync-settings change - drop the company's snapshots now
+    (they embed store info and the brand scope) and queue a rebuild
+    """
+    if sender is Store:
+        company_id = _brand_scope(instance.brand_id)[0]
+    else:
+        company_id = instance.company_id
+    if company_id:
+        invalidate_snapshots(company_id)
+        transaction.on_commit(lambda: schedule_snapshot_rebuild(company_id))
+
+
+for _model in (Store, Brand, PromotionSyncSettings):
+    post_save.connect(snapshot_scope_changed, sender=_model, dispatch_uid=f'sync_snapshot_{_model.__name__}')
+
+
+def store_scope_changed(sender, instance, **kwargs):
+    """Drop cached store scopes affected by a store, brand or company change"""
+    if sender is Store:
+        store_ids = [instance.pk]
+    elif sender is Brand:
+        store_ids = list(Store.objects.filter(brand_id=instance.pk).values_list('id', flat=True))
+    else:
+        store_ids = list(Store.objects.filter(brand__company_id=instance.pk).values_list('id', flat=True))
+    invalidate_store_scopes(store_ids)
+
+
+for _model in (Store, Brand, Company):
+    post_save.connect(store_scope_changed, sender=_model, dispatch_uid=f'sync_store_scope_save_{_model.__name__}')
+    post_delete.connect(store_scope_changed, sender=_model, dispatch_uid=f'sync_store_scope_delete_{_model.__name__}')
@@ -0,0 +1,250 @@
+"""
+Precomputed per-store sync snapshots
+
+Full syncs of products and promotions are the heaviest sync responses.
+A Celery task renders them once per store into a gzip blob (SyncSnapshot)
+after master data changes; sync endpoints then stream the stored bytes
+with Content-Encoding: gzip instead of serializing in the request thread.
+
+Every change-sequence allocation schedules a rebuild for the company.
+Rebuilds are debounced: the first change queues a task with a countdown
+and later changes inside that window ride along with it.
+
+A snapshot is only served while its version (the company's change
+sequence, plus the date and sync settings for promotions) still matches,
+so a pending rebuild never serves stale data - the view just falls back
+to the live response.
+"""
+
+import gzip
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils import timezone
+
+from core.models import Company, Store
+from promotions.models import Promotion
+from promotions.services.compiler import PromotionCompiler
+from sync_api.bootstrap import products_section, promotion_sync_query, resolve_scope
+from sync_api.compression import accepts_encoding
+from sync_api.etag import etag_matches, make_etag, not_modified
+from sync_api.models import SyncSequence, SyncSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+PENDING_KEY = 'sync_snapshot_pending:{company_id}'
+
+
+def products_version(company_id):
+    """Products snapshot version: the company's change sequence"""
+    return str(SyncSequence.current(company_id))
+
+
+def promotions_version(company_id, sync_settings, now):
+    """Promotions snapshot version: change sequence, date window and sync settings"""
+    return f"{SyncSequence.current(company_id)}:{now.date().isoformat()}:{sync_settings.updated_at.isoformat()}"
+
+
+def _store_info(store):
+    return {
+        'id': str(store.id),
+        'code': store.store_code,
+        'name': store.store_name,
+    }
+
+
+def build_products_payload(scope):
+    """
+    Full /sync/products/ response for a store
+
+    Returns:
+        (version, payload) - version is read before the data
+    """
+    version = products_version(scope.company_id)
+    product_list = list(products_section(scope, None))
+    payload = {
+        'products': product_list,
+        'deleted_ids': [],
+        'full_resync_required': False,
+        'next_seq': int(version),
+        'has_more': False,
+        'sync_timestamp': scope.now.isoformat(),
+        'total': len(product_list),
+        'filter': {
+            'company_id': str(scope.company_id),
+            'store_id': str(scope.store_id),
+        },
+        'store': _store_info(scope.store),
+    }
+    return version, payload
+
+
+def build_promotions_payload(scope):
+    """
+    Full /sync/promotions/ response for a store (brand defaults to the store's brand)
+
+    Returns:
+        (version, payload) - version is read before the data
+    """
+    sync_settings = scope.sync_settings
+    store = scope.store
+    version = promotions_version(scope.company_id, sync_settings, scope.now)
+
+    query = promotion_sync_query(sync_settings, scope.company_id, scope.now)
+    query &= Q(brand_id=store.brand_id)
+    query &= (Q(all_stores=True) | Q(stores=store))
+    promotions = Promotion.objects.filter(query).distinct().order_by('-execution_priority', 'name')
+    total_available = promotions.count()
+    compiled = PromotionCompiler().compile_multiple(promotions[:sync_settings.max_promotions_per_sync])
+
+    payload = {
+        'promotions': compiled,
+        'deleted_ids': [],
+        'full_resync_required': False,
+        'next_seq': int(version.split(':')[0]),
+        'has_more': False,
+        'sync_timestamp': scope.now.isoformat(),
+        'total': len(compiled),
+        'total_available': total_available,
+        'settings': {
+            'strategy': sync_settings.sync_strategy,
+            'future_days': sync_settings.future_days,
+            'past_days': sync_settings.past_days,
+            'max_promotions': sync_settings.max_promotions_per_sync
+        },
+        'filter': {
+            'company_id': str(scope.company_id),
+            'brand_id': str(store.brand_id),
+            'store_id': str(scope.store_id),
+        },
+        'store': _store_info(store),
+    }
+    return version, payload
+
+
+# Snapshot entity -> payload builder
+SNAPSHOT_BUILDERS = {
+    'products': build_products_payload,
+    'promotions': build_promotions_payload,
+}
+
+
+def build_store_snapshots(company_id, store_id):
+    """
+    Render and store every snapshot entity for one store
+
+    Returns:
+        Number of snapshots written (0 if the store is not syncable)
+    """
+    try:
+        scope = resolve_scope(company_id, store_id, timezone.now(), cached=False)
+    except (Store.DoesNotExist, Company.DoesNotExist):
+        SyncSnapshot.objects.filter(store_id=store_id).delete()
+        return 0
+
+    for entity, builder in SNAPSHOT_BUILDERS.items():
+        version, payload = builder(scope)
+        raw = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+        SyncSnapshot.objects.update_or_create(
+            store_id=store_id,
+            entity=entity,
+            defaults={
+                'company_id': company_id,
+                'version': version,
+                'etag': make_etag('snapshot', entity, store_id, version),
+                'content_encoding': 'gzip',
+                'payload': gzip.compress(raw, compresslevel=6),
+                'raw_size': len(raw),
+            }
+        )
+    return len(SNAPSHOT_BUILDERS)
+
+
+def build_company_snapshots(company_id):
+    """
+    Rebuild snapshots for every active store of a company
+
+    Clears the pending flag first, so changes made during the rebuild
+    queue another one.
+
+    Returns:
+        Number of snapshots written
+    """
+    cache.delete(PENDING_KEY.format(company_id=company_id))
+
+    store_ids = list(Store.objects.filter(
+        brand__company_id=company_id, is_active=True
+    ).values_list('id', flat=True))
+    SyncSnapshot.objects.filter(company_id=company_id).exclude(store_id__in=store_ids).delete()
+
+    return sum(build_store_snapshots(company_id, store_id) for store_id in store_ids)
+
+
+def invalidate_snapshots(company_id):
+    """Drop a company's snapshots (for changes the version doesn't cover)"""
+    SyncSnapshot.objects.filter(company_id=company_id).delete()
+
+
+def schedule_snapshot_rebuild(company_id):
+    """
+    Queue a debounced snapshot rebuild for a company
+
+    Only the first call inside the debounce window queues a task.
+    Broker errors are logged, never raised: the live path still works.
+    """
+    if not company_id or not getattr(settings, 'SYNC_SNAPSHOTS_ENABLED', True):
+        return
+
+    debounce = getattr(settings, 'SYNC_SNAPSHOT_DEBOUNCE_SECONDS', 30)
+    key = PENDING_KEY.format(company_id=company_id)
+    # Expire the flag eventually in case the task is lost
+    if not cache.add(key, True, timeout=debounce + 300):
+        return
+
+    from config.tasks import rebuild_sync_snapshots_task
+    try:
+        rebuild_sync_snapshots_task.apply_async(args=[str(company_id)], countdown=debounce)
+    except Exception as e:
+        cache.delete(key)
+        logger.warning(f"Could not queue sync snapshot rebuild for company {company_id}: {str(e)}")
+
+
+def serve_snapshot(request, store_id, entity, version):
+    """
+    Response built from a current snapshot, or None to fall back to the live path
+
+    Gzip-capable clients get the stored bytes as-is; others get them
+    decompressed (still no serialization work). Compact-format requests,
+    and all requests while SYNC_SNAPSHOTS_ENABLED is off, take the live path.
+    """
+    if not getattr(settings, 'SYNC_SNAPSHOTS_ENABLED', True):
+        return None
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is not None and renderer.format == 'compact':
+        return None
+
+    snapshot = SyncSnapshot.objects.filter(
+        store_id=store_id, entity=entity, version=version
+    ).only('etag', 'payload', 'content_encoding', 'built_at').first()
+    if snapshot is None:
+        return None
+
+    if etag_matches(request, snapshot.etag):
+        return not_modified(snapshot.etag)
+
+    payload = bytes(snapshot.payload)
+    if accepts_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), 'gzip'):
+        response = HttpResponse(payload, content_type='application/json')
+        response['Content-Encoding'] = snapshot.content_encoding
+    else:
+        response = HttpResponse(gzip.decompress(payload), content_type='application/json')
+    response['ETag'] = snapshot.etag
+    response['Vary'] = 'Accept-Encoding'
+    response['X-Sync-Snapshot'] = snapshot.built_at.isoformat()
+    return response
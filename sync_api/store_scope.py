@@ -0,0 +1,163 @@
+"""
+Store scope resolver for sync endpoints
+
+Every edge poll starts by resolving (company_id, store_id) to the store,
+its company and the food-court brands operating in it. Those rows almost
+never change, so the result is cached in two tiers:
+
+- an in-process LRU (SYNC_SCOPE_LOCAL_TTL seconds), no network hop
+- the shared Django cache (SYNC_SCOPE_CACHE_TIMEOUT seconds)
+
+Store / Brand / Company saves and deletes drop the shared entry and this
+process's LRU entry (see sync_api/signals.py). Other worker processes may
+keep serving their local copy for up to SYNC_SCOPE_LOCAL_TTL seconds.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.models import Brand, Store
+
+CACHE_PREFIX = 'sync_store_scope'
+LOCAL_MAXSIZE = 1024
+
+
+class ResolvedStore:
+    """Store, company and food-court brand ids for one store"""
+
+    __slots__ = ('store', 'brand_ids')
+
+    def __init__(self, store, brand_ids):
+        self.store = store
+        self.brand_ids = brand_ids
+
+    @property
+    def company(self):
+        return self.store.brand.company
+
+    @property
+    def company_id(self):
+        return self.store.brand.company_id
+
+    @property
+    def store_id(self):
+        return self.store.id
+
+
+class _LocalLRU:
+    """Small thread-safe LRU with per-entry expiry"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = _LocalLRU(LOCAL_MAXSIZE)
+
+
+def _cache_key(store_id):
+    return f'{CACHE_PREFIX}:{store_id}'
+
+
+def _as_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _load(store_id):
+    store = Store.objects.select_related('brand__company').filter(id=store_id).first()
+    if store is None:
+        return None
+    brand_ids = tuple(Brand.objects.filter(
+        company_id=store.brand.company_id,
+        is_active=True,
+        stores__id=store_id
+    ).values_list('id', flat=True))
+    return ResolvedStore(store, brand_ids)
+
+
+def get_store_scope(company_id, store_id, cached=True):
+    """
+    Resolve a store and its food-court brands
+
+    Active flags are not checked here - callers decide whether inactive
+    stores / companies are acceptable.
+
+    Args:
+        cached: False bypasses both cache tiers (background jobs)
+
+    Returns:
+        ResolvedStore, or None if the store doesn't exist or doesn't
+        belong to the company (malformed ids included)
+    """
+    store_uuid = _as_uuid(store_id)
+    company_uuid = _as_uuid(company_id)
+    if store_uuid is None or company_uuid is None:
+        return None
+
+    if not cached:
+        resolved = _load(store_uuid)
+    else:
+        key = _cache_key(store_uuid)
+        resolved = _local.get(key)
+        if resolved is None:
+            resolved = cache.get(key)
+            if resolved is None:
+                resolved = _load(store_uuid)
+                if resolved is None:
+                    return None
+                cache.set(key, resolved, getattr(settings, 'SYNC_SCOPE_CACHE_TIMEOUT', 3600))
+            _local.set(key, resolved, getattr(settings, 'SYNC_SCOPE_LOCAL_TTL', 30))
+
+    if resolved is None or resolved.company_id != company_uuid:
+        return None
+    return resolved
+
+
+def invalidate_store_scopes(store_ids):
+    """Drop cached scopes for the given stores"""
+    keys = [_cache_key(_as_uuid(store_id)) for store_id in store_ids]
+    for key in keys:
+        _local.delete(key)
+    if keys:
+        cache.delete_many(keys)
+
+
+def clear_local_store_scopes():
+    """Empty this process's LRU (tests)"""
+    _local.clear()
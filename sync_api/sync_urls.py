@@ -20,6 +20,7 @@ urlpatterns = [
     path('table-areas/', sync_views.sync_table_areas, name='table_areas'),  # Areas only
     path('table-groups/', sync_views.sync_table_groups, name='table_groups'),  # Table groups
     path('version/', sync_views.sync_version, name='version'),
+    path('bootstrap/', sync_views.sync_bootstrap, name='bootstrap'),  # All sections, streamed
     
     # Upload endpoints
     path('usage/', sync_views.upload_usage, name='upload_usage'),
@@ -1,12 +1,30 @@
 """
 Sync API Views for Edge Server
 Provides REST API endpoints for Edge Server to download promotion data
+
+Read endpoints return an ETag and answer If-None-Match with
+304 Not Modified (see sync_api/etag.py)
+
+Full product / promotion syncs are served from precomputed gzip
+snapshots while they are current (see sync_api/snapshots.py)
+
+Read endpoints also render a columnar compact format on request
+(see sync_api/renderers.py); responses are compressed per
+Accept-Encoding by sync_api.compression.SyncCompressionMiddleware.
+
+Master-data endpoints also accept since_seq / limit: a per-company change
+sequence cursor (see sync_api.models.SyncSequence). Responses carry
+next_seq and has_more; edges resume from next_seq with no overlap.
 """
 
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
 from django.utils import timezone
 from django.db.models import Q
 from datetime import datetime
@@ -16,14 +34,69 @@ from drf_spectacular.types import OpenApiTypes
 from promotions.models import Promotion
 from promotions.models_settings import PromotionSyncSettings
 from promotions.services.compiler import PromotionCompiler
+from promotions.services.usage_ingest import MAX_USAGES_PER_REQUEST, ingest_usages
 from core.models import Store, Company, Brand
+from sync_api.bootstrap import (
+    BOOTSTRAP_SECTIONS, promotion_sync_query, resolve_scope, stream_json, stream_ndjson
+)
+from sync_api.cursor import DEFAULT_SEQ_PAGE_SIZE, MAX_SEQ_PAGE_SIZE, paginate_changes, seq_params
+from sync_api.etag import sync_etag, etag_matches, not_modified, with_etag
+from sync_api.ingest_metrics import render_metrics
+from sync_api.models import SyncSequence, SyncTombstone
+from sync_api.renderers import SYNC_RENDERER_CLASSES
+from sync_api.snapshots import products_version, promotions_version, serve_snapshot
+from sync_api.store_scope import get_store_scope
 from products.models import Category, Product
-from datetime import timedelta
 import logging
 
 logger = logging.getLogger('promotions.sync_api')
 
 
+SEQ_SCHEMA_PROPERTIES = {
+    'since_seq': {
+        'type': 'integer',
+        'description': 'next_seq from the previous sync; takes precedence over updated_since (optional)'
+    },
+    'limit': {
+        'type': 'integer',
+        'description': f'Page size for since_seq syncs (default {DEFAULT_SEQ_PAGE_SIZE}, max {MAX_SEQ_PAGE_SIZE})'
+    },
+}
+
+
+def _invalid_seq_response():
+    return Response({
+        'error': 'since_seq must be a non-negative integer and limit a positive integer',
+        'code': 'INVALID_SEQ'
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _deletions(company_id, model_name, updated_since_dt, since_seq=None, until_seq=None, **filters):
+    """
+    deleted_ids for an incremental sync response, read from SyncTombstone
+    
+    full_resync_required is set when updated_since is older than the
+    tombstone retention window, or since_seq is older than the last
+    compacted tombstone (older tombstones may be gone).
+    """
+    if since_seq is not None:
+        return {
+            'deleted_ids': SyncTombstone.deleted_ids(
+                company_id, model_name, since_seq=since_seq, until_seq=until_seq, **filters
+            ),
+            'full_resync_required': since_seq < SyncSequence.compacted(company_id),
+        }
+    if not updated_since_dt:
+        return {'deleted_ids': [], 'full_resync_required': False}
+    if timezone.is_naive(updated_since_dt):
+        updated_since_dt = timezone.make_aware(updated_since_dt)
+    
+    return {
+        'deleted_ids': SyncTombstone.deleted_ids(company_id, model_name, updated_since_dt, **filters),
+        'full_resync_required': updated_since_dt < SyncTombstone.retention_horizon(),
+    }
+
+
 @extend_schema(
     request={
         'application/json': {
@@ -48,7 +121,8 @@ logger = logging.getLogger('promotions.sync_api')
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
-                }
+                },
+                **SEQ_SCHEMA_PROPERTIES
             },
             'required': ['company_id', 'store_id']
         }
@@ -73,6 +147,7 @@ logger = logging.getLogger('promotions.sync_api')
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_promotions(request):
     """
     Get promotions for Edge Server
@@ -82,12 +157,15 @@ def sync_promotions(request):
         "company_id": "uuid",
         "store_id": "uuid",
         "brand_id": "uuid"  // Optional
-        "updated_since": "2026-01-29T00:00:00Z"  // Optional
+        "updated_since": "2026-01-29T00:00:00Z",  // Optional
+        "since_seq": 1234,  // optional, preferred over updated_since
+        "limit": 500  // optional page size for since_seq
     }
     
     Returns:
         - promotions: List of compiled promotion JSON
         - deleted_ids: List of deleted promotion IDs
+        - next_seq / has_more: Change-sequence cursor for the next request
         - sync_timestamp: Current server timestamp
         - total: Total number of promotions
     """
@@ -97,6 +175,7 @@ def sync_promotions(request):
         store_id = request.data.get('store_id')
         brand_id = request.data.get('brand_id')  # Optional
         updated_since = request.data.get('updated_since')
+        updated_since_dt = None
         
         # Validate required parameters
         if not company_id:
@@ -111,52 +190,24 @@ def sync_promotions(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id)
-            # Get brand_id from store if not provided
-            if not brand_id:
-                brand_id = store.brand_id
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
+        # Get brand_id from store if not provided
+        if not brand_id:
+            brand_id = store.brand_id
         
         # Get sync settings for company
-        try:
-            company = Company.objects.get(id=company_id)
-            sync_settings = PromotionSyncSettings.get_for_company(company)
-        except Company.DoesNotExist:
-            return Response({
-                'error': 'Company not found',
-                'code': 'COMPANY_NOT_FOUND'
-            }, status=status.HTTP_404_NOT_FOUND)
+        sync_settings = PromotionSyncSettings.get_for_company(scope.company)
         
         # Build query based on sync strategy
         now = timezone.now()
-        
-        if sync_settings.sync_strategy == 'current_only':
-            # Only promotions valid today
-            query = Q(
-                company_id=company_id,
-                start_date__lte=now.date(),
-                end_date__gte=now.date()
-            )
-        elif sync_settings.sync_strategy == 'include_future':
-            # Promotions valid from past_days ago to future_days ahead
-            query = Q(
-                company_id=company_id,
-                start_date__lte=now.date() + timedelta(days=sync_settings.future_days),
-                end_date__gte=now.date() - timedelta(days=sync_settings.past_days)
-            )
-        else:  # 'all_active'
-            # All active promotions regardless of dates
-            query = Q(company_id=company_id)
-        
-        # Apply active filter based on settings
-        if not sync_settings.include_inactive:
-            query &= Q(is_active=True)
+        query = promotion_sync_query(sync_settings, company_id, now)
         
         # Filter by brand (REQUIRED)
         query &= Q(brand_id=brand_id)
@@ -165,8 +216,13 @@ def sync_promotions(request):
         if store:
             query &= (Q(all_stores=True) | Q(stores=store))
         
-        # Incremental sync
-        if updated_since:
+        try:
+            since_seq, limit = seq_params(request.data)
+        except (TypeError, ValueError):
+            return _invalid_seq_response()
+        
+        # Timestamp-based incremental sync (since_seq takes precedence)
+        if updated_since and since_seq is None:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 query &= Q(updated_at__gte=updated_since_dt)
@@ -176,23 +232,52 @@ def sync_promotions(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Full sync for the store's own brand - serve the precomputed snapshot if current
+        if not updated_since and since_seq is None and str(brand_id) == str(store.brand_id):
+            snapshot = serve_snapshot(
+                request, store.id, 'promotions', promotions_version(company_id, sync_settings, now)
+            )
+            if snapshot is not None:
+                return snapshot
+
+        # Version fingerprint - answer If-None-Match before compiling. The
+        # change sequence high-water (as in the snapshot version) catches
+        # tombstone-only changes the promotion rows don't show
+        etag = sync_etag(
+            request, 'promotions',
+            Promotion.objects.filter(company_id=company_id, brand_id=brand_id),
+            'updated_at',
+            extra=(sync_settings.updated_at, now.date(), SyncSequence.current(company_id))
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         # Get promotions with limit from settings
-        promotions = Promotion.objects.filter(query).distinct().order_by('-execution_priority', 'name')
+        promotions, cursor = paginate_changes(
+            Promotion.objects.filter(query).distinct(), company_id, since_seq,
+            min(limit, sync_settings.max_promotions_per_sync)
+        )
         
-        # Apply max promotions limit
-        total_available = promotions.count()
-        promotions = promotions[:sync_settings.max_promotions_per_sync]
+        if since_seq is None:
+            # Apply max promotions limit
+            promotions = promotions.order_by('-execution_priority', 'name')
+            total_available = promotions.count()
+            promotions = promotions[:sync_settings.max_promotions_per_sync]
+        else:
+            total_available = len(promotions)
         
         # Compile promotions
         compiler = PromotionCompiler()
         compiled_promotions = compiler.compile_multiple(promotions)
         
         # Get deleted IDs (if incremental sync)
-        deleted_ids = []
-        if updated_since:
-            # TODO: Track deleted promotions in a separate table
-            # For now, return empty list
-            pass
+        # Inactive promotions are still sent when include_inactive is set
+        deletions = _deletions(
+            company_id, 'promotion', updated_since_dt,
+            since_seq=since_seq, until_seq=cursor['next_seq'],
+            brand_ids=[brand_id],
+            reasons=['deleted'] if sync_settings.include_inactive else None
+        )
         
         sync_timestamp = now.isoformat()
         
@@ -203,7 +288,8 @@ def sync_promotions(request):
         
         response_data = {
             'promotions': compiled_promotions,
-            'deleted_ids': deleted_ids,
+            **deletions,
+            **cursor,
             'sync_timestamp': sync_timestamp,
             'total': len(compiled_promotions),
             'total_available': total_available,
@@ -228,7 +314,7 @@ def sync_promotions(request):
                 'name': store.store_name
             }
         
-        return Response(response_data)
+        return with_etag(Response(response_data), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_promotions: {str(e)}", exc_info=True)
@@ -263,7 +349,8 @@ def sync_promotions(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
-                }
+                },
+                **SEQ_SCHEMA_PROPERTIES
             },
             'required': ['company_id', 'store_id']
         }
@@ -288,6 +375,7 @@ def sync_promotions(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_categories(request):
     """
     Get categories for Edge Server (for food court concept)
@@ -299,7 +387,9 @@ def sync_categories(request):
         "company_id": "uuid",
         "store_id": "uuid",
         "brand_id": "uuid",  // optional
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "since_seq": 1234,  // optional, preferred over updated_since
+        "limit": 500  // optional page size for since_seq
     }
     """
     try:
@@ -318,24 +408,21 @@ def sync_categories(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
         brand_id = request.data.get('brand_id')
         updated_since = request.data.get('updated_since')
+        updated_since_dt = None
         
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = scope.brand_ids
         
         # Build query - filter by brands in this store
         query = Q(brand_id__in=store_brands, is_active=True)
@@ -344,7 +431,13 @@ def sync_categories(request):
         if brand_id:
             query &= Q(brand_id=brand_id)
         
-        if updated_since:
+        try:
+            since_seq, limit = seq_params(request.data)
+        except (TypeError, ValueError):
+            return _invalid_seq_response()
+        
+        # Timestamp-based incremental sync (since_seq takes precedence)
+        if updated_since and since_seq is None:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 query &= Q(updated_at__gte=updated_since_dt)
@@ -354,11 +447,21 @@ def sync_categories(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'categories',
+            Category.objects.filter(brand_id__in=store_brands),
+            'updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         categories = Category.objects.filter(query).select_related('brand').values(
             'id', 'brand_id', 'brand__company_id', 'name', 
             'parent_id', 'is_active', 'sort_order',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'change_seq'
         )
+        categories, cursor = paginate_changes(categories, company_id, since_seq, limit)
         
         # Convert to list and rename brand__company_id to company_id
         category_list = []
@@ -373,11 +476,15 @@ def sync_categories(request):
                 'sort_order': cat['sort_order'],
                 'created_at': cat['created_at'].isoformat(),
                 'updated_at': cat['updated_at'].isoformat(),
+                'change_seq': cat['change_seq'],
             })
         
-        return Response({
+        return with_etag(Response({
             'categories': category_list,
-            'deleted_ids': [],
+            **_deletions(company_id, 'category', updated_since_dt,
+                         since_seq=since_seq, until_seq=cursor['next_seq'],
+                         brand_ids=[brand_id] if brand_id else store_brands),
+            **cursor,
             'sync_timestamp': timezone.now().isoformat(),
             'total': len(category_list),
             'filter': {
@@ -390,7 +497,7 @@ def sync_categories(request):
                 'code': store.store_code,
                 'name': store.store_name,
             }
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_categories: {str(e)}", exc_info=True)
@@ -419,7 +526,8 @@ def sync_categories(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
-                }
+                },
+                **SEQ_SCHEMA_PROPERTIES
             },
             'required': ['company_id', 'store_id']
         }
@@ -436,6 +544,7 @@ def sync_categories(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_products(request):
     """
     Get products for Edge Server (for food court concept)
@@ -446,7 +555,9 @@ def sync_products(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "since_seq": 1234,  // optional, preferred over updated_since
+        "limit": 500  // optional page size for since_seq
     }
     """
     try:
@@ -465,29 +576,33 @@ def sync_products(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
         updated_since = request.data.get('updated_since')
         
+        updated_since_dt = None
+        
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = scope.brand_ids
         
         # Build query - filter by company and brands operating in this store
         # Note: Product does NOT have store_id field, only brand_id
         query = Q(company_id=company_id, brand_id__in=store_brands, is_active=True)
         
-        if updated_since:
+        try:
+            since_seq, limit = seq_params(request.data)
+        except (TypeError, ValueError):
+            return _invalid_seq_response()
+        
+        # Timestamp-based incremental sync (since_seq takes precedence)
+        if updated_since and since_seq is None:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 query &= Q(updated_at__gte=updated_since_dt)
@@ -497,11 +612,27 @@ def sync_products(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Full sync - serve the precomputed snapshot if current
+        if not updated_since and since_seq is None:
+            snapshot = serve_snapshot(request, store.id, 'products', products_version(company_id))
+            if snapshot is not None:
+                return snapshot
+
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'products',
+            Product.objects.filter(company_id=company_id, brand_id__in=store_brands),
+            'updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         products = Product.objects.filter(query).values(
             'id', 'company_id', 'brand_id', 'category_id',
             'name', 'sku', 'price', 'cost', 'is_active', 
-            'description', 'created_at', 'updated_at'
+            'description', 'created_at', 'updated_at', 'change_seq'
         )
+        products, cursor = paginate_changes(products, company_id, since_seq, limit)
         
         # Convert to list and add store_id from context
         product_list = []
@@ -520,11 +651,14 @@ def sync_products(request):
                 'description': prod['description'] or '',
                 'created_at': prod['created_at'].isoformat(),
                 'updated_at': prod['updated_at'].isoformat(),
+                'change_seq': prod['change_seq'],
             })
         
-        return Response({
+        return with_etag(Response({
             'products': product_list,
-            'deleted_ids': [],
+            **_deletions(company_id, 'product', updated_since_dt,
+                         since_seq=since_seq, until_seq=cursor['next_seq'], brand_ids=store_brands),
+            **cursor,
             'sync_timestamp': timezone.now().isoformat(),
             'total': len(product_list),
             'filter': {
@@ -536,7 +670,7 @@ def sync_products(request):
                 'code': store.store_code,
                 'name': store.store_name,
             }
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_products: {str(e)}", exc_info=True)
@@ -590,6 +724,15 @@ def sync_version(request):
                 'error': 'company_id is required in request body'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'version',
+            Promotion.objects.filter(company_id=company_id),
+            'updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         # Get latest promotion update
         latest_promotion = Promotion.objects.filter(
             company_id=company_id
@@ -602,11 +745,11 @@ def sync_version(request):
             last_updated = timezone.now()
             version = 0
         
-        return Response({
+        return with_etag(Response({
             'version': version,
             'last_updated': last_updated.isoformat(),
             'force_update': False
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_version: {str(e)}", exc_info=True)
@@ -632,7 +775,8 @@ def sync_version(request):
                             },
                             'bill_id': {
                                 'type': 'string',
-                                'description': 'Bill transaction ID'
+                                'format': 'uuid',
+                                'description': 'Bill UUID (one usage per promotion per bill)'
                             },
                             'discount_amount': {
                                 'type': 'number',
@@ -670,7 +814,7 @@ def sync_version(request):
                 'usages': [
                     {
                         'promotion_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
-                        'bill_id': 'B001',
+                        'bill_id': '5b0c6a3e-9a41-4c1e-8f7d-2f1a0c9e7b11',
                         'discount_amount': 15000.0,
                         'used_at': '2026-01-27T10:00:00Z',
                         'store_id': 'uuid-here'
@@ -692,7 +836,7 @@ def upload_usage(request):
         "usages": [
             {
                 "promotion_id": "uuid",
-                "bill_id": "B001",
+                "bill_id": "uuid",
                 "discount_amount": 15000.0,
                 "used_at": "2026-01-27T10:00:00Z",
                 "store_id": "uuid",
@@ -700,35 +844,33 @@ def upload_usage(request):
             }
         ]
     }
+    
+    Up to 10,000 usages per request. Retried uploads are idempotent:
+    a (promotion_id, bill_id) pair is stored once and counted once in
+    Promotion.current_uses.
+    
+    Returns:
+        - created: Usages inserted by this request
+        - duplicates: Usages already stored (or repeated in the batch)
+        - errors: Rejected rows (index, data, error)
+        - total: Usages received
     """
     try:
         usages = request.data.get('usages', [])
         
-        if not usages:
+        if not usages or not isinstance(usages, list):
             return Response({
                 'error': 'usages array is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        created = 0
-        errors = []
-        
-        for usage_data in usages:
-            try:
-                # TODO: Create PromotionUsage model and save
-                # For now, just log
-                logger.info(f"Usage logged: promotion={usage_data.get('promotion_id')}, amount={usage_data.get('discount_amount')}")
-                created += 1
-            except Exception as e:
-                errors.append({
-                    'data': usage_data,
-                    'error': str(e)
-                })
+        if len(usages) > MAX_USAGES_PER_REQUEST:
+            return Response({
+                'error': f'At most {MAX_USAGES_PER_REQUEST} usages per request',
+                'code': 'BATCH_TOO_LARGE'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({
-            'created': created,
-            'errors': errors,
-            'total': len(usages)
-        })
+        # Validated in memory, bulk inserted; retries are idempotent on (promotion, bill_id)
+        return Response(ingest_usages(usages))
         
     except Exception as e:
         logger.error(f"Error in upload_usage: {str(e)}", exc_info=True)
@@ -758,6 +900,7 @@ def upload_usage(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_companies(request):
     """
     Get all active companies
@@ -791,6 +934,15 @@ def sync_companies(request):
     }
     """
     try:
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'companies',
+            Company.objects.filter(is_active=True),
+            'updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         # Get all active companies
         companies = Company.objects.filter(is_active=True).order_by('name')
         
@@ -808,11 +960,11 @@ def sync_companies(request):
                 'updated_at': company.updated_at.isoformat(),
             })
         
-        return Response({
+        return with_etag(Response({
             'companies': company_list,
             'total': len(company_list),
             'sync_timestamp': timezone.now().isoformat(),
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_companies: {str(e)}", exc_info=True)
@@ -853,6 +1005,7 @@ def sync_companies(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_brands(request):
     """
     Get brands filtered by company and store (for food court concept)
@@ -912,31 +1065,37 @@ def sync_brands(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
-        # Validate company exists
-        try:
-            company = Company.objects.get(id=company_id, is_active=True)
-        except Company.DoesNotExist:
+        # Validate company is active
+        company = scope.company
+        if not company.is_active:
             return Response({
                 'error': f'Company not found: {company_id}',
                 'code': 'COMPANY_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
         
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'brands',
+            Brand.objects.filter(company_id=company_id, stores__id=store_id),
+            'updated_at', 'company__updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         # Get all active brands for this company that have stores in this location
         # For food court concept: get all brands that operate in this store
         brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).select_related('company').distinct().order_by('name')
+            id__in=scope.brand_ids
+        ).select_related('company').order_by('name')
         
         brand_list = []
         for brand in brands:
@@ -959,7 +1118,7 @@ def sync_brands(request):
                 'updated_at': brand.updated_at.isoformat(),
             })
         
-        return Response({
+        return with_etag(Response({
             'brands': brand_list,
             'total': len(brand_list),
             'company': {
@@ -973,7 +1132,7 @@ def sync_brands(request):
                 'name': store.store_name,
             },
             'sync_timestamp': timezone.now().isoformat(),
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_brands: {str(e)}", exc_info=True)
@@ -1014,6 +1173,7 @@ def sync_brands(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_stores(request):
     """
     Get stores filtered by company and store (for food court concept)
@@ -1075,23 +1235,33 @@ def sync_stores(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Validate company exists
-        try:
-            company = Company.objects.get(id=company_id, is_active=True)
-        except Company.DoesNotExist:
+        # Resolve store and company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        
+        # Validate company is active
+        if scope is not None and not scope.company.is_active:
             return Response({
                 'error': f'Company not found: {company_id}',
                 'code': 'COMPANY_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
+        company = scope.company
+        
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'stores',
+            Store.objects.filter(id=store_id),
+            'updated_at', 'brand__updated_at', 'brand__company__updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
         # Build query for stores - filter by specific store
         query = Q(id=store_id, brand__company_id=company_id, is_active=True)
@@ -1121,7 +1291,7 @@ def sync_stores(request):
                 'updated_at': store.updated_at.isoformat(),
             })
         
-        return Response({
+        return with_etag(Response({
             'stores': store_list,
             'total': len(store_list),
             'company': {
@@ -1139,7 +1309,7 @@ def sync_stores(request):
                 'store_id': str(store_id),
             },
             'sync_timestamp': timezone.now().isoformat(),
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_stores: {str(e)}", exc_info=True)
@@ -1168,7 +1338,8 @@ def sync_stores(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
-                }
+                },
+                **SEQ_SCHEMA_PROPERTIES
             },
             'required': ['company_id', 'store_id']
         }
@@ -1185,6 +1356,7 @@ def sync_stores(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_tables(request):
     """
     Get tables and table areas for Edge Server (for food court concept)
@@ -1193,7 +1365,9 @@ def sync_tables(request):
     Body: {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // Optional
+        "updated_since": "2026-01-29T00:00:00Z",  // Optional
+        "since_seq": 1234,  // optional, preferred over updated_since
+        "limit": 500  // optional page size for since_seq
     }
     
     Returns:
@@ -1208,6 +1382,7 @@ def sync_tables(request):
         company_id = request.data.get('company_id')
         store_id = request.data.get('store_id')
         updated_since = request.data.get('updated_since')
+        updated_since_dt = None
         
         # Validate required parameters
         if not company_id:
@@ -1222,24 +1397,20 @@ def sync_tables(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
         # Import models
         from products.models import TableArea, Tables
         
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = scope.brand_ids
         
         # Build query for table areas - get tables from all brands in this store
         areas_query = Q(
@@ -1249,8 +1420,13 @@ def sync_tables(request):
             is_active=True
         )
         
-        # Incremental sync for areas
-        if updated_since:
+        try:
+            since_seq, limit = seq_params(request.data)
+        except (TypeError, ValueError):
+            return _invalid_seq_response()
+        
+        # Timestamp-based incremental sync for areas (since_seq takes precedence)
+        if updated_since and since_seq is None:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 areas_query &= Q(updated_at__gte=updated_since_dt)
@@ -1260,8 +1436,46 @@ def sync_tables(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'tables',
+            TableArea.objects.filter(company_id=company_id, brand_id__in=store_brands, store_id=store_id),
+            'updated_at', 'tables__updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         # Get table areas
-        table_areas = TableArea.objects.filter(areas_query).order_by('sort_order', 'name')
+        table_areas, cursor = paginate_changes(
+            TableArea.objects.filter(areas_query).order_by('sort_order', 'name'),
+            company_id, since_seq, limit
+        )
+        
+        if since_seq is None:
+            # Get tables for these areas
+            area_ids = [area.id for area in table_areas]
+            tables_query = Q(area_id__in=area_ids, is_active=True)
+            
+            if updated_since:
+                tables_query &= Q(updated_at__gte=updated_since_dt)
+            
+            tables = Tables.objects.filter(tables_query).select_related('area').order_by('area', 'number')
+        else:
+            # Tables change independently of their area; page them on the same cursor
+            tables, tables_cursor = paginate_changes(
+                Tables.objects.filter(
+                    area__company_id=company_id,
+                    area__brand_id__in=store_brands,
+                    area__store_id=store_id,
+                    is_active=True
+                ).select_related('area'),
+                company_id, since_seq, limit
+            )
+            # Stop both streams at the lower cursor so no row is sent twice
+            if tables_cursor['next_seq'] < cursor['next_seq']:
+                cursor = tables_cursor
+            table_areas = [area for area in table_areas if area.change_seq <= cursor['next_seq']]
+            tables = [table for table in tables if table.change_seq <= cursor['next_seq']]
         
         area_list = []
         for area in table_areas:
@@ -1279,17 +1493,9 @@ def sync_tables(request):
                 'is_active': area.is_active,
                 'created_at': area.created_at.isoformat(),
                 'updated_at': area.updated_at.isoformat(),
+                'change_seq': area.change_seq,
             })
         
-        # Get tables for these areas
-        area_ids = [area.id for area in table_areas]
-        tables_query = Q(area_id__in=area_ids, is_active=True)
-        
-        if updated_since:
-            tables_query &= Q(updated_at__gte=updated_since_dt)
-        
-        tables = Tables.objects.filter(tables_query).select_related('area').order_by('area', 'number')
-        
         table_list = []
         for table in tables:
             table_list.append({
@@ -1305,8 +1511,13 @@ def sync_tables(request):
                 'is_active': table.is_active,
                 'created_at': table.created_at.isoformat(),
                 'updated_at': table.updated_at.isoformat(),
+                'change_seq': table.change_seq,
             })
         
+        seq_window = {'since_seq': since_seq, 'until_seq': cursor['next_seq']}
+        area_deletions = _deletions(company_id, 'table_area', updated_since_dt, store_id=store_id, **seq_window)
+        table_deletions = _deletions(company_id, 'table', updated_since_dt, store_id=store_id, **seq_window)
+        
         logger.info(
             f"Tables sync: company={company_id}, store={store.store_code}, "
             f"areas={len(area_list)}, tables={len(table_list)}"
@@ -1317,6 +1528,12 @@ def sync_tables(request):
             'tables': table_list,
             'total_areas': len(area_list),
             'total_tables': len(table_list),
+            'deleted_ids': {
+                'table_areas': area_deletions['deleted_ids'],
+                'tables': table_deletions['deleted_ids'],
+            },
+            'full_resync_required': table_deletions['full_resync_required'],
+            **cursor,
             'sync_timestamp': timezone.now().isoformat(),
             'filter': {
                 'company_id': str(company_id),
@@ -1329,7 +1546,7 @@ def sync_tables(request):
             }
         }
         
-        return Response(response_data)
+        return with_etag(Response(response_data), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_tables: {str(e)}", exc_info=True)
@@ -1359,7 +1576,8 @@ def sync_tables(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
-                }
+                },
+                **SEQ_SCHEMA_PROPERTIES
             },
             'required': ['company_id', 'store_id']
         }
@@ -1376,6 +1594,7 @@ def sync_tables(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_table_areas(request):
     """
     Get table areas only for Edge Server (for food court concept)
@@ -1386,7 +1605,9 @@ def sync_table_areas(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "since_seq": 1234,  // optional, preferred over updated_since
+        "limit": 500  // optional page size for since_seq
     }
     
     Returns:
@@ -1412,23 +1633,21 @@ def sync_table_areas(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
         updated_since = request.data.get('updated_since')
         
+        updated_since_dt = None
+        
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = scope.brand_ids
         
         # Import models
         from products.models import TableArea
@@ -1441,7 +1660,13 @@ def sync_table_areas(request):
             is_active=True
         )
         
-        if updated_since:
+        try:
+            since_seq, limit = seq_params(request.data)
+        except (TypeError, ValueError):
+            return _invalid_seq_response()
+        
+        # Timestamp-based incremental sync (since_seq takes precedence)
+        if updated_since and since_seq is None:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 query &= Q(updated_at__gte=updated_since_dt)
@@ -1451,7 +1676,19 @@ def sync_table_areas(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        table_areas = TableArea.objects.filter(query).order_by('sort_order', 'name')
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'table_areas',
+            TableArea.objects.filter(company_id=company_id, brand_id__in=store_brands, store_id=store_id),
+            'updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        table_areas, cursor = paginate_changes(
+            TableArea.objects.filter(query).order_by('sort_order', 'name'),
+            company_id, since_seq, limit
+        )
         
         area_list = []
         for area in table_areas:
@@ -1469,11 +1706,14 @@ def sync_table_areas(request):
                 'is_active': area.is_active,
                 'created_at': area.created_at.isoformat(),
                 'updated_at': area.updated_at.isoformat(),
+                'change_seq': area.change_seq,
             })
         
-        return Response({
+        return with_etag(Response({
             'table_areas': area_list,
-            'deleted_ids': [],
+            **_deletions(company_id, 'table_area', updated_since_dt,
+                         since_seq=since_seq, until_seq=cursor['next_seq'], store_id=store_id),
+            **cursor,
             'sync_timestamp': timezone.now().isoformat(),
             'total': len(area_list),
             'filter': {
@@ -1485,7 +1725,7 @@ def sync_table_areas(request):
                 'code': store.store_code,
                 'name': store.store_name,
             }
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_table_areas: {str(e)}", exc_info=True)
@@ -1532,6 +1772,7 @@ def sync_table_areas(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_table_groups(request):
     """
     Get table groups for Edge Server (for food court concept)
@@ -1569,23 +1810,21 @@ def sync_table_groups(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
         updated_since = request.data.get('updated_since')
         
+        updated_since_dt = None
+        
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = scope.brand_ids
         
         # Import models
         from products.models import TableGroup
@@ -1603,6 +1842,15 @@ def sync_table_groups(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'table_groups',
+            TableGroup.objects.filter(brand_id__in=store_brands),
+            'created_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         table_groups = TableGroup.objects.filter(query).select_related(
             'brand', 'main_table', 'created_by'
         ).prefetch_related('members__table').order_by('-created_at')
@@ -1631,7 +1879,7 @@ def sync_table_groups(request):
                 'total_members': len(members),
             })
         
-        return Response({
+        return with_etag(Response({
             'table_groups': group_list,
             'deleted_ids': [],
             'sync_timestamp': timezone.now().isoformat(),
@@ -1645,7 +1893,7 @@ def sync_table_groups(request):
                 'code': store.store_code,
                 'name': store.store_name,
             }
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_table_groups: {str(e)}", exc_info=True)
@@ -1675,7 +1923,8 @@ def sync_table_groups(request):
                     'type': 'string',
                     'format': 'date-time',
                     'description': 'Last sync timestamp for incremental sync (optional)'
-                }
+                },
+                **SEQ_SCHEMA_PROPERTIES
             },
             'required': ['company_id', 'store_id']
         }
@@ -1692,6 +1941,7 @@ def sync_table_groups(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_modifiers(request):
     """
     Get modifiers for Edge Server (for food court concept)
@@ -1702,7 +1952,9 @@ def sync_modifiers(request):
     {
         "company_id": "uuid",
         "store_id": "uuid",
-        "updated_since": "2026-01-29T00:00:00Z"  // optional
+        "updated_since": "2026-01-29T00:00:00Z",  // optional
+        "since_seq": 1234,  // optional, preferred over updated_since
+        "limit": 500  // optional page size for since_seq
     }
     
     Returns:
@@ -1726,23 +1978,21 @@ def sync_modifiers(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
         updated_since = request.data.get('updated_since')
         
+        updated_since_dt = None
+        
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = scope.brand_ids
         
         # Import Modifier model
         from products.models import Modifier, ModifierOption
@@ -1750,7 +2000,13 @@ def sync_modifiers(request):
         # Build query - filter by brands operating in this store
         query = Q(brand_id__in=store_brands, is_active=True)
         
-        if updated_since:
+        try:
+            since_seq, limit = seq_params(request.data)
+        except (TypeError, ValueError):
+            return _invalid_seq_response()
+        
+        # Timestamp-based incremental sync (since_seq takes precedence)
+        if updated_since and since_seq is None:
             try:
                 updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
                 query &= Q(updated_at__gte=updated_since_dt)
@@ -1760,7 +2016,19 @@ def sync_modifiers(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        modifiers = Modifier.objects.filter(query).select_related('brand').prefetch_related('options')
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'modifiers',
+            Modifier.objects.filter(brand_id__in=store_brands),
+            'updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        modifiers, cursor = paginate_changes(
+            Modifier.objects.filter(query).select_related('brand').prefetch_related('options'),
+            company_id, since_seq, limit
+        )
         
         modifier_list = []
         for modifier in modifiers:
@@ -1789,11 +2057,14 @@ def sync_modifiers(request):
                 'options': options,
                 'created_at': modifier.created_at.isoformat(),
                 'updated_at': modifier.updated_at.isoformat(),
+                'change_seq': modifier.change_seq,
             })
         
-        return Response({
+        return with_etag(Response({
             'modifiers': modifier_list,
-            'deleted_ids': [],
+            **_deletions(company_id, 'modifier', updated_since_dt,
+                         since_seq=since_seq, until_seq=cursor['next_seq'], brand_ids=store_brands),
+            **cursor,
             'sync_timestamp': timezone.now().isoformat(),
             'total': len(modifier_list),
             'filter': {
@@ -1805,7 +2076,7 @@ def sync_modifiers(request):
                 'code': store.store_code,
                 'name': store.store_name,
             }
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_modifiers: {str(e)}", exc_info=True)
@@ -1852,6 +2123,7 @@ def sync_modifiers(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_modifier_options(request):
     """
     Get modifier options for Edge Server (for food court concept)
@@ -1889,23 +2161,21 @@ def sync_modifier_options(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
         updated_since = request.data.get('updated_since')
         
+        updated_since_dt = None
+        
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = scope.brand_ids
         
         # Import ModifierOption model
         from products.models import ModifierOption
@@ -1927,6 +2197,15 @@ def sync_modifier_options(request):
                     'code': 'INVALID_DATE_FORMAT'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'modifier_options',
+            ModifierOption.objects.filter(modifier__brand_id__in=store_brands),
+            'created_at', 'modifier__updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         options = ModifierOption.objects.filter(query).select_related(
             'modifier', 'modifier__brand'
         ).order_by('modifier', 'sort_order')
@@ -1947,9 +2226,9 @@ def sync_modifier_options(request):
                 'created_at': option.created_at.isoformat(),
             })
         
-        return Response({
+        return with_etag(Response({
             'modifier_options': option_list,
-            'deleted_ids': [],
+            **_deletions(company_id, 'modifier_option', updated_since_dt, brand_ids=store_brands),
             'sync_timestamp': timezone.now().isoformat(),
             'total': len(option_list),
             'filter': {
@@ -1961,7 +2240,7 @@ def sync_modifier_options(request):
                 'code': store.store_code,
                 'name': store.store_name,
             }
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_modifier_options: {str(e)}", exc_info=True)
@@ -2008,6 +2287,7 @@ def sync_modifier_options(request):
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(SYNC_RENDERER_CLASSES)
 def sync_product_modifiers(request):
     """
     Get product-modifier relationships for Edge Server (for food court concept)
@@ -2042,21 +2322,30 @@ def sync_product_modifiers(request):
                 'code': 'MISSING_STORE_ID'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify store exists and belongs to company
-        try:
-            store = Store.objects.get(id=store_id, brand__company_id=company_id, is_active=True)
-        except Store.DoesNotExist:
+        # Verify store exists and belongs to company (cached scope lookup)
+        scope = get_store_scope(company_id, store_id)
+        if scope is None or not scope.store.is_active:
             return Response({
                 'error': 'Store not found or does not belong to the specified company',
                 'code': 'STORE_NOT_FOUND'
             }, status=status.HTTP_404_NOT_FOUND)
+        store = scope.store
         
         # Get all brands operating in this store for food court concept
-        store_brands = Brand.objects.filter(
-            company_id=company_id,
-            is_active=True,
-            stores__id=store_id
-        ).values_list('id', flat=True)
+        store_brands = scope.brand_ids
+        
+        # Product-modifier links have no timestamps: the payload is always
+        # complete, updated_since only selects which deletions to report
+        updated_since = request.data.get('updated_since')
+        updated_since_dt = None
+        if updated_since:
+            try:
+                updated_since_dt = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
+            except (ValueError, AttributeError):
+                return Response({
+                    'error': 'Invalid updated_since format',
+                    'code': 'INVALID_DATE_FORMAT'
+                }, status=status.HTTP_400_BAD_REQUEST)
         
         # Import ProductModifier model
         from products.models import ProductModifier
@@ -2069,6 +2358,15 @@ def sync_product_modifiers(request):
             modifier__is_active=True
         )
         
+        # Version fingerprint - answer If-None-Match before building the payload
+        etag = sync_etag(
+            request, 'product_modifiers',
+            ProductModifier.objects.filter(product__company_id=company_id, product__brand_id__in=store_brands),
+            'product__updated_at', 'modifier__updated_at'
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         product_modifiers = ProductModifier.objects.filter(query).select_related(
             'product', 'modifier'
         ).order_by('product', 'sort_order')
@@ -2085,9 +2383,9 @@ def sync_product_modifiers(request):
                 'sort_order': pm.sort_order,
             })
         
-        return Response({
+        return with_etag(Response({
             'product_modifiers': pm_list,
-            'deleted_ids': [],
+            **_deletions(company_id, 'product_modifier', updated_since_dt, brand_ids=store_brands),
             'sync_timestamp': timezone.now().isoformat(),
             'total': len(pm_list),
             'filter': {
@@ -2099,7 +2397,7 @@ def sync_product_modifiers(request):
                 'code': store.store_code,
                 'name': store.store_name,
             }
-        })
+        }), etag)
         
     except Exception as e:
         logger.error(f"Error in sync_product_modifiers: {str(e)}", exc_info=True)
@@ -2108,3 +2406,171 @@ def sync_product_modifiers(request):
             'code': 'INTERNAL_ERROR',
             'detail': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'company_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Company UUID of the edge location'
+                },
+                'store_id': {
+                    'type': 'string',
+                    'format': 'uuid',
+                    'description': 'Store UUID of the edge location'
+                },
+                'format': {
+                    'type': 'string',
+                    'enum': ['ndjson', 'json'],
+                    'description': 'ndjson (default, one row per line) or json (single streamed document)'
+                },
+                'sections': {
+                    'type': 'array',
+                    'items': {'type': 'string', 'enum': list(BOOTSTRAP_SECTIONS)},
+                    'description': 'Subset of sections to stream (optional, default all)'
+                }
+            },
+            'required': ['company_id', 'store_id']
+        }
+    },
+    responses={(200, 'application/x-ndjson'): OpenApiTypes.STR},
+    examples=[
+        OpenApiExample(
+            'Bootstrap Store',
+            value={
+                'company_id': '812e76b6-f235-4bb2-948a-cae58ee62b97',
+                'store_id': 'uuid-here'
+            }
+        )
+    ]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_bootstrap(request):
+    """
+    Stream everything an Edge Server needs to cold-start, in one request
+    
+    POST /api/v1/sync/bootstrap/
+    
+    Request Body:
+    {
+        "company_id": "uuid",
+        "store_id": "uuid",
+        "format": "ndjson",  // optional: ndjson (default) | json
+        "sections": ["products", "categories"]  // optional subset
+    }
+    
+    The store scope is resolved once; sections are streamed in order:
+    companies, brands, stores, categories, products, modifiers,
+    modifier_options, product_modifiers, table_areas, tables,
+    table_groups, promotions.
+    
+    NDJSON response (application/x-ndjson):
+        {"section": "meta", "data": {"company_id": ..., "next_seq": 42, ...}}
+        {"section": "products", "data": {...}}
+        ...
+        {"section": "end", "data": {"counts": {"products": 120, ...}}}
+    
+    meta.next_seq is the change sequence to use as since_seq for the
+    following incremental syncs. A missing "end" line (or an "error"
+    line) means the stream was cut short and must be retried.
+    """
+    company_id = request.data.get('company_id')
+    store_id = request.data.get('store_id')
+    output_format = request.data.get('format') or 'ndjson'
+    sections = request.data.get('sections') or list(BOOTSTRAP_SECTIONS)
+    
+    if not company_id:
+        return Response({
+            'error': 'company_id is required in request body',
+            'code': 'MISSING_COMPANY_ID'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not store_id:
+        return Response({
+            'error': 'store_id is required in request body',
+            'code': 'MISSING_STORE_ID'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if output_format not in ('ndjson', 'json'):
+        return Response({
+            'error': 'format must be ndjson or json',
+            'code': 'INVALID_FORMAT'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not isinstance(sections, list):
+        return Response({
+            'error': 'sections must be a list',
+            'code': 'INVALID_SECTIONS'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    unknown = [name for name in sections if name not in BOOTSTRAP_SECTIONS]
+    if unknown:
+        return Response({
+            'error': f'Unknown sections: {", ".join(map(str, unknown))}',
+            'code': 'INVALID_SECTIONS'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    # Keep stream order stable regardless of request order
+    sections = [name for name in BOOTSTRAP_SECTIONS if name in sections]
+    
+    now = timezone.now()
+    try:
+        scope = resolve_scope(company_id, store_id, now)
+    except (Store.DoesNotExist, Company.DoesNotExist, ValueError, ValidationError):
+        return Response({
+            'error': 'Store not found or does not belong to the specified company',
+            'code': 'STORE_NOT_FOUND'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    meta = {
+        'company_id': str(company_id),
+        'store_id': str(store_id),
+        'brand_ids': [str(brand_id) for brand_id in scope.brand_ids],
+        'sections': sections,
+        # Read before any section so changes during the stream are re-sent
+        'next_seq': SyncSequence.current(company_id),
+        'sync_timestamp': now.isoformat(),
+    }
+    
+    def on_error(exc):
+        logger.error(f"Error in sync_bootstrap stream: {str(exc)}", exc_info=True)
+    
+    logger.info(
+        f"Bootstrap stream: company={company_id}, store={scope.store.store_code}, "
+        f"format={output_format}, sections={len(sections)}"
+    )
+    
+    if output_format == 'json':
+        stream = stream_json(scope, request, sections, meta, on_error)
+        content_type = 'application/json'
+    else:
+        stream = stream_ndjson(scope, request, sections, meta, on_error)
+        content_type = 'application/x-ndjson'
+    
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def ingest_metrics(request):
+    """
+    Prometheus scrape endpoint for Edge push ingest (GET /metrics)
+    
+    Authorized by METRICS_TOKEN as a Bearer token, or a staff session
+    when no token is configured.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        authorized = constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    else:
+        authorized = request.user.is_authenticated and request.user.is_staff
+    if not authorized:
+        return HttpResponseForbidden('Forbidden')
+    
+    response = HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    response['Cache-Control'] = 'no-store'
+    return response
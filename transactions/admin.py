@@ -6,7 +6,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     Bill, BillItem, Payment, BillPromotion, CashDrop,
-    StoreSession, CashierShift, KitchenOrder, BillRefund, InventoryMovement
+    StoreSession, CashierShift, KitchenOrder, BillRefund, InventoryMovement, IngestBatch
 )
 
 
@@ -214,3 +214,20 @@ class InventoryMovementAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(IngestBatch)
+class IngestBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'store_id', 'status', 'record_count', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['id', 'store_id']
+    exclude = ['payload']
+    readonly_fields = [
+        'id', 'company_id', 'store_id', 'status', 'payload_size', 'record_count',
+        'result', 'attempts', 'created_at', 'started_at', 'finished_at'
+    ]
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,86 @@
+"""
+Parsers for push endpoints
+
+A week of offline sales pushed as one JSON document is tens of MB that
+JSONParser loads whole before the view runs. Push endpoints also accept
+newline-delimited JSON (one record per line):
+
+- application/x-ndjson - request.data is a RecordStream that reads and
+  decodes one line at a time from the request body, so the view can write
+  records in fixed-size batches while the rest of the body is unread
+
+Line formats per endpoint:
+
+    bills/push_bulk/   {"bill_number": "B-1", ..., "items": [...]}
+    bulk-push/         {"bills": {...}}  /  {"cash_drops": {...}}  / ...
+"""
+
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+class RecordStream:
+    """
+    Lazy iterator over the JSON objects of an NDJSON request body
+
+    Can be iterated once. store_id / company_id of the first record that
+    carries them are kept in .meta (for ingest metrics).
+    """
+
+    def __init__(self, stream, encoding='utf-8'):
+        self.stream = stream
+        self.encoding = encoding
+        self.meta = {}
+        self.lines = 0
+        self.bytes_read = 0
+
+    def _observe(self, record):
+        if 'store_id' in self.meta:
+            return
+        candidates = [record] + [value for value in record.values() if isinstance(value, dict)]
+        for candidate in candidates:
+            if candidate.get('store_id'):
+                self.meta['store_id'] = candidate['store_id']
+                self.meta['company_id'] = candidate.get('company_id')
+                return
+
+    def __iter__(self):
+        if self.stream is None:
+            return
+        max_line = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        while True:
+            line = self.stream.readline(max_line + 1) if max_line else self.stream.readline()
+            if not line:
+                return
+            self.lines += 1
+            self.bytes_read += len(line)
+            if max_line and len(line) > max_line and not line.endswith(b'\n'):
+                raise ParseError(f'NDJSON line {self.lines} exceeds {max_line} bytes')
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line.decode(self.encoding))
+            except (UnicodeDecodeError, ValueError) as exc:
+                raise ParseError(f'NDJSON parse error on line {self.lines} - {exc}')
+            if not isinstance(record, dict):
+                raise ParseError(f'NDJSON line {self.lines} is not a JSON object')
+            self._observe(record)
+            yield record
+
+
+class NDJSONParser(BaseParser):
+    """Newline-delimited JSON, parsed lazily (see RecordStream)"""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return RecordStream(stream, encoding)
+
+
+# Parser classes for push endpoints that can ingest a stream
+PUSH_PARSER_CLASSES = [JSONParser, NDJSONParser]
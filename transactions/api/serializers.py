@@ -3,10 +3,12 @@ Transactions API Serializers - For Edge → HO Push
 Receive transaction data from Edge servers
 """
 from rest_framework import serializers
+from analytics.rollups import mark_rows_dirty
 from transactions.models import (
     Bill, BillItem, Payment, BillPromotion, CashDrop,
     StoreSession, CashierShift, KitchenOrder, BillRefund, InventoryMovement
 )
+from transactions.services.copy_loader import bulk_load
 
 
 class BillItemSerializer(serializers.ModelSerializer):
@@ -57,6 +59,64 @@ class BillSerializer(serializers.ModelSerializer):
         return bill
 
 
+# ============================================================================
+# BULK INGEST (validation only - writes go through transactions.services.bill_ingest)
+# ============================================================================
+
+class BillItemIngestSerializer(serializers.ModelSerializer):
+    """Nested bill item; bill_id and denormalized fields come from the bill"""
+    class Meta:
+        model = BillItem
+        exclude = ['bill_id']
+        extra_kwargs = {
+            'company_id': {'required': False},
+            'brand_id': {'required': False},
+            'store_id': {'required': False},
+            'created_at': {'required': False},
+            'created_by': {'required': False},
+        }
+
+
+class PaymentIngestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        exclude = ['bill_id']
+        extra_kwargs = {
+            'created_at': {'required': False},
+            'created_by': {'required': False},
+        }
+
+
+class BillPromotionIngestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BillPromotion
+        exclude = ['bill_id']
+        extra_kwargs = {
+            'applied_at': {'required': False},
+            'applied_by': {'required': False},
+        }
+
+
+class BillIngestSerializer(serializers.ModelSerializer):
+    """
+    Validate one pushed bill with its items / payments / promotions
+
+    (store_id, bill_number) is not validated here - the ingest pipeline
+    resolves it set-based for the whole batch and upserts existing bills.
+    """
+    items = BillItemIngestSerializer(many=True, required=False)
+    payments = PaymentIngestSerializer(many=True, required=False)
+    promotions = BillPromotionIngestSerializer(many=True, required=False)
+
+    class Meta:
+        model = Bill
+        fields = '__all__'
+        validators = []
+        extra_kwargs = {
+            'payload_hash': {'read_only': True},
+        }
+
+
 class CashDropSerializer(serializers.ModelSerializer):
     class Meta:
         model = CashDrop
@@ -94,8 +154,12 @@ class InventoryMovementSerializer(serializers.ModelSerializer):
 
 
 class BulkTransactionSerializer(serializers.Serializer):
-    """Bulk transaction push from Edge - multiple records in one request"""
-    bills = BillSerializer(many=True, required=False)
+    """
+    Bulk transaction push from Edge - multiple records in one request
+    
+    Bills are not part of this serializer: bulk_push hands them to the
+    bulk bill ingest pipeline (transactions.services.bill_ingest).
+    """
     cash_drops = CashDropSerializer(many=True, required=False)
     store_sessions = StoreSessionSerializer(many=True, required=False)
     cashier_shifts = CashierShiftSerializer(many=True, required=False)
@@ -107,15 +171,6 @@ class BulkTransactionSerializer(serializers.Serializer):
         """Create all records in bulk"""
         created_counts = {}
         
-        # Bills (with nested items/payments/promotions)
-        bills_data = validated_data.get('bills', [])
-        bills = []
-        for bill_data in bills_data:
-            serializer = BillSerializer(data=bill_data)
-            if serializer.is_valid():
-                bills.append(serializer.save())
-        created_counts['bills'] = len(bills)
-        
         # Cash Drops
         cash_drops_data = validated_data.get('cash_drops', [])
         cash_drops = CashDrop.objects.bulk_create([
@@ -153,9 +208,8 @@ class BulkTransactionSerializer(serializers.Serializer):
         
         # Inventory Movements
         inv_data = validated_data.get('inventory_movements', [])
-        inv_movements = InventoryMovement.objects.bulk_create([
-            InventoryMovement(**data) for data in inv_data
-        ])
-        created_counts['inventory_movements'] = len(inv_movements)
+        movements = [InventoryMovement(**data) for data in inv_data]
+        created_counts['inventory_movements'] = bulk_load(InventoryMovement, movements)
+        mark_rows_dirty(movements)
         
         return created_counts
@@ -5,7 +5,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     BillPushViewSet, CashDropPushViewSet, StoreSessionPushViewSet,
-    CashierShiftPushViewSet, InventoryMovementPushViewSet, bulk_push
+    CashierShiftPushViewSet, InventoryMovementPushViewSet, bulk_push,
+    bulk_push_async, ingest_batch_status
 )
 
 router = DefaultRouter()
@@ -18,4 +19,6 @@ router.register(r'inventory', InventoryMovementPushViewSet, basename='inventory-
 urlpatterns = [
     path('', include(router.urls)),
     path('bulk-push/', bulk_push, name='bulk-push'),
+    path('bulk-push/async/', bulk_push_async, name='bulk-push-async'),
+    path('batches/<uuid:batch_id>/', ingest_batch_status, name='ingest-batch-status'),
 ]
@@ -1,27 +1,45 @@
 """
 Transactions API Views - Edge → HO Push
 Receive transaction data from Edge servers (write-only endpoints)
+
+Push endpoints are instrumented per store (sync_api.ingest_metrics):
+request / row / failure counts, DB vs other time and payload bytes go
+to SyncHealth and the /metrics endpoint.
+
+bills/push_bulk and bulk-push also accept NDJSON (application/x-ndjson,
+see transactions/api/parsers.py) for large catch-up pushes; records are
+written in TRANSACTION_STREAM_BATCH_SIZE batches as the body is read.
 """
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, parser_classes, permission_classes
 from rest_framework.response import Response
+from django.conf import settings
 from django.db import transaction
+from django.urls import reverse
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 from transactions.models import (
     Bill, BillItem, Payment, BillPromotion, CashDrop,
-    StoreSession, CashierShift, KitchenOrder, BillRefund, InventoryMovement
+    StoreSession, CashierShift, KitchenOrder, BillRefund, InventoryMovement, IngestBatch
 )
 from .serializers import (
-    BillSerializer, CashDropSerializer, StoreSessionSerializer,
+    BillIngestSerializer, CashDropSerializer, StoreSessionSerializer,
     CashierShiftSerializer, KitchenOrderSerializer, BillRefundSerializer,
     InventoryMovementSerializer, BulkTransactionSerializer
 )
+from .parsers import PUSH_PARSER_CLASSES, RecordStream
+from analytics.rollups import mark_rows_dirty
+from sync_api.ingest_metrics import instrument_push
+from transactions.services.bill_ingest import ingest_bill_stream, ingest_bills
+from transactions.services.copy_loader import bulk_load
+from transactions.services.ingest_queue import (
+    apply_bulk_push, apply_bulk_push_stream, as_uuid, enqueue_batch, is_saturated, resolve_store_id
+)
 
 
 @extend_schema(tags=['Transactions'])
 class BillPushViewSet(viewsets.ViewSet):
     """
-    Receive bills from Edge (create-only)
+    Receive bills from Edge (idempotent create / upsert)
     POST /api/v1/transactions/bills/push/
     """
     permission_classes = [permissions.IsAuthenticated]
@@ -30,56 +48,56 @@ class BillPushViewSet(viewsets.ViewSet):
         summary="Push Single Bill",
         description="Receive a single completed bill from Edge server",
         responses={201: None},
-        request=BillSerializer
+        request=BillIngestSerializer
     )
     @action(detail=False, methods=['post'])
+    @instrument_push('bills')
     def push(self, request):
         """
         Push single bill with items, payments, promotions
         Body: { bill_data with nested items/payments/promotions }
         """
-        serializer = BillSerializer(data=request.data)
-        if serializer.is_valid():
-            bill = serializer.save()
-            return Response(
-                {'success': True, 'bill_id': str(bill.id)},
-                status=status.HTTP_201_CREATED
-            )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # Same idempotent path as push_bulk - a retried push is acknowledged
+        result = ingest_bills([request.data])
+        if result['errors']:
+            return Response(result['errors'][0]['errors'], status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'success': True, 'bill_id': result['bill_ids'][0]},
+            status=status.HTTP_201_CREATED
+        )
     
     @extend_schema(
         summary="Push Bulk Bills",
-        description="Receive multiple bills from Edge server in one request",
+        description="Receive multiple bills from Edge server in one request. "
+                    "Bills are validated once and written with one bulk INSERT per table; "
+                    "invalid bills are reported per index (207) without aborting the rest. "
+                    "Idempotent on (store_id, bill_number) or idempotency_key: retried bills "
+                    "are acknowledged as duplicates, changed bills (VOID / REFUND) are upserted. "
+                    "With Content-Type application/x-ndjson (one bill per line) bills are "
+                    "written in batches while the body is read.",
         responses={201: None}
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], parser_classes=PUSH_PARSER_CLASSES)
+    @instrument_push('bills')
     def push_bulk(self, request):
         """
         Push multiple bills in one request
-        Body: { bills: [...] }
+        Body: { bills: [...] }, or NDJSON with one bill per line
         """
-        bills_data = request.data.get('bills', [])
-        created_bills = []
-        errors = []
-        
-        for idx, bill_data in enumerate(bills_data):
-            serializer = BillSerializer(data=bill_data)
-            if serializer.is_valid():
-                bill = serializer.save()
-                created_bills.append(str(bill.id))
-            else:
-                errors.append({
-                    'index': idx,
-                    'errors': serializer.errors
-                })
+        if isinstance(request.data, RecordStream):
+            # Batches already written stay written if the stream breaks -
+            # the edge's retry acknowledges them as duplicates
+            result = ingest_bill_stream(request.data)
+        else:
+            bills_data = request.data.get('bills', [])
+            if not isinstance(bills_data, list):
+                return Response({'bills': ['Expected a list of bills.']}, status=status.HTTP_400_BAD_REQUEST)
+            result = ingest_bills(bills_data)
         
         return Response({
-            'success': len(errors) == 0,
-            'created': len(created_bills),
-            'failed': len(errors),
-            'bill_ids': created_bills,
-            'errors': errors
-        }, status=status.HTTP_201_CREATED if len(errors) == 0 else status.HTTP_207_MULTI_STATUS)
+            'success': result['failed'] == 0,
+            **result
+        }, status=status.HTTP_201_CREATED if result['failed'] == 0 else status.HTTP_207_MULTI_STATUS)
 
 
 @extend_schema(tags=['Transactions'])
@@ -93,6 +111,7 @@ class CashDropPushViewSet(viewsets.ViewSet):
         request=CashDropSerializer
     )
     @action(detail=False, methods=['post'])
+    @instrument_push('cash_drops')
     def push(self, request):
         """Push single cash drop"""
         serializer = CashDropSerializer(data=request.data)
@@ -109,6 +128,7 @@ class CashDropPushViewSet(viewsets.ViewSet):
         description="Receive multiple cash drop records from Edge server"
     )
     @action(detail=False, methods=['post'])
+    @instrument_push('cash_drops')
     def push_bulk(self, request):
         """Push multiple cash drops"""
         cash_drops_data = request.data.get('cash_drops', [])
@@ -132,6 +152,7 @@ class StoreSessionPushViewSet(viewsets.ViewSet):
         request=StoreSessionSerializer
     )
     @action(detail=False, methods=['post'])
+    @instrument_push('store_sessions')
     def push(self, request):
         """Push store session (EOD)"""
         serializer = StoreSessionSerializer(data=request.data)
@@ -155,6 +176,7 @@ class CashierShiftPushViewSet(viewsets.ViewSet):
         request=CashierShiftSerializer
     )
     @action(detail=False, methods=['post'])
+    @instrument_push('cashier_shifts')
     def push(self, request):
         """Push cashier shift"""
         serializer = CashierShiftSerializer(data=request.data)
@@ -174,24 +196,39 @@ class InventoryMovementPushViewSet(viewsets.ViewSet):
     
     @extend_schema(
         summary="Push Bulk Inventory Movements",
-        description="Receive stock movements (deductions) from Edge server"
+        description="Receive stock movements (deductions) from Edge server. "
+                    "Loaded with COPY on PostgreSQL, ORM bulk insert elsewhere."
     )
     @action(detail=False, methods=['post'])
+    @instrument_push('inventory_movements')
     def push_bulk(self, request):
         """Push multiple inventory movements"""
-        movements_data = request.data.get('movements', [])
-        movements = InventoryMovement.objects.bulk_create([
-            InventoryMovement(**data) for data in movements_data
-        ])
+        serializer = InventoryMovementSerializer(data=request.data.get('movements', []), many=True)
+        if not serializer.is_valid():
+            return Response({'movements': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        movements = [InventoryMovement(**data) for data in serializer.validated_data]
+        with transaction.atomic():
+            created = bulk_load(InventoryMovement, movements)
+            # Inventory cost rollups for the touched days
+            mark_rows_dirty(movements)
         return Response({
             'success': True,
-            'created': len(movements)
+            'created': created
         }, status=status.HTTP_201_CREATED)
 
 
-@extend_schema(tags=['Transactions'], summary="Bulk Push All Data", description="Receive mixed transaction data in one request")
+@extend_schema(
+    tags=['Transactions'],
+    summary="Bulk Push All Data",
+    description="Receive mixed transaction data in one request. With Content-Type "
+                "application/x-ndjson every line is one {\"<record type>\": {...}} record "
+                "and records are written in batches while the body is read."
+)
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@parser_classes(PUSH_PARSER_CLASSES)
+@instrument_push()
 def bulk_push(request):
     """
     Bulk push endpoint - all transaction types in one request
@@ -206,16 +243,101 @@ def bulk_push(request):
       bill_refunds: [...],
       inventory_movements: [...]
     }
+    
+    NDJSON body: one {"bills": {...}} / {"cash_drops": {...}} / ... per line
     """
-    serializer = BulkTransactionSerializer(data=request.data)
-    if serializer.is_valid():
-        with transaction.atomic():
-            created_counts = serializer.save()
-        
-        return Response({
-            'success': True,
-            'created': created_counts,
-            'message': 'Bulk transaction push successful'
-        }, status=status.HTTP_201_CREATED)
+    if isinstance(request.data, RecordStream):
+        status_code, body = apply_bulk_push_stream(request.data)
+    else:
+        status_code, body = apply_bulk_push(request.data)
+    return Response(body, status=status_code)
+
+
+@extend_schema(
+    tags=['Transactions'],
+    summary="Bulk Push All Data (Async)",
+    description="Queue a bulk push for background processing. Returns 202 with a batch id; "
+                "poll the batch status endpoint for the outcome. Returns 429 with Retry-After "
+                "when the ingest queue is full.",
+    request=BulkTransactionSerializer,
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@instrument_push()
+def bulk_push_async(request):
+    """
+    Async bulk push - same body as bulk-push (plus optional store_id / company_id)
+    The payload is stored compressed and applied by a Celery worker
+    """
+    if not isinstance(request.data, dict):
+        return Response({'error': 'Expected a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    store_id = resolve_store_id(request.data)
+    if store_id is None:
+        return Response(
+            {'store_id': ['store_id is required (top-level or on the records).']},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if is_saturated():
+        retry_after = getattr(settings, 'TRANSACTION_INGEST_RETRY_AFTER', 30)
+        response = Response({
+            'error': 'QUEUE_FULL',
+            'message': 'Ingest queue is full, retry later'
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(retry_after)
+        return response
+    
+    batch = enqueue_batch(request.data, store_id)
+    status_url = f"{reverse('ingest-batch-status', kwargs={'batch_id': batch.id})}?store_id={store_id}"
+    response = Response({
+        'success': True,
+        'batch_id': str(batch.id),
+        'status': batch.status,
+        'status_url': status_url,
+    }, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = status_url
+    return response
+
+
+@extend_schema(
+    tags=['Transactions'],
+    summary="Ingest Batch Status",
+    description="Outcome of an async bulk push. Scoped by store_id and/or company_id "
+                "(query params): a batch of another store is not found."
+)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def ingest_batch_status(request, batch_id):
+    """
+    Poll an async bulk push batch
+    Query params: store_id and/or company_id (at least one)
+    """
+    scope = {}
+    for param in ('store_id', 'company_id'):
+        value = request.query_params.get(param)
+        if value:
+            scope[param] = as_uuid(value)
+            if scope[param] is None:
+                return Response({param: ['Must be a valid UUID.']}, status=status.HTTP_400_BAD_REQUEST)
+    if not scope:
+        return Response(
+            {'error': 'store_id or company_id parameter required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    batch = IngestBatch.objects.defer('payload').filter(id=batch_id, **scope).first()
+    if batch is None:
+        return Response({'error': 'Batch not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'batch_id': str(batch.id),
+        'store_id': str(batch.store_id),
+        'status': batch.status,
+        'record_count': batch.record_count,
+        'attempts': batch.attempts,
+        'created_at': batch.created_at,
+        'started_at': batch.started_at,
+        'finished_at': batch.finished_at,
+        'result': batch.result,
+    })
@@ -0,0 +1,54 @@
+"""
+Management Command: Archive Partitions
+Detaches monthly partitions of the transaction tables older than N months
+and moves them to the "archive" schema (or drops them with --drop).
+
+Usage:
+    python manage.py archive_partitions --older-than 24 --dry-run
+    python manage.py archive_partitions --older-than 24
+    python manage.py archive_partitions --older-than 36 --drop
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.services.partitions import ARCHIVE_SCHEMA, archive_partitions, partitioning_supported
+
+
+class Command(BaseCommand):
+    help = 'Detach and archive (or drop) old monthly partitions of the transaction tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            required=True,
+            help='Archive months that ended more than N months before the current month',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop detached partitions instead of moving them to the archive schema',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the partitions that would be affected',
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 1:
+            raise CommandError('--older-than must be at least 1')
+        if not partitioning_supported():
+            self.stdout.write(self.style.WARNING('Partitioning requires PostgreSQL - nothing to do'))
+            return
+
+        affected = archive_partitions(options['older_than'], drop=options['drop'], dry_run=options['dry_run'])
+        for name in affected:
+            self.stdout.write(f"  - {name}")
+
+        if options['dry_run']:
+            action = 'Would affect'
+        elif options['drop']:
+            action = 'Dropped'
+        else:
+            action = f'Archived to schema "{ARCHIVE_SCHEMA}"'
+        self.stdout.write(self.style.SUCCESS(f"{action}: {len(affected)} partitions"))
@@ -0,0 +1,131 @@
+"""
+Management Command: Benchmark Bulk Load
+Compares rows/sec of ORM bulk_create and the PostgreSQL COPY loader for
+inventory_movement and bill_item. Every run is rolled back.
+
+Usage:
+    python manage.py benchmark_bulk_load
+    python manage.py benchmark_bulk_load --rows 200000 --table inventory_movement
+"""
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from transactions.models import BillItem, InventoryMovement
+from transactions.services.copy_loader import ORM_BATCH_SIZE, copy_rows, copy_supported
+
+
+class _Rollback(Exception):
+    pass
+
+
+def make_inventory_movements(count):
+    now = timezone.now()
+    company_id, brand_id, store_id, user_id = (uuid.uuid4() for _ in range(4))
+    items = [uuid.uuid4() for _ in range(50)]
+    return [
+        InventoryMovement(
+            company_id=company_id,
+            brand_id=brand_id,
+            store_id=store_id,
+            inventory_item_id=items[i % len(items)],
+            movement_type='SALE',
+            quantity=Decimal('-0.25'),
+            unit='kg',
+            unit_cost=Decimal('12000.00'),
+            total_cost=Decimal('-3000.00'),
+            bill_id=uuid.uuid4(),
+            created_at=now - timedelta(seconds=i),
+            created_by=user_id,
+        )
+        for i in range(count)
+    ]
+
+
+def make_bill_items(count):
+    now = timezone.now()
+    company_id, brand_id, store_id, user_id = (uuid.uuid4() for _ in range(4))
+    return [
+        BillItem(
+            bill_id=uuid.uuid4(),
+            company_id=company_id,
+            brand_id=brand_id,
+            store_id=store_id,
+            product_id=uuid.uuid4(),
+            product_sku=f'SKU-{i % 300}',
+            product_name=f'Product {i % 300}',
+            quantity=Decimal('1.00'),
+            unit_price=Decimal('25000.00'),
+            total=Decimal('25000.00'),
+            modifiers_snapshot=[{'name': 'Extra\tspicy', 'price': 0}],
+            notes='no ice' if i % 7 == 0 else None,
+            created_at=now - timedelta(seconds=i),
+            created_by=user_id,
+        )
+        for i in range(count)
+    ]
+
+
+TABLES = {
+    'inventory_movement': (InventoryMovement, make_inventory_movements),
+    'bill_item': (BillItem, make_bill_items),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ORM bulk_create vs COPY loader rows/sec (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=50000,
+            help='Rows to load per run',
+        )
+        parser.add_argument(
+            '--table',
+            choices=sorted(TABLES),
+            default=None,
+            help='Only benchmark one table (default: both)',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        tables = [options['table']] if options['table'] else list(TABLES)
+        loaders = [('orm', self.load_orm)]
+        if copy_supported():
+            loaders.append(('copy', self.load_copy))
+        else:
+            self.stdout.write(self.style.WARNING('COPY loader unavailable on this database - ORM only'))
+
+        self.stdout.write(self.style.SUCCESS(f"=== Bulk load benchmark: {rows} rows ===\n"))
+        self.stdout.write(f"{'table':<22}{'loader':<8}{'seconds':>10}{'rows/sec':>12}")
+
+        for table in tables:
+            model, factory = TABLES[table]
+            for label, loader in loaders:
+                instances = factory(rows)
+                elapsed = self.timed(loader, model, instances)
+                self.stdout.write(f"{table:<22}{label:<8}{elapsed:>10.2f}{rows / elapsed:>12,.0f}")
+
+    def timed(self, loader, model, instances):
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                loader(model, instances)
+                elapsed = time.perf_counter() - started
+                raise _Rollback
+        except _Rollback:
+            pass
+        return elapsed
+
+    def load_orm(self, model, instances):
+        model.objects.bulk_create(instances, batch_size=ORM_BATCH_SIZE)
+
+    def load_copy(self, model, instances):
+        copy_rows(model, instances)
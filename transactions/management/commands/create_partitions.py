@@ -0,0 +1,55 @@
+"""
+Management Command: Create Partitions
+Creates upcoming monthly partitions of bill_item, payment, bill_promotion
+and inventory_movement (PostgreSQL). Run daily via Celery Beat.
+
+Usage:
+    python manage.py create_partitions
+    python manage.py create_partitions --months-ahead 6
+    python manage.py create_partitions --list
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from transactions.services.partitions import (
+    PARTITIONED_TABLES, ensure_partitions, is_partitioned, list_partitions, partitioning_supported
+)
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly partitions of the transaction tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=getattr(settings, 'TRANSACTION_PARTITION_MONTHS_AHEAD', 3),
+            help='Months after the current one to create (default: TRANSACTION_PARTITION_MONTHS_AHEAD)',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Only list existing partitions',
+        )
+
+    def handle(self, *args, **options):
+        if not partitioning_supported():
+            self.stdout.write(self.style.WARNING('Partitioning requires PostgreSQL - nothing to do'))
+            return
+
+        if options['list']:
+            with connection.cursor() as cursor:
+                for table in PARTITIONED_TABLES:
+                    if not is_partitioned(cursor, table):
+                        self.stdout.write(f"{table}: not partitioned")
+                        continue
+                    partitions = list_partitions(cursor, table)
+                    span = f"{partitions[0][0]:%Y-%m} .. {partitions[-1][0]:%Y-%m}" if partitions else '-'
+                    self.stdout.write(f"{table}: {len(partitions)} monthly partitions ({span})")
+            return
+
+        created = ensure_partitions(options['months_ahead'])
+        for name in created:
+            self.stdout.write(f"  + {name}")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions"))
@@ -0,0 +1,36 @@
+# Generated manually for idempotent bill ingest
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bill',
+            name='bill_number',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Optional client key; retries with the same key are acknowledged', max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the last ingested payload (exact duplicate detection)', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='bill',
+            constraint=models.UniqueConstraint(fields=('store_id', 'bill_number'), name='bill_store_number_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='bill',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('store_id', 'idempotency_key'), name='bill_store_idempotency_uniq'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated manually for asynchronous queued ingest
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_bill_idempotent_ingest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('company_id', models.UUIDField(blank=True, db_index=True, null=True)),
+                ('store_id', models.UUIDField(db_index=True)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('PROCESSING', 'Processing'), ('DONE', 'Done'), ('PARTIAL', 'Partially Applied'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('payload', models.BinaryField(blank=True, help_text='zlib-compressed JSON body (cleared once applied)', null=True)),
+                ('payload_size', models.PositiveIntegerField(default=0, help_text='Uncompressed size in bytes')),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'ingest_batch',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ingest_batch_status_idx'), models.Index(fields=['store_id', 'status'], name='ingest_batch_store_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated manually for monthly range partitioning of transaction tables
+#
+# The conversion DDL is kept here rather than imported from
+# transactions.services.partitions so this migration keeps doing what it
+# did when it was written.
+
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+
+# table -> partition column
+PARTITIONED_TABLES = {
+    'bill_item': 'created_at',
+    'payment': 'created_at',
+    'bill_promotion': 'applied_at',
+    'inventory_movement': 'created_at',
+}
+
+MONTHS_AHEAD = 3
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def _is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace",
+        [table]
+    )
+    return cursor.fetchone() is not None
+
+
+def _index_definitions(cursor, table):
+    """Non-unique index DDL of a table (unique ones are rebuilt by the caller)"""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename = %s "
+        "AND indexdef NOT LIKE 'CREATE UNIQUE INDEX%%'",
+        [table]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def convert_to_partitioned(cursor, table, column):
+    """Rebuild a plain table as a monthly partitioned table (data is copied)"""
+    quote = cursor.db.ops.quote_name
+    legacy = f'{table}_legacy'
+    indexes = _index_definitions(cursor, table)
+
+    cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+    cursor.execute(
+        f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({quote(column)})"
+    )
+    cursor.execute(f"ALTER TABLE {quote(table)} ADD PRIMARY KEY (id, {quote(column)})")
+    cursor.execute(f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT")
+
+    cursor.execute(f"SELECT MIN({quote(column)}) FROM {quote(legacy)}")
+    oldest = cursor.fetchone()[0]
+    current = _month_start(timezone.now())
+    month = _month_start(oldest) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote(f'{table}_p{month:%Y%m}')} "
+            f"PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)",
+            [month.isoformat(), _add_months(month, 1).isoformat()]
+        )
+        month = _add_months(month, 1)
+
+    cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(legacy)}")
+    cursor.execute(f"DROP TABLE {quote(legacy)}")
+    for definition in indexes:
+        cursor.execute(definition)
+
+
+def convert_to_plain(cursor, table):
+    """Reverse of convert_to_partitioned (data is copied back)"""
+    quote = cursor.db.ops.quote_name
+    legacy = f'{table}_partitioned'
+    indexes = _index_definitions(cursor, table)
+
+    cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+    cursor.execute(
+        f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    cursor.execute(f"ALTER TABLE {quote(table)} ADD PRIMARY KEY (id)")
+    cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(legacy)}")
+    cursor.execute(f"DROP TABLE {quote(legacy)} CASCADE")
+    for definition in indexes:
+        cursor.execute(definition)
+
+
+def partition_tables(apps, schema_editor):
+    # PostgreSQL only - SQLite (dev) keeps plain tables
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            if not _is_partitioned(cursor, table):
+                convert_to_partitioned(cursor, table, column)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if _is_partitioned(cursor, table):
+                convert_to_plain(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_ingestbatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
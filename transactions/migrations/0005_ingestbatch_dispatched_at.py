@@ -0,0 +1,18 @@
+# Generated manually for ingest batch dispatch tracking
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_partition_transaction_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestbatch',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, help_text='Last dispatch / busy retry of its task', null=True),
+        ),
+    ]
@@ -33,7 +33,8 @@ class Bill(models.Model):
     store_id = models.UUIDField(db_index=True)
     terminal_id = models.UUIDField()
     
-    bill_number = models.CharField(max_length=50, unique=True, db_index=True)
+    # Unique per store - see Meta.constraints
+    bill_number = models.CharField(max_length=50, db_index=True)
     bill_type = models.CharField(max_length=20, choices=BILL_TYPE_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='OPEN', db_index=True)
     
@@ -69,6 +70,10 @@ class Bill(models.Model):
     
     # Sync metadata
     synced_at = models.DateTimeField(auto_now_add=True)
+    idempotency_key = models.CharField(max_length=100, null=True, blank=True,
+                                       help_text='Optional client key; retries with the same key are acknowledged')
+    payload_hash = models.CharField(max_length=64, blank=True, default='',
+                                    help_text='SHA-256 of the last ingested payload (exact duplicate detection)')
     
     class Meta:
         db_table = 'bill'
@@ -79,6 +84,14 @@ class Bill(models.Model):
             models.Index(fields=['bill_number'], name='bill_number_idx'),
             models.Index(fields=['status', 'created_at'], name='bill_status_date_idx'),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['store_id', 'bill_number'], name='bill_store_number_uniq'),
+            models.UniqueConstraint(
+                fields=['store_id', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='bill_store_idempotency_uniq'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.bill_number} - {self.status}"
@@ -470,3 +483,45 @@ class InventoryMovement(models.Model):
     
     def __str__(self):
         return f"{self.movement_type} - {self.quantity} {self.unit}"
+
+
+class IngestBatch(models.Model):
+    """
+    Staging row for an asynchronously ingested Edge push
+    Raw payload is stored zlib-compressed and drained by Celery workers
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('PROCESSING', 'Processing'),
+        ('DONE', 'Done'),
+        ('PARTIAL', 'Partially Applied'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company_id = models.UUIDField(null=True, blank=True, db_index=True)
+    store_id = models.UUIDField(db_index=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    payload = models.BinaryField(null=True, blank=True, help_text='zlib-compressed JSON body (cleared once applied)')
+    payload_size = models.PositiveIntegerField(default=0, help_text='Uncompressed size in bytes')
+    record_count = models.PositiveIntegerField(default=0)
+    
+    result = models.JSONField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True, help_text='Last dispatch / busy retry of its task')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'ingest_batch'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='ingest_batch_status_idx'),
+            models.Index(fields=['store_id', 'status'], name='ingest_batch_store_idx'),
+        ]
+    
+    def __str__(self):
+        return f"IngestBatch {self.id} - {self.status}"
@@ -0,0 +1,350 @@
+"""
+Bill Ingest
+Bulk, idempotent ingest of completed bills pushed by Edge Servers
+
+An end-of-day upload carries hundreds of bills, each with nested items,
+payments and promotions. Every bill is validated exactly once, the valid
+ones are flattened into one buffer per table, and each table is written
+with a single bulk_create per batch inside one transaction.
+
+Bills are keyed on (store_id, bill_number), or on the optional client
+idempotency_key. Existing bills are resolved with one set-based lookup:
+
+- same payload as last time (payload_hash) -> acknowledged as duplicate
+- changed payload (e.g. later VOID / REFUND)  -> upserted; the bill row is
+  updated in place and its items / payments / promotions are replaced
+
+Invalid bills are reported per index and never abort the rest of the
+batch. If a batch INSERT hits an IntegrityError (a concurrent push of
+the same bill), that batch is retried bill by bill in savepoints so only
+the offending bills fail - the edge's next retry is then acknowledged.
+
+Every (store, date) written is marked dirty for the sales rollups
+(analytics.rollups) in the same transaction.
+
+Streamed (NDJSON) pushes go through BillStream, which runs ingest_bills
+every TRANSACTION_STREAM_BATCH_SIZE bills so memory is bounded by the
+batch, not the payload. A bill repeated across batches is simply upserted
+by the later batch.
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from analytics.rollups import business_day, mark_dirty
+from transactions.api.serializers import BillIngestSerializer
+from transactions.models import Bill, BillItem, Payment, BillPromotion
+from transactions.services.copy_loader import bulk_load
+
+logger = logging.getLogger(__name__)
+
+
+# Bills per bulk_create round (children follow their bills)
+BILL_BATCH_SIZE = 500
+
+# Rows per INSERT / lookup statement
+ROW_BATCH_SIZE = 1000
+
+# Bill columns rewritten on upsert
+UPSERT_FIELDS = [
+    field.name for field in Bill._meta.concrete_fields
+    if field.name not in ('id', 'synced_at')
+]
+
+
+def payload_hash(validated):
+    """Stable hash of a validated bill (children included)"""
+    encoded = json.dumps(validated, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class _PendingBill:
+    """One validated bill flattened into model instances"""
+
+    __slots__ = ('index', 'bill', 'items', 'payments', 'promotions', 'existing')
+
+    def __init__(self, index, validated):
+        digest = payload_hash(validated)
+        items = validated.pop('items', [])
+        payments = validated.pop('payments', [])
+        promotions = validated.pop('promotions', [])
+
+        self.index = index
+        self.existing = None
+        self.bill = Bill(id=uuid.uuid4(), payload_hash=digest, **validated)
+        bill = self.bill
+
+        self.items = [
+            BillItem(**{
+                'company_id': bill.company_id,
+                'brand_id': bill.brand_id,
+                'store_id': bill.store_id,
+                'created_at': bill.created_at,
+                'created_by': bill.created_by,
+                **item,
+                'id': uuid.uuid4(),
+            })
+            for item in items
+        ]
+        self.payments = [
+            Payment(**{
+                'created_at': bill.created_at,
+                'created_by': bill.created_by,
+                **payment,
+                'id': uuid.uuid4(),
+            })
+            for payment in payments
+        ]
+        self.promotions = [
+            BillPromotion(**{
+                'applied_at': bill.created_at,
+                'applied_by': bill.created_by,
+                **promotion,
+                'id': uuid.uuid4(),
+            })
+            for promotion in promotions
+        ]
+
+    @property
+    def key(self):
+        return (self.bill.store_id, self.bill.bill_number)
+
+    @property
+    def idempotency_key(self):
+        if self.bill.idempotency_key:
+            return (self.bill.store_id, self.bill.idempotency_key)
+        return None
+
+    def adopt(self, existing):
+        """Target an existing bill row (upsert)"""
+        self.existing = existing
+        self.bill.id = existing.id
+        self.bill.synced_at = existing.synced_at
+
+    def children(self):
+        for rows in (self.items, self.payments, self.promotions):
+            for row in rows:
+                row.bill_id = self.bill.id
+        return self.items, self.payments, self.promotions
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _find_existing(pending):
+    """
+    One lookup per chunk for bills already on HO
+
+    Returns:
+        (by (store_id, bill_number), by (store_id, idempotency_key))
+    """
+    by_number, by_key = {}, {}
+    for chunk in _chunks(pending, ROW_BATCH_SIZE):
+        stores = {p.bill.store_id for p in chunk}
+        numbers = {p.bill.bill_number for p in chunk}
+        keys = {p.bill.idempotency_key for p in chunk if p.bill.idempotency_key}
+        condition = Q(store_id__in=stores, bill_number__in=numbers)
+        if keys:
+            condition |= Q(store_id__in=stores, idempotency_key__in=keys)
+        for bill in Bill.objects.filter(condition).only(
+            'id', 'store_id', 'bill_number', 'idempotency_key', 'payload_hash', 'synced_at', 'created_at'
+        ):
+            by_number[(bill.store_id, bill.bill_number)] = bill
+            if bill.idempotency_key:
+                by_key[(bill.store_id, bill.idempotency_key)] = bill
+    return by_number, by_key
+
+
+def _write(inserts, updates):
+    """One statement per table for a batch of new and changed bills"""
+    if updates:
+        bill_ids = [p.bill.id for p in updates]
+        BillItem.objects.filter(bill_id__in=bill_ids).delete()
+        Payment.objects.filter(bill_id__in=bill_ids).delete()
+        BillPromotion.objects.filter(bill_id__in=bill_ids).delete()
+        Bill.objects.bulk_update([p.bill for p in updates], UPSERT_FIELDS, batch_size=ROW_BATCH_SIZE)
+    if inserts:
+        Bill.objects.bulk_create([p.bill for p in inserts], batch_size=ROW_BATCH_SIZE)
+
+    items, payments, promotions = [], [], []
+    for p in inserts + updates:
+        bill_items, bill_payments, bill_promotions = p.children()
+        items.extend(bill_items)
+        payments.extend(bill_payments)
+        promotions.extend(bill_promotions)
+    # Items are the high-volume table - COPY on PostgreSQL
+    bulk_load(BillItem, items)
+    Payment.objects.bulk_create(payments, batch_size=ROW_BATCH_SIZE)
+    BillPromotion.objects.bulk_create(promotions, batch_size=ROW_BATCH_SIZE)
+
+
+def _touched_days(pending):
+    """(store_id, business date) slices a batch of written bills affects"""
+    days = set()
+    for p in pending:
+        days.add((p.bill.store_id, business_day(p.bill.created_at)))
+        if p.existing is not None:
+            # An upsert may move the bill to another day
+            days.add((p.bill.store_id, business_day(p.existing.created_at)))
+        for item in p.items:
+            if item.created_at:
+                days.add((item.store_id, business_day(item.created_at)))
+    return days
+
+
+def ingest_bills(bills_data):
+    """
+    Validate and upsert a batch of bills with their nested rows
+
+    Args:
+        bills_data: List of bill dicts from the edge (items / payments /
+            promotions nested; children inherit bill_id and the bill's
+            company / brand / store / created_* when omitted)
+
+    Returns:
+        Dict with created, updated, duplicates, failed, bill_ids
+        (index-ordered ids of every acknowledged bill), errors (index, errors),
+        rows (rows written per table)
+    """
+    errors = []
+    pending = []
+
+    for index, bill_data in enumerate(bills_data):
+        serializer = BillIngestSerializer(data=bill_data)
+        if not serializer.is_valid():
+            errors.append({'index': index, 'errors': serializer.errors})
+            continue
+        pending.append(_PendingBill(index, dict(serializer.validated_data)))
+
+    # Within the batch the last occurrence of a bill wins (its latest state)
+    latest = {}
+    for p in pending:
+        latest[p.key] = p
+    acknowledged = [(p.index, latest[p.key]) for p in pending]
+    superseded = len(pending) - len(latest)
+    pending = list(latest.values())
+
+    by_number, by_key = _find_existing(pending)
+    writes, duplicates = [], superseded
+    for p in pending:
+        existing = by_number.get(p.key) or (by_key.get(p.idempotency_key) if p.idempotency_key else None)
+        if existing is None:
+            writes.append(p)
+            continue
+        p.adopt(existing)
+        if existing.payload_hash == p.bill.payload_hash:
+            duplicates += 1
+        else:
+            writes.append(p)
+
+    failed = set()
+    with transaction.atomic():
+        for batch in _chunks(writes, BILL_BATCH_SIZE):
+            try:
+                with transaction.atomic():
+                    _write([p for p in batch if p.existing is None], [p for p in batch if p.existing])
+                continue
+            except IntegrityError:
+                logger.warning('Bill ingest: batch write conflicted, retrying bill by bill')
+
+            for p in batch:
+                try:
+                    with transaction.atomic():
+                        _write([p] if p.existing is None else [], [p] if p.existing else [])
+                except IntegrityError as e:
+                    failed.add(p.index)
+                    errors.append({'index': p.index, 'errors': {'non_field_errors': [str(e)]}})
+
+        written = [p for p in writes if p.index not in failed]
+        mark_dirty(_touched_days(written))
+
+    created = sum(1 for p in written if p.existing is None)
+    updated = len(written) - created
+    bill_ids = [str(p.bill.id) for index, p in acknowledged if p.index not in failed]
+
+    errors.sort(key=lambda error: error['index'])
+    logger.info(
+        f"Bill ingest: total={len(bills_data)}, created={created}, updated={updated}, "
+        f"duplicates={duplicates}, failed={len(errors)}"
+    )
+    return {
+        'created': created,
+        'updated': updated,
+        'duplicates': duplicates,
+        'failed': len(errors),
+        'bill_ids': bill_ids,
+        'errors': errors,
+        'rows': {
+            'bills': len(written),
+            'bill_items': sum(len(p.items) for p in written),
+            'payments': sum(len(p.payments) for p in written),
+            'bill_promotions': sum(len(p.promotions) for p in written),
+        },
+    }
+
+
+class BillStream:
+    """
+    Incremental ingest_bills: add() bills one by one, every batch_size
+    bills are written; result() flushes the rest and returns the totals
+    (same shape as ingest_bills, indexes relative to the whole stream)
+    """
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or getattr(settings, 'TRANSACTION_STREAM_BATCH_SIZE', BILL_BATCH_SIZE)
+        self.buffer = []
+        self.offset = 0
+        self.totals = {
+            'created': 0, 'updated': 0, 'duplicates': 0, 'failed': 0,
+            'bill_ids': [], 'errors': [],
+            'rows': {'bills': 0, 'bill_items': 0, 'payments': 0, 'bill_promotions': 0},
+        }
+
+    def add(self, bill_data):
+        self.buffer.append(bill_data)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        result = ingest_bills(self.buffer)
+        for key in ('created', 'updated', 'duplicates', 'failed'):
+            self.totals[key] += result[key]
+        self.totals['bill_ids'].extend(result['bill_ids'])
+        self.totals['errors'].extend(
+            {**error, 'index': error['index'] + self.offset} for error in result['errors']
+        )
+        for table, count in result['rows'].items():
+            self.totals['rows'][table] += count
+        self.offset += len(self.buffer)
+        self.buffer = []
+
+    @property
+    def count(self):
+        return self.offset + len(self.buffer)
+
+    def result(self):
+        self.flush()
+        return self.totals
+
+
+def ingest_bill_stream(bills, batch_size=None):
+    """
+    ingest_bills over an iterable of bills, written batch_size at a time
+
+    Returns:
+        Same dict as ingest_bills
+    """
+    stream = BillStream(batch_size)
+    for bill_data in bills:
+        stream.add(bill_data)
+    return stream.result()
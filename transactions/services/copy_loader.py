@@ -0,0 +1,131 @@
+"""
+COPY Loader
+PostgreSQL fast path for high-volume append-only pushes
+
+Recipe-based stock deductions turn every sale into several
+InventoryMovement rows, and bill items arrive in the same volumes.
+On PostgreSQL, bulk_load() streams model instances into a temporary
+staging table with COPY FROM STDIN (psycopg2 copy_expert) and moves them
+into the real table with one INSERT ... SELECT:
+
+- COPY skips per-row statement parsing / parameter binding
+- the INSERT into the target still runs every constraint and index (and
+  routes rows to their monthly partition), and ON CONFLICT DO NOTHING
+  makes a replayed load harmless
+
+Other backends (SQLite in dev) and small batches use ORM bulk_create.
+"""
+
+import io
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import connections, models, transaction
+
+logger = logging.getLogger(__name__)
+
+# Rows per ORM INSERT statement on the fallback path
+ORM_BATCH_SIZE = 1000
+
+
+def copy_supported(using='default'):
+    """True if the connection can take the COPY fast path"""
+    if not getattr(settings, 'TRANSACTION_COPY_ENABLED', True):
+        return False
+    return connections[using].vendor == 'postgresql'
+
+
+def _escape(text):
+    # COPY text format: backslash, tab, newline and CR must be escaped
+    return (
+        text.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _copy_value(field, obj):
+    value = field.get_prep_value(field.pre_save(obj, add=True))
+    if value is None:
+        return '\\N'
+    if isinstance(field, models.JSONField):
+        return _escape(json.dumps(value, cls=field.encoder))
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return _escape(str(value))
+
+
+def _copy_buffer(fields, instances):
+    buffer = io.StringIO()
+    for obj in instances:
+        buffer.write('\t'.join(_copy_value(field, obj) for field in fields))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def copy_rows(model, instances, using='default'):
+    """
+    Load instances through a COPY-filled staging table (PostgreSQL only)
+
+    Returns:
+        Number of rows inserted into the target table
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    fields = model._meta.concrete_fields
+    columns = ', '.join(quote(field.column) for field in fields)
+    stage = quote(f'_copy_{table}_{uuid.uuid4().hex[:8]}')
+
+    for obj in instances:
+        if obj.pk is None:
+            obj.pk = model._meta.pk.get_default()
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {stage} (LIKE {quote(table)} INCLUDING DEFAULTS) ON COMMIT DROP'
+        )
+        cursor.copy_expert(
+            f'COPY {stage} ({columns}) FROM STDIN',
+            _copy_buffer(fields, instances)
+        )
+        cursor.execute(
+            # No conflict target: on partitioned tables the pk is (id, <partition column>)
+            f'INSERT INTO {quote(table)} ({columns}) SELECT {columns} FROM {stage} '
+            f'ON CONFLICT DO NOTHING'
+        )
+        inserted = cursor.rowcount
+        cursor.execute(f'DROP TABLE {stage}')
+
+    for obj in instances:
+        obj._state.adding = False
+        obj._state.db = using
+    return inserted
+
+
+def bulk_load(model, instances, using='default'):
+    """
+    Insert instances with COPY on PostgreSQL, ORM bulk_create elsewhere
+
+    Batches below TRANSACTION_COPY_MIN_ROWS use bulk_create too - the
+    staging table costs more than it saves for a handful of rows.
+
+    Returns:
+        Number of rows inserted
+    """
+    instances = list(instances)
+    if not instances:
+        return 0
+
+    if copy_supported(using) and len(instances) >= getattr(settings, 'TRANSACTION_COPY_MIN_ROWS', 200):
+        inserted = copy_rows(model, instances, using=using)
+        logger.debug(f"COPY loaded {inserted}/{len(instances)} rows into {model._meta.db_table}")
+        return inserted
+
+    return len(model.objects.using(using).bulk_create(instances, batch_size=ORM_BATCH_SIZE))
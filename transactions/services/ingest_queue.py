@@ -0,0 +1,427 @@
+"""
+Ingest Queue
+Asynchronous (queued) mode for Edge transaction pushes
+
+At end of day every store pushes at once. Instead of validating and
+writing inside the gunicorn request, the async endpoint stores the raw
+body zlib-compressed in an IngestBatch staging row, answers 202 with the
+batch id, and a Celery task applies it later with the same code path as
+the synchronous bulk_push.
+
+- Bounded concurrency per store: a worker must hold one of
+  TRANSACTION_INGEST_STORE_CONCURRENCY cache slots for the batch's store;
+  otherwise the task is retried BUSY_MAX_RETRIES times, then gives up and
+  leaves the batch to the drain. The slot holds the batch id and its lease
+  is renewed while the batch runs.
+- Back-pressure: once QUEUED + PROCESSING batches reach
+  TRANSACTION_INGEST_MAX_QUEUE_DEPTH, new pushes get 429 + Retry-After.
+- Lost messages / dead workers: drain_ingest_batches_task (beat) requeues
+  PROCESSING batches whose slot has expired (the worker died) and
+  re-dispatches QUEUED batches whose task has not run for
+  DISPATCH_STALE_SECONDS (dispatched_at is set on dispatch and on every
+  busy retry).
+"""
+
+import json
+import logging
+import tempfile
+import time
+import uuid
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import status
+
+from sync_api.ingest_metrics import QueryTimer, record_push
+from transactions.api.serializers import BulkTransactionSerializer
+from transactions.models import IngestBatch
+from transactions.services.bill_ingest import BillStream, ingest_bills
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = ('QUEUED', 'PROCESSING')
+SLOT_PREFIX = 'ingest_store_slot'
+
+# process_ingest_batch_task retries a batch of a busy store this often,
+# this many times
+BUSY_RETRY_SECONDS = 5
+BUSY_MAX_RETRIES = 12
+
+# A QUEUED batch whose task has not run for this long has lost its task
+DISPATCH_STALE_SECONDS = 120
+
+# Record lists accepted in a bulk push body ('movements': inventory push_bulk)
+RECORD_KEYS = (
+    'bills', 'cash_drops', 'store_sessions', 'cashier_shifts',
+    'kitchen_orders', 'bill_refunds', 'inventory_movements', 'movements',
+)
+
+
+def apply_bulk_push(data):
+    """
+    Apply a bulk push body (bills + other transaction types)
+
+    Bills go through the bulk ingest pipeline (validated once, per-bill
+    errors); the other record types are validated as a whole.
+
+    Returns:
+        (HTTP status code, response body)
+    """
+    data = dict(data)
+    bills_data = data.pop('bills', [])
+    if not isinstance(bills_data, list):
+        return status.HTTP_400_BAD_REQUEST, {'bills': ['Expected a list of bills.']}
+
+    serializer = BulkTransactionSerializer(data=data)
+    if not serializer.is_valid():
+        return status.HTTP_400_BAD_REQUEST, serializer.errors
+
+    with transaction.atomic():
+        created_counts = serializer.save()
+        bill_result = ingest_bills(bills_data)
+    rows = {**created_counts, **bill_result['rows']}
+    if bills_data:
+        created_counts['bills'] = bill_result['created']
+
+    if bill_result['errors']:
+        return status.HTTP_207_MULTI_STATUS, {
+            'success': False,
+            'created': created_counts,
+            'rows': rows,
+            'bill_errors': bill_result['errors'],
+            'message': 'Bulk transaction push completed with bill errors'
+        }
+    return status.HTTP_201_CREATED, {
+        'success': True,
+        'created': created_counts,
+        'rows': rows,
+        'message': 'Bulk transaction push successful'
+    }
+
+
+def apply_bulk_push_stream(records, batch_size=None):
+    """
+    Apply a streamed (NDJSON) bulk push
+
+    Every record is an envelope {"<record type>": {...}} with the same keys
+    as the JSON body. The body is first read into a spool file (memory
+    up to TRANSACTION_STREAM_SPOOL_BYTES, disk beyond), so a slow upload
+    holds no transaction, locks or pooled connection while it arrives.
+    Records are then buffered per type and written every batch_size
+    records, so memory is bounded by the batch size. As with
+    apply_bulk_push, everything is written in one transaction: an invalid
+    non-bill record rolls the whole push back (400), invalid bills are
+    reported per index (207).
+
+    Returns:
+        (HTTP status code, response body)
+    """
+    batch_size = batch_size or getattr(settings, 'TRANSACTION_STREAM_BATCH_SIZE', 500)
+    record_types = set(BulkTransactionSerializer().fields)
+    spool, error = _spool_records(records, record_types)
+    if error:
+        return status.HTTP_400_BAD_REQUEST, error
+    with spool:
+        return _apply_spooled_records(spool, record_types, batch_size)
+
+
+def _spool_records(records, record_types):
+    """
+    Read a record stream to the end, checking the envelopes
+
+    Returns:
+        (spool file positioned at the start, None) or (None, error body)
+    """
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=getattr(settings, 'TRANSACTION_STREAM_SPOOL_BYTES', 8 * 1024 * 1024)
+    )
+    try:
+        for line, record in enumerate(records, start=1):
+            if len(record) != 1:
+                spool.close()
+                return None, {'line': line, 'error': 'Expected one {"<record type>": {...}} object per line.'}
+            key = next(iter(record))
+            if key != 'bills' and key not in record_types:
+                spool.close()
+                return None, {'line': line, 'error': f'Unknown record type: {key}'}
+            spool.write(json.dumps(record, cls=DjangoJSONEncoder, separators=(',', ':')).encode() + b'\n')
+    except BaseException:
+        # e.g. ParseError on a malformed line
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, None
+
+
+def _apply_spooled_records(spool, record_types, batch_size):
+    bills = BillStream(batch_size)
+    buffers = {key: [] for key in record_types}
+    created_counts = {key: 0 for key in record_types}
+    seen = {key: 0 for key in record_types}
+
+    def flush(key):
+        serializer = BulkTransactionSerializer(data={key: buffers[key]})
+        if not serializer.is_valid():
+            # Report positions within the whole stream for this record type
+            errors = serializer.errors[key]
+            offset = seen[key] - len(buffers[key])
+            return {key: {offset + index: error for index, error in enumerate(errors) if error}}
+        created_counts[key] += serializer.save()[key]
+        buffers[key] = []
+        return None
+
+    with transaction.atomic():
+        for raw in spool:
+            key, value = next(iter(json.loads(raw).items()))
+            if key == 'bills':
+                bills.add(value)
+                continue
+            buffers[key].append(value)
+            seen[key] += 1
+            if len(buffers[key]) >= batch_size:
+                errors = flush(key)
+                if errors:
+                    transaction.set_rollback(True)
+                    return status.HTTP_400_BAD_REQUEST, errors
+
+        for key in record_types:
+            errors = flush(key) if buffers[key] else None
+            if errors:
+                transaction.set_rollback(True)
+                return status.HTTP_400_BAD_REQUEST, errors
+        bill_result = bills.result()
+
+    rows = {**created_counts, **bill_result['rows']}
+    if bills.count:
+        created_counts['bills'] = bill_result['created']
+
+    if bill_result['errors']:
+        return status.HTTP_207_MULTI_STATUS, {
+            'success': False,
+            'created': created_counts,
+            'rows': rows,
+            'bill_errors': bill_result['errors'],
+            'message': 'Bulk transaction push completed with bill errors'
+        }
+    return status.HTTP_201_CREATED, {
+        'success': True,
+        'created': created_counts,
+        'rows': rows,
+        'message': 'Bulk transaction push successful'
+    }
+
+
+def queue_depth():
+    """Batches waiting for or being processed by a worker"""
+    return IngestBatch.objects.filter(status__in=PENDING_STATUSES).count()
+
+
+def is_saturated():
+    return queue_depth() >= getattr(settings, 'TRANSACTION_INGEST_MAX_QUEUE_DEPTH', 500)
+
+
+def as_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def resolve_store_id(data):
+    """store_id of a push body: top-level, else the first record carrying one"""
+    store_id = as_uuid(data.get('store_id'))
+    if store_id:
+        return store_id
+    for key in RECORD_KEYS:
+        records = data.get(key)
+        if isinstance(records, list):
+            for record in records:
+                if isinstance(record, dict) and record.get('store_id'):
+                    return as_uuid(record['store_id'])
+    return None
+
+
+def _dispatch(batch_id):
+    from config.tasks import process_ingest_batch_task
+    try:
+        process_ingest_batch_task.delay(str(batch_id))
+    except Exception as e:
+        # Broker down - drain_ingest_batches_task picks the batch up later
+        logger.warning(f"Could not dispatch ingest batch {batch_id}: {e}")
+        return
+    IngestBatch.objects.filter(id=batch_id, status='QUEUED').update(dispatched_at=timezone.now())
+
+
+def enqueue_batch(data, store_id):
+    """
+    Persist a push body as a QUEUED batch and dispatch it after commit
+
+    Returns:
+        IngestBatch
+    """
+    raw = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    batch = IngestBatch.objects.create(
+        company_id=as_uuid(data.get('company_id')),
+        store_id=store_id,
+        payload=zlib.compress(raw, 6),
+        payload_size=len(raw),
+        record_count=sum(len(data[key]) for key in RECORD_KEYS if isinstance(data.get(key), list)),
+    )
+    transaction.on_commit(lambda: _dispatch(batch.id))
+    return batch
+
+
+def _slot_keys(store_id):
+    return [
+        f'{SLOT_PREFIX}:{store_id}:{slot}'
+        for slot in range(getattr(settings, 'TRANSACTION_INGEST_STORE_CONCURRENCY', 1))
+    ]
+
+
+def _acquire_store_slot(store_id, batch_id):
+    lease = getattr(settings, 'TRANSACTION_INGEST_LEASE_SECONDS', 600)
+    for key in _slot_keys(store_id):
+        if cache.add(key, str(batch_id), lease):
+            return key
+    return None
+
+
+def _holds_slot(store_id, batch_id):
+    """True while a worker applying batch_id holds a slot of its store"""
+    return str(batch_id) in cache.get_many(_slot_keys(store_id)).values()
+
+
+class SlotHeartbeat:
+    """connection.execute_wrapper hook renewing the store slot lease while a batch runs"""
+
+    def __init__(self, key):
+        self.key = key
+        self.lease = getattr(settings, 'TRANSACTION_INGEST_LEASE_SECONDS', 600)
+        self.last_beat = time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        now = time.monotonic()
+        if now - self.last_beat >= self.lease / 4:
+            cache.touch(self.key, self.lease)
+            self.last_beat = now
+        return execute(sql, params, many, context)
+
+
+def _finish_batch(batch, status_code, body):
+    batch.status = {
+        status.HTTP_201_CREATED: 'DONE',
+        status.HTTP_207_MULTI_STATUS: 'PARTIAL',
+    }.get(status_code, 'FAILED')
+    batch.result = json.loads(json.dumps(body, cls=DjangoJSONEncoder))
+    batch.finished_at = timezone.now()
+    update_fields = ['status', 'result', 'finished_at']
+    if batch.status == 'DONE':
+        # Keep raw payloads only where someone may need to inspect them
+        batch.payload = None
+        update_fields.append('payload')
+    batch.save(update_fields=update_fields)
+
+
+def process_batch(batch_id):
+    """
+    Apply one queued batch
+
+    Returns:
+        Final batch status, 'BUSY' when the store has no free slot (retry
+        later) or None when the batch is gone / already claimed
+    """
+    batch = IngestBatch.objects.filter(id=batch_id).only('id', 'store_id', 'status').first()
+    if batch is None or batch.status != 'QUEUED':
+        return None
+
+    slot = _acquire_store_slot(batch.store_id, batch_id)
+    if slot is None:
+        # The task is alive - keep the drain from dispatching another one
+        IngestBatch.objects.filter(id=batch_id, status='QUEUED').update(dispatched_at=timezone.now())
+        return 'BUSY'
+
+    try:
+        claimed = IngestBatch.objects.filter(id=batch_id, status='QUEUED').update(
+            status='PROCESSING', started_at=timezone.now(), attempts=F('attempts') + 1
+        )
+        if not claimed:
+            return None
+
+        batch = IngestBatch.objects.get(id=batch_id)
+        timer = QueryTimer()
+        started = time.perf_counter()
+        try:
+            # The rows and the batch outcome commit together: a worker dying
+            # in between leaves nothing applied, so a requeue can't double
+            # cash drops / sessions / shifts
+            with transaction.atomic():
+                with connection.execute_wrapper(timer), connection.execute_wrapper(SlotHeartbeat(slot)):
+                    data = json.loads(zlib.decompress(bytes(batch.payload)))
+                    status_code, body = apply_bulk_push(data)
+                _finish_batch(batch, status_code, body)
+        except Exception as e:
+            logger.exception(f"Ingest batch {batch_id} failed")
+            status_code, body = None, {'error': str(e)}
+            _finish_batch(batch, status_code, body)
+        elapsed = time.perf_counter() - started
+
+        # The 202 request was recorded without rows; count them now
+        record_push(
+            batch.store_id,
+            rows=body.get('rows'),
+            failed=batch.status == 'FAILED',
+            validation_failures=len(body.get('bill_errors', [])) + int(status_code == status.HTTP_400_BAD_REQUEST),
+            db_seconds=timer.seconds,
+            serialize_seconds=max(elapsed - timer.seconds, 0.0),
+            company_id=batch.company_id,
+            count_request=False,
+        )
+        logger.info(f"Ingest batch {batch_id}: {batch.status} ({batch.record_count} records)")
+        return batch.status
+    finally:
+        # An expired slot may have been taken by another batch since
+        if cache.get(slot) == str(batch_id):
+            cache.delete(slot)
+
+
+def requeue_stale_batches(limit=500):
+    """
+    Recover batches from dead workers and lost task messages
+
+    A PROCESSING batch is requeued only once its store slot is gone: a
+    running batch renews the slot lease, so an expired slot means the
+    worker died (cash drops, sessions and shifts must not be applied twice).
+
+    Returns:
+        Number of batches dispatched
+    """
+    now = timezone.now()
+    lease = getattr(settings, 'TRANSACTION_INGEST_LEASE_SECONDS', 600)
+    stuck = IngestBatch.objects.filter(
+        status='PROCESSING', started_at__lt=now - timedelta(seconds=lease)
+    ).values_list('id', 'store_id')
+    dead = [batch_id for batch_id, store_id in stuck if not _holds_slot(store_id, batch_id)]
+    if dead:
+        requeued = IngestBatch.objects.filter(id__in=dead, status='PROCESSING').update(
+            status='QUEUED', dispatched_at=None
+        )
+        logger.warning(f"Requeued {requeued} stuck ingest batches")
+
+    # Fresh batches are still being dispatched; the others have a live task
+    # while dispatched_at keeps moving
+    lost = (
+        Q(dispatched_at__isnull=True, created_at__lt=now - timedelta(seconds=60))
+        | Q(dispatched_at__lt=now - timedelta(seconds=DISPATCH_STALE_SECONDS))
+    )
+    batch_ids = list(IngestBatch.objects.filter(lost, status='QUEUED').order_by('created_at').values_list(
+        'id', flat=True
+    )[:limit])
+    for batch_id in batch_ids:
+        _dispatch(batch_id)
+    return len(batch_ids)
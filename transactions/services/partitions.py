@@ -0,0 +1,219 @@
+"""
+Partitions
+Monthly range partitioning of the append-only transaction tables (PostgreSQL)
+
+bill_item, payment, bill_promotion and inventory_movement grow forever and
+are read almost exclusively by date range. Migration 0004 converts them to
+declarative RANGE partitions on their timestamp column (its DDL lives in
+the migration itself):
+
+    bill_item            -> bill_item_p202601, bill_item_p202602, ..., bill_item_default
+
+- the primary key becomes (id, <partition column>) - PostgreSQL requires the
+  partition key in every unique constraint; ids stay UUID4 so Django's
+  single-column pk is still unique in practice
+- partitions are UTC calendar months; ensure_partitions() creates upcoming
+  months ahead of time (Celery beat), rows outside every monthly partition
+  land in <table>_default and are moved out when their month is created
+- archive_partitions() detaches old months and moves them to the
+  ARCHIVE_SCHEMA schema (or drops them)
+
+bill itself stays a plain table: its (store_id, bill_number) idempotency
+key can't be enforced globally on a table partitioned by date.
+
+Report queries must filter the raw partition column with a range
+(date_range_filter) - created_at__date lookups wrap the column in a
+timezone cast and defeat partition pruning.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# table -> partition column
+PARTITIONED_TABLES = {
+    'bill_item': 'created_at',
+    'payment': 'created_at',
+    'bill_promotion': 'applied_at',
+    'inventory_movement': 'created_at',
+}
+
+ARCHIVE_SCHEMA = 'archive'
+
+
+def partitioning_supported():
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def date_range_filter(field, start_date, end_date):
+    """
+    Inclusive date range as raw timestamp bounds (partition-prunable)
+
+    Args:
+        field: Timestamp field name, e.g. 'created_at'
+        start_date / end_date: date or 'YYYY-MM-DD'
+
+    Returns:
+        Filter kwargs {field__gte: <aware start>, field__lt: <aware day after end>}
+    """
+    if isinstance(start_date, str):
+        start_date = date.fromisoformat(start_date)
+    if isinstance(end_date, str):
+        end_date = date.fromisoformat(end_date)
+    tz = timezone.get_current_timezone()
+    return {
+        f'{field}__gte': timezone.make_aware(datetime.combine(start_date, time.min), tz),
+        f'{field}__lt': timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz),
+    }
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace",
+        [table]
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """
+    Monthly partitions of a table
+
+    Returns:
+        Sorted list of (month, partition name); the default partition is excluded
+    """
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s AND p.relnamespace = 'public'::regnamespace",
+        [table]
+    )
+    prefix = f'{table}_p'
+    partitions = []
+    for (name,) in cursor.fetchall():
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions.append((date(int(suffix[:4]), int(suffix[4:]), 1), name))
+    return sorted(partitions)
+
+
+def _create_month(cursor, table, month):
+    """
+    Create one monthly partition
+
+    PostgreSQL refuses a new partition while the default partition holds
+    rows of its range (late or future-dated rows that arrived before the
+    month existed). Those rows are moved: the default partition is
+    detached, the month created, the rows moved into it through the parent
+    and the default re-attached. Callers run this inside a transaction.
+    """
+    quote = connection.ops.quote_name
+    column = quote(PARTITIONED_TABLES[table])
+    default = quote(f'{table}_default')
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    create = (
+        f"CREATE TABLE IF NOT EXISTS {quote(partition_name(table, month))} "
+        f"PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)"
+    )
+
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= %s AND {column} < %s)", bounds
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(create, bounds)
+        return
+
+    cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {default}")
+    cursor.execute(create, bounds)
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {default} WHERE {column} >= %s AND {column} < %s RETURNING *) "
+        f"INSERT INTO {quote(table)} SELECT * FROM moved",
+        bounds
+    )
+    cursor.execute(f"ALTER TABLE {quote(table)} ATTACH PARTITION {default} DEFAULT")
+    logger.info(f"Moved {table} rows of {month:%Y-%m} out of the default partition")
+
+
+def ensure_partitions(months_ahead=3):
+    """
+    Create monthly partitions from the current month up to months_ahead
+
+    Returns:
+        List of partition names that were missing
+    """
+    if not partitioning_supported():
+        return []
+
+    created = []
+    current = month_start(timezone.now())
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            existing = {month for month, _ in list_partitions(cursor, table)}
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if month not in existing:
+                    _create_month(cursor, table, month)
+                    created.append(partition_name(table, month))
+    if created:
+        logger.info(f"Created partitions: {', '.join(created)}")
+    return created
+
+
+def archive_partitions(older_than_months, drop=False, dry_run=False):
+    """
+    Detach monthly partitions that ended more than older_than_months ago
+
+    Detached partitions move to the ARCHIVE_SCHEMA schema (queryable,
+    dumpable with pg_dump -n archive) or are dropped.
+
+    Returns:
+        List of affected partition names
+    """
+    if not partitioning_supported():
+        return []
+
+    quote = connection.ops.quote_name
+    cutoff = add_months(month_start(timezone.now()), -older_than_months)
+    affected = []
+    with connection.cursor() as cursor:
+        if not drop and not dry_run:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {quote(ARCHIVE_SCHEMA)}")
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            for month, name in list_partitions(cursor, table):
+                if month >= cutoff:
+                    continue
+                affected.append(name)
+                if dry_run:
+                    continue
+                cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+                if drop:
+                    cursor.execute(f"DROP TABLE {quote(name)}")
+                else:
+                    cursor.execute(f"ALTER TABLE {quote(name)} SET SCHEMA {quote(ARCHIVE_SCHEMA)}")
+    if affected and not dry_run:
+        logger.info(f"{'Dropped' if drop else 'Archived'} partitions: {', '.join(affected)}")
+    return affected
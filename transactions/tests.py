@@ -1,3 +1,588 @@
-from django.test import TestCase
+"""
+Tests for the bulk, idempotent bill ingest pipeline (push_bulk / bulk-push)
+the async queued ingest mode (bulk-push/async), the COPY loader and partitions
+"""
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import User
+from transactions.api.parsers import RecordStream
+from transactions.models import Bill, BillItem, Payment, BillPromotion, CashDrop, IngestBatch, InventoryMovement
+from transactions.services.copy_loader import _copy_buffer, bulk_load
+from transactions.services.partitions import (
+    add_months, date_range_filter, ensure_partitions, month_start, partition_name
+)
+from transactions.services.ingest_queue import (
+    DISPATCH_STALE_SECONDS, apply_bulk_push_stream, process_batch, requeue_stale_batches
+)
+from sync_api.models import SyncHealth
+
+
+PUSH_BULK_URL = '/api/v1/transactions/bills/push_bulk/'
+BULK_PUSH_URL = '/api/v1/transactions/bulk-push/'
+ASYNC_PUSH_URL = '/api/v1/transactions/bulk-push/async/'
+INVENTORY_PUSH_URL = '/api/v1/transactions/inventory/push_bulk/'
+
+
+class BillPayloadMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='billuser', password='testpass123')
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.company_id = str(uuid.uuid4())
+        self.brand_id = str(uuid.uuid4())
+        self.store_id = str(uuid.uuid4())
+        self.cashier_id = str(uuid.uuid4())
+
+    def _bill(self, number, items=2):
+        return {
+            'company_id': self.company_id,
+            'brand_id': self.brand_id,
+            'store_id': self.store_id,
+            'terminal_id': str(uuid.uuid4()),
+            'bill_number': number,
+            'bill_type': 'DINE_IN',
+            'status': 'PAID',
+            'subtotal': '50000.00',
+            'total': '50000.00',
+            'created_by': self.cashier_id,
+            'created_at': '2026-01-27T10:00:00Z',
+            'items': [
+                {
+                    'product_id': str(uuid.uuid4()),
+                    'product_sku': f'SKU-{i}',
+                    'product_name': f'Product {i}',
+                    'quantity': '1.00',
+                    'unit_price': '25000.00',
+                    'total': '25000.00',
+                }
+                for i in range(items)
+            ],
+            'payments': [
+                {'payment_method': 'CASH', 'amount': '50000.00', 'status': 'SUCCESS'}
+            ],
+            'promotions': [
+                {
+                    'promotion_id': str(uuid.uuid4()),
+                    'promotion_name': 'Promo',
+                    'execution_stage': 'ITEM_LEVEL',
+                    'discount_amount': '0.00',
+                }
+            ],
+        }
+
+    def _movement(self, **overrides):
+        return {
+            'company_id': self.company_id,
+            'brand_id': self.brand_id,
+            'store_id': self.store_id,
+            'inventory_item_id': str(uuid.uuid4()),
+            'movement_type': 'SALE',
+            'quantity': '-0.25',
+            'unit': 'kg',
+            'created_at': '2026-01-27T10:00:00Z',
+            'created_by': self.cashier_id,
+            **overrides,
+        }
+
+
+class BillIngestTests(BillPayloadMixin, TestCase):
+
+    def test_push_bulk_creates_nested_rows(self):
+        response = self.api.post(PUSH_BULK_URL, {'bills': [self._bill('B-1'), self._bill('B-2')]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertTrue(response.data['success'])
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(len(response.data['bill_ids']), 2)
+
+        bill = Bill.objects.get(bill_number='B-1')
+        items = BillItem.objects.filter(bill_id=bill.id)
+        self.assertEqual(items.count(), 2)
+        # Children inherit denormalized fields from the bill
+        self.assertEqual(str(items[0].store_id), self.store_id)
+        self.assertEqual(str(items[0].created_by), self.cashier_id)
+        self.assertEqual(Payment.objects.filter(bill_id=bill.id).count(), 1)
+        self.assertEqual(BillPromotion.objects.filter(bill_id=bill.id).count(), 1)
+
+    def test_invalid_bills_reported_without_aborting(self):
+        bad = self._bill('B-BAD')
+        del bad['terminal_id']
+
+        bills = [self._bill('B-1'), bad, self._bill('B-2')]
+        response = self.api.post(PUSH_BULK_URL, {'bills': bills}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertIn('terminal_id', response.data['errors'][0]['errors'])
+        self.assertTrue(Bill.objects.filter(bill_number='B-2').exists())
+
+    def test_retry_is_acknowledged_as_duplicate(self):
+        bills = [self._bill('B-1'), self._bill('B-2')]
+        first = self.api.post(PUSH_BULK_URL, {'bills': bills}, format='json')
+
+        retry = self.api.post(PUSH_BULK_URL, {'bills': bills}, format='json')
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED, retry.data)
+        self.assertEqual(retry.data['created'], 0)
+        self.assertEqual(retry.data['duplicates'], 2)
+        self.assertEqual(retry.data['bill_ids'], first.data['bill_ids'])
+        self.assertEqual(Bill.objects.count(), 2)
+        self.assertEqual(BillItem.objects.count(), 4)
+
+    def test_changed_bill_is_upserted(self):
+        bill = self._bill('B-1')
+        first = self.api.post(PUSH_BULK_URL, {'bills': [bill]}, format='json')
+
+        bill['status'] = 'VOID'
+        bill['voided_reason'] = 'Customer left'
+        bill['items'] = bill['items'][:1]
+        response = self.api.post(PUSH_BULK_URL, {'bills': [bill]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['bill_ids'], first.data['bill_ids'])
+        stored = Bill.objects.get(bill_number='B-1')
+        self.assertEqual(stored.status, 'VOID')
+        self.assertEqual(BillItem.objects.filter(bill_id=stored.id).count(), 1)
+        self.assertEqual(Payment.objects.filter(bill_id=stored.id).count(), 1)
+
+    def test_bill_number_unique_per_store(self):
+        other_store = self._bill('B-1')
+        other_store['store_id'] = str(uuid.uuid4())
+        response = self.api.post(PUSH_BULK_URL, {'bills': [self._bill('B-1'), other_store]}, format='json')
+
+        self.assertEqual(response.data['created'], 2)
+
+    def test_idempotency_key_matches_renumbered_bill(self):
+        bill = self._bill('B-TEMP')
+        bill['idempotency_key'] = 'edge-1:42'
+        self.api.post(PUSH_BULK_URL, {'bills': [bill]}, format='json')
+
+        bill['bill_number'] = 'B-42'
+        response = self.api.post(PUSH_BULK_URL, {'bills': [bill]}, format='json')
+
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(list(Bill.objects.values_list('bill_number', flat=True)), ['B-42'])
+
+    def test_last_occurrence_in_batch_wins(self):
+        paid = self._bill('B-1')
+        voided = dict(paid, status='VOID')
+        response = self.api.post(PUSH_BULK_URL, {'bills': [paid, voided]}, format='json')
+
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['duplicates'], 1)
+        self.assertEqual(len(set(response.data['bill_ids'])), 1)
+        self.assertEqual(Bill.objects.get(bill_number='B-1').status, 'VOID')
+
+    def test_query_count_independent_of_bill_count(self):
+        bills = [self._bill(f'B-{i}', items=3) for i in range(50)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.post(PUSH_BULK_URL, {'bills': bills}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(BillItem.objects.count(), 150)
+        # Lookup + one INSERT per table, savepoints and the metrics row - not per bill
+        self.assertLess(len(ctx.captured_queries), 25)
+
+    def test_bulk_push_routes_bills_through_ingest(self):
+        bad = self._bill('B-BAD')
+        bad['bill_type'] = 'unknown'
+        response = self.api.post(
+            BULK_PUSH_URL,
+            {'bills': [self._bill('B-1'), bad]},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created']['bills'], 1)
+        self.assertEqual(response.data['bill_errors'][0]['index'], 1)
+        self.assertTrue(Bill.objects.filter(bill_number='B-1').exists())
+
+    def test_single_push_is_idempotent(self):
+        bill = self._bill('B-1')
+        first = self.api.post('/api/v1/transactions/bills/push/', bill, format='json')
+        retry = self.api.post('/api/v1/transactions/bills/push/', bill, format='json')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED, first.data)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data['bill_id'], first.data['bill_id'])
+
+
+class AsyncIngestTests(BillPayloadMixin, TestCase):
+
+    def _payload(self, *numbers):
+        return {'bills': [self._bill(number) for number in numbers]}
+
+    def test_async_push_queues_and_worker_applies(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.api.post(ASYNC_PUSH_URL, self._payload('A-1', 'A-2'), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+        self.assertEqual(len(callbacks), 1)
+        batch = IngestBatch.objects.get(id=response.data['batch_id'])
+        self.assertEqual(batch.status, 'QUEUED')
+        self.assertEqual(str(batch.store_id), self.store_id)
+        self.assertEqual(batch.record_count, 2)
+        self.assertFalse(Bill.objects.exists())
+
+        self.assertEqual(process_batch(batch.id), 'DONE')
+
+        self.assertEqual(Bill.objects.count(), 2)
+        status_response = self.api.get(response['Location'])
+        self.assertEqual(status_response.data['status'], 'DONE')
+        self.assertEqual(status_response.data['result']['created']['bills'], 2)
+        # Already applied - a duplicate task message is a no-op
+        self.assertIsNone(process_batch(batch.id))
+
+    def test_partial_batch_reports_bill_errors(self):
+        payload = self._payload('A-1', 'A-2')
+        del payload['bills'][1]['terminal_id']
+        response = self.api.post(ASYNC_PUSH_URL, payload, format='json')
+
+        self.assertEqual(process_batch(response.data['batch_id']), 'PARTIAL')
+        batch = IngestBatch.objects.get(id=response.data['batch_id'])
+        self.assertEqual(batch.result['bill_errors'][0]['index'], 1)
+
+    def test_store_concurrency_is_bounded(self):
+        first = self.api.post(ASYNC_PUSH_URL, self._payload('A-1'), format='json')
+        cache.add(f'ingest_store_slot:{self.store_id}:0', 1, 60)
+
+        self.assertEqual(process_batch(first.data['batch_id']), 'BUSY')
+        self.assertEqual(IngestBatch.objects.get(id=first.data['batch_id']).status, 'QUEUED')
+
+    @override_settings(TRANSACTION_INGEST_MAX_QUEUE_DEPTH=1, TRANSACTION_INGEST_RETRY_AFTER=45)
+    def test_back_pressure_when_queue_full(self):
+        self.api.post(ASYNC_PUSH_URL, self._payload('A-1'), format='json')
+
+        response = self.api.post(ASYNC_PUSH_URL, self._payload('A-2'), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '45')
+        self.assertEqual(IngestBatch.objects.count(), 1)
+
+    def test_store_id_required(self):
+        response = self.api.post(ASYNC_PUSH_URL, {'bills': []}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_busy_retry_keeps_batch_from_redispatch(self):
+        response = self.api.post(ASYNC_PUSH_URL, self._payload('A-1'), format='json')
+        batch_id = response.data['batch_id']
+        old = timezone.now() - timedelta(seconds=DISPATCH_STALE_SECONDS + 60)
+        IngestBatch.objects.filter(id=batch_id).update(created_at=old, dispatched_at=old)
+        cache.add(f'ingest_store_slot:{self.store_id}:0', 'other-batch', 60)
+
+        self.assertEqual(process_batch(batch_id), 'BUSY')
+        self.assertEqual(requeue_stale_batches(), 0)
+
+        # Retries exhausted: dispatched_at stops moving and the drain takes over
+        IngestBatch.objects.filter(id=batch_id).update(dispatched_at=old)
+        self.assertEqual(requeue_stale_batches(), 1)
+        self.assertGreater(IngestBatch.objects.get(id=batch_id).dispatched_at, old)
+
+    def test_running_batch_is_not_requeued(self):
+        response = self.api.post(ASYNC_PUSH_URL, self._payload('A-1'), format='json')
+        batch_id = response.data['batch_id']
+        IngestBatch.objects.filter(id=batch_id).update(
+            status='PROCESSING', started_at=timezone.now() - timedelta(hours=1)
+        )
+        slot = f'ingest_store_slot:{self.store_id}:0'
+        cache.add(slot, batch_id, 60)
+
+        requeue_stale_batches()
+        self.assertEqual(IngestBatch.objects.get(id=batch_id).status, 'PROCESSING')
+
+        # Slot lease expired - the worker is gone
+        cache.delete(slot)
+        requeue_stale_batches()
+        self.assertEqual(IngestBatch.objects.get(id=batch_id).status, 'QUEUED')
+
+    def test_status_is_scoped_to_store(self):
+        response = self.api.post(ASYNC_PUSH_URL, self._payload('A-1'), format='json')
+        url = response['Location'].split('?')[0]
+
+        self.assertEqual(self.api.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.api.get(url, {'store_id': str(uuid.uuid4())}).status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(self.api.get(url, {'store_id': self.store_id}).status_code, status.HTTP_200_OK)
+
+
+class IngestBatchCrashTests(BillPayloadMixin, TransactionTestCase):
+    """Autocommit, like a worker: the batch claim commits on its own"""
+
+    def test_batch_outcome_commits_with_its_rows(self):
+        cash_drop = {
+            'company_id': self.company_id, 'brand_id': self.brand_id, 'store_id': self.store_id,
+            'terminal_id': str(uuid.uuid4()), 'transaction_type': 'DROP', 'amount': '500000.00',
+            'created_at': '2026-01-27T10:00:00Z', 'created_by': self.cashier_id,
+        }
+        response = self.api.post(
+            ASYNC_PUSH_URL, {'store_id': self.store_id, 'cash_drops': [cash_drop]}, format='json'
+        )
+        batch_id = response.data['batch_id']
+
+        def connection_lost(execute, sql, params, many, context):
+            # The worker loses its connection when it records the outcome
+            if sql.startswith('UPDATE "ingest_batch"') and '"result"' in sql:
+                raise OperationalError('server closed the connection unexpectedly')
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(connection_lost), self.assertRaises(OperationalError):
+            process_batch(batch_id)
+        self.assertEqual(IngestBatch.objects.get(id=batch_id).status, 'PROCESSING')
+        self.assertFalse(CashDrop.objects.exists())
+
+        IngestBatch.objects.filter(id=batch_id).update(started_at=timezone.now() - timedelta(hours=1))
+        requeue_stale_batches()
+        self.assertEqual(process_batch(batch_id), 'DONE')
+        self.assertEqual(CashDrop.objects.count(), 1)
+
+
+class CopyLoaderTests(BillPayloadMixin, TestCase):
+
+    def test_copy_buffer_escapes_text_and_nulls(self):
+        item = BillItem(
+            bill_id=uuid.uuid4(), company_id=uuid.uuid4(), brand_id=uuid.uuid4(), store_id=uuid.uuid4(),
+            product_id=uuid.uuid4(), product_sku='SKU', product_name='Tab\tName', quantity='1.00',
+            unit_price='25000.00', total='25000.00', notes='line1\nline2\\', category_id=None,
+            modifiers_snapshot=[{'name': 'Extra'}], created_at='2026-01-27T10:00:00+07:00',
+            created_by=uuid.uuid4(),
+        )
+        fields = BillItem._meta.concrete_fields
+
+        line = _copy_buffer(fields, [item]).getvalue()
+
+        self.assertTrue(line.endswith('\n'))
+        values = dict(zip([f.name for f in fields], line[:-1].split('\t')))
+        self.assertEqual(len(values), len(fields))
+        self.assertEqual(values['product_name'], 'Tab\\tName')
+        self.assertEqual(values['notes'], 'line1\\nline2\\\\')
+        self.assertEqual(values['category_id'], '\\N')
+        self.assertEqual(values['is_void'], 'f')
+        self.assertEqual(values['modifiers_snapshot'], '[{"name": "Extra"}]')
+
+    def test_bulk_load_falls_back_to_orm(self):
+        movements = [InventoryMovement(**self._movement()) for _ in range(3)]
+
+        self.assertEqual(bulk_load(InventoryMovement, movements), 3)
+        self.assertEqual(InventoryMovement.objects.count(), 3)
+
+    def test_inventory_push_bulk_validates_rows(self):
+        response = self.api.post(
+            INVENTORY_PUSH_URL, {'movements': [self._movement(), self._movement()]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['created'], 2)
+
+        response = self.api.post(
+            INVENTORY_PUSH_URL, {'movements': [self._movement(movement_type='EATEN')]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(InventoryMovement.objects.count(), 2)
+
+
+class PartitionTests(TestCase):
+
+    def test_month_helpers(self):
+        self.assertEqual(add_months(date(2026, 11, 1), 3), date(2027, 2, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(partition_name('bill_item', date(2026, 2, 1)), 'bill_item_p202602')
+
+    def test_date_range_filter_uses_raw_bounds(self):
+        bounds = date_range_filter('created_at', '2026-01-01', '2026-01-31')
+
+        self.assertEqual(set(bounds), {'created_at__gte', 'created_at__lt'})
+        self.assertEqual(bounds['created_at__gte'].date(), date(2026, 1, 1))
+        self.assertEqual(bounds['created_at__lt'].date(), date(2026, 2, 1))
+        self.assertIsNotNone(bounds['created_at__gte'].tzinfo)
+
+    def test_date_range_filter_includes_whole_end_day(self):
+        item = BillItem.objects.create(
+            bill_id=uuid.uuid4(), company_id=uuid.uuid4(), brand_id=uuid.uuid4(), store_id=uuid.uuid4(),
+            product_id=uuid.uuid4(), product_sku='SKU', product_name='Product', quantity='1.00',
+            unit_price='1.00', total='1.00', created_by=uuid.uuid4(),
+            created_at=timezone.make_aware(datetime(2026, 1, 31, 23, 30)),
+        )
+
+        self.assertTrue(BillItem.objects.filter(
+            id=item.id, **date_range_filter('created_at', '2026-01-01', '2026-01-31')
+        ).exists())
+        self.assertFalse(BillItem.objects.filter(
+            id=item.id, **date_range_filter('created_at', '2026-02-01', '2026-02-28')
+        ).exists())
+
+    def test_commands_are_noops_without_postgresql(self):
+        out = StringIO()
+        call_command('create_partitions', stdout=out)
+        call_command('archive_partitions', older_than=12, stdout=out)
+
+        self.assertEqual(ensure_partitions(), [])
+        self.assertIn('requires PostgreSQL', out.getvalue())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partitioning requires PostgreSQL')
+    def test_ensure_partitions_moves_rows_out_of_the_default_partition(self):
+        migration = import_module('transactions.migrations.0004_partition_transaction_tables')
+        with connection.cursor() as cursor:
+            migration.convert_to_partitioned(cursor, 'bill_item', 'created_at')
+        month = add_months(month_start(timezone.now()), migration.MONTHS_AHEAD + 1)
+        item = BillItem.objects.create(
+            bill_id=uuid.uuid4(), company_id=uuid.uuid4(), brand_id=uuid.uuid4(), store_id=uuid.uuid4(),
+            product_id=uuid.uuid4(), product_sku='SKU', product_name='Product', quantity='1.00',
+            unit_price='1.00', total='1.00', created_by=uuid.uuid4(),
+            created_at=datetime(month.year, month.month, 15, tzinfo=dt_timezone.utc),
+        )
+
+        created = ensure_partitions(months_ahead=migration.MONTHS_AHEAD + 1)
+
+        self.assertIn(partition_name('bill_item', month), created)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM "{partition_name("bill_item", month)}"')
+            self.assertEqual([row[0] for row in cursor.fetchall()], [item.id])
+            cursor.execute('SELECT COUNT(*) FROM "bill_item_default"')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertTrue(BillItem.objects.filter(id=item.id).exists())
+
+
+class StreamingIngestTests(BillPayloadMixin, TestCase):
+
+    def _ndjson(self, records):
+        return ''.join(json.dumps(record) + '\n' for record in records)
+
+    def _post(self, url, records):
+        return self.api.post(url, self._ndjson(records), content_type='application/x-ndjson')
+
+    def test_record_stream_reads_lazily(self):
+        body = BytesIO(self._ndjson([self._bill(f'S-{i}') for i in range(20)]).encode())
+        records = iter(RecordStream(body))
+
+        self.assertEqual(next(records)['bill_number'], 'S-0')
+        # Only the first line has been consumed
+        self.assertLess(body.tell(), len(body.getvalue()) / 10)
+
+    @override_settings(TRANSACTION_STREAM_BATCH_SIZE=2)
+    def test_push_bulk_ndjson_writes_in_batches(self):
+        bills = [self._bill(f'S-{i}') for i in range(5)]
+        del bills[3]['terminal_id']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post(PUSH_BULK_URL, bills)
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS, response.data)
+        self.assertEqual(response.data['created'], 4)
+        self.assertEqual(len(response.data['bill_ids']), 4)
+        # Indexes are relative to the whole stream, not the batch
+        self.assertEqual([error['index'] for error in response.data['errors']], [3])
+        self.assertEqual(BillItem.objects.count(), 8)
+        # One bill INSERT per batch
+        self.assertEqual(sum('INSERT INTO "bill" ' in query['sql'] for query in ctx.captured_queries), 3)
+
+    @override_settings(TRANSACTION_STREAM_BATCH_SIZE=2)
+    def test_bulk_push_ndjson_mixed_records(self):
+        records = [{'bills': self._bill('S-1')}] + [{'inventory_movements': self._movement()} for _ in range(3)]
+        response = self._post(BULK_PUSH_URL, records)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['created']['bills'], 1)
+        self.assertEqual(response.data['created']['inventory_movements'], 3)
+        self.assertEqual(InventoryMovement.objects.count(), 3)
+        self.assertEqual(SyncHealth.objects.get(store_id=self.store_id).rows['inventory_movements'], 3)
+
+    @override_settings(TRANSACTION_STREAM_BATCH_SIZE=2)
+    def test_bulk_push_ndjson_invalid_record_rolls_back(self):
+        records = [{'bills': self._bill('S-1')}] + [{'inventory_movements': self._movement()} for _ in range(2)]
+        records.append({'inventory_movements': self._movement(movement_type='EATEN')})
+        response = self._post(BULK_PUSH_URL, records)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(2, response.data['inventory_movements'])
+        self.assertFalse(Bill.objects.exists())
+        self.assertFalse(InventoryMovement.objects.exists())
+
+    def test_stream_is_read_before_the_transaction_opens(self):
+        depth = len(connection.atomic_blocks)
+        depths = []
+
+        def records():
+            for number in ('S-1', 'S-2'):
+                depths.append(len(connection.atomic_blocks))
+                yield {'bills': self._bill(number)}
+
+        status_code, body = apply_bulk_push_stream(records())
+
+        self.assertEqual(status_code, status.HTTP_201_CREATED, body)
+        self.assertEqual(depths, [depth, depth])
+        self.assertEqual(Bill.objects.count(), 2)
+
+    def test_malformed_line_is_rejected(self):
+        body = self._ndjson([{'bills': self._bill('S-1')}]) + '{"bills": \n'
+        response = self.api.post(BULK_PUSH_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', str(response.data['detail']))
+        self.assertFalse(Bill.objects.exists())
+
+
+class IngestMetricsTests(BillPayloadMixin, TestCase):
+
+    def test_push_records_store_health(self):
+        payload = {'bills': [self._bill('M-1'), self._bill('M-2', items=3), self._bill('M-3')]}
+        del payload['bills'][2]['terminal_id']
+        self.api.post(PUSH_BULK_URL, payload, format='json')
+
+        health = SyncHealth.objects.get(store_id=self.store_id)
+        self.assertEqual(health.requests, 1)
+        self.assertEqual(health.failed_requests, 0)
+        self.assertEqual(health.validation_failures, 1)
+        self.assertEqual(health.rows['bills'], 2)
+        self.assertEqual(health.rows['bill_items'], 5)
+        self.assertGreater(health.payload_bytes, 0)
+        self.assertIsNotNone(health.last_push_at)
+
+    def test_push_that_raises_is_recorded_as_failed(self):
+        body = json.dumps(self._bill('M-1')) + '\n{"bills": \n'
+        response = self.api.post(PUSH_BULK_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        health = SyncHealth.objects.get(store_id=self.store_id)
+        self.assertEqual((health.requests, health.failed_requests, health.validation_failures), (1, 1, 1))
+
+    def test_async_batch_rows_counted_once(self):
+        response = self.api.post(ASYNC_PUSH_URL, {'bills': [self._bill('M-1')]}, format='json')
+        process_batch(response.data['batch_id'])
+
+        health = SyncHealth.objects.get(store_id=self.store_id)
+        self.assertEqual(health.requests, 1)
+        self.assertEqual(health.rows['bills'], 1)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        self.api.post(PUSH_BULK_URL, {'bills': [self._bill('M-1')]}, format='json')
+
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn(f'fnb_ingest_requests{{store_id="{self.store_id}",store_code=""}} 1', body)
+        self.assertIn(f'fnb_ingest_rows{{store_id="{self.store_id}",store_code="",table="bills"}} 1', body)
+        self.assertIn('fnb_ingest_queue_depth 0', body)